@@ -11,8 +11,12 @@ from typing import Any
 import psycopg2
 import psycopg2.extras
 
+from price_lookup import fetch_prices_at
+
 
 SCHEMA = "btc"
+# Janela do candle mais próximo de cada estado; sem candle nela vale o preço do estado
+PRICE_WINDOW_SEC = 60
 
 
 @dataclass
@@ -184,6 +188,21 @@ def fetch_states(cur: psycopg2.extensions.cursor, symbol: str, hours: int | None
     return [dict(zip(cols, row)) for row in cur.fetchall()]
 
 
+def attach_candle_prices(conn: Any, states: list[dict[str, Any]], symbol: str) -> list[dict[str, Any]]:
+    """Preço de cada estado pelo candle mais próximo, resolvido em lote.
+
+    Uma chamada a ``price_lookup.fetch_prices_at`` (consultas por faixa +
+    ``searchsorted``) para todos os timestamps, em vez de um lookup por linha.
+    Estados sem candle na janela mantêm o preço gravado no snapshot.
+    """
+    prices = fetch_prices_at(conn, [(symbol, state["timestamp"]) for state in states], PRICE_WINDOW_SEC)
+    priced: list[dict[str, Any]] = []
+    for state in states:
+        candle_price = prices.get((symbol, int(state["timestamp"])))
+        priced.append(state if candle_price is None else {**state, "price": candle_price})
+    return priced
+
+
 def backfill(dsn: str, symbol: str, hours: int | None, replace_learning_rewards: bool) -> dict[str, Any]:
     conn = psycopg2.connect(dsn)
     try:
@@ -193,13 +212,15 @@ def backfill(dsn: str, symbol: str, hours: int | None, replace_learning_rewards:
 
         with conn.cursor() as cur:
             states = fetch_states(cur, symbol, hours)
+        states = attach_candle_prices(conn, states, symbol)
 
         processed = 0
         action_counts = {0: 0, 1: 0, 2: 0}
         reward_sum = 0.0
         rows: list[tuple[Any, ...]] = []
 
-        for current, next_state in zip(states, states[1:]):
+        transitions = list(zip(states, states[1:]))
+        for current, next_state in transitions:
             scored = retro_score_sample(current, next_state)
             action_counts[scored.best_action] += 1
             reward_sum += scored.reward
@@ -268,7 +289,7 @@ def backfill(dsn: str, symbol: str, hours: int | None, replace_learning_rewards:
 
         return {
             "states": len(states),
-            "transitions": max(len(states) - 1, 0),
+            "transitions": len(transitions),
             "processed": processed,
             "reward_sum": round(reward_sum, 6),
             "action_counts": action_counts,
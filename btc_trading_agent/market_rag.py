@@ -29,8 +29,13 @@ from typing import Dict, List, Optional, Tuple
 from collections import deque
 from contextlib import contextmanager
 
+from price_lookup import nearest_values
+
 logger = logging.getLogger(__name__)
 
+# Tolerância (s) para casar o preço futuro de um snapshot com outro snapshot
+OUTCOME_PRICE_TOLERANCE_SEC = 60
+
 # ====================== CONSTANTES ======================
 RAG_DIR = Path(__file__).parent / "data" / "market_rag"
 RAG_DIR.mkdir(parents=True, exist_ok=True)
@@ -1701,38 +1706,37 @@ class MarketRAG:
 
         Para cada snapshot no buffer recente que ainda não tem outcome,
         verifica se já passou tempo suficiente para calcular price_change.
+        Os preços futuros (5/15/60 min) de todos os pendentes são resolvidos
+        de uma vez com price_lookup.nearest_values sobre o buffer ordenado.
         """
         now = time.time()
         updated = 0
 
-        for snap in self._recent_snapshots:
-            if snap.outcome is not None:
-                continue
+        pending = [
+            snap for snap in self._recent_snapshots
+            if snap.outcome is None and now - snap.timestamp >= 300
+        ]
+        if not pending:
+            return
+
+        horizons = (300, 900, 3600)
+        targets = [snap.timestamp + h for snap in pending for h in horizons]
+        future_prices = self._find_prices_at(targets).reshape(len(pending), len(horizons))
 
+        for snap, (price_5m, price_15m, price_60m) in zip(pending, future_prices):
             elapsed = now - snap.timestamp
 
-            # Precisa de pelo menos 5 min de dados futuros
-            if elapsed < 300:
-                continue
-
             # Buscar preço 5 min depois
-            target_time_5m = snap.timestamp + 300
-            price_5m = self._find_price_at(target_time_5m)
-
-            if price_5m is not None and snap.price > 0:
+            if not np.isnan(price_5m) and snap.price > 0:
                 snap.price_change_5m = (price_5m / snap.price) - 1
 
             # 15 min
-            if elapsed >= 900:
-                price_15m = self._find_price_at(snap.timestamp + 900)
-                if price_15m is not None and snap.price > 0:
-                    snap.price_change_15m = (price_15m / snap.price) - 1
+            if elapsed >= 900 and not np.isnan(price_15m) and snap.price > 0:
+                snap.price_change_15m = (price_15m / snap.price) - 1
 
             # 60 min
-            if elapsed >= 3600:
-                price_60m = self._find_price_at(snap.timestamp + 3600)
-                if price_60m is not None and snap.price > 0:
-                    snap.price_change_60m = (price_60m / snap.price) - 1
+            if elapsed >= 3600 and not np.isnan(price_60m) and snap.price > 0:
+                snap.price_change_60m = (price_60m / snap.price) - 1
 
             # Determinar outcome baseado em 5m
             if snap.price_change_5m is not None:
@@ -1751,6 +1755,17 @@ class MarketRAG:
             self._stats["outcomes_updated"] += updated
             logger.debug(f"📊 Outcomes atualizados: {updated} snapshots")
 
+    def _find_prices_at(self, target_times: List[float]) -> np.ndarray:
+        """Preços mais próximos de vários timestamps alvo (``nan`` se > 60s)."""
+        snaps = sorted(self._recent_snapshots, key=lambda snap: snap.timestamp)
+        return nearest_values(
+            [snap.timestamp for snap in snaps],
+            [snap.price for snap in snaps],
+            target_times,
+            OUTCOME_PRICE_TOLERANCE_SEC,
+            inclusive=False,
+        )
+
     def _find_price_at(self, target_time: float) -> Optional[float]:
         """Encontra o preço mais próximo de um timestamp alvo.
 
@@ -1760,16 +1775,8 @@ class MarketRAG:
         Returns:
             Preço mais próximo ou None se não encontrado.
         """
-        best_price = None
-        best_diff = float("inf")
-
-        for snap in self._recent_snapshots:
-            diff = abs(snap.timestamp - target_time)
-            if diff < best_diff and diff < 60:  # Tolerância de 60s
-                best_diff = diff
-                best_price = snap.price
-
-        return best_price
+        price = self._find_prices_at([target_time])[0]
+        return None if np.isnan(price) else float(price)
 
     def _update_store_metadata(self, snapshot: MarketSnapshot) -> None:
         """Atualiza metadata de um snapshot existente no VectorStore.
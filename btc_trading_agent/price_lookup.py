@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""Lookup vetorizado de "preço mais próximo de um timestamp".
+
+Compartilhado pela rotulagem de notícias do ``rss_llm_trainer`` (ground truth
+T / T+4h), pelos outcomes do ``MarketRAG`` e pelo ``backfill_retro_rewards``.
+Em vez de uma query (ou varredura linear) por alvo, a série de preços é
+carregada uma vez, ordenada, e todos os alvos são resolvidos com
+``np.searchsorted`` — O((n + m) log n) no lugar de O(n·m).
+
+No PostgreSQL a série vem de consultas por faixa ``symbol = %s AND timestamp
+BETWEEN %s AND %s``, que usam o índice (symbol, timestamp) de ``btc.candles``
+(o antigo ``ORDER BY ABS(timestamp - ts)`` forçava varrer o símbolo inteiro).
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Lacunas maiores que isso entre alvos consecutivos viram consultas separadas,
+# para não puxar meses de candles quando os timestamps pedidos são esparsos.
+MAX_RANGE_GAP_SEC = 12 * 3600
+
+PriceKey = Tuple[str, int]
+
+
+def nearest_indices(
+    timestamps: Sequence[float],
+    targets: Sequence[float],
+    tolerance: float,
+    inclusive: bool = True,
+) -> np.ndarray:
+    """Índice do timestamp mais próximo de cada alvo (``-1`` se fora da tolerância).
+
+    ``timestamps`` deve estar em ordem crescente. Em empate de distância vence o
+    ponto anterior ao alvo e, entre timestamps repetidos, a primeira ocorrência —
+    o mesmo resultado de uma varredura linear que só troca em diferença estrita.
+    """
+    ts = np.asarray(timestamps, dtype=np.float64)
+    tg = np.asarray(targets, dtype=np.float64)
+    result = np.full(tg.shape, -1, dtype=np.int64)
+    if ts.size == 0 or tg.size == 0:
+        return result
+
+    right = np.searchsorted(ts, tg, side="left")
+    left = right - 1
+    right_ok = right < ts.size
+    left_ok = left >= 0
+
+    right_c = np.clip(right, 0, ts.size - 1)
+    left_c = np.clip(left, 0, ts.size - 1)
+    # Primeira ocorrência do valor à esquerda (timestamps duplicados)
+    left_c = np.searchsorted(ts, ts[left_c], side="left")
+
+    d_right = np.where(right_ok, np.abs(ts[right_c] - tg), np.inf)
+    d_left = np.where(left_ok, np.abs(tg - ts[left_c]), np.inf)
+    use_left = d_left <= d_right
+    best = np.where(use_left, left_c, right_c)
+    best_d = np.where(use_left, d_left, d_right)
+
+    within = best_d <= tolerance if inclusive else best_d < tolerance
+    result[within] = best[within]
+    return result
+
+
+def nearest_values(
+    timestamps: Sequence[float],
+    values: Sequence[float],
+    targets: Sequence[float],
+    tolerance: float,
+    inclusive: bool = True,
+) -> np.ndarray:
+    """Valor no timestamp mais próximo de cada alvo (``nan`` se fora da tolerância)."""
+    vals = np.asarray(values, dtype=np.float64)
+    idx = nearest_indices(timestamps, targets, tolerance, inclusive)
+    out = np.full(idx.shape, np.nan, dtype=np.float64)
+    found = idx >= 0
+    out[found] = vals[idx[found]]
+    return out
+
+
+def _ranges(sorted_ts: List[int], window_sec: int, max_gap: int) -> List[Tuple[int, int]]:
+    """Agrupa alvos ordenados em faixas [lo - janela, hi + janela], quebrando nas lacunas."""
+    ranges: List[Tuple[int, int]] = []
+    start = prev = sorted_ts[0]
+    for ts in sorted_ts[1:]:
+        if ts - prev > max(max_gap, 2 * window_sec):
+            ranges.append((start - window_sec, prev + window_sec))
+            start = ts
+        prev = ts
+    ranges.append((start - window_sec, prev + window_sec))
+    return ranges
+
+
+def fetch_prices_at(
+    conn,
+    requests: Iterable[Tuple[str, float]],
+    window_sec: int,
+    table: str = "btc.candles",
+    max_gap_sec: int = MAX_RANGE_GAP_SEC,
+) -> Dict[PriceKey, Optional[float]]:
+    """Resolve em lote o ``close`` mais próximo de cada (symbol, ts) em segundos.
+
+    Faz uma consulta por faixa contígua de cada símbolo e resolve os alvos com
+    ``searchsorted``. Retorna ``{(symbol, int(ts)): preço ou None}``.
+    """
+    by_symbol: Dict[str, set] = {}
+    for symbol, ts in requests:
+        by_symbol.setdefault(symbol, set()).add(int(ts))
+
+    prices: Dict[PriceKey, Optional[float]] = {}
+    with conn.cursor() as cur:
+        for symbol, ts_set in by_symbol.items():
+            targets = sorted(ts_set)
+            candle_ts: List[float] = []
+            candle_close: List[float] = []
+            for lo, hi in _ranges(targets, window_sec, max_gap_sec):
+                cur.execute(
+                    f"""
+                    SELECT timestamp, close
+                    FROM {table}
+                    WHERE symbol = %s AND timestamp BETWEEN %s AND %s
+                    ORDER BY timestamp
+                    """,
+                    (symbol, lo, hi),
+                )
+                for ts, close in cur.fetchall():
+                    candle_ts.append(float(ts))
+                    candle_close.append(float(close))
+            resolved = nearest_values(candle_ts, candle_close, targets, window_sec)
+            for ts, price in zip(targets, resolved):
+                prices[(symbol, ts)] = None if np.isnan(price) else float(price)
+            logger.debug(
+                "price_lookup %s: %d alvos resolvidos sobre %d candles",
+                symbol, len(targets), len(candle_ts),
+            )
+    return prices
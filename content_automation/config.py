@@ -43,6 +43,15 @@ def _with_defaults(data: dict[str, Any]) -> dict[str, Any]:
     video.setdefault("height", 1920)
     video.setdefault("max_duration_seconds", 60)
     video.setdefault("tts_backend", "mock")
+    video.setdefault("template", "default")
+    video.setdefault("encoder_preset", "auto")
+
+    pipeline = data.setdefault("pipeline", {})
+    pipeline.setdefault("generate_workers", 2)
+    pipeline.setdefault("render_workers", 0)  # 0 = um por núcleo (nunca mais que os núcleos)
+    pipeline.setdefault("render_pool", "process")
+    pipeline.setdefault("publish_workers", 1)
+    pipeline.setdefault("claim_timeout_minutes", 60)
 
     publisher = data.setdefault("publisher", {})
     publisher.setdefault("mode", "mock")
@@ -68,7 +68,9 @@ def main(argv: list[str] | None = None) -> int:
             generated=stats.generated,
             published=stats.published,
             failed=stats.failed,
+            resumed=stats.resumed,
             duration_seconds=round(stats.duration_seconds, 2),
+            stage_seconds={k: round(v, 3) for k, v in stats.stage_seconds.items()},
             errors=stats.errors,
         )
         if args.once:
@@ -78,7 +80,9 @@ def main(argv: list[str] | None = None) -> int:
                         "generated": stats.generated,
                         "published": stats.published,
                         "failed": stats.failed,
+                        "resumed": stats.resumed,
                         "duration_seconds": stats.duration_seconds,
+                        "stage_seconds": stats.stage_seconds,
                         "errors": stats.errors,
                     },
                     indent=2,
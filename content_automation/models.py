@@ -11,6 +11,7 @@ from typing import Any
 class ContentStatus(str, Enum):
     PENDING = "pending"
     GENERATED = "generated"
+    RENDERED = "rendered"
     POSTED = "posted"
     FAILED = "failed"
 
@@ -69,6 +70,8 @@ class QueueItem:
     publish_url: str = ""
     retries: int = 0
     error: str = ""
+    payload: dict[str, Any] = field(default_factory=dict)
+    claimed_at: str = ""
     created_at: str = ""
     updated_at: str = ""
 
@@ -85,7 +88,14 @@ class PipelineRunStats:
     generated: int = 0
     published: int = 0
     failed: int = 0
+    resumed: int = 0
     errors: list[str] = field(default_factory=list)
+    stage_seconds: dict[str, float] = field(default_factory=dict)
+    stage_counts: dict[str, int] = field(default_factory=dict)
+
+    def record_stage(self, stage: str, seconds: float) -> None:
+        self.stage_seconds[stage] = self.stage_seconds.get(stage, 0.0) + seconds
+        self.stage_counts[stage] = self.stage_counts.get(stage, 0) + 1
 
     @property
     def duration_seconds(self) -> float:
@@ -3,13 +3,33 @@
 from __future__ import annotations
 
 import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from dataclasses import asdict
 from datetime import UTC, datetime, timedelta
 from pathlib import Path
+from typing import Any, Callable
 from zoneinfo import ZoneInfo
 
 from content_automation.config import load_settings
 from content_automation.generator import generate_content
-from content_automation.models import ContentStatus, PipelineRunStats, QueueItem
+from content_automation.models import (
+    ContentStatus,
+    GeneratedContent,
+    PipelineRunStats,
+    PublishResult,
+    QueueItem,
+    VideoArtifact,
+)
 from content_automation.publisher import build_publisher
 from content_automation.storage import ContentQueue
 from content_automation.trends import pick_best_trend
@@ -17,6 +37,37 @@ from content_automation.video_pipeline import render_video
 
 logger = logging.getLogger(__name__)
 
+# Itens que ainda têm estágio a executar; os do meio do pipeline já venceram
+ACTIVE_STATUSES = (ContentStatus.PENDING, ContentStatus.GENERATED, ContentStatus.RENDERED)
+RESUMABLE_STATUSES = (ContentStatus.GENERATED, ContentStatus.RENDERED)
+
+
+def _timed(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> tuple[Any, float]:
+    """Executa ``fn`` no worker e mede só o trabalho (sem a espera na fila)."""
+    t0 = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - t0
+
+
+def _content_from_item(item: QueueItem) -> GeneratedContent:
+    data = item.payload.get("content")
+    if data:
+        return GeneratedContent(**data)
+    return GeneratedContent(
+        topic=item.topic,
+        title=item.title,
+        script=item.script,
+        cta=item.cta,
+        trend_score=item.trend_score,
+    )
+
+
+def _video_from_item(item: QueueItem) -> VideoArtifact:
+    data = item.payload.get("video")
+    if not data:
+        raise RuntimeError(f"Item {item.id} sem artefato de vídeo salvo")
+    return VideoArtifact(**data)
+
 
 class ContentScheduler:
     def __init__(self, settings: dict | None = None) -> None:
@@ -82,75 +133,221 @@ class ContentScheduler:
         return created
 
     def due_items(self, *, grace_minutes: int = 0) -> list[QueueItem]:
+        """Pending vencidos + itens que pararam no meio do pipeline (retomada)."""
         now = datetime.now(self.tz)
-        pending = self.queue.list_by_status(ContentStatus.PENDING)
         due: list[QueueItem] = []
-        for item in pending:
+        for item in self.queue.list_by_statuses(list(ACTIVE_STATUSES)):
+            if item.status in RESUMABLE_STATUSES:
+                due.append(item)
+                continue
             slot_dt = datetime.fromisoformat(item.scheduled_for)
             if slot_dt <= now + timedelta(minutes=grace_minutes):
                 due.append(item)
         return due
 
-    def process_item(self, item: QueueItem) -> QueueItem:
+    # -- estágios ---------------------------------------------------------
+
+    def _generate(self, item: QueueItem) -> GeneratedContent:
         trend = pick_best_trend([item.topic])
         if trend is None:
             raise RuntimeError(f"Sem trend para tópico {item.topic}")
-
-        content = generate_content(
+        return generate_content(
             trend,
             prompts_dir=self.prompts_dir,
             max_script_seconds=int(self.settings["video"]["max_duration_seconds"]),
         )
-        video = render_video(
-            content,
-            output_dir=self.output_dir,
-            width=int(self.settings["video"]["width"]),
-            height=int(self.settings["video"]["height"]),
-            max_duration_seconds=int(self.settings["video"]["max_duration_seconds"]),
-            tts_backend=str(self.settings["video"]["tts_backend"]),
-        )
-        publish = self.publisher.publish(
+
+    def _render_kwargs(self) -> dict[str, Any]:
+        video = self.settings["video"]
+        return {
+            "output_dir": self.output_dir,
+            "width": int(video["width"]),
+            "height": int(video["height"]),
+            "max_duration_seconds": int(video["max_duration_seconds"]),
+            "tts_backend": str(video["tts_backend"]),
+            "template": str(video["template"]),
+            "encoder_preset": str(video["encoder_preset"]),
+        }
+
+    def _publish(self, content: GeneratedContent, video: VideoArtifact) -> PublishResult:
+        return self.publisher.publish(
             content,
             video,
             platform=str(self.settings["publisher"]["platform"]),
         )
 
+    def _mark_generated(self, item: QueueItem, content: GeneratedContent) -> QueueItem:
         return self.queue.update_item(
             item.id,
-            status=ContentStatus.POSTED,
+            status=ContentStatus.GENERATED,
             title=content.title,
             script=content.script,
             cta=content.cta,
             trend_score=content.trend_score,
+            payload={"content": content.to_dict()},
+        )
+
+    def _mark_rendered(self, item: QueueItem, video: VideoArtifact) -> QueueItem:
+        return self.queue.update_item(
+            item.id,
+            status=ContentStatus.RENDERED,
             video_path=video.mp4_path,
+            payload={**item.payload, "video": asdict(video)},
+        )
+
+    def _mark_posted(self, item: QueueItem, publish: PublishResult) -> QueueItem:
+        return self.queue.update_item(
+            item.id,
+            status=ContentStatus.POSTED,
             publish_url=publish.url,
             error="",
+            claimed_at="",
         )
 
-    def process_due(self, *, force: bool = False) -> PipelineRunStats:
-        stats = PipelineRunStats(started_at=datetime.now(UTC))
+    def _mark_failed(self, item: QueueItem, exc: BaseException, stats: PipelineRunStats) -> None:
+        """Conta a tentativa; abaixo do limite o item fica no estágio em que parou."""
         max_retries = int(self.settings["scheduler"]["max_retries"])
-        items = self.queue.list_by_status(ContentStatus.PENDING) if force else self.due_items()
+        retries = item.retries + 1
+        status = ContentStatus.FAILED if retries >= max_retries else item.status
+        self.queue.update_item(item.id, status=status, retries=retries, error=str(exc), claimed_at="")
+        stats.failed += 1
+        stats.errors.append(f"item={item.id}: {exc}")
+        logger.error(
+            "pipeline_item_failed",
+            exc_info=(type(exc), exc, exc.__traceback__),
+            extra={"extra_fields": {"queue_id": item.id, "stage": item.status.value}},
+        )
+
+    def process_item(self, item: QueueItem) -> QueueItem:
+        """Leva um item até ``posted`` em sequência, a partir do estágio salvo."""
+        if item.status == ContentStatus.PENDING:
+            item = self._mark_generated(item, self._generate(item))
+        if item.status == ContentStatus.GENERATED:
+            video = render_video(_content_from_item(item), **self._render_kwargs())
+            item = self._mark_rendered(item, video)
+        return self._mark_posted(
+            item,
+            self._publish(_content_from_item(item), _video_from_item(item)),
+        )
+
+    def _pool_sizes(self) -> tuple[int, int, int]:
+        pipeline = self.settings.get("pipeline", {})
+        cpus = os.cpu_count() or 1
+        # Cada render já dispara um ffmpeg multi-thread: mais workers que núcleos só disputa CPU
+        render = min(int(pipeline.get("render_workers") or 0) or cpus, cpus)
+        return (
+            max(1, int(pipeline.get("generate_workers", 2))),
+            max(1, render),
+            max(1, int(pipeline.get("publish_workers", 1))),
+        )
 
+    def _claim(self, items: list[QueueItem]) -> list[QueueItem]:
+        """Reserva os itens do ciclo; os que outro ciclo já pegou ficam de fora."""
+        minutes = int(self.settings.get("pipeline", {}).get("claim_timeout_minutes", 60))
+        claimed: list[QueueItem] = []
         for item in items:
-            try:
-                self.process_item(item)
-                stats.published += 1
-                stats.generated += 1
-            except Exception as exc:
-                retries = item.retries + 1
-                status = ContentStatus.FAILED if retries >= max_retries else ContentStatus.PENDING
-                self.queue.update_item(
-                    item.id,
-                    status=status,
-                    retries=retries,
-                    error=str(exc),
+            if self.queue.claim(item.id, stale_after=timedelta(minutes=minutes)):
+                claimed.append(item)
+            else:
+                logger.info("pipeline_item_busy", extra={"extra_fields": {"queue_id": item.id}})
+        return claimed
+
+    def _render_executor(self, workers: int) -> Executor:
+        kind = str(self.settings.get("pipeline", {}).get("render_pool", "process"))
+        if kind == "thread":
+            return ThreadPoolExecutor(max_workers=workers, thread_name_prefix="content-render")
+        # spawn: o processo pai tem threads (pools, logging) e fork herdaria locks
+        return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def process_due(self, *, force: bool = False) -> PipelineRunStats:
+        """Pipeline em estágios: geração, render e publicação em pools próprios.
+
+        Cada item avança assim que o estágio anterior termina, então o LLM do
+        próximo item não espera o ffmpeg do anterior. O estado é gravado na
+        fila a cada transição (``generated`` → ``rendered`` → ``posted``); um
+        ciclo interrompido é retomado do último estágio concluído. Cada item é
+        reservado (``claimed_at``) antes de entrar no pipeline, então dois
+        ciclos simultâneos não geram nem publicam o mesmo item.
+        """
+        stats = PipelineRunStats(started_at=datetime.now(UTC))
+        if force:
+            items = self.queue.list_by_statuses(list(ACTIVE_STATUSES))
+        else:
+            items = self.due_items()
+        items = self._claim(items)
+        if not items:
+            stats.finished_at = datetime.now(UTC)
+            return stats
+
+        generate_workers, render_workers, publish_workers = self._pool_sizes()
+        needs_render = sum(item.status != ContentStatus.RENDERED for item in items)
+        render_workers = min(render_workers, max(1, needs_render))
+        # Como em render_videos: cada ffmpeg fica com sua fatia dos núcleos
+        cpus = os.cpu_count() or 1
+        render_kwargs = {
+            **self._render_kwargs(),
+            "threads": max(1, cpus // render_workers) if render_workers > 1 else 0,
+        }
+        generate_pool = ThreadPoolExecutor(max_workers=generate_workers, thread_name_prefix="content-generate")
+        render_pool = self._render_executor(render_workers) if needs_render else None
+        publish_pool = ThreadPoolExecutor(max_workers=publish_workers, thread_name_prefix="content-publish")
+        in_flight: dict[Future, tuple[str, QueueItem]] = {}
+
+        def submit(item: QueueItem) -> None:
+            if item.status == ContentStatus.PENDING:
+                future = generate_pool.submit(_timed, self._generate, item)
+                in_flight[future] = ("generate", item)
+            elif item.status == ContentStatus.GENERATED:
+                future = render_pool.submit(_timed, render_video, _content_from_item(item), **render_kwargs)
+                in_flight[future] = ("render", item)
+            else:
+                future = publish_pool.submit(
+                    _timed, self._publish, _content_from_item(item), _video_from_item(item)
                 )
-                stats.failed += 1
-                stats.errors.append(f"item={item.id}: {exc}")
-                logger.exception("pipeline_item_failed", extra={"extra_fields": {"queue_id": item.id}})
+                in_flight[future] = ("publish", item)
+
+        try:
+            for item in items:
+                if item.status != ContentStatus.PENDING:
+                    stats.resumed += 1
+                submit(item)
+
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, item = in_flight.pop(future)
+                    try:
+                        result, seconds = future.result()
+                    except Exception as exc:
+                        self._mark_failed(item, exc, stats)
+                        continue
+                    stats.record_stage(stage, seconds)
+                    if stage == "generate":
+                        stats.generated += 1
+                        submit(self._mark_generated(item, result))
+                    elif stage == "render":
+                        submit(self._mark_rendered(item, result))
+                    else:
+                        self._mark_posted(item, result)
+                        stats.published += 1
+        finally:
+            generate_pool.shutdown(wait=True)
+            if render_pool is not None:
+                render_pool.shutdown(wait=True)
+            publish_pool.shutdown(wait=True)
 
         stats.finished_at = datetime.now(UTC)
+        logger.info(
+            "pipeline_run_complete",
+            extra={
+                "extra_fields": {
+                    "items": len(items),
+                    "resumed": stats.resumed,
+                    "stage_seconds": {k: round(v, 3) for k, v in stats.stage_seconds.items()},
+                    "duration_seconds": round(stats.duration_seconds, 3),
+                }
+            },
+        )
         return stats
 
     def run_cycle(self, *, force: bool = False) -> PipelineRunStats:
@@ -2,8 +2,9 @@
 
 from __future__ import annotations
 
+import json
 import sqlite3
-from datetime import UTC, datetime
+from datetime import UTC, datetime, timedelta
 from pathlib import Path
 
 from content_automation.models import ContentStatus, QueueItem
@@ -37,11 +38,19 @@ class ContentQueue:
                     publish_url TEXT DEFAULT '',
                     retries INTEGER DEFAULT 0,
                     error TEXT DEFAULT '',
+                    payload TEXT DEFAULT '{}',
+                    claimed_at TEXT DEFAULT '',
                     created_at TEXT NOT NULL,
                     updated_at TEXT NOT NULL
                 )
                 """
             )
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(content_queue)")}
+            if "payload" not in columns:
+                # Filas criadas antes do pipeline em estágios
+                conn.execute("ALTER TABLE content_queue ADD COLUMN payload TEXT DEFAULT '{}'")
+            if "claimed_at" not in columns:
+                conn.execute("ALTER TABLE content_queue ADD COLUMN claimed_at TEXT DEFAULT ''")
             conn.execute(
                 "CREATE INDEX IF NOT EXISTS idx_queue_status ON content_queue(status)"
             )
@@ -67,6 +76,8 @@ class ContentQueue:
             publish_url=row["publish_url"] or "",
             retries=int(row["retries"] or 0),
             error=row["error"] or "",
+            payload=json.loads(row["payload"] or "{}"),
+            claimed_at=row["claimed_at"] or "",
             created_at=row["created_at"] or "",
             updated_at=row["updated_at"] or "",
         )
@@ -95,15 +106,19 @@ class ContentQueue:
         return row is not None
 
     def list_by_status(self, status: ContentStatus, *, limit: int = 50) -> list[QueueItem]:
+        return self.list_by_statuses([status], limit=limit)
+
+    def list_by_statuses(self, statuses: list[ContentStatus], *, limit: int = 50) -> list[QueueItem]:
+        placeholders = ", ".join("?" for _ in statuses)
         with self._connect() as conn:
             rows = conn.execute(
-                """
+                f"""
                 SELECT * FROM content_queue
-                WHERE status = ?
+                WHERE status IN ({placeholders})
                 ORDER BY scheduled_for ASC, id ASC
                 LIMIT ?
                 """,
-                (status.value, limit),
+                (*(status.value for status in statuses), limit),
             ).fetchall()
         return [self._row_to_item(row) for row in rows]
 
@@ -112,6 +127,24 @@ class ContentQueue:
             row = conn.execute("SELECT * FROM content_queue WHERE id = ?", (item_id,)).fetchone()
         return self._row_to_item(row) if row else None
 
+    def claim(self, item_id: int, *, stale_after: timedelta) -> bool:
+        """Marca o item como em andamento; False se outro ciclo já o pegou.
+
+        O UPDATE condicional é atômico no SQLite, então dois ciclos
+        concorrentes não processam o mesmo item. Uma reserva mais velha que
+        ``stale_after`` (processo morto no meio do pipeline) pode ser retomada.
+        """
+        now = datetime.now(UTC)
+        with self._connect() as conn:
+            cursor = conn.execute(
+                """
+                UPDATE content_queue SET claimed_at = ?, updated_at = ?
+                WHERE id = ? AND (claimed_at IS NULL OR claimed_at = '' OR claimed_at < ?)
+                """,
+                (now.isoformat(), now.isoformat(), item_id, (now - stale_after).isoformat()),
+            )
+        return cursor.rowcount == 1
+
     def update_item(self, item_id: int, **fields: object) -> QueueItem:
         allowed = {
             "status",
@@ -123,10 +156,14 @@ class ContentQueue:
             "publish_url",
             "retries",
             "error",
+            "payload",
+            "claimed_at",
         }
         updates = {key: value for key, value in fields.items() if key in allowed}
         if "status" in updates and isinstance(updates["status"], ContentStatus):
             updates["status"] = updates["status"].value
+        if "payload" in updates:
+            updates["payload"] = json.dumps(updates["payload"], ensure_ascii=False)
         updates["updated_at"] = self._now()
 
         assignments = ", ".join(f"{key} = ?" for key in updates)
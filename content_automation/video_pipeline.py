@@ -2,14 +2,23 @@
 
 from __future__ import annotations
 
+import hashlib
+import json
 import logging
 import math
+import os
 import re
 import shutil
 import subprocess
 import textwrap
+import threading
+import uuid
 import wave
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from functools import lru_cache
 from pathlib import Path
+from typing import Any
 
 from content_automation.models import GeneratedContent, VideoArtifact
 
@@ -86,39 +95,263 @@ def synthesize_speech(
     return "mock"
 
 
-def _write_cover(path: Path, title: str, *, width: int, height: int) -> None:
+@dataclass(frozen=True)
+class RenderTemplate:
+    """Identidade visual fixa dos vídeos (fundo, moldura e tipografia do título).
+
+    O fundo com a moldura é renderizado uma única vez por template e tamanho e
+    fica em ``output_dir/templates``; por item só o título é desenhado.
+    """
+
+    name: str = "default"
+    background: tuple[int, int, int] = (12, 18, 32)
+    accent: tuple[int, int, int] = (56, 189, 248)
+    margin: int = 40
+    border: int = 4
+    title_font: str = "DejaVuSans-Bold.ttf"
+    title_font_size: int = 42
+    title_wrap: int = 22
+
+    def cache_key(self, width: int, height: int) -> str:
+        raw = json.dumps({**asdict(self), "size": [width, height]}, sort_keys=True)
+        return f"{self.name}_{width}x{height}_{hashlib.sha1(raw.encode()).hexdigest()[:10]}"
+
+
+TEMPLATES: dict[str, RenderTemplate] = {"default": RenderTemplate()}
+
+
+@dataclass(frozen=True)
+class EncoderPreset:
+    """Argumentos de vídeo do ffmpeg para uma meta de throughput.
+
+    Com ``loop_clip`` só 1 s de vídeo é codificado; o MP4 final repete esse
+    trecho com ``-c:v copy``, então o custo não cresce com a duração.
+    """
+
+    name: str
+    video_args: tuple[str, ...]
+    encoder: str = "libx264"
+    fps: int = 25
+    loop_clip: bool = False
+
+
+_X264_FAST = ("-c:v", "libx264", "-preset", "veryfast", "-tune", "stillimage", "-crf", "23")
+
+ENCODER_PRESETS: dict[str, EncoderPreset] = {
+    "quality": EncoderPreset(
+        "quality", ("-c:v", "libx264", "-preset", "medium", "-tune", "stillimage", "-crf", "20")
+    ),
+    "fast": EncoderPreset("fast", _X264_FAST),
+    "copy_loop": EncoderPreset("copy_loop", _X264_FAST, loop_clip=True),
+    "nvenc": EncoderPreset(
+        "nvenc", ("-c:v", "h264_nvenc", "-preset", "p1", "-cq", "23"), encoder="h264_nvenc", loop_clip=True
+    ),
+}
+
+
+@lru_cache(maxsize=1)
+def available_encoders() -> frozenset[str]:
+    """Encoders de vídeo do ffmpeg instalado (consultado uma vez por processo)."""
+    proc = subprocess.run(["ffmpeg", "-hide_banner", "-encoders"], capture_output=True, text=True)
+    names = set()
+    for line in (getattr(proc, "stdout", "") or "").splitlines():
+        parts = line.split()
+        if len(parts) >= 2 and parts[0].startswith("V"):
+            names.add(parts[1])
+    return frozenset(names)
+
+
+@lru_cache(maxsize=1)
+def nvenc_usable() -> bool:
+    """Codifica 1 frame com h264_nvenc: o ffmpeg lista o encoder mesmo sem GPU/driver."""
+    if "h264_nvenc" not in available_encoders():
+        return False
+    proc = subprocess.run(
+        [
+            "ffmpeg", "-hide_banner", "-f", "lavfi", "-i", "color=c=black:s=256x256",
+            "-frames:v", "1", "-c:v", "h264_nvenc", "-f", "null", "-",
+        ],
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        logger.warning("h264_nvenc listado mas inutilizável — usando x264: %s", (proc.stderr or "")[-300:])
+        return False
+    return True
+
+
+def select_encoder_preset(name: str = "auto") -> EncoderPreset:
+    """``auto``: NVENC se funcionar de fato, senão x264 rápido em loop de 1 s."""
+    if name == "auto":
+        return ENCODER_PRESETS["nvenc" if nvenc_usable() else "copy_loop"]
+    try:
+        return ENCODER_PRESETS[name]
+    except KeyError:
+        raise ValueError(f"Preset de encoder desconhecido: {name}") from None
+
+
+def _rgb_hex(color: tuple[int, int, int]) -> str:
+    return "0x{:02x}{:02x}{:02x}".format(*color)
+
+
+def _drawtext_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("'", "\\'").replace(":", "\\:").replace("%", "\\%")
+
+
+def _run_ffmpeg(cmd: list[str]) -> None:
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffmpeg falhou: {proc.stderr[-1500:]}")
+
+
+_template_locks: dict[str, threading.Lock] = {}
+_template_locks_guard = threading.Lock()
+
+
+def template_background(template: RenderTemplate, *, width: int, height: int, cache_dir: Path) -> Path:
+    """PNG do fundo + moldura do template, renderizado só na primeira chamada."""
+    key = template.cache_key(width, height)
+    path = cache_dir / f"{key}.png"
+    if path.is_file():
+        return path
+    with _template_locks_guard:
+        lock = _template_locks.setdefault(key, threading.Lock())
+    with lock:
+        if path.is_file():
+            return path
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        # O lock só vale no processo; workers do pool de render em processos
+        # podem gerar o mesmo template juntos, então cada um usa seu tmp
+        tmp = path.with_name(f".{path.stem}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp.png")
+        m, b = template.margin, template.border
+        try:
+            try:
+                from PIL import Image, ImageDraw
+
+                img = Image.new("RGB", (width, height), color=template.background)
+                ImageDraw.Draw(img).rectangle((m, m, width - m, height - m), outline=template.accent, width=b)
+                img.save(tmp, format="PNG")
+            except ImportError:
+                if shutil.which("ffmpeg") is None:
+                    raise RuntimeError("Pillow ou ffmpeg necessário para gerar capa.") from None
+                _run_ffmpeg(
+                    [
+                        "ffmpeg",
+                        "-y",
+                        "-f",
+                        "lavfi",
+                        "-i",
+                        f"color=c={_rgb_hex(template.background)}:s={width}x{height}",
+                        "-vf",
+                        f"drawbox=x={m}:y={m}:w={width - 2 * m}:h={height - 2 * m}:"
+                        f"color={_rgb_hex(template.accent)}:t={b}",
+                        "-frames:v",
+                        "1",
+                        str(tmp),
+                    ]
+                )
+            os.replace(tmp, path)
+        finally:
+            tmp.unlink(missing_ok=True)
+        logger.info("render_template_built", extra={"extra_fields": {"template": key}})
+    return path
+
+
+@lru_cache(maxsize=8)
+def _title_font(name: str, size: int) -> Any:
+    """Fonte TrueType do título no tamanho do template (carregada uma vez por processo)."""
+    from PIL import ImageFont
+
+    try:
+        return ImageFont.truetype(name, size)
+    except OSError:
+        logger.warning("Fonte %s não encontrada — usando a padrão do Pillow", name)
+        try:
+            return ImageFont.load_default(size=size)
+        except TypeError:  # Pillow < 10.1 não escala a fonte padrão
+            return ImageFont.load_default()
+
+
+def _write_cover(
+    path: Path,
+    title: str,
+    *,
+    background: Path,
+    template: RenderTemplate,
+    width: int,
+    height: int,
+) -> None:
+    """Capa final do item: fundo do template + título (faixa no topo e corpo)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    wrapped = textwrap.wrap(title, width=template.title_wrap) or [title]
+    headline = title[:80]
     try:
-        from PIL import Image, ImageDraw, ImageFont
+        from PIL import Image, ImageDraw
 
-        img = Image.new("RGB", (width, height), color=(12, 18, 32))
+        font = _title_font(template.title_font, template.title_font_size)
+        img = Image.open(background).convert("RGB")
         draw = ImageDraw.Draw(img)
-        draw.rectangle((40, 40, width - 40, height - 40), outline=(56, 189, 248), width=4)
-        wrapped = "\n".join(textwrap.wrap(title, width=22))
-        draw.multiline_text((80, height // 3), wrapped, fill=(248, 250, 252), spacing=8)
-        path.parent.mkdir(parents=True, exist_ok=True)
+        draw.multiline_text((80, height // 3), "\n".join(wrapped), fill=(248, 250, 252), font=font, spacing=8)
+        box = draw.textbbox((0, 0), headline, font=font)
+        x = (width - (box[2] - box[0])) // 2
+        y = int(height * 0.08)
+        draw.rectangle((x - 8, y - 8, x + box[2] - box[0] + 8, y + box[3] - box[1] + 8), fill=(0, 0, 0))
+        draw.text((x, y), headline, fill=(255, 255, 255), font=font)
         img.save(path, format="JPEG", quality=90)
         return
     except ImportError:
         pass
 
-    if shutil.which("ffmpeg") is None:
-        raise RuntimeError("Pillow ou ffmpeg necessário para gerar capa.")
-    subprocess.run(
+    body = _drawtext_escape("\n".join(wrapped))
+    vf = (
+        f"drawtext=text='{_drawtext_escape(headline)}':x=(w-text_w)/2:y=h*0.08:"
+        f"fontsize={template.title_font_size}:fontcolor=white:box=1:boxcolor=black@0.45,"
+        f"drawtext=text='{body}':x=80:y=h/3:fontsize={template.title_font_size}:"
+        f"fontcolor=white:line_spacing=8"
+    )
+    _run_ffmpeg(["ffmpeg", "-y", "-i", str(background), "-vf", vf, "-frames:v", "1", str(path)])
+
+
+def encode_still_video(
+    cover_path: Path,
+    wav_path: Path,
+    mp4_path: Path,
+    *,
+    duration: float,
+    preset: EncoderPreset,
+    threads: int = 0,
+) -> None:
+    """Capa já no tamanho final + narração → MP4, sem filtros de escala/texto."""
+    seconds = str(math.ceil(duration))
+    thread_args = ["-threads", str(threads)] if threads > 0 else []
+    audio_args = ["-c:a", "aac", "-b:a", "192k", "-shortest", "-t", seconds]
+    if not preset.loop_clip:
+        _run_ffmpeg(
+            [
+                "ffmpeg", "-y", "-loop", "1", "-framerate", str(preset.fps), "-i", str(cover_path),
+                "-i", str(wav_path), *preset.video_args, *thread_args, "-pix_fmt", "yuv420p",
+                *audio_args, str(mp4_path),
+            ]
+        )
+        return
+    # 1 s com um único GOP e depois cópia do stream em loop até a duração do áudio
+    clip_path = mp4_path.with_name(f"{mp4_path.stem}.loop.mkv")
+    _run_ffmpeg(
         [
-            "ffmpeg",
-            "-y",
-            "-f",
-            "lavfi",
-            "-i",
-            f"color=c=#0c1220:s={width}x{height}",
-            "-frames:v",
-            "1",
-            str(path),
-        ],
-        check=True,
-        capture_output=True,
-        text=True,
+            "ffmpeg", "-y", "-loop", "1", "-framerate", str(preset.fps), "-i", str(cover_path),
+            *preset.video_args, *thread_args, "-g", str(preset.fps), "-pix_fmt", "yuv420p",
+            "-t", "1", str(clip_path),
+        ]
     )
+    try:
+        _run_ffmpeg(
+            [
+                "ffmpeg", "-y", "-stream_loop", "-1", "-i", str(clip_path), "-i", str(wav_path),
+                "-map", "0:v", "-map", "1:a", "-c:v", "copy", *audio_args, str(mp4_path),
+            ]
+        )
+    finally:
+        clip_path.unlink(missing_ok=True)
 
 
 def _render_video_mock_stub(
@@ -156,12 +389,17 @@ def render_video(
     height: int = 1920,
     max_duration_seconds: int = 60,
     tts_backend: str = "mock",
+    template: str | RenderTemplate = "default",
+    encoder_preset: str = "auto",
+    threads: int = 0,
 ) -> VideoArtifact:
     duration = _estimate_duration(content.script, max_seconds=max_duration_seconds)
     if shutil.which("ffmpeg") is None:
         logger.warning("ffmpeg ausente — usando renderização mock stub")
         return _render_video_mock_stub(content, output_dir=output_dir, duration=duration)
 
+    tpl = TEMPLATES[template] if isinstance(template, str) else template
+    preset = select_encoder_preset(encoder_preset)
     slug = re.sub(r"[^a-zA-Z0-9_-]+", "_", content.title.lower())[:48].strip("_")
     work_dir = output_dir / "videos" / slug
     work_dir.mkdir(parents=True, exist_ok=True)
@@ -178,46 +416,9 @@ def render_video(
         duration_hint=duration,
     )
     _write_srt(srt_path, content.script, duration)
-    _write_cover(cover_path, content.title, width=width, height=height)
-
-    # Vídeo vertical estático + áudio + legendas queimadas (simplificado)
-    safe_title = content.title.replace("'", "\\'")[:80]
-    vf = (
-        f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
-        f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2:black,"
-        f"drawtext=text='{safe_title}':x=(w-text_w)/2:y=h*0.08:"
-        f"fontsize=42:fontcolor=white:box=1:boxcolor=black@0.45"
-    )
-
-    cmd = [
-        "ffmpeg",
-        "-y",
-        "-loop",
-        "1",
-        "-i",
-        str(cover_path),
-        "-i",
-        str(wav_path),
-        "-vf",
-        vf,
-        "-c:v",
-        "libx264",
-        "-tune",
-        "stillimage",
-        "-c:a",
-        "aac",
-        "-b:a",
-        "192k",
-        "-pix_fmt",
-        "yuv420p",
-        "-shortest",
-        "-t",
-        str(math.ceil(duration)),
-        str(mp4_path),
-    ]
-    proc = subprocess.run(cmd, capture_output=True, text=True)
-    if proc.returncode != 0:
-        raise RuntimeError(f"ffmpeg falhou: {proc.stderr[-1500:]}")
+    background = template_background(tpl, width=width, height=height, cache_dir=output_dir / "templates")
+    _write_cover(cover_path, content.title, background=background, template=tpl, width=width, height=height)
+    encode_still_video(cover_path, wav_path, mp4_path, duration=duration, preset=preset, threads=threads)
 
     artifact = VideoArtifact(
         mp4_path=str(mp4_path),
@@ -233,7 +434,26 @@ def render_video(
                 "mp4": artifact.mp4_path,
                 "duration": artifact.duration_seconds,
                 "tts": used_tts,
+                "template": tpl.name,
+                "encoder_preset": preset.name,
             }
         },
     )
-    return artifact
\ No newline at end of file
+    return artifact
+
+
+def render_videos(
+    contents: list[GeneratedContent],
+    *,
+    workers: int = 0,
+    **kwargs: Any,
+) -> list[VideoArtifact]:
+    """Renderiza vários vídeos em paralelo (cada ffmpeg com sua fatia de threads)."""
+    if not contents:
+        return []
+    cpus = os.cpu_count() or 1
+    workers = max(1, min(workers or cpus, len(contents)))
+    kwargs.setdefault("threads", max(1, cpus // workers) if workers > 1 else 0)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="render-video") as pool:
+        futures = [pool.submit(render_video, content, **kwargs) for content in contents]
+        return [future.result() for future in futures]
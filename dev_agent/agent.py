@@ -6,10 +6,16 @@ from __future__ import annotations
 import asyncio
 import json
 import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures import wait
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from dev_agent.task_cache import TaskResultCache, task_key
 
 
 class TaskStatus(str, Enum):
@@ -43,16 +49,64 @@ class ProjectSpec:
     requirements: List[str] = field(default_factory=list)
 
 
+class SquadLimiter:
+    """Semaforo com capacidade ajustavel em tempo de execucao.
+
+    Diferente de trocar o ``threading.Semaphore``, reduzir a capacidade nao
+    perde a contagem dos slots ja ocupados: novas tarefas so esperam ate o
+    numero de ativos cair abaixo do novo limite.
+    """
+
+    def __init__(self, capacity: int):
+        self._cond = threading.Condition()
+        self._capacity = max(1, capacity)
+        self._active = 0
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    def set_capacity(self, n: int) -> None:
+        with self._cond:
+            self._capacity = max(1, n)
+            self._cond.notify_all()
+
+    def acquire(self) -> None:
+        with self._cond:
+            while self._active >= self._capacity:
+                self._cond.wait()
+            self._active += 1
+
+    def release(self) -> None:
+        with self._cond:
+            self._active = max(0, self._active - 1)
+            self._cond.notify()
+
+
 class DevAgent:
-    def __init__(self, llm_url: str, model: str):
+    def __init__(self, llm_url: str, model: str, cache_dir: Optional[str] = None):
         self.llm_url = llm_url
         self.model = model
         self._tasks: Dict[str, Task] = {}
         self._counter = 0
-        SQUAD_MIN = int(os.getenv("SQUAD_MIN", "1"))
-        SQUAD_MAX = int(os.getenv("SQUAD_MAX", "10"))
-        import threading
-        self._squad_semaphore = threading.Semaphore(SQUAD_MAX)
+        self._counter_lock = threading.Lock()
+        self.squad_min = max(1, int(os.getenv("SQUAD_MIN", "1")))
+        self.squad_max = max(self.squad_min, int(os.getenv("SQUAD_MAX", "10")))
+        self.squad_autoscale = True
+        # O pool tem o teto SQUAD_MAX; quem limita a concorrencia efetiva e o squad
+        self._squad_semaphore = SquadLimiter(self.squad_max)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+        from dev_agent import config
+        self.cache = TaskResultCache(
+            cache_dir if cache_dir is not None else config.TASK_CACHE_DIR,
+            ttl_seconds=config.TASK_CACHE_TTL_SECONDS,
+        )
 
         try:
             from dev_agent.llm_client import LLMClient, CodeGenerator
@@ -82,34 +136,92 @@ class DevAgent:
         return "degraded"
 
     def create_task(self, description: str, language: str = "python") -> str:
-        self._counter += 1
-        task_id = f"task_{self._counter}"
+        with self._counter_lock:
+            self._counter += 1
+            task_id = f"task_{self._counter}"
         self._tasks[task_id] = Task(description=description, language=language)
         return task_id
 
-    def execute_task(self, task_id: str) -> Dict[str, Any]:
+    def _generate(self, task: Task) -> Dict[str, Any]:
+        if not self.codegen:
+            return {"success": False, "error": "LLM unavailable"}
+        result = self.codegen.generate_code(task.description, task.language)
+        if not result.get("success"):
+            return {"success": False, "code": result.get("code", ""), "error": result.get("error") or "LLM failure"}
+        return {
+            "success": True,
+            "code": result.get("code", ""),
+            "tests": task.tests,
+            "test_results": result.get("test_results"),
+        }
+
+    def execute_task(self, task_id: str, refresh: bool = False) -> Dict[str, Any]:
+        """Gera o codigo da tarefa; ``refresh=True`` ignora o cache (retry explicito)."""
         task = self._tasks.get(task_id)
         if not task:
             return {"success": False, "error": f"Task {task_id} nao encontrada"}
         task.status = TaskStatus.in_progress
         try:
-            if self.codegen:
-                result = self.codegen.generate_code(task.description, task.language)
-                task.code = result.get("code", "")
-                if result.get("success"):
-                    task.status = TaskStatus.completed
-                    task.completed_at = datetime.now()
-                    return {"success": True, "task_id": task_id, "code": task.code}
+            key = task_key(task.description, task.language, self.model)
+            result, cached = self.cache.get_or_compute(key, lambda: self._generate(task), refresh=refresh)
+            task.code = result.get("code", "")
+            task.tests = result.get("tests") or ""
+            if result.get("success"):
+                task.status = TaskStatus.completed
+                task.completed_at = datetime.now()
+                return {"success": True, "task_id": task_id, "code": task.code, "cached": cached}
             task.status = TaskStatus.failed
-            return {"success": False, "error": "LLM unavailable"}
+            task.errors.append(result.get("error", ""))
+            return {"success": False, "error": result.get("error", "LLM unavailable")}
         except Exception as e:
             task.status = TaskStatus.failed
             task.errors.append(str(e))
             return {"success": False, "error": str(e)}
 
-    def develop(self, description: str, language: str = "python") -> Dict[str, Any]:
+    def develop(self, description: str, language: str = "python", refresh: bool = False) -> Dict[str, Any]:
         task_id = self.create_task(description, language)
-        return self.execute_task(task_id)
+        return self.execute_task(task_id, refresh=refresh)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.squad_max, thread_name_prefix="dev-squad")
+            return self._executor
+
+    def _execute_in_slot(self, task_id: str, refresh: bool = False) -> Dict[str, Any]:
+        self._acquire_squad_slot()
+        try:
+            return self.execute_task(task_id, refresh=refresh)
+        finally:
+            self._release_squad_slot()
+
+    def submit_task(self, task_id: str, refresh: bool = False) -> Future:
+        """Agenda a tarefa no pool; no maximo ``squad_capacity`` rodam ao mesmo tempo."""
+        return self._get_executor().submit(self._execute_in_slot, task_id, refresh)
+
+    def develop_many(
+        self,
+        requests: Sequence[Tuple[str, str]],
+        timeout: Optional[float] = None,
+        refresh: bool = False,
+    ) -> List[Dict[str, Any]]:
+        """Executa demandas independentes ``(descricao, linguagem)`` em paralelo.
+
+        Resultados na ordem de entrada; as que estouram ``timeout`` voltam como
+        falha (a execucao continua e o resultado fica no cache se der certo).
+        ``refresh=True`` refaz todas sem consultar o cache.
+        """
+        futures = [self.submit_task(self.create_task(desc, lang), refresh) for desc, lang in requests]
+        wait(futures, timeout=timeout)
+        results: List[Dict[str, Any]] = []
+        for future in futures:
+            try:
+                results.append(future.result(timeout=0))
+            except FutureTimeoutError:
+                results.append({"success": False, "error": f"timeout apos {timeout}s"})
+            except Exception as e:
+                results.append({"success": False, "error": str(e)})
+        return results
 
     def quick_run(self, code: str, language: str = "python") -> Dict[str, Any]:
         if self.docker:
@@ -157,17 +269,24 @@ class DevAgent:
     def _release_squad_slot(self) -> None:
         self._squad_semaphore.release()
 
+    @property
+    def squad_capacity(self) -> int:
+        return self._squad_semaphore.capacity
+
     def set_squad_capacity(self, n: int) -> None:
-        import threading
-        self._squad_semaphore = threading.Semaphore(n)
+        self._squad_semaphore.set_capacity(min(self.squad_max, max(self.squad_min, n)))
 
     def enable_squad_autoscale(self) -> None:
-        pass
+        self.squad_autoscale = True
 
     def disable_squad_autoscale(self) -> None:
-        pass
+        self.squad_autoscale = False
 
     def cleanup(self) -> None:
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
         if self.docker:
             try:
                 self.docker.cleanup_all()
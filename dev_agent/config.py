@@ -12,6 +12,10 @@ DOCKER_HOST = os.getenv("DOCKER_HOST", "unix:///var/run/docker.sock")
 # Project storage
 PROJECTS_DIR = os.getenv("DEV_AGENT_PROJECTS_DIR", "dev_projects")
 TRAINING_DIR = os.getenv("DEV_AGENT_TRAINING_DIR", "agent_training")
+# Cache de codigo gerado por (descricao, linguagem, modelo); vazio (padrao) = so memoria.
+# Com um diretorio o cache sobrevive a reinicios, inclusive respostas ruins ate o TTL.
+TASK_CACHE_DIR = os.getenv("DEV_AGENT_CACHE_DIR", "")
+TASK_CACHE_TTL_SECONDS = float(os.getenv("DEV_AGENT_CACHE_TTL_SECONDS", str(7 * 86400)))
 
 # Docker settings
 DEV_NETWORK = "dev_agent_network"
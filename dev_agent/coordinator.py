@@ -37,6 +37,7 @@ class CoordinatorAgent:
         self.autoscale_interval = int(os.getenv("COORDINATOR_AUTOSCALE_INTERVAL", "10"))
         self.max_subtasks = int(os.getenv("COORDINATOR_MAX_SUBTASKS", "10"))
         self.prometheus_url = os.getenv("COORDINATOR_PROMETHEUS_URL", "http://localhost:9090")
+        self._last_autoscale = float("-inf")
 
         try:
             from web_search import create_search_engine
@@ -44,16 +45,18 @@ class CoordinatorAgent:
         except Exception:
             self._search = None
 
-    def decide_and_execute(self, description: str, language: str = "python") -> Dict[str, Any]:
+    def decide_and_execute(self, description: str, language: str = "python", refresh: bool = False) -> Dict[str, Any]:
         """
         Tenta resolver a tarefa autonomamente. Se falhar, roda busca web,
         alimenta o RAG e tenta novamente. Só retorna `requires_user: True`
-        quando não houver solução após `max_retries` tentativas.
+        quando não houver solução após `max_retries` tentativas. Com
+        `refresh=True` (o usuário pediu para refazer) o cache do DevAgent é
+        ignorado e a resposta nova substitui a guardada.
         """
         errors: List[str] = []
         for attempt in range(self.max_retries):
             try:
-                result = self.dev_agent.develop(description, language)
+                result = self._develop(description, language, refresh)
                 if result.get("success"):
                     return {
                         "success": True,
@@ -80,15 +83,53 @@ class CoordinatorAgent:
 
         return {"success": False, "requires_user": True, "errors": errors}
 
+    def _develop(self, description: str, language: str, refresh: bool) -> Dict[str, Any]:
+        if refresh:
+            return self.dev_agent.develop(description, language, refresh=True)
+        return self.dev_agent.develop(description, language)
+
     def _split_and_execute(self, description: str, language: str, attempt: int) -> Dict[str, Any]:
-        subtasks = self._split_description_by_type(description)
-        results = []
-        for task_type, scope in subtasks:
-            sub_desc = f"Tipo de tarefa: {task_type}. Execute apenas esta parte da demanda. Mantenha a resposta objetiva.\n\nDemanda original:\n{description}\n\nEscopo desta parte:\n{scope}"
-            result = self.dev_agent.develop(sub_desc, language)
-            results.append({"task_type": task_type, "success": result.get("success"), "errors": result.get("error")})
+        """Executa as partes independentes da demanda em paralelo no squad do DevAgent.
+
+        Partes já resolvidas em tentativas anteriores voltam do cache do
+        DevAgent, então um retry só refaz o que falhou.
+        """
+        subtasks = self._split_description_by_type(description)[: self.max_subtasks]
+        sub_descs = [
+            f"Tipo de tarefa: {task_type}. Execute apenas esta parte da demanda. Mantenha a resposta objetiva.\n\nDemanda original:\n{description}\n\nEscopo desta parte:\n{scope}"
+            for task_type, scope in subtasks
+        ]
+        if hasattr(self.dev_agent, "develop_many"):
+            self._autoscale_to_target()
+            outcomes = self.dev_agent.develop_many(
+                [(sub_desc, language) for sub_desc in sub_descs],
+                timeout=self.split_timeout,
+            )
+        else:
+            outcomes = [self.dev_agent.develop(sub_desc, language) for sub_desc in sub_descs]
+        results = [
+            {
+                "task_type": task_type,
+                "success": result.get("success"),
+                "errors": result.get("error"),
+                "code": result.get("code"),
+                "cached": bool(result.get("cached")),
+            }
+            for (task_type, _scope), result in zip(subtasks, outcomes)
+        ]
         overall_success = all(r["success"] for r in results)
-        return {"success": overall_success, "errors": [r["errors"] for r in results if not r["success"]]}
+        logger.info(
+            "split attempt=%s subtasks=%s ok=%s cached=%s",
+            attempt,
+            len(results),
+            sum(1 for r in results if r["success"]),
+            sum(1 for r in results if r["cached"]),
+        )
+        return {
+            "success": overall_success,
+            "errors": [r["errors"] for r in results if not r["success"]],
+            "results": results,
+        }
 
     def _split_description_by_type(self, description: str) -> List[Tuple[str, str]]:
         return [
@@ -98,14 +139,33 @@ class CoordinatorAgent:
         ]
 
     def _autoscale_to_target(self) -> None:
+        """Ajusta o squad em ±1 para manter a CPU perto de ``cpu_target``.
+
+        Consulta o Prometheus no máximo a cada ``autoscale_interval`` segundos;
+        não mexe no squad se o DevAgent estiver com autoscale desligado.
+        """
+        if not hasattr(self.dev_agent, "set_squad_capacity") or not getattr(self.dev_agent, "squad_autoscale", True):
+            return
+        now = time.monotonic()
+        if now - self._last_autoscale < self.autoscale_interval:
+            return
+        self._last_autoscale = now
         min_squad = int(os.getenv("SQUAD_MIN", "1"))
         max_squad = int(os.getenv("SQUAD_MAX", "10"))
         cpu = self._get_cpu_usage_percent()
         if cpu is None:
             return
+        current = int(getattr(self.dev_agent, "squad_capacity", max_squad))
         target = self.cpu_target
-        if cpu < target - self.cpu_tolerance and hasattr(self.dev_agent, "set_squad_capacity"):
-            pass
+        if cpu < target - self.cpu_tolerance:
+            wanted = min(max_squad, current + 1)
+        elif cpu > target + self.cpu_tolerance:
+            wanted = max(min_squad, current - 1)
+        else:
+            return
+        if wanted != current:
+            self.dev_agent.set_squad_capacity(wanted)
+            logger.info("squad autoscale cpu=%.1f%% capacity %s -> %s", cpu, current, wanted)
 
     def _get_cpu_usage_percent(self) -> Optional[float]:
         try:
@@ -239,6 +299,7 @@ def main() -> None:
     parser.add_argument("--rag", default="", help="URL da API RAG")
     parser.add_argument("--test", action="store_true", help="Executar teste básico")
     parser.add_argument("--smoke", action="store_true", help="Smoke test rápido para CI (não executa LLM)")
+    parser.add_argument("--refresh", action="store_true", help="Refazer a tarefa ignorando o cache do DevAgent")
     args = parser.parse_args()
 
     from dev_agent.config import OLLAMA_HOST, OLLAMA_MODEL
@@ -270,7 +331,7 @@ def main() -> None:
         return
 
     if args.description:
-        result = coordinator.decide_and_execute(args.description)
+        result = coordinator.decide_and_execute(args.description, refresh=args.refresh)
         print(json.dumps(result, indent=2, ensure_ascii=False))
 
 
@@ -0,0 +1,135 @@
+"""
+Cache de resultados do Dev Agent endereçado por conteúdo
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+
+def task_key(description: str, language: str, model: str) -> str:
+    """SHA-256 de (descricao, linguagem, modelo): a mesma demanda gera a mesma chave."""
+    raw = json.dumps([description.strip(), language.lower(), model], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class TaskResultCache:
+    """Codigo gerado e resultados de teste por chave de tarefa.
+
+    Mantem um LRU em memoria e, se ``cache_dir`` for informado, um JSON por
+    chave em disco (sobrevive a reinicios do servico). Apenas resultados bem
+    sucedidos entram no cache. Chamadas simultaneas com a mesma chave
+    compartilham uma unica execucao (:meth:`get_or_compute`).
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_entries: int = 512, ttl_seconds: float = 7 * 86400):
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _path(self, key: str) -> Optional[Path]:
+        return self.cache_dir / key[:2] / f"{key}.json" if self.cache_dir else None
+
+    def _fresh(self, entry: Dict[str, Any]) -> bool:
+        return self.ttl_seconds <= 0 or time.time() - float(entry.get("stored_at", 0)) < self.ttl_seconds
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and self._fresh(entry):
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return dict(entry)
+        path = self._path(key)
+        if path is not None:
+            try:
+                entry = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                entry = None
+            if entry is not None and self._fresh(entry):
+                self._remember(key, entry)
+                with self._lock:
+                    self.hits += 1
+                return dict(entry)
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _remember(self, key: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def put(self, key: str, entry: Dict[str, Any]) -> None:
+        entry = {**entry, "stored_at": time.time()}
+        self._remember(key, entry)
+        path = self._path(key)
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_text(json.dumps(entry, ensure_ascii=False), encoding="utf-8")
+            tmp.replace(path)
+        except OSError:
+            pass
+
+    def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Dict[str, Any]],
+        refresh: bool = False,
+    ) -> tuple[Dict[str, Any], bool]:
+        """Retorna ``(resultado, veio_do_cache)``; guarda o resultado se ``success``.
+
+        ``refresh=True`` (retry explicito) ignora a entrada existente e a
+        execucao em andamento, recalcula e substitui a entrada se der certo.
+        """
+        if not refresh:
+            cached = self.get(key)
+            if cached is not None:
+                return cached, True
+        with self._lock:
+            future = None if refresh else self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+        if not owner:
+            return dict(future.result()), True
+        try:
+            result = compute()
+            if result.get("success"):
+                self.put(key, result)
+            future.set_result(result)
+            return result, False
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        finally:
+            with self._lock:
+                if self._inflight.get(key) is future:
+                    self._inflight.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._memory),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            }
@@ -16,6 +16,12 @@ Fontes gratuitas (sem API key):
     - Mempool.space: Fee rate, hashrate trend, mining pools
     - Stablecoins (DeFiLlama): poder de compra total no mercado
 
+Coleta: as fontes rodam em paralelo (pool de threads), cada uma com timeout
+próprio e cache TTL de acordo com a frequência real de atualização (Fear &
+Greed é diário, L/S é de 5 min). Fonte que falha ou estoura o prazo do ciclo
+reaproveita o último valor bom (stale) até ``max_stale``; a idade do valor
+usado, latência e erros por fonte saem em ``btc_signals_source_*``.
+
 Pesos do composite (soma=1.0):
   Funding consensus (Binance+OKX+Bybit): 0.25  — custo real de posições long
   L/S global (Binance):                  0.20  — alavancagem de varejo
@@ -33,9 +39,13 @@ import logging
 import os
 import signal
 import sys
+import threading
 import time
+import urllib.parse
 import urllib.request
-from typing import Any, Dict, Optional, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FuturesTimeout, as_completed
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 logging.basicConfig(
     level=logging.INFO,
@@ -52,6 +62,13 @@ PROMETHEUS_PORT= int(os.environ.get("BTC_SIGNALS_PORT", "9123"))
 DATABASE_URL   = os.environ.get(
     "DATABASE_URL", ""
 )
+# Prazo total da coleta paralela; fontes que não respondem a tempo usam stale
+COLLECT_DEADLINE = float(os.environ.get("BTC_SIGNALS_COLLECT_DEADLINE", "12"))
+COLLECT_WORKERS  = int(os.environ.get("BTC_SIGNALS_COLLECT_WORKERS", "8"))
+# Idade máxima (s) de um valor stale; por fonte vale max(isso, 3 × TTL)
+STALE_MAX_AGE    = float(os.environ.get("BTC_SIGNALS_STALE_MAX_AGE", "900"))
+# Redireciona todos os hosts das APIs (ex.: servidor stub local em testes)
+BASE_URL_OVERRIDE = os.environ.get("BTC_SIGNALS_BASE_URL_OVERRIDE", "")
 
 WEIGHTS = {
     "funding_consensus": 0.25,
@@ -66,12 +83,27 @@ WEIGHTS = {
 
 # ── Helpers ───────────────────────────────────────────────────────────
 
-def _fetch(url: str, timeout: int = 8) -> Optional[Any]:
+# Contexto da fonte em execução na thread atual (timeout e contagem de erros)
+_source_ctx = threading.local()
+
+
+def _resolve_url(url: str) -> str:
+    if not BASE_URL_OVERRIDE:
+        return url
+    parts = urllib.parse.urlsplit(url)
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    return BASE_URL_OVERRIDE.rstrip("/") + path
+
+
+def _fetch(url: str, timeout: Optional[float] = None) -> Optional[Any]:
+    if timeout is None:
+        timeout = getattr(_source_ctx, "timeout", 8)
     try:
-        req = urllib.request.Request(url, headers={"User-Agent": "btc-signals/2.0"})
+        req = urllib.request.Request(_resolve_url(url), headers={"User-Agent": "btc-signals/2.0"})
         with urllib.request.urlopen(req, timeout=timeout) as r:
             return json.loads(r.read())
     except Exception as e:
+        _source_ctx.errors = getattr(_source_ctx, "errors", 0) + 1
         log.debug("fetch %s: %s", url[:60], e)
         return None
 
@@ -196,7 +228,7 @@ def fetch_blockchair_onchain() -> Tuple[Optional[int], Optional[float]]:
     Alto volume relativo à média histórica → rede ativa → pode indicar acumulação
     ou distribuição (confirmar com outros sinais).
     """
-    d = _fetch("https://api.blockchair.com/bitcoin/stats", timeout=10)
+    d = _fetch("https://api.blockchair.com/bitcoin/stats")
     if not d:
         return None, None
     try:
@@ -225,6 +257,179 @@ def compute_nvt(price: float, daily_btc_sent: Optional[float]) -> Optional[float
     BTC_SUPPLY = 19_700_000
     return round(BTC_SUPPLY / daily_btc_sent, 2)
 
+# ── Coleta paralela com cache ─────────────────────────────────────────
+
+@dataclass(frozen=True)
+class SignalSource:
+    """Fonte externa: fetcher, TTL do cache e timeout por requisição HTTP."""
+
+    name: str
+    fetch: Callable[[], Any]
+    ttl: float
+    timeout: float = 8.0
+    empty: Any = None
+
+    @property
+    def max_stale(self) -> float:
+        return max(STALE_MAX_AGE, 3 * self.ttl)
+
+
+@dataclass
+class _CacheEntry:
+    value: Any
+    fetched_at: float
+
+
+# TTLs acompanham a frequência de atualização de cada API: L/S e taker são
+# janelas de 5 min, funding liquida a cada 8h, OI é série de 1h, F&G é diário.
+# TTL 55s < BTC_SIGNALS_INTERVAL padrão: fontes rápidas buscam todo ciclo.
+SOURCES: List[SignalSource] = [
+    SignalSource("binance_global_ls", fetch_binance_global_ls,   ttl=55),
+    SignalSource("binance_top_ls",    fetch_binance_top_ls,      ttl=55),
+    SignalSource("binance_taker",     fetch_binance_taker,       ttl=55),
+    SignalSource("binance_funding",   fetch_binance_funding,     ttl=300),
+    SignalSource("okx_ls",            fetch_okx_ls,              ttl=55),
+    SignalSource("okx_funding",       fetch_okx_funding,         ttl=120),
+    SignalSource("bybit_ticker",      fetch_bybit_funding_oi,    ttl=55, empty=(None, None)),
+    SignalSource("bybit_oi",          fetch_bybit_oi_series,     ttl=300, empty=(None, None)),
+    SignalSource("deribit_put_call",  fetch_deribit_put_call,    ttl=300),
+    SignalSource("fear_greed",        fetch_fear_greed,          ttl=3600, empty=(None, None)),
+    SignalSource("coinbase_premium",  fetch_coinbase_premium,    ttl=55, timeout=5),
+    SignalSource("mempool",           fetch_mempool,             ttl=55, timeout=5, empty=(None, None)),
+    SignalSource("btc_dominance",     fetch_btc_dominance,       ttl=600),
+    SignalSource("blockchain_info",   fetch_blockchain_info,     ttl=600, empty=(None, None)),
+    SignalSource("blockchair",        fetch_blockchair_onchain,  ttl=600, timeout=10, empty=(None, None)),
+]
+
+_source_cache: Dict[str, _CacheEntry] = {}
+_inflight: Dict[str, Future] = {}
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=COLLECT_WORKERS, thread_name_prefix="btc-signals")
+        return _executor
+
+
+def reset_source_cache() -> None:
+    """Esquece valores em cache e fetches pendentes (testes / reload)."""
+    _source_cache.clear()
+    _inflight.clear()
+
+
+def _is_empty(value: Any) -> bool:
+    if isinstance(value, tuple):
+        return all(v is None for v in value)
+    return value is None
+
+
+def _run_source(src: SignalSource) -> Tuple[Any, float, bool]:
+    """Executa o fetcher na thread do pool; retorna (valor, latência, erro).
+
+    A fonte só falha se o fetcher levantar exceção ou não devolver nada. Um
+    fetcher composto com uma sub-requisição falha (ex.: mempool sem o
+    blockstream) mantém o valor parcial em vez de cair no cache stale.
+    """
+    _source_ctx.timeout = src.timeout
+    _source_ctx.errors = 0
+    t0 = time.monotonic()
+    raised = False
+    try:
+        value = src.fetch()
+    except Exception as e:
+        log.debug("fonte %s: %s", src.name, e)
+        value, raised = src.empty, True
+    failed = raised or _is_empty(value)
+    if not failed and _source_ctx.errors:
+        log.debug("fonte %s: resultado parcial (%d fetch com erro)", src.name, _source_ctx.errors)
+    return value, time.monotonic() - t0, failed
+
+
+def _store_result(src: SignalSource, future: Future) -> None:
+    """Callback do pool: registra métricas e guarda o valor bom no cache.
+
+    Roda também para fetches que terminam depois do prazo do ciclo, de modo que
+    uma fonte lenta ainda atualiza o cache para o próximo ciclo.
+    """
+    value, latency, failed = future.result()
+    _pset_source("btc_signals_source_latency_seconds", "Latência do último fetch da fonte", src.name, round(latency, 4))
+    if failed:
+        _pinc_source("btc_signals_source_errors_total", "Falhas de fetch por fonte", src.name)
+    else:
+        _source_cache[src.name] = _CacheEntry(value, time.time())
+
+
+def _fallback(src: SignalSource, now: float) -> Any:
+    entry = _source_cache.get(src.name)
+    stale_ok = entry is not None and now - entry.fetched_at <= src.max_stale
+    _pset_source("btc_signals_source_stale", "Fonte usando último valor bom (1=stale)", src.name, int(stale_ok))
+    return entry.value if stale_ok else src.empty
+
+
+def collect_sources(sources: Optional[List[SignalSource]] = None) -> Dict[str, Any]:
+    """Coleta todas as fontes em paralelo respeitando TTL, timeout e prazo do ciclo.
+
+    Fontes dentro do TTL não geram requisição. Falha, resposta vazia ou estouro
+    de ``COLLECT_DEADLINE`` caem no último valor bom; uma fonte ainda presa do
+    ciclo anterior não é reenviada ao pool.
+    """
+    sources = SOURCES if sources is None else sources
+    pool = _get_executor()
+    started = time.monotonic()
+    now = time.time()
+    results: Dict[str, Any] = {}
+    pending: Dict[Future, SignalSource] = {}
+    fresh: set = set()
+
+    for src in sources:
+        entry = _source_cache.get(src.name)
+        if entry is not None and now - entry.fetched_at < src.ttl:
+            results[src.name] = entry.value
+            _pset_source("btc_signals_source_stale", "Fonte usando último valor bom (1=stale)", src.name, 0)
+            _pinc_source("btc_signals_source_cache_hits_total", "Leituras servidas pelo cache TTL", src.name)
+            continue
+        running = _inflight.get(src.name)
+        if running is not None and not running.done():
+            continue
+        future = pool.submit(_run_source, src)
+        future.add_done_callback(lambda f, src=src: _store_result(src, f))
+        _inflight[src.name] = future
+        pending[future] = src
+
+    try:
+        for future in as_completed(pending, timeout=max(0.0, started + COLLECT_DEADLINE - time.monotonic())):
+            src = pending[future]
+            value, _latency, failed = future.result()
+            if not failed:
+                _pset_source("btc_signals_source_stale", "Fonte usando último valor bom (1=stale)", src.name, 0)
+                results[src.name] = value
+                fresh.add(src.name)
+    except FuturesTimeout:
+        late = sorted(src.name for fut, src in pending.items() if not fut.done())
+        log.warning("Fontes sem resposta em %.0fs: %s", COLLECT_DEADLINE, ", ".join(late))
+        for name in late:
+            _pinc_source("btc_signals_source_timeouts_total", "Fontes que estouraram o prazo do ciclo", name)
+
+    now = time.time()
+    for src in sources:
+        if src.name in fresh:
+            age = 0.0
+        else:
+            if src.name not in results:
+                results[src.name] = _fallback(src, now)
+            entry = _source_cache.get(src.name)
+            if entry is None:
+                continue
+            age = round(now - entry.fetched_at, 1)
+        _pset_source("btc_signals_source_age_seconds", "Idade do valor usado da fonte", src.name, age)
+
+    _pset("btc_signals_collect_seconds", "Duração da coleta paralela do ciclo", round(time.monotonic() - started, 4))
+    return results
+
 # ── Compute signals ───────────────────────────────────────────────────
 
 def compute_funding_consensus(binance: Optional[float], okx: Optional[float], bybit: Optional[float]) -> Optional[float]:
@@ -309,6 +514,9 @@ def signal_label(c: float) -> str:
 # ── DB + Prometheus ───────────────────────────────────────────────────
 
 _prom: Dict[str, float] = {}
+# Métricas por fonte: nome → (help, tipo, {source: valor})
+_prom_sources: Dict[str, Tuple[str, str, Dict[str, float]]] = {}
+_prom_lock = threading.Lock()
 
 
 def persist(row: Dict[str, Any]) -> None:
@@ -342,12 +550,18 @@ def serve_prometheus() -> None:
     class H(http.server.BaseHTTPRequestHandler):
         def do_GET(self):
             lines = []
-            for name, (help_txt, val) in sorted(_prom.items()):
+            with _prom_lock:
+                gauges = sorted(_prom.items())
+                per_source = sorted((k, (h, t, dict(v))) for k, (h, t, v) in _prom_sources.items())
+            for name, (help_txt, val) in gauges:
                 lines += [
                     f"# HELP {name} {help_txt}",
                     f"# TYPE {name} gauge",
                     f'{name}{{coin="BTC-USDT"}} {val}',
                 ]
+            for name, (help_txt, mtype, series) in per_source:
+                lines += [f"# HELP {name} {help_txt}", f"# TYPE {name} {mtype}"]
+                lines += [f'{name}{{source="{src}"}} {val}' for src, val in sorted(series.items())]
             body = ("\n".join(lines) + "\n").encode()
             self.send_response(200)
             self.send_header("Content-Type", "text/plain; version=0.0.4")
@@ -363,7 +577,19 @@ def serve_prometheus() -> None:
 
 
 def _pset(name: str, help_txt: str, val: float) -> None:
-    _prom[name] = (help_txt, val)
+    with _prom_lock:
+        _prom[name] = (help_txt, val)
+
+
+def _pset_source(name: str, help_txt: str, source: str, val: float) -> None:
+    with _prom_lock:
+        _prom_sources.setdefault(name, (help_txt, "gauge", {}))[2][source] = val
+
+
+def _pinc_source(name: str, help_txt: str, source: str) -> None:
+    with _prom_lock:
+        series = _prom_sources.setdefault(name, (help_txt, "counter", {}))[2]
+        series[source] = series.get(source, 0) + 1
 
 # ── Ciclo principal ───────────────────────────────────────────────────
 
@@ -374,22 +600,23 @@ def run_cycle() -> None:
     global _prev_oi
     log.info("Coletando sinais v2...")
 
-    # --- Coleta paralela (sequencial mas rápido — todas <8s) ---
-    global_ls   = fetch_binance_global_ls()
-    top_ls      = fetch_binance_top_ls()
-    taker       = fetch_binance_taker()
-    bn_fund     = fetch_binance_funding()
-    okx_ls      = fetch_okx_ls()
-    okx_fund    = fetch_okx_funding()
-    bybit_fund, bybit_mark = fetch_bybit_funding_oi()
-    oi_now, oi_prev_api    = fetch_bybit_oi_series()
-    put_call    = fetch_deribit_put_call()
-    fng, fng_cls = fetch_fear_greed()
-    cb_premium  = fetch_coinbase_premium()
-    fee, vsize  = fetch_mempool()
-    dominance   = fetch_btc_dominance()
-    onchain_tx, onchain_btc     = fetch_blockchain_info()
-    bc_tx24,    bc_vol_btc      = fetch_blockchair_onchain()
+    # --- Coleta paralela com cache TTL e fallback stale por fonte ---
+    data = collect_sources()
+    global_ls   = data["binance_global_ls"]
+    top_ls      = data["binance_top_ls"]
+    taker       = data["binance_taker"]
+    bn_fund     = data["binance_funding"]
+    okx_ls      = data["okx_ls"]
+    okx_fund    = data["okx_funding"]
+    bybit_fund, bybit_mark = data["bybit_ticker"]
+    oi_now, oi_prev_api    = data["bybit_oi"]
+    put_call    = data["deribit_put_call"]
+    fng, fng_cls = data["fear_greed"]
+    cb_premium  = data["coinbase_premium"]
+    fee, vsize  = data["mempool"]
+    dominance   = data["btc_dominance"]
+    onchain_tx, onchain_btc     = data["blockchain_info"]
+    bc_tx24,    bc_vol_btc      = data["blockchair"]
     # Preço atual para calcular NVT (usa o mark price do Bybit se disponível)
     _price_for_nvt = bybit_mark or 0.0
     nvt_ratio = compute_nvt(_price_for_nvt, onchain_btc or bc_vol_btc)
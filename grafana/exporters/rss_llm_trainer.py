@@ -37,7 +37,7 @@ import urllib.request
 from dataclasses import dataclass, field, asdict
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 
 try:
     import feedparser
@@ -52,6 +52,17 @@ except ImportError:
     print("ERROR: psycopg2 not installed. Run: pip install psycopg2-binary")
     sys.exit(1)
 
+# Lookup vetorizado compartilhado com o trading agent (MarketRAG / backfill_retro_rewards).
+# append (e não insert) para não sombrear módulos deste diretório.
+_TRADING_AGENT_DIR = Path(__file__).resolve().parents[2] / "btc_trading_agent"
+if _TRADING_AGENT_DIR.is_dir() and str(_TRADING_AGENT_DIR) not in sys.path:
+    sys.path.append(str(_TRADING_AGENT_DIR))
+
+try:
+    from price_lookup import fetch_prices_at
+except ImportError:
+    fetch_prices_at = None
+
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s %(levelname)s [trainer] %(message)s",
@@ -249,23 +260,54 @@ def get_price_at_ts(
 
     Note:
         btc.candles.timestamp está em SEGUNDOS (10 dígitos, ex: 1772652120).
+        Busca o vizinho anterior e o posterior por faixa (usa o índice
+        symbol/timestamp) em vez de ORDER BY ABS(...), que varria o símbolo.
+        Para muitos timestamps use get_prices_at_timestamps().
     """
     ts_sec = int(ts)  # garante segundos
     window_sec = window_min * 60
 
     with conn.cursor() as cur:
         cur.execute("""
-            SELECT close
-            FROM btc.candles
-            WHERE symbol = %s
-              AND ABS(timestamp - %s) <= %s
-            ORDER BY ABS(timestamp - %s)
+            SELECT close, timestamp FROM (
+                (SELECT close, timestamp FROM btc.candles
+                  WHERE symbol = %s AND timestamp <= %s AND timestamp >= %s
+                  ORDER BY timestamp DESC LIMIT 1)
+                UNION ALL
+                (SELECT close, timestamp FROM btc.candles
+                  WHERE symbol = %s AND timestamp > %s AND timestamp <= %s
+                  ORDER BY timestamp ASC LIMIT 1)
+            ) AS nearest
+            ORDER BY ABS(timestamp - %s), timestamp
             LIMIT 1
-        """, (symbol, ts_sec, window_sec, ts_sec))
+        """, (
+            symbol, ts_sec, ts_sec - window_sec,
+            symbol, ts_sec, ts_sec + window_sec,
+            ts_sec,
+        ))
         row = cur.fetchone()
         return float(row[0]) if row else None
 
 
+def get_prices_at_timestamps(
+    conn: psycopg2.extensions.connection,
+    requests: Iterable[Tuple[str, float]],
+    window_min: int = 30,
+) -> Dict[Tuple[str, int], Optional[float]]:
+    """Resolve em lote o preço mais próximo de cada (symbol, ts em segundos).
+
+    Usa price_lookup.fetch_prices_at (uma consulta por faixa + searchsorted)
+    quando disponível; senão cai para get_price_at_ts por par.
+    Retorna ``{(symbol, int(ts)): preço ou None}``.
+    """
+    keys = list(dict.fromkeys((symbol, int(ts)) for symbol, ts in requests))
+    if not keys:
+        return {}
+    if fetch_prices_at is not None:
+        return fetch_prices_at(conn, keys, window_min * 60)
+    return {key: get_price_at_ts(conn, key[0], key[1], window_min=window_min) for key in keys}
+
+
 def get_best_training_examples(
     conn: psycopg2.extensions.connection,
     limit: int = MAX_FEW_SHOT_EXAMPLES,
@@ -604,6 +646,18 @@ def mode_collect(limit_per_feed: int = 50) -> None:
     processed = 0
     with_price = 0
 
+    # Ground truth de todos os artigos de uma vez (T e T+impacto)
+    price_requests: List[Tuple[str, float]] = []
+    for art in articles:
+        symbol = COIN_SYMBOL_MAP.get(
+            detect_primary_coin(art.get("title", ""), art.get("description", "")), "BTC-USDT"
+        )
+        price_requests.append((symbol, art["published_ts"]))
+        price_requests.append((symbol, art["published_ts"] + impact_seconds))
+    t0 = time.monotonic()
+    prices = get_prices_at_timestamps(conn, price_requests, window_min=60)
+    log.info("Preços resolvidos: %d timestamps em %.2fs", len(prices), time.monotonic() - t0)
+
     for i, art in enumerate(articles, 1):
         title = art.get("title", "")
         description = art.get("description", "")
@@ -623,8 +677,8 @@ def mode_collect(limit_per_feed: int = 50) -> None:
         )
 
         # Busca preço no momento da publicação e T+4h
-        price_pub = get_price_at_ts(conn, symbol, pub_ts, window_min=60)
-        price_impact = get_price_at_ts(conn, symbol, pub_ts + impact_seconds, window_min=60)
+        price_pub = prices.get((symbol, int(pub_ts)))
+        price_impact = prices.get((symbol, int(pub_ts + impact_seconds)))
 
         if price_pub and price_impact and price_pub > 0:
             sample.price_at_publish = price_pub
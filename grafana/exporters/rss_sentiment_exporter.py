@@ -19,6 +19,11 @@ Metrics:
   btc_news_confidence{coin}        — confiança média do classificador
   btc_news_fetch_errors_total      — counter de erros de fetch RSS
   btc_news_articles_processed_total — counter de artigos processados com sucesso
+  btc_news_stage_items_total{stage} — itens por estágio (fetch/dedup/classify/insert)
+  btc_news_stage_seconds{stage}    — duração do estágio no último ciclo
+  btc_news_stage_throughput{stage} — itens/s do estágio no último ciclo
+  btc_news_feed_not_modified_total{feed} — respostas 304 (ETag/If-Modified-Since)
+  btc_news_backlog                 — pares artigo×moeda aguardando classificação
 
 Systemd service: rss-sentiment-exporter.service
 Ollama integration: GPU0 (:11434) para phi4-mini/trading-sentiment (GPU1 fallback)
@@ -34,13 +39,16 @@ import re
 import signal
 import socket
 import sys
+import threading
 import time
 import urllib.error
 import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 
 try:
     import feedparser
@@ -54,6 +62,11 @@ try:
 except ImportError:
     HAS_PSYCOPG2 = False
 
+try:
+    from psycopg2.extras import execute_values
+except ImportError:
+    execute_values = None
+
 try:
     from prometheus_client import Counter, Gauge, start_http_server
     HAS_PROM = True
@@ -97,6 +110,11 @@ PG_DSN = os.environ.get(
 )
 FETCH_INTERVAL = int(os.environ.get("RSS_FETCH_INTERVAL", "300"))  # 5 min
 SENTIMENT_WINDOW_HOURS = int(os.environ.get("RSS_SENTIMENT_WINDOW", "4"))
+# Paralelismo do pipeline: feeds são I/O puro; a classificação é limitada pelo
+# OLLAMA_NUM_PARALLEL da GPU0, então o pool de workers é pequeno por padrão.
+FEED_FETCH_WORKERS = int(os.environ.get("RSS_FEED_FETCH_WORKERS", "8"))
+CLASSIFY_WORKERS = int(os.environ.get("RSS_CLASSIFY_WORKERS", "2"))
+INSERT_BATCH_SIZE = int(os.environ.get("RSS_INSERT_BATCH_SIZE", "50"))
 
 # Moedas monitoradas pelo trading agent
 TRACKED_COINS = ["BTC", "ETH", "XRP", "SOL", "DOGE", "ADA"]
@@ -236,23 +254,76 @@ def detect_coins(text: str) -> List[str]:
 
 FEED_FETCH_TIMEOUT = int(os.environ.get("RSS_FEED_FETCH_TIMEOUT", "30"))
 
+# Validadores HTTP (ETag / Last-Modified) por feed, para GET condicional no próximo ciclo.
+# Os recebidos no ciclo ficam pendentes e só valem depois que os artigos foram
+# gravados: senão uma falha no banco seguida de 304 perderia esses itens.
+FEED_VALIDATORS: Dict[str, Dict[str, str]] = {}
+FEED_PENDING_VALIDATORS: Dict[str, Dict[str, str]] = {}
+# Status HTTP da última busca de cada feed (None em erro de rede/parse)
+FEED_LAST_STATUS: Dict[str, Optional[int]] = {}
+
+_socket_timeout_lock = threading.Lock()
+_socket_timeout_users = 0
+_socket_timeout_saved: Optional[float] = None
+
 
-def fetch_rss_feed(feed_url: str, feed_name: str) -> List[NewsArticle]:
+@contextmanager
+def _feed_socket_timeout(timeout: float) -> Iterator[None]:
+    """Aplica o timeout default de socket enquanto houver fetch em andamento.
+
+    feedparser não aceita timeout; o default de socket é global ao processo, então
+    com fetches concorrentes só o primeiro a entrar salva o valor anterior e só o
+    último a sair o restaura.
+    """
+    global _socket_timeout_users, _socket_timeout_saved
+    with _socket_timeout_lock:
+        if _socket_timeout_users == 0:
+            _socket_timeout_saved = socket.getdefaulttimeout()
+            socket.setdefaulttimeout(timeout)
+        _socket_timeout_users += 1
+    try:
+        yield
+    finally:
+        with _socket_timeout_lock:
+            _socket_timeout_users -= 1
+            if _socket_timeout_users == 0:
+                socket.setdefaulttimeout(_socket_timeout_saved)
+
+
+def fetch_rss_feed(
+    feed_url: str,
+    feed_name: str,
+    validators: Optional[Dict[str, str]] = None,
+) -> List[NewsArticle]:
     """Busca e parseia um feed RSS retornando lista de artigos.
 
     Requer feedparser instalado. Retorna lista vazia em caso de erro.
+    Se ``validators`` for informado, envia ETag/If-Modified-Since e atualiza o
+    dict com os validadores da resposta; um 304 retorna lista vazia.
     """
     if not HAS_FEEDPARSER:
         log.error("feedparser não instalado — pip install feedparser")
         return []
 
+    FEED_LAST_STATUS[feed_name] = None
     try:
-        old_timeout = socket.getdefaulttimeout()
-        socket.setdefaulttimeout(FEED_FETCH_TIMEOUT)
-        try:
-            feed = feedparser.parse(feed_url)
-        finally:
-            socket.setdefaulttimeout(old_timeout)
+        conditional = validators or {}
+        with _feed_socket_timeout(FEED_FETCH_TIMEOUT):
+            feed = feedparser.parse(
+                feed_url,
+                etag=conditional.get("etag"),
+                modified=conditional.get("modified"),
+            )
+        status = getattr(feed, "status", None)
+        FEED_LAST_STATUS[feed_name] = status if isinstance(status, int) else None
+        if validators is not None:
+            for key in ("etag", "modified"):
+                value = getattr(feed, key, None)
+                if isinstance(value, str) and value:
+                    validators[key] = value
+        if getattr(feed, "status", None) == 304:
+            log.debug("Feed %s não modificado (304)", feed_name)
+            return []
         if feed.bozo and not feed.entries:
             log.warning("Feed %s retornou erro: %s", feed_name, feed.bozo_exception)
             return []
@@ -341,23 +412,51 @@ def fetch_kucoin_articles() -> List[NewsArticle]:
     return articles
 
 
-def fetch_all_feeds() -> List[NewsArticle]:
-    """Busca todos os feeds RSS configurados e retorna artigos consolidados."""
+def fetch_all_feeds(metrics: Optional[Dict] = None) -> List[NewsArticle]:
+    """Busca todos os feeds RSS configurados em paralelo e retorna artigos consolidados.
+
+    Cada feed usa GET condicional com os validadores do último ciclo gravado;
+    os novos ficam em FEED_PENDING_VALIDATORS até ``commit_feed_validators``.
+    A ordem do resultado segue RSS_FEEDS (KuCoin por último).
+    """
+    started = time.monotonic()
     all_articles: List[NewsArticle] = []
-    for feed_def in RSS_FEEDS:
-        articles = fetch_rss_feed(feed_def["url"], feed_def["name"])
-        all_articles.extend(articles)
-        log.info("Feed %s: %d artigos relevantes", feed_def["name"], len(articles))
 
-    if KUCOIN_NEWS_ENABLED:
-        kucoin_articles = fetch_kucoin_articles()
-        all_articles.extend(kucoin_articles)
-        if not kucoin_articles:
-            log.info("Feed kucoin: 0 artigos relevantes")
+    def _fetch(feed_def: Dict[str, str]) -> List[NewsArticle]:
+        validators = dict(FEED_VALIDATORS.get(feed_def["name"], {}))
+        articles = fetch_rss_feed(feed_def["url"], feed_def["name"], validators)
+        FEED_PENDING_VALIDATORS[feed_def["name"]] = validators
+        if FEED_LAST_STATUS.get(feed_def["name"]) == 304 and metrics and "feed_not_modified" in metrics:
+            metrics["feed_not_modified"].labels(feed=feed_def["name"]).inc()
+        return articles
+
+    workers = max(1, min(FEED_FETCH_WORKERS, len(RSS_FEEDS) + 1))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rss-fetch") as pool:
+        kucoin_future = pool.submit(fetch_kucoin_articles) if KUCOIN_NEWS_ENABLED else None
+        for feed_def, articles in zip(RSS_FEEDS, pool.map(_fetch, RSS_FEEDS)):
+            all_articles.extend(articles)
+            log.info("Feed %s: %d artigos relevantes", feed_def["name"], len(articles))
 
+        if kucoin_future is not None:
+            try:
+                kucoin_articles = kucoin_future.result()
+            except Exception as e:
+                log.error("Erro ao buscar notícias KuCoin: %s", e)
+                kucoin_articles = []
+            all_articles.extend(kucoin_articles)
+            if not kucoin_articles:
+                log.info("Feed kucoin: 0 artigos relevantes")
+
+    _observe_stage(metrics, "fetch", len(all_articles), time.monotonic() - started)
     return all_articles
 
 
+def commit_feed_validators() -> None:
+    """Passa a usar os validadores do ciclo cujos artigos já foram gravados."""
+    FEED_VALIDATORS.update(FEED_PENDING_VALIDATORS)
+    FEED_PENDING_VALIDATORS.clear()
+
+
 # ── Ollama Sentiment Classification ───────────────────────────────────
 
 # Prompt para trading-sentiment (modelo especializado) e modelos genéricos
@@ -770,6 +869,9 @@ def _heuristic_sentiment_fallback(article: NewsArticle) -> SentimentResult:
 class NewsDatabase:
     """Gerencia persistência de notícias e sentimento no PostgreSQL."""
 
+    # Falhas de escrita desde o início: o ciclo só confirma os validadores sem falha
+    write_failures = 0
+
     def __init__(self, dsn: str) -> None:
         """Inicializa conexão com o banco de dados."""
         self.dsn = dsn
@@ -827,6 +929,70 @@ class NewsDatabase:
             log.warning("Erro ao verificar URL: %s", e)
             return False
 
+    def existing_pairs(self, pairs: List[Tuple[str, str]]) -> Set[Tuple[str, str]]:
+        """Retorna os pares (url, coin) já persistidos, numa única consulta por ciclo."""
+        if not pairs:
+            return set()
+        urls = sorted({url for url, _ in pairs})
+        try:
+            conn = self._get_conn()
+            with conn.cursor() as cur:
+                cur.execute(
+                    "SELECT url, coin FROM btc.news_sentiment WHERE url = ANY(%s)",
+                    (urls,),
+                )
+                return {(row[0], row[1]) for row in cur.fetchall()}
+        except Exception as e:
+            log.warning("Erro na deduplicação em lote: %s", e)
+            self._conn = None
+            return set()
+
+    def insert_sentiments(
+        self,
+        rows: List[Tuple[NewsArticle, str, SentimentResult]],
+    ) -> int:
+        """Insere registros em lote (ON CONFLICT DO NOTHING). Retorna quantos entraram."""
+        if not rows:
+            return 0
+        values = [
+            (
+                article.published,
+                article.source,
+                article.title[:500],
+                article.url,
+                coin,
+                result.sentiment,
+                result.confidence,
+                result.category,
+                article.description[:500],
+            )
+            for article, coin, result in rows
+        ]
+        if execute_values is None:
+            return sum(1 for article, coin, result in rows if self.insert_sentiment(article, coin, result))
+        try:
+            conn = self._get_conn()
+            with conn.cursor() as cur:
+                inserted = execute_values(
+                    cur,
+                    """INSERT INTO btc.news_sentiment
+                        (timestamp, source, title, url, coin, sentiment,
+                         confidence, category, summary)
+                       VALUES %s
+                       ON CONFLICT (url, coin) DO NOTHING
+                       RETURNING 1
+                    """,
+                    values,
+                    page_size=max(len(values), 1),
+                    fetch=True,
+                )
+                return len(inserted)
+        except Exception as e:
+            log.error("Erro ao inserir lote de sentimento: %s", e)
+            self.write_failures += 1
+            self._conn = None
+            return 0
+
     def insert_sentiment(
         self,
         article: NewsArticle,
@@ -859,6 +1025,7 @@ class NewsDatabase:
                 return cur.rowcount > 0
         except Exception as e:
             log.error("Erro ao inserir sentimento: %s", e)
+            self.write_failures += 1
             self._conn = None  # forçar reconexão
             return False
 
@@ -974,10 +1141,50 @@ def setup_prometheus_metrics() -> Optional[Dict]:
             "btc_news_articles_processed_total",
             "Total de artigos processados com sucesso",
         ),
+        "stage_items": Counter(
+            "btc_news_stage_items_total",
+            "Itens processados por estágio do pipeline",
+            ["stage"],
+        ),
+        "stage_seconds": Gauge(
+            "btc_news_stage_seconds",
+            "Duração do estágio no último ciclo (segundos)",
+            ["stage"],
+        ),
+        "stage_throughput": Gauge(
+            "btc_news_stage_throughput",
+            "Vazão do estágio no último ciclo (itens/s)",
+            ["stage"],
+        ),
+        "feed_not_modified": Counter(
+            "btc_news_feed_not_modified_total",
+            "Respostas 304 (feed não modificado) por feed",
+            ["feed"],
+        ),
+        "backlog": Gauge(
+            "btc_news_backlog",
+            "Pares artigo×moeda aguardando classificação",
+        ),
     }
     return metrics
 
 
+def _observe_stage(
+    metrics: Optional[Dict], stage: str, items: int, seconds: float
+) -> None:
+    """Registra itens, duração e vazão de um estágio do pipeline."""
+    if not metrics or "stage_items" not in metrics:
+        return
+    metrics["stage_items"].labels(stage=stage).inc(items)
+    metrics["stage_seconds"].labels(stage=stage).set(seconds)
+    metrics["stage_throughput"].labels(stage=stage).set(items / seconds if seconds > 0 else 0.0)
+
+
+def _set_backlog(metrics: Optional[Dict], value: int) -> None:
+    if metrics and "backlog" in metrics:
+        metrics["backlog"].set(value)
+
+
 def update_prometheus_metrics(
     db: NewsDatabase,
     metrics: Optional[Dict],
@@ -1007,48 +1214,111 @@ def process_articles(
 ) -> int:
     """Processa lista de artigos: deduplicação → classificação → persistência.
 
-    Retorna número de artigos novos processados.
-    """
-    new_count = 0
+    Pipeline por ciclo:
+    1. deduplicação set-based (uma consulta para todos os pares url×moeda);
+    2. classificação uma vez por artigo (o prompt não depende da moeda) num
+       pool limitado a CLASSIFY_WORKERS chamadas simultâneas ao Ollama;
+    3. inserção em lotes de INSERT_BATCH_SIZE à medida que as classificações
+       terminam, para não perder progresso se o ciclo for interrompido.
 
+    Retorna número de pares artigo×moeda novos processados.
+    """
+    started = time.monotonic()
+    pending: Dict[str, Tuple[NewsArticle, List[str]]] = {}
     for article in articles:
         for coin in article.coins:
-            # Deduplicação
-            if db and db.url_exists(article.url, coin):
-                continue
+            entry = pending.setdefault(article.url, (article, []))
+            if coin not in entry[1]:
+                entry[1].append(coin)
+
+    all_pairs = [(url, coin) for url, (_, coins) in pending.items() for coin in coins]
+    existing = db.existing_pairs(all_pairs) if db and all_pairs else set()
+    work: List[Tuple[NewsArticle, List[str]]] = []
+    for url, (article, coins) in pending.items():
+        new_coins = [coin for coin in coins if (url, coin) not in existing]
+        if new_coins:
+            work.append((article, new_coins))
+    backlog = sum(len(coins) for _, coins in work)
+    _observe_stage(metrics, "dedup", len(all_pairs), time.monotonic() - started)
+    _set_backlog(metrics, backlog)
+    if not work:
+        return 0
 
-            # Classificação de sentimento via Ollama
-            result = classify_sentiment_ollama(article)
+    new_count = 0
+    batch: List[Tuple[NewsArticle, str, SentimentResult]] = []
+    insert_seconds = 0.0
+    inserted_rows = 0
+
+    def _flush() -> None:
+        nonlocal new_count, insert_seconds, inserted_rows
+        if not batch:
+            return
+        t0 = time.monotonic()
+        inserted = db.insert_sentiments(list(batch)) if db else len(batch)
+        insert_seconds += time.monotonic() - t0
+        inserted_rows += len(batch)
+        new_count += inserted
+        if metrics and inserted:
+            metrics["articles_processed"].inc(inserted)
+        batch.clear()
+
+    classify_started = time.monotonic()
+    workers = max(1, min(CLASSIFY_WORKERS, len(work)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rss-classify") as pool:
+        futures = {pool.submit(classify_sentiment_ollama, article): (article, coins) for article, coins in work}
+        for future in as_completed(futures):
+            article, coins = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                log.error("Erro ao classificar '%s': %s", article.title[:60], e)
+                result = _heuristic_sentiment_fallback(article)
+            for coin in coins:
+                log.info(
+                    "📰 [%s] %s → sent=%.2f conf=%.2f cat=%s | %s",
+                    coin,
+                    article.source,
+                    result.sentiment,
+                    result.confidence,
+                    result.category,
+                    article.title[:80],
+                )
+                batch.append((article, coin, result))
+            backlog -= len(coins)
+            _set_backlog(metrics, backlog)
+            if len(batch) >= INSERT_BATCH_SIZE:
+                _flush()
+        _flush()
+
+    _observe_stage(metrics, "classify", len(work), time.monotonic() - classify_started)
+    _observe_stage(metrics, "insert", inserted_rows, insert_seconds)
+    return new_count
 
-            log.info(
-                "📰 [%s] %s → sent=%.2f conf=%.2f cat=%s | %s",
-                coin,
-                article.source,
-                result.sentiment,
-                result.confidence,
-                result.category,
-                article.title[:80],
-            )
 
-            # Persistir
-            if db:
-                inserted = db.insert_sentiment(article, coin, result)
-                if inserted:
-                    new_count += 1
-                    if metrics:
-                        metrics["articles_processed"].inc()
-            else:
-                new_count += 1
-                if metrics:
-                    metrics["articles_processed"].inc()
-
-            # Pequena pausa entre classificações para não sobrecarregar Ollama
-            time.sleep(0.5)
+# ── Main Loop ──────────────────────────────────────────────────────────
 
-    return new_count
 
+def run_cycle(db: Optional[NewsDatabase], metrics: Optional[Dict]) -> int:
+    """Um ciclo: busca → processa → confirma os validadores se a gravação deu certo."""
+    # 1. Buscar todos os feeds
+    articles = fetch_all_feeds(metrics)
+    log.info("Total de artigos coletados: %d", len(articles))
+
+    # 2. Processar (deduplica + classifica + persiste)
+    failures_before = db.write_failures if db else 0
+    new_count = process_articles(articles, db, metrics)
+    log.info("Artigos novos processados: %d", new_count)
+    if db and db.write_failures != failures_before:
+        # Sem os validadores novos o próximo ciclo baixa o feed de novo (sem 304)
+        log.warning("Falha ao gravar artigos; feeds serão rebuscados no próximo ciclo")
+        FEED_PENDING_VALIDATORS.clear()
+    else:
+        commit_feed_validators()
 
-# ── Main Loop ──────────────────────────────────────────────────────────
+    # 3. Atualizar métricas Prometheus
+    if db and metrics:
+        update_prometheus_metrics(db, metrics, TRACKED_COINS)
+    return new_count
 
 
 def main() -> None:
@@ -1136,19 +1406,10 @@ def main() -> None:
 
     while running:
         try:
-            # 1. Buscar todos os feeds
-            articles = fetch_all_feeds()
-            log.info("Total de artigos coletados: %d", len(articles))
-
-            # 2. Processar (deduplica + classifica + persiste)
-            new_count = process_articles(articles, db, prom_metrics)
-            log.info("Artigos novos processados: %d", new_count)
-
-            # 3. Atualizar métricas Prometheus
-            if db and prom_metrics:
-                update_prometheus_metrics(db, prom_metrics, TRACKED_COINS)
-
+            run_cycle(db, prom_metrics)
         except Exception as e:
+            # Validadores do ciclo descartados: os feeds voltam sem GET condicional
+            FEED_PENDING_VALIDATORS.clear()
             log.error("Erro no loop principal: %s", e)
             if prom_metrics:
                 prom_metrics["fetch_errors"].inc()
@@ -10,9 +10,15 @@ Indexa:
 
 import os
 import sys
+import json
 import asyncio
+import hashlib
+import argparse
 from pathlib import Path
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
 
 # Adicionar ao path
 sys.path.insert(0, str(Path(__file__).parent))
@@ -32,6 +38,18 @@ CHROMA_PATH = Path(__file__).parent / "chroma_db"
 DOCS_PATH = Path(__file__).parent / "docs"
 CODE_PATH = Path(__file__).parent
 
+# Manifesto incremental: coleção → fonte → hash do conteúdo + ids dos chunks
+MANIFEST_PATH = CHROMA_PATH / "index_manifest.json"
+
+# Embeddings em lote no Ollama (nomic-embed-text@GPU1). O /api/embed devolve
+# vetores normalizados e o /api/embeddings (embedding function da coleção, usada
+# nas queries) não: os lotes só são usados em coleções com distância cosseno.
+EMBED_URL = os.getenv("OLLAMA_EMBED_URL", "http://192.168.15.2:11435")
+EMBED_MODEL = os.getenv("OLLAMA_EMBED_MODEL", "nomic-embed-text")
+EMBED_BATCH_SIZE = int(os.getenv("RAG_EMBED_BATCH_SIZE", "64"))
+EMBED_CONCURRENCY = int(os.getenv("RAG_EMBED_CONCURRENCY", "2"))
+EMBED_TIMEOUT = float(os.getenv("RAG_EMBED_TIMEOUT", "120"))
+
 # Extensões de código para indexar
 CODE_EXTENSIONS = {'.py', '.js', '.ts', '.go', '.rs', '.java', '.cs', '.php', '.sh', '.md'}
 
@@ -49,47 +67,135 @@ IMPORTANT_FILES = [
 ]
 
 
+def content_hash(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class IndexManifest:
+    """Manifesto do que já está no Chroma: por coleção, fonte → hash e ids dos chunks"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.data: dict = {}
+        try:
+            self.data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self.data = {}
+
+    def get(self, collection: str, source: str):
+        return self.data.get(collection, {}).get(source)
+
+    def set(self, collection: str, source: str, digest: str, ids: list):
+        self.data.setdefault(collection, {})[source] = {"hash": digest, "ids": ids}
+
+    def remove(self, collection: str, source: str):
+        return self.data.get(collection, {}).pop(source, None)
+
+    def sources(self, collection: str) -> list:
+        return list(self.data.get(collection, {}))
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(self.data, ensure_ascii=False, indent=1, sort_keys=True), encoding="utf-8")
+        tmp.replace(self.path)
+
+
+class BatchEmbedder:
+    """Embeddings em lote via /api/embed do Ollama, com no máximo N requisições simultâneas.
+
+    Se algum lote falhar, ``embed`` retorna None e o upsert segue sem
+    embeddings — a embedding function da coleção calcula como antes.
+    """
+
+    def __init__(self, url: str = EMBED_URL, model: str = EMBED_MODEL,
+                 batch_size: int = EMBED_BATCH_SIZE, concurrency: int = EMBED_CONCURRENCY):
+        self.url = url.rstrip("/")
+        self.model = model
+        self.batch_size = max(1, batch_size)
+        self.concurrency = max(1, concurrency)
+        self.session = requests.Session()
+        self.requests = 0
+        self.failures = 0
+
+    def _embed_batch(self, texts: list):
+        self.requests += 1
+        try:
+            resp = self.session.post(
+                f"{self.url}/api/embed",
+                json={"model": self.model, "input": texts},
+                timeout=EMBED_TIMEOUT,
+            )
+            resp.raise_for_status()
+            embeddings = resp.json().get("embeddings") or []
+            if len(embeddings) == len(texts):
+                return embeddings
+            raise ValueError(f"{len(embeddings)} embeddings para {len(texts)} textos")
+        except Exception as e:
+            self.failures += 1
+            print(f"   ⚠️ Embedding em lote falhou ({e}); a coleção calcula os embeddings")
+            return None
+
+    def embed(self, texts: list):
+        """Embeddings na mesma ordem de ``texts`` (None se algum lote ficou sem)"""
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            results = list(pool.map(self._embed_batch, batches))
+        if any(result is None for result in results):
+            return None
+        return [vec for result in results for vec in result]
+
+
 class RAGIndexer:
     """Indexador de documentação para o RAG"""
     
-    def __init__(self):
+    def __init__(self, force: bool = False):
         CHROMA_PATH.mkdir(parents=True, exist_ok=True)
         
         # Embedding GPU local via nomic-embed-text@GPU1 (:11435); fallback CPU.
-        embed_url = os.getenv("OLLAMA_EMBED_URL", "http://192.168.15.2:11435")
+        embed_url = EMBED_URL
+        # Lotes pré-embedados só quando a coleção também usa o Ollama (mesma dimensão)
+        # e compara por cosseno (ver _accepts_batch_embeddings)
+        self.embedder = None
         try:
             self.embedding_fn = embedding_functions.OllamaEmbeddingFunction(
-                model_name="nomic-embed-text",
+                model_name=EMBED_MODEL,
                 url=f"{embed_url}/api/embeddings",
             )
+            self.embedder = BatchEmbedder(url=embed_url)
         except Exception:
             self.embedding_fn = embedding_functions.DefaultEmbeddingFunction()
         
+        # Só fontes com hash novo são re-chunkadas e re-embedadas (force ignora o manifesto)
+        self.force = force
+        self.manifest = IndexManifest(MANIFEST_PATH)
+        self.stats = {"unchanged": 0, "changed": 0, "removed": 0, "chunks": 0, "deleted_chunks": 0}
+        
         self.client = chromadb.PersistentClient(path=str(CHROMA_PATH))
         
         # Coleções
         self.docs_collection = self.client.get_or_create_collection(
             name="system_documentation",
             embedding_function=self.embedding_fn,
-            metadata={"description": "Documentação do sistema Shared Auto-Dev"}
+            metadata={"description": "Documentação do sistema Shared Auto-Dev", "hnsw:space": "cosine"}
         )
         
         self.code_collection = self.client.get_or_create_collection(
             name="system_code",
             embedding_function=self.embedding_fn,
-            metadata={"description": "Código fonte do sistema"}
+            metadata={"description": "Código fonte do sistema", "hnsw:space": "cosine"}
         )
         
         self.knowledge_collection = self.client.get_or_create_collection(
             name="homelab_knowledge",
             embedding_function=self.embedding_fn,
-            metadata={"description": "Conhecimento do homelab"}
+            metadata={"description": "Conhecimento do homelab", "hnsw:space": "cosine"}
         )
         
         self.solutions_collection = self.client.get_or_create_collection(
             name="solutions",
             embedding_function=self.embedding_fn,
-            metadata={"description": "Soluções desenvolvidas"}
+            metadata={"description": "Soluções desenvolvidas", "hnsw:space": "cosine"}
         )
         
     def _chunk_text(self, text: str, chunk_size: int = 1000, overlap: int = 200) -> list:
@@ -113,6 +219,95 @@ class RAGIndexer:
             
         return chunks
     
+    def _sync_sources(self, collection, sources: dict, build_records, unreadable=()) -> int:
+        """Sincroniza ``collection`` com ``sources`` (fonte → conteúdo).
+
+        Fontes com o mesmo hash do manifesto são puladas; das alteradas, os ids
+        que sumiram são apagados e os chunks novos são embedados em lote.
+        Fontes que deixaram de existir têm todos os chunks removidos; as que
+        existem mas não puderam ser lidas (``unreadable``) ficam como estão.
+        Retorna o número de chunks (re)indexados.
+        """
+        name = collection.name
+        records = []
+        updates = []
+        for source, content in sources.items():
+            digest = content_hash(content)
+            entry = self.manifest.get(name, source)
+            if entry and entry["hash"] == digest and not self.force:
+                self.stats["unchanged"] += 1
+                continue
+            file_records = build_records(source, content)
+            new_ids = [record[0] for record in file_records]
+            try:
+                if entry:
+                    stale = sorted(set(entry["ids"]) - set(new_ids))
+                    if stale:
+                        collection.delete(ids=stale)
+                        self.stats["deleted_chunks"] += len(stale)
+                else:
+                    # Sem manifesto (primeira execução): limpa restos de execuções antigas
+                    collection.delete(where={"source": source})
+            except Exception as e:
+                print(f"   ⚠️ Erro removendo chunks antigos de {source}: {e}")
+            self.stats["changed"] += 1
+            records.extend(file_records)
+            updates.append((source, digest, new_ids))
+
+        for source in self.manifest.sources(name):
+            if source in sources or source in unreadable:
+                continue
+            entry = self.manifest.remove(name, source)
+            try:
+                if entry and entry["ids"]:
+                    collection.delete(ids=entry["ids"])
+                    self.stats["deleted_chunks"] += len(entry["ids"])
+            except Exception as e:
+                print(f"   ⚠️ Erro removendo {source}: {e}")
+            self.stats["removed"] += 1
+
+        indexed = self._upsert_batched(collection, records)
+        if indexed == len(records):
+            for source, digest, ids in updates:
+                self.manifest.set(name, source, digest, ids)
+        self.manifest.save()
+        return indexed
+
+    def _upsert_batched(self, collection, records: list) -> int:
+        """Upsert em lotes de EMBED_BATCH_SIZE com embeddings pré-calculados quando possível"""
+        if not records:
+            return 0
+        batch_size = max(1, EMBED_BATCH_SIZE)
+        embeddings = None
+        if self.embedder is not None and self._accepts_batch_embeddings(collection):
+            embeddings = self.embedder.embed([record[1] for record in records])
+        indexed = 0
+        for start in range(0, len(records), batch_size):
+            batch = records[start:start + batch_size]
+            kwargs = {
+                "ids": [record[0] for record in batch],
+                "documents": [record[1] for record in batch],
+                "metadatas": [record[2] for record in batch],
+            }
+            if embeddings is not None:
+                kwargs["embeddings"] = embeddings[start:start + batch_size]
+            try:
+                collection.upsert(**kwargs)
+                indexed += len(batch)
+            except Exception as e:
+                print(f"   ❌ Erro indexando lote {start // batch_size} de {collection.name}: {e}")
+        self.stats["chunks"] += indexed
+        return indexed
+    
+    @staticmethod
+    def _accepts_batch_embeddings(collection) -> bool:
+        """Coleções antigas (distância L2) recebem só vetores da própria embedding function.
+
+        Misturar vetores normalizados (/api/embed) com os da query (/api/embeddings)
+        distorce a distância L2; no cosseno a norma não importa.
+        """
+        return (collection.metadata or {}).get("hnsw:space") == "cosine"
+
     def index_documentation(self):
         """Indexa arquivos de documentação"""
         print("\n📚 Indexando documentação...")
@@ -121,37 +316,38 @@ class RAGIndexer:
             print(f"   Diretório {DOCS_PATH} não existe")
             return
         
-        indexed = 0
+        sources = {}
+        unreadable = set()
         for doc_file in DOCS_PATH.glob("*.md"):
-            content = doc_file.read_text(encoding='utf-8')
-            chunks = self._chunk_text(content)
-            
-            for i, chunk in enumerate(chunks):
-                doc_id = f"doc_{doc_file.stem}_{i}"
-                
-                try:
-                    self.docs_collection.upsert(
-                        ids=[doc_id],
-                        documents=[chunk],
-                        metadatas=[{
-                            "source": str(doc_file),
-                            "filename": doc_file.name,
-                            "type": "documentation",
-                            "chunk": i,
-                            "indexed_at": datetime.now().isoformat()
-                        }]
-                    )
-                    indexed += 1
-                except Exception as e:
-                    print(f"   ❌ Erro indexando {doc_file.name}: {e}")
+            try:
+                sources[str(doc_file)] = doc_file.read_text(encoding='utf-8')
+            except Exception as e:
+                unreadable.add(str(doc_file))
+                print(f"   ❌ Erro lendo {doc_file.name}: {e}")
         
+        def build_records(source: str, content: str) -> list:
+            doc_file = Path(source)
+            indexed_at = datetime.now().isoformat()
+            return [
+                (f"doc_{doc_file.stem}_{i}", chunk, {
+                    "source": source,
+                    "filename": doc_file.name,
+                    "type": "documentation",
+                    "chunk": i,
+                    "indexed_at": indexed_at
+                })
+                for i, chunk in enumerate(self._chunk_text(content))
+            ]
+        
+        indexed = self._sync_sources(self.docs_collection, sources, build_records, unreadable)
         print(f"   ✅ {indexed} chunks de documentação indexados")
         
     def index_code(self):
         """Indexa código fonte importante"""
         print("\n💻 Indexando código fonte...")
         
-        indexed = 0
+        sources = {}
+        unreadable = set()
         for rel_path in IMPORTANT_FILES:
             file_path = CODE_PATH / rel_path
             
@@ -160,34 +356,29 @@ class RAGIndexer:
                 continue
             
             try:
-                content = file_path.read_text(encoding='utf-8')
+                sources[str(file_path)] = file_path.read_text(encoding='utf-8')
             except Exception as e:
+                unreadable.add(str(file_path))
                 print(f"   ❌ Erro lendo {rel_path}: {e}")
-                continue
-            
+        
+        def build_records(source: str, content: str) -> list:
+            file_path = Path(source)
+            indexed_at = datetime.now().isoformat()
             # Extrair docstrings e comentários importantes
             chunks = self._extract_code_chunks(content, file_path.suffix)
-            
-            for i, (chunk, chunk_type) in enumerate(chunks):
-                doc_id = f"code_{file_path.stem}_{i}"
-                
-                try:
-                    self.code_collection.upsert(
-                        ids=[doc_id],
-                        documents=[chunk],
-                        metadatas=[{
-                            "source": str(file_path),
-                            "filename": file_path.name,
-                            "language": self._get_language(file_path.suffix),
-                            "type": chunk_type,
-                            "chunk": i,
-                            "indexed_at": datetime.now().isoformat()
-                        }]
-                    )
-                    indexed += 1
-                except Exception as e:
-                    print(f"   ❌ Erro indexando {rel_path}: {e}")
+            return [
+                (f"code_{file_path.stem}_{i}", chunk, {
+                    "source": source,
+                    "filename": file_path.name,
+                    "language": self._get_language(file_path.suffix),
+                    "type": chunk_type,
+                    "chunk": i,
+                    "indexed_at": indexed_at
+                })
+                for i, (chunk, chunk_type) in enumerate(chunks)
+            ]
         
+        indexed = self._sync_sources(self.code_collection, sources, build_records, unreadable)
         print(f"   ✅ {indexed} chunks de código indexados")
     
     def _extract_code_chunks(self, content: str, extension: str) -> list:
@@ -321,18 +512,20 @@ class RAGIndexer:
             }
         ]
         
-        for item in knowledge_items:
-            try:
-                self.knowledge_collection.upsert(
-                    ids=[item["id"]],
-                    documents=[item["content"]],
-                    metadatas=[{
-                        "type": item["type"],
-                        "indexed_at": datetime.now().isoformat()
-                    }]
-                )
-            except Exception as e:
-                print(f"   ❌ Erro indexando {item['id']}: {e}")
+        items = {item["id"]: item for item in knowledge_items}
+        
+        def build_records(source: str, content: str) -> list:
+            return [(source, content, {
+                "source": source,
+                "type": items[source]["type"],
+                "indexed_at": datetime.now().isoformat()
+            })]
+        
+        self._sync_sources(
+            self.knowledge_collection,
+            {item["id"]: item["content"] for item in knowledge_items},
+            build_records,
+        )
         
         print(f"   ✅ {len(knowledge_items)} itens de conhecimento indexados")
     
@@ -345,29 +538,30 @@ class RAGIndexer:
             print("   Diretório de soluções não existe")
             return
         
-        indexed = 0
+        sources = {}
+        unreadable = set()
         for solution_dir in solutions_path.iterdir():
             if not solution_dir.is_dir():
                 continue
             
             readme = solution_dir / "README.md"
             if readme.exists():
-                content = readme.read_text(encoding='utf-8')
-                
                 try:
-                    self.solutions_collection.upsert(
-                        ids=[f"solution_{solution_dir.name}"],
-                        documents=[content],
-                        metadatas=[{
-                            "solution_name": solution_dir.name,
-                            "path": str(solution_dir),
-                            "indexed_at": datetime.now().isoformat()
-                        }]
-                    )
-                    indexed += 1
+                    sources[str(readme)] = readme.read_text(encoding='utf-8')
                 except Exception as e:
-                    print(f"   ❌ Erro indexando {solution_dir.name}: {e}")
+                    unreadable.add(str(readme))
+                    print(f"   ❌ Erro lendo {readme}: {e}")
+        
+        def build_records(source: str, content: str) -> list:
+            solution_dir = Path(source).parent
+            return [(f"solution_{solution_dir.name}", content, {
+                "source": source,
+                "solution_name": solution_dir.name,
+                "path": str(solution_dir),
+                "indexed_at": datetime.now().isoformat()
+            })]
         
+        indexed = self._sync_sources(self.solutions_collection, sources, build_records, unreadable)
         print(f"   ✅ {indexed} soluções indexadas")
     
     def show_stats(self):
@@ -377,6 +571,13 @@ class RAGIndexer:
         print(f"   Código: {self.code_collection.count()} documentos")
         print(f"   Conhecimento: {self.knowledge_collection.count()} documentos")
         print(f"   Soluções: {self.solutions_collection.count()} documentos")
+        print(
+            f"   Incremental: {self.stats['unchanged']} fontes sem mudança, "
+            f"{self.stats['changed']} reindexadas, {self.stats['removed']} removidas, "
+            f"{self.stats['chunks']} chunks embedados, {self.stats['deleted_chunks']} chunks apagados"
+        )
+        if self.embedder is not None:
+            print(f"   Embeddings: {self.embedder.requests} requisições em lote, {self.embedder.failures} falhas")
         
     def search(self, query: str, n_results: int = 5) -> dict:
         """Busca em todas as coleções"""
@@ -401,11 +602,16 @@ class RAGIndexer:
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Indexa a documentação no RAG (ChromaDB)")
+    parser.add_argument("--force", action="store_true",
+                        help="Reindexa tudo, ignorando o manifesto incremental")
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("🚀 Shared Auto-Dev RAG Indexer")
     print("=" * 60)
     
-    indexer = RAGIndexer()
+    indexer = RAGIndexer(force=args.force)
     
     # Indexar tudo
     indexer.index_documentation()
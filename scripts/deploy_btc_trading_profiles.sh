@@ -551,6 +551,9 @@ sync_trading_runtime() {
   sync_runtime_file \
     "${REPO_ROOT}/btc_trading_agent/market_rag.py" \
     "${TARGET_DIR}/market_rag.py"
+  sync_runtime_file \
+    "${REPO_ROOT}/btc_trading_agent/price_lookup.py" \
+    "${TARGET_DIR}/price_lookup.py"
   sync_runtime_file \
     "${REPO_ROOT}/btc_trading_agent/kucoin_api.py" \
     "${TARGET_DIR}/kucoin_api.py"
@@ -23,6 +23,8 @@ import argparse
 import asyncio
 import base64
 from collections import deque
+import contextlib
+import contextvars
 import hashlib
 import json
 import logging
@@ -31,6 +33,7 @@ import glob
 import inspect
 import random
 import re
+import sqlite3
 import subprocess
 import sys
 import time
@@ -40,6 +43,7 @@ import urllib.parse
 import urllib.request
 import uuid
 import xml.etree.ElementTree as ET
+from contextlib import closing
 from dataclasses import asdict, dataclass, field
 from datetime import datetime
 from pathlib import Path
@@ -52,7 +56,7 @@ except ImportError:  # pragma: no cover - ambiente nao Unix.
 
 import httpx
 from bs4 import BeautifulSoup
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Response
 from pydantic import BaseModel, Field
 
 try:
@@ -109,6 +113,49 @@ if not any(getattr(handler, "_bn_acervo_handler", False) for handler in _root_lo
 
 _JOB_TASKS: dict[str, asyncio.Task[Any]] = {}
 
+try:
+    from prometheus_client import CollectorRegistry, Counter, Gauge, generate_latest
+except ImportError:  # pragma: no cover - metricas opcionais
+    _METRICS_REGISTRY = None
+    _DOC_CACHE_REQUESTS = _DOC_CACHE_GPU_SECONDS_SAVED = _DOC_CACHE_BYTES = None
+    _RUN_WALL_SECONDS = _STAGE_BUSY_SECONDS = _STAGE_UTILIZATION = None
+else:
+    # Registro proprio: o modulo pode ser importado mais de uma vez (CLI/API/testes)
+    _METRICS_REGISTRY = CollectorRegistry()
+    _DOC_CACHE_REQUESTS = Counter(
+        "bn_acervo_doc_cache_requests_total",
+        "Consultas ao cache de documentos do BN Acervo",
+        ["kind", "result"],
+        registry=_METRICS_REGISTRY,
+    )
+    _DOC_CACHE_GPU_SECONDS_SAVED = Counter(
+        "bn_acervo_doc_cache_gpu_seconds_saved_total",
+        "Segundos de OCR/resumo em GPU evitados por hits no cache",
+        registry=_METRICS_REGISTRY,
+    )
+    _DOC_CACHE_BYTES = Gauge(
+        "bn_acervo_doc_cache_bytes",
+        "Bytes ocupados pelos documentos em cache",
+        registry=_METRICS_REGISTRY,
+    )
+    _RUN_WALL_SECONDS = Gauge(
+        "bn_acervo_run_wall_seconds",
+        "Tempo total (wall-clock) da ultima investigacao",
+        registry=_METRICS_REGISTRY,
+    )
+    _STAGE_BUSY_SECONDS = Counter(
+        "bn_acervo_stage_busy_seconds_total",
+        "Segundos de trabalho acumulados por estagio do pipeline",
+        ["stage"],
+        registry=_METRICS_REGISTRY,
+    )
+    _STAGE_UTILIZATION = Gauge(
+        "bn_acervo_stage_utilization",
+        "Ocupacao do estagio na ultima investigacao (trabalho / (duracao x workers))",
+        ["stage"],
+        registry=_METRICS_REGISTRY,
+    )
+
 
 def _job_is_active_status(status: Any) -> bool:
     return str(status or "").strip().lower() in {"queued", "running"}
@@ -1585,6 +1632,8 @@ class DownloadedDocument:
     extracted_text: str = ""
     summary: str = ""
     skipped_reason: str | None = None
+    sha256: str | None = None
+    cache_hit: bool = False
 
 
 @dataclass
@@ -1885,21 +1934,82 @@ class InvestigationMemoryStore:
 
 
 class InvestigationJobStore:
-    """Persistencia simples de jobs assincronos por arquivo."""
+    """Persistencia de jobs assincronos com status indexado e log append-only.
+
+    Layout em ``base_dir``:
+    - ``jobs.sqlite3``: tabela ``jobs`` pequena (status, fase, progresso, erro,
+      payload) usada para polling, listagem e filtros — O(1) por job.
+    - ``<job_id>/events.jsonl``: log append-only; ``append_log`` so anexa uma linha
+      e compacta para as ultimas ``LOG_LIMIT`` quando passa de ``EVENTS_MAX_BYTES``.
+    - ``<job_id>/partial_result.json`` e ``result.json``: campos pesados, lidos
+      apenas quando ``load(..., include_results=True)``.
+
+    Jobs no formato antigo (``<job_id>.json``) sao importados na inicializacao.
+    """
+
+    LOG_LIMIT = 250
+    EVENTS_MAX_BYTES = 512 * 1024
+    HEAVY_FIELDS = ("partial_result", "result")
+    STATUS_FIELDS = ("status", "phase", "progress_percent", "error")
 
     def __init__(self, base_dir: Path) -> None:
         self.base_dir = base_dir
         self.base_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = self.base_dir / "jobs.sqlite3"
         self._lock = threading.Lock()
+        self._init_db()
+        self._import_legacy_jobs()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.db_path, timeout=10)
+        connection.row_factory = sqlite3.Row
+        return connection
+
+    def _init_db(self) -> None:
+        with closing(self._connect()) as connection, connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    job_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    phase TEXT NOT NULL,
+                    progress_percent INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    query TEXT NOT NULL DEFAULT '',
+                    payload TEXT NOT NULL DEFAULT '{}',
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                )
+                """
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status_updated ON jobs(status, updated_at)")
+            connection.execute("CREATE INDEX IF NOT EXISTS idx_jobs_updated ON jobs(updated_at)")
 
-    def job_path(self, job_id: str) -> Path:
-        return self.base_dir / f"{job_id}.json"
+    def job_dir(self, job_id: str) -> Path:
+        return self.base_dir / job_id
+
+    def _events_path(self, job_id: str) -> Path:
+        return self.job_dir(job_id) / "events.jsonl"
+
+    def _heavy_path(self, job_id: str, field_name: str) -> Path:
+        return self.job_dir(job_id) / f"{field_name}.json"
+
+    def _import_legacy_jobs(self) -> None:
+        for path in sorted(self.base_dir.glob("*.json")):
+            try:
+                data = json.loads(path.read_text(encoding="utf-8"))
+            except Exception:
+                logger.warning("Falha ao ler job legado %s", path.name, exc_info=True)
+                continue
+            if isinstance(data, dict) and str(data.get("job_id") or "").strip():
+                self.save(data)
+            path.rename(path.with_name(path.name + ".migrated"))
 
     def create(self, payload: AcervoStoryRequest) -> dict[str, Any]:
         now = datetime.now().isoformat()
-        job_id = uuid.uuid4().hex
         record = {
-            "job_id": job_id,
+            "job_id": uuid.uuid4().hex,
             "status": "queued",
             "created_at": now,
             "updated_at": now,
@@ -1914,61 +2024,558 @@ class InvestigationJobStore:
         self.save(record)
         return record
 
-    def load(self, job_id: str) -> dict[str, Any] | None:
-        path = self.job_path(job_id)
+    def _row_to_record(self, row: sqlite3.Row) -> dict[str, Any]:
+        return {
+            "job_id": row["job_id"],
+            "status": row["status"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"],
+            "phase": row["phase"],
+            "progress_percent": int(row["progress_percent"] or 0),
+            "payload": json.loads(row["payload"] or "{}"),
+            "error": row["error"],
+        }
+
+    def status(self, job_id: str) -> dict[str, Any] | None:
+        """Registro leve (sem logs nem resultados) direto da tabela indexada."""
+        with closing(self._connect()) as connection:
+            row = connection.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._row_to_record(row) if row is not None else None
+
+    def load(
+        self,
+        job_id: str,
+        *,
+        include_results: bool = True,
+        log_limit: int = LOG_LIMIT,
+    ) -> dict[str, Any] | None:
+        record = self.status(job_id)
+        if record is None:
+            return None
+        record["logs"] = self.read_logs(job_id, limit=log_limit)
+        for field_name in self.HEAVY_FIELDS:
+            record[field_name] = self._read_heavy(job_id, field_name) if include_results else None
+        return record
+
+    def _read_heavy(self, job_id: str, field_name: str) -> Any:
+        path = self._heavy_path(job_id, field_name)
         if not path.exists():
             return None
         try:
             return json.loads(path.read_text(encoding="utf-8"))
         except Exception:
-            logger.warning("Falha ao ler job %s", job_id, exc_info=True)
+            logger.warning("Falha ao ler %s do job %s", field_name, job_id, exc_info=True)
             return None
 
-    def iter_records(self) -> list[dict[str, Any]]:
-        records: list[dict[str, Any]] = []
-        for path in sorted(self.base_dir.glob("*.json")):
+    def _write_heavy(self, job_id: str, field_name: str, value: Any) -> None:
+        path = self._heavy_path(job_id, field_name)
+        if value is None:
+            path.unlink(missing_ok=True)
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps(value, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def read_logs(self, job_id: str, limit: int = LOG_LIMIT) -> list[dict[str, Any]]:
+        """Ultimas ``limit`` linhas do log, lidas a partir do fim do arquivo."""
+        path = self._events_path(job_id)
+        if limit <= 0 or not path.exists():
+            return []
+        block_size = 64 * 1024
+        with path.open("rb") as handle:
+            handle.seek(0, os.SEEK_END)
+            position = handle.tell()
+            data = b""
+            while position > 0 and data.count(b"\n") <= limit:
+                step = min(block_size, position)
+                position -= step
+                handle.seek(position)
+                data = handle.read(step) + data
+        entries: list[dict[str, Any]] = []
+        for line in data.splitlines()[-limit:]:
             try:
-                data = json.loads(path.read_text(encoding="utf-8"))
-            except Exception:
-                logger.warning("Falha ao ler job %s", path.name, exc_info=True)
+                entries.append(json.loads(line))
+            except ValueError:
                 continue
-            if isinstance(data, dict) and str(data.get("job_id") or "").strip():
-                records.append(data)
+        return entries
+
+    def iter_records(self, *, include_results: bool = False) -> list[dict[str, Any]]:
+        with closing(self._connect()) as connection:
+            rows = connection.execute("SELECT * FROM jobs ORDER BY created_at").fetchall()
+        records = [self._row_to_record(row) for row in rows]
+        if include_results:
+            for record in records:
+                for field_name in self.HEAVY_FIELDS:
+                    record[field_name] = self._read_heavy(record["job_id"], field_name)
         return records
 
+    def list_jobs(self, *, statuses: Iterable[str] | None = None, limit: int = 50) -> list[dict[str, Any]]:
+        """Jobs mais recentes primeiro, opcionalmente filtrados por status (via indice)."""
+        query = "SELECT * FROM jobs"
+        params: list[Any] = []
+        wanted = [str(item).strip().lower() for item in statuses or [] if str(item).strip()]
+        if wanted:
+            query += f" WHERE status IN ({', '.join('?' for _ in wanted)})"
+            params.extend(wanted)
+        query += " ORDER BY updated_at DESC LIMIT ?"
+        params.append(max(1, int(limit)))
+        with closing(self._connect()) as connection:
+            rows = connection.execute(query, params).fetchall()
+        return [self._row_to_record(row) for row in rows]
+
     def list_active(self) -> list[dict[str, Any]]:
-        return [record for record in self.iter_records() if _job_is_active_status(record.get("status"))]
+        return self.list_jobs(statuses=("queued", "running"), limit=1000)
+
+    def _rewrite_logs(self, job_id: str, logs: list[dict[str, Any]]) -> None:
+        events_path = self._events_path(job_id)
+        events_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = events_path.with_suffix(".jsonl.tmp")
+        with tmp_path.open("w", encoding="utf-8") as handle:
+            for entry in logs[-self.LOG_LIMIT:]:
+                handle.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, events_path)
 
     def save(self, record: dict[str, Any]) -> None:
+        """Grava status, campos pesados presentes e (se houver a chave) os logs do registro."""
+        job_id = str(record["job_id"])
+        payload = record.get("payload") or {}
         with self._lock:
-            self.job_path(str(record["job_id"])).write_text(json.dumps(record, ensure_ascii=False, indent=2), encoding="utf-8")
+            with closing(self._connect()) as connection, connection:
+                connection.execute(
+                    """
+                    INSERT OR REPLACE INTO jobs
+                        (job_id, status, phase, progress_percent, error, query, payload, created_at, updated_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        job_id,
+                        str(record.get("status") or "queued"),
+                        str(record.get("phase") or "queued"),
+                        int(record.get("progress_percent") or 0),
+                        record.get("error"),
+                        str(payload.get("query") or "") if isinstance(payload, dict) else "",
+                        json.dumps(payload, ensure_ascii=False),
+                        str(record.get("created_at") or datetime.now().isoformat()),
+                        str(record.get("updated_at") or datetime.now().isoformat()),
+                    ),
+                )
+            self.job_dir(job_id).mkdir(parents=True, exist_ok=True)
+            for field_name in self.HEAVY_FIELDS:
+                # Registro leve (status/load sem resultados) nao apaga o que esta em disco;
+                # limpar um campo pesado e explicito via update(campo=None)
+                if record.get(field_name) is not None:
+                    self._write_heavy(job_id, field_name, record[field_name])
+            if "logs" in record:
+                self._rewrite_logs(job_id, list(record.get("logs") or []))
 
     def update(self, job_id: str, **fields: Any) -> dict[str, Any] | None:
-        record = self.load(job_id)
-        if record is None:
-            return None
-        record.update(fields)
-        record["updated_at"] = datetime.now().isoformat()
-        self.save(record)
-        return record
+        """Atualiza status e/ou campos pesados; retorna o registro leve (use ``load`` para o completo)."""
+        status_fields = {key: fields[key] for key in self.STATUS_FIELDS if key in fields}
+        now = datetime.now().isoformat()
+        assignments = ", ".join(f"{key} = ?" for key in status_fields)
+        with self._lock:
+            with closing(self._connect()) as connection, connection:
+                cursor = connection.execute(
+                    f"UPDATE jobs SET {assignments + ', ' if assignments else ''}updated_at = ? WHERE job_id = ?",
+                    (*status_fields.values(), now, job_id),
+                )
+                if cursor.rowcount == 0:
+                    return None
+            for field_name in self.HEAVY_FIELDS:
+                if field_name in fields:
+                    self._write_heavy(job_id, field_name, fields[field_name])
+        return self.status(job_id)
 
     def append_log(self, job_id: str, *, level: str, message: str) -> dict[str, Any] | None:
-        record = self.load(job_id)
-        if record is None:
-            return None
-        logs = record.setdefault("logs", [])
-        logs.append(
-            {
-                "timestamp": datetime.now().isoformat(),
-                "level": level,
-                "message": _truncate(message, 1200),
-            }
+        """Anexa uma linha ao log do job sem reescrever o registro."""
+        entry = {
+            "timestamp": datetime.now().isoformat(),
+            "level": level,
+            "message": _truncate(message, 1200),
+        }
+        with self._lock:
+            with closing(self._connect()) as connection, connection:
+                cursor = connection.execute(
+                    "UPDATE jobs SET updated_at = ? WHERE job_id = ?", (entry["timestamp"], job_id)
+                )
+                if cursor.rowcount == 0:
+                    return None
+            events_path = self._events_path(job_id)
+            events_path.parent.mkdir(parents=True, exist_ok=True)
+            with events_path.open("a", encoding="utf-8") as handle:
+                handle.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                size = handle.tell()
+            if size > self.EVENTS_MAX_BYTES:
+                # Compacta: so as ultimas LOG_LIMIT linhas sao lidas de volta
+                self._rewrite_logs(job_id, self.read_logs(job_id, limit=self.LOG_LIMIT))
+        return entry
+
+
+class DocumentCache:
+    """Cache enderecado por conteudo de documentos baixados e de sua digestao.
+
+    - ``urls``: URL -> SHA-256 do conteudo (objetos digitais da BN sao estaveis;
+      entradas expiram apos ``url_ttl_seconds`` para revalidar).
+    - ``blobs``: arquivo em ``blobs/<sha[:2]>/<sha><sufixo>``, deduplicado por
+      conteudo, com ``last_access`` para despejo LRU dentro de ``max_bytes``.
+    - ``digests``: resultado da digestao (modo, texto, resumo) por variante de
+      pipeline (digesters, OCR, modelos) e segundos de GPU gastos.
+    - ``pages``: texto OCR por pagina de PDF, reaproveitado quando uma nova
+      investigacao pede mais paginas do mesmo documento. Paginas sem texto
+      (OCR vazio ou falho) nao sao gravadas e voltam a ser processadas.
+    - ``stats``: contadores persistentes de hit/miss e GPU-segundos poupados.
+    """
+
+    def __init__(self, base_dir: Path, *, max_bytes: int, url_ttl_seconds: float) -> None:
+        self.base_dir = base_dir
+        self.blob_dir = base_dir / "blobs"
+        self.blob_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = base_dir / "index.sqlite3"
+        self.max_bytes = max_bytes
+        self.url_ttl_seconds = url_ttl_seconds
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.db_path, timeout=10)
+        connection.row_factory = sqlite3.Row
+        return connection
+
+    def _init_db(self) -> None:
+        with closing(self._connect()) as connection, connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS urls (
+                    url TEXT PRIMARY KEY,
+                    sha256 TEXT NOT NULL,
+                    fetched_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_urls_sha ON urls(sha256);
+                CREATE TABLE IF NOT EXISTS blobs (
+                    sha256 TEXT PRIMARY KEY,
+                    suffix TEXT NOT NULL,
+                    media_type TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_access REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_blobs_access ON blobs(last_access);
+                CREATE TABLE IF NOT EXISTS digests (
+                    sha256 TEXT NOT NULL,
+                    variant TEXT NOT NULL,
+                    extraction_mode TEXT NOT NULL,
+                    extracted_text TEXT NOT NULL,
+                    summary TEXT NOT NULL,
+                    gpu_seconds REAL NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (sha256, variant)
+                );
+                CREATE TABLE IF NOT EXISTS pages (
+                    sha256 TEXT NOT NULL,
+                    page_number INTEGER NOT NULL,
+                    text TEXT NOT NULL,
+                    gpu_seconds REAL NOT NULL DEFAULT 0,
+                    PRIMARY KEY (sha256, page_number)
+                );
+                CREATE TABLE IF NOT EXISTS page_scans (
+                    sha256 TEXT PRIMARY KEY,
+                    max_requested INTEGER NOT NULL,
+                    pages_found INTEGER NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS stats (
+                    key TEXT PRIMARY KEY,
+                    value REAL NOT NULL DEFAULT 0
+                );
+                """
+            )
+
+    def blob_path(self, sha256: str, suffix: str) -> Path:
+        return self.blob_dir / sha256[:2] / f"{sha256}{suffix}"
+
+    def _bump(self, connection: sqlite3.Connection, key: str, amount: float = 1.0) -> None:
+        connection.execute(
+            "INSERT INTO stats(key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = value + excluded.value",
+            (key, amount),
         )
-        if len(logs) > 250:
-            record["logs"] = logs[-250:]
-        record["updated_at"] = datetime.now().isoformat()
-        self.save(record)
-        return record
+
+    def record(self, kind: str, hit: bool, gpu_seconds_saved: float = 0.0) -> None:
+        result = "hit" if hit else "miss"
+        with self._lock, closing(self._connect()) as connection, connection:
+            self._bump(connection, f"{kind}_{result}")
+            if gpu_seconds_saved > 0:
+                self._bump(connection, "gpu_seconds_saved", gpu_seconds_saved)
+        if _DOC_CACHE_REQUESTS is not None:
+            _DOC_CACHE_REQUESTS.labels(kind=kind, result=result).inc()
+            if gpu_seconds_saved > 0:
+                _DOC_CACHE_GPU_SECONDS_SAVED.inc(gpu_seconds_saved)
+
+    def lookup_url(self, url: str) -> dict[str, Any] | None:
+        """Blob ainda valido para a URL (atualiza o LRU) ou ``None``."""
+        with self._lock, closing(self._connect()) as connection, connection:
+            row = connection.execute(
+                """
+                SELECT b.sha256, b.suffix, b.media_type, b.size, u.fetched_at
+                FROM urls u JOIN blobs b ON b.sha256 = u.sha256
+                WHERE u.url = ?
+                """,
+                (url,),
+            ).fetchone()
+            if row is None or time.time() - row["fetched_at"] > self.url_ttl_seconds:
+                return None
+            path = self.blob_path(row["sha256"], row["suffix"])
+            if not path.exists():
+                connection.execute("DELETE FROM blobs WHERE sha256 = ?", (row["sha256"],))
+                return None
+            connection.execute("UPDATE blobs SET last_access = ? WHERE sha256 = ?", (time.time(), row["sha256"]))
+        return {"sha256": row["sha256"], "media_type": row["media_type"], "size": row["size"], "path": path}
+
+    def store_blob(self, url: str, source_path: Path, *, sha256: str, media_type: str, suffix: str) -> Path:
+        """Move o download para o armazenamento por conteudo e associa a URL."""
+        target = self.blob_path(sha256, suffix)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        now = time.time()
+        if target.exists():
+            source_path.unlink(missing_ok=True)
+        else:
+            os.replace(source_path, target)
+        size = target.stat().st_size
+        with self._lock, closing(self._connect()) as connection, connection:
+            connection.execute(
+                """
+                INSERT INTO blobs(sha256, suffix, media_type, size, last_access) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(sha256) DO UPDATE SET last_access = excluded.last_access
+                """,
+                (sha256, suffix, media_type, size, now),
+            )
+            connection.execute("INSERT OR REPLACE INTO urls(url, sha256, fetched_at) VALUES (?, ?, ?)", (url, sha256, now))
+        self.evict(keep={sha256})
+        return target
+
+    def get_digest(self, sha256: str, variant: str) -> dict[str, Any] | None:
+        with closing(self._connect()) as connection:
+            row = connection.execute(
+                "SELECT extraction_mode, extracted_text, summary, gpu_seconds FROM digests WHERE sha256 = ? AND variant = ?",
+                (sha256, variant),
+            ).fetchone()
+        return dict(row) if row is not None else None
+
+    def put_digest(self, sha256: str, variant: str, document: DownloadedDocument, gpu_seconds: float) -> None:
+        with self._lock, closing(self._connect()) as connection, connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    sha256,
+                    variant,
+                    document.extraction_mode,
+                    document.extracted_text,
+                    document.summary,
+                    gpu_seconds,
+                    time.time(),
+                ),
+            )
+
+    def get_pages(self, sha256: str) -> tuple[dict[int, tuple[str, float]], int, int]:
+        """Paginas OCR em cache, maior ``max_pages`` ja pedido e paginas existentes."""
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                "SELECT page_number, text, gpu_seconds FROM pages WHERE sha256 = ?", (sha256,)
+            ).fetchall()
+            scan = connection.execute(
+                "SELECT max_requested, pages_found FROM page_scans WHERE sha256 = ?", (sha256,)
+            ).fetchone()
+        pages = {int(row["page_number"]): (row["text"], float(row["gpu_seconds"])) for row in rows}
+        if scan is None:
+            return pages, 0, 0
+        return pages, int(scan["max_requested"]), int(scan["pages_found"])
+
+    def put_pages(
+        self,
+        sha256: str,
+        pages: dict[int, tuple[str, float]],
+        *,
+        max_requested: int,
+        pages_found: int,
+    ) -> None:
+        """Grava paginas com texto; paginas vazias ficam de fora para serem refeitas."""
+        pages = {number: page for number, page in pages.items() if (page[0] or "").strip()}
+        with self._lock, closing(self._connect()) as connection, connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?)",
+                [(sha256, number, text, seconds) for number, (text, seconds) in pages.items()],
+            )
+            connection.execute(
+                """
+                INSERT INTO page_scans VALUES (?, ?, ?)
+                ON CONFLICT(sha256) DO UPDATE SET
+                    max_requested = MAX(max_requested, excluded.max_requested),
+                    pages_found = MAX(pages_found, excluded.pages_found)
+                """,
+                (sha256, max_requested, pages_found),
+            )
+
+    def total_bytes(self) -> int:
+        with closing(self._connect()) as connection:
+            return int(connection.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0])
+
+    def evict(self, keep: Iterable[str] = ()) -> int:
+        """Remove blobs menos usados ate caber em ``max_bytes``; retorna quantos saiu."""
+        keep_set = set(keep)
+        removed = 0
+        with self._lock, closing(self._connect()) as connection, connection:
+            total = int(connection.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0])
+            if total > self.max_bytes:
+                for row in connection.execute("SELECT sha256, suffix, size FROM blobs ORDER BY last_access").fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    if row["sha256"] in keep_set:
+                        continue
+                    self.blob_path(row["sha256"], row["suffix"]).unlink(missing_ok=True)
+                    for table in ("blobs", "urls", "digests", "pages", "page_scans"):
+                        connection.execute(f"DELETE FROM {table} WHERE sha256 = ?", (row["sha256"],))
+                    total -= int(row["size"])
+                    removed += 1
+        if _DOC_CACHE_BYTES is not None:
+            _DOC_CACHE_BYTES.set(total)
+        return removed
+
+    def stats(self) -> dict[str, Any]:
+        with closing(self._connect()) as connection:
+            values = {row["key"]: row["value"] for row in connection.execute("SELECT key, value FROM stats")}
+            blob_count = int(connection.execute("SELECT COUNT(*) FROM blobs").fetchone()[0])
+        summary: dict[str, Any] = {
+            "bytes": self.total_bytes(),
+            "max_bytes": self.max_bytes,
+            "blobs": blob_count,
+            "gpu_seconds_saved": round(float(values.get("gpu_seconds_saved", 0.0)), 2),
+        }
+        for kind in ("download", "digest", "page"):
+            hits = int(values.get(f"{kind}_hit", 0))
+            misses = int(values.get(f"{kind}_miss", 0))
+            summary[kind] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            }
+        return summary
+
+
+@dataclass
+class PendingSummary:
+    """Resumo adiado pelo estagio de OCR para o estagio de sumarizacao (GPU1)."""
+
+    document: DownloadedDocument
+    text: str
+    on_done: Callable[[float], None] | None = None
+
+
+# Quando definido (estagio de OCR do pipeline), ``_set_document_summary`` apenas
+# enfileira o texto aqui em vez de chamar o modelo de resumo na hora.
+_SUMMARY_SINK: contextvars.ContextVar[list[PendingSummary] | None] = contextvars.ContextVar(
+    "bn_acervo_summary_sink", default=None
+)
+_STAGE_DONE = object()
+
+
+@dataclass
+class PipelineStageStats:
+    name: str
+    workers: int
+    items: int = 0
+    busy_seconds: float = 0.0
+    started_at: float | None = None
+    finished_at: float | None = None
+
+    def as_dict(self) -> dict[str, Any]:
+        wall = (self.finished_at or time.monotonic()) - self.started_at if self.started_at is not None else 0.0
+        capacity = wall * max(self.workers, 1)
+        return {
+            "workers": self.workers,
+            "items": self.items,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "wall_seconds": round(wall, 3),
+            "utilization": round(self.busy_seconds / capacity, 4) if capacity > 0 else 0.0,
+        }
+
+
+class InvestigationPipelineStats:
+    """Tempo total da investigacao e ocupacao de cada estagio do pipeline."""
+
+    def __init__(self) -> None:
+        self.started_at = time.monotonic()
+        self.finished_at: float | None = None
+        self.stages: dict[str, PipelineStageStats] = {}
+
+    def stage(self, name: str, workers: int) -> PipelineStageStats:
+        stats = self.stages.get(name)
+        if stats is None:
+            stats = self.stages[name] = PipelineStageStats(name=name, workers=workers)
+        return stats
+
+    @contextlib.asynccontextmanager
+    async def timed(self, name: str):
+        stats = self.stage(name, 1)
+        stats.started_at = stats.started_at or time.monotonic()
+        started = time.monotonic()
+        try:
+            yield stats
+        finally:
+            stats.items += 1
+            stats.busy_seconds += time.monotonic() - started
+            stats.finished_at = time.monotonic()
+
+    def finish(self) -> dict[str, Any]:
+        self.finished_at = time.monotonic()
+        summary = {
+            "wall_seconds": round(self.finished_at - self.started_at, 3),
+            "stages": {name: stats.as_dict() for name, stats in self.stages.items()},
+        }
+        if _RUN_WALL_SECONDS is not None:
+            _RUN_WALL_SECONDS.set(summary["wall_seconds"])
+            for name, values in summary["stages"].items():
+                _STAGE_BUSY_SECONDS.labels(stage=name).inc(values["busy_seconds"])
+                _STAGE_UTILIZATION.labels(stage=name).set(values["utilization"])
+        return summary
+
+
+async def _run_stage_workers(
+    stats: PipelineStageStats,
+    inbox: asyncio.Queue,
+    handler: Callable[[Any], Awaitable[Any]],
+    outbox: asyncio.Queue | None = None,
+) -> None:
+    """Consome ``inbox`` com ``stats.workers`` workers ate o marcador de fim.
+
+    O retorno nao nulo de ``handler`` segue para ``outbox``; ao terminar, o
+    marcador de fim e repassado ao proximo estagio. Filas limitadas fazem o
+    estagio anterior esperar quando este fica para tras.
+    """
+    stats.started_at = stats.started_at or time.monotonic()
+
+    async def worker() -> None:
+        while True:
+            item = await inbox.get()
+            if item is _STAGE_DONE:
+                await inbox.put(_STAGE_DONE)
+                return
+            started = time.monotonic()
+            try:
+                output = await handler(item)
+            except Exception as exc:
+                logger.warning("Estagio %s falhou em um item: %s", stats.name, exc, exc_info=True)
+                output = None
+            finally:
+                stats.items += 1
+                stats.busy_seconds += time.monotonic() - started
+            if outbox is not None and output is not None:
+                await outbox.put(output)
+
+    try:
+        await asyncio.gather(*(worker() for _ in range(max(stats.workers, 1))))
+    finally:
+        stats.finished_at = time.monotonic()
+    if outbox is not None:
+        await outbox.put(_STAGE_DONE)
 
 
 class RateGate:
@@ -2082,7 +2689,9 @@ class DoclingDocumentDigester(BaseDocumentDigester):
             return False
         local_path = Path(document.local_path or "")
         try:
-            extracted = await asyncio.to_thread(self._convert_with_docling, local_path)
+            # Docling usa OCR em GPU0: mesmo semaforo do OCR via Ollama vision
+            async with agent.gpu0_semaphore:
+                extracted = await asyncio.to_thread(self._convert_with_docling, local_path)
         except Exception as exc:
             logger.warning("Docling falhou para %s: %s", local_path, exc)
             return False
@@ -2090,7 +2699,7 @@ class DoclingDocumentDigester(BaseDocumentDigester):
             return False
         document.extraction_mode = "docling"
         document.extracted_text = _truncate(extracted, 5000)
-        document.summary = await agent._summarize_document_text(extracted)
+        await agent._set_document_summary(document, extracted)
         return True
 
     def _convert_with_docling(self, local_path: Path) -> str:
@@ -2155,18 +2764,18 @@ class LegacyDocumentDigester(BaseDocumentDigester):
             text = await asyncio.to_thread(agent._pdftotext, local_path)
             document.extracted_text = _truncate(text, 5000)
             if prefer_ocr and max_ocr_pages_per_document > 0:
-                ocr_text = await agent._ocr_pdf_pages(local_path, max_ocr_pages_per_document)
+                ocr_text = await agent._ocr_pdf_pages(local_path, max_ocr_pages_per_document, sha256=document.sha256)
                 if ocr_text:
                     document.extraction_mode = "pdf_ocr_gpu0"
-                    document.summary = await agent._summarize_document_text(ocr_text)
+                    await agent._set_document_summary(document, ocr_text)
                     return True
                 if document.extracted_text:
                     document.extraction_mode = "pdftotext"
-                    document.summary = await agent._summarize_document_text(document.extracted_text)
+                    await agent._set_document_summary(document, document.extracted_text)
                     return True
             elif document.extracted_text:
                 document.extraction_mode = "pdftotext"
-                document.summary = await agent._summarize_document_text(document.extracted_text)
+                await agent._set_document_summary(document, document.extracted_text)
                 return True
             document.skipped_reason = "pdf_sem_texto_e_sem_ocr"
             return False
@@ -2176,7 +2785,7 @@ class LegacyDocumentDigester(BaseDocumentDigester):
             if ocr_text:
                 document.extraction_mode = "image_ocr_gpu0"
                 document.extracted_text = _truncate(ocr_text, 5000)
-                document.summary = await agent._summarize_document_text(ocr_text)
+                await agent._set_document_summary(document, ocr_text)
                 return True
             document.skipped_reason = "ocr_vazio"
             return False
@@ -2188,7 +2797,7 @@ class LegacyDocumentDigester(BaseDocumentDigester):
             return False
         document.extraction_mode = "texto_direto"
         document.extracted_text = _truncate(content, 5000)
-        document.summary = await agent._summarize_document_text(content)
+        await agent._set_document_summary(document, content)
         return True
 
 
@@ -2273,11 +2882,27 @@ class BnAcervoAgent:
         self.character_memory_path = self.memory_dir / "characters_graph.json"
         self.investigation_memory_store = InvestigationMemoryStore(self.investigation_dir)
         self.job_store = InvestigationJobStore(self.jobs_dir)
+        self.document_cache: DocumentCache | None = None
+        if _bool_env("BN_ACERVO_DOC_CACHE_ENABLED", True):
+            self.document_cache = DocumentCache(
+                DATA_DIR / "bn_acervo" / "doc_cache",
+                max_bytes=_int_env("BN_ACERVO_DOC_CACHE_MAX_BYTES", 5 * 1024 * 1024 * 1024),
+                url_ttl_seconds=_int_env("BN_ACERVO_DOC_CACHE_URL_TTL_SECONDS", 30 * 24 * 3600),
+            )
         self.investigation_budget_policy = InvestigationBudgetPolicy.from_env()
 
         self.gpu0_semaphore = asyncio.Semaphore(_int_env("BN_ACERVO_GPU0_CONCURRENCY", 1))
         self.gpu1_semaphore = asyncio.Semaphore(_int_env("BN_ACERVO_GPU1_CONCURRENCY", 2))
         self.rate_gate = RateGate(self.browser_request_interval_seconds)
+        # Pipeline detalhe -> download -> OCR -> resumo: filas limitadas entre estagios
+        self.pipeline_queue_size = _int_env("BN_ACERVO_PIPELINE_QUEUE_SIZE", 4)
+        self.detail_fetch_workers = _int_env("BN_ACERVO_DETAIL_WORKERS", 1)
+        self.download_workers = _int_env("BN_ACERVO_DOWNLOAD_WORKERS", 2)
+        self.ocr_workers = _int_env("BN_ACERVO_OCR_WORKERS", 2)
+        self.summary_workers = _int_env("BN_ACERVO_SUMMARY_WORKERS", 2)
+        self.download_semaphore = asyncio.Semaphore(self.download_workers)
+        self._prefetched_documents: dict[str, asyncio.Task[DownloadedDocument]] = {}
+        self._pipeline_stats: InvestigationPipelineStats | None = None
         self.document_digester = DocumentDigesterRegistry(
             [
                 DoclingDocumentDigester(enabled=self.docling_enabled),
@@ -2302,6 +2927,31 @@ class BnAcervoAgent:
         self,
         payload: AcervoStoryRequest,
         progress_callback: Callable[[str, str, dict[str, Any] | None], Awaitable[None] | None] | None = None,
+    ) -> dict[str, Any]:
+        stats = InvestigationPipelineStats()
+        self._pipeline_stats = stats
+        try:
+            result = await self._run_investigation(payload, progress_callback)
+        finally:
+            self._pipeline_stats = None
+            self._discard_prefetched_documents()
+        result["pipeline_stats"] = stats.finish()
+        logger.info(
+            "BN acervo run wall=%.1fs estagios=%s",
+            result["pipeline_stats"]["wall_seconds"],
+            {name: values["utilization"] for name, values in result["pipeline_stats"]["stages"].items()},
+        )
+        return result
+
+    def _timed_stage(self, name: str) -> Any:
+        if self._pipeline_stats is None:
+            return contextlib.nullcontext()
+        return self._pipeline_stats.timed(name)
+
+    async def _run_investigation(
+        self,
+        payload: AcervoStoryRequest,
+        progress_callback: Callable[[str, str, dict[str, Any] | None], Awaitable[None] | None] | None = None,
     ) -> dict[str, Any]:
         profile = self._resolve_investigation_profile(payload)
         payload = profile.apply(payload)
@@ -2318,7 +2968,8 @@ class BnAcervoAgent:
             payload.include_authority_pages,
             payload.persist_investigation,
         )
-        plan = await self._plan_query(payload.query, profile)
+        async with self._timed_stage("planning"):
+            plan = await self._plan_query(payload.query, profile)
         await self._emit_progress(progress_callback, "planning", "Plano gerado; iniciando descoberta de fontes.", {"percent": 18})
         logger.info(
             "Plano gerado search_terms=%s hypotheses=%s institutions=%s companies=%s unresolved=%s",
@@ -2328,7 +2979,8 @@ class BnAcervoAgent:
             len(plan.get("companies", [])),
             len(plan.get("unresolved_questions", [])),
         )
-        candidate_hits = await self._discover_candidate_hits(plan, payload)
+        async with self._timed_stage("discovery"):
+            candidate_hits = await self._discover_candidate_hits(plan, payload)
         if not candidate_hits:
             logger.warning("Nenhum candidato do acervo foi encontrado para a consulta")
             await self._emit_progress(progress_callback, "contingency", "Nenhum candidato encontrado; retornando contingencia.", {"percent": 100})
@@ -2342,33 +2994,8 @@ class BnAcervoAgent:
             {"percent": 34, "candidate_hits": len(candidate_hits), "partial_result": discovery_snapshot},
         )
 
-        fetched_records: list[AcervoRecord] = []
         scan_limit = min(len(candidate_hits), max(payload.max_detail_records * 2, payload.max_detail_records))
-        for hit in candidate_hits[:scan_limit]:
-            if hit.source_kind in {"hemeroteca_pdf", "bndigital_page", "objdigital_document", "direct_document"}:
-                record = self._build_external_record_from_search_hit(hit)
-                fetched_records.append(record)
-                if len(fetched_records) >= payload.max_detail_records:
-                    break
-                continue
-            try:
-                record = await self._fetch_record(hit.detail_url)
-            except Exception as exc:
-                logger.warning("Falha ao ler detalhe do Sophia %s: %s", hit.detail_url, exc)
-                if "bloqueio_cloudflare" in str(exc):
-                    fetched_records.append(self._build_partial_record_from_search_hit(hit))
-                    if len(fetched_records) >= payload.max_detail_records:
-                        break
-                continue
-            if not payload.include_authority_pages and "/autoridade/" in record.detail_url.lower():
-                continue
-            if not record.raw_text and hit.snippet:
-                record.raw_text = hit.snippet
-            if hit.snippet and "snippet_busca" not in record.metadata:
-                record.metadata["snippet_busca"] = hit.snippet
-            fetched_records.append(record)
-            if len(fetched_records) >= payload.max_detail_records:
-                break
+        fetched_records = await self._fetch_detail_records(candidate_hits[:scan_limit], payload)
 
         if not fetched_records:
             logger.warning("Todos os candidatos retornaram bloqueio ou falha de leitura")
@@ -2387,7 +3014,8 @@ class BnAcervoAgent:
                 "partial_result": self._build_partial_result_snapshot(payload.query, plan, fetched_records, fetched_references, phase="ranking"),
             },
         )
-        ranked_records = await self._rank_records(payload.query, fetched_records, payload.max_detail_records)
+        async with self._timed_stage("ranking"):
+            ranked_records = await self._rank_records(payload.query, fetched_records, payload.max_detail_records)
         logger.info("Ranqueamento concluido ranked_records=%s", len(ranked_records))
         ranked_references = build_reference_entries(ranked_records)
         await self._emit_progress(
@@ -2428,7 +3056,8 @@ class BnAcervoAgent:
         }
         if payload.output_mode == "dossier":
             logger.info("Compondo dossie final")
-            dossier = await self._compose_dossier(payload.query, plan, ranked_records, references)
+            async with self._timed_stage("composition"):
+                dossier = await self._compose_dossier(payload.query, plan, ranked_records, references)
             self._persist_character_memory(payload.query, dossier)
             dossier = self._expand_dossier_with_character_memory(payload.query, dossier)
             dossier["neural_map"] = build_neural_correlation_map(dossier)
@@ -2453,7 +3082,8 @@ class BnAcervoAgent:
             return result
 
         logger.info("Compondo historia final")
-        story_markdown = await self._compose_story(payload.query, plan, ranked_records, references)
+        async with self._timed_stage("composition"):
+            story_markdown = await self._compose_story(payload.query, plan, ranked_records, references)
         result["story_markdown"] = story_markdown
         if payload.persist_investigation:
             self.investigation_memory_store.save_run(
@@ -2468,6 +3098,103 @@ class BnAcervoAgent:
         await self._emit_progress(progress_callback, "completed", "Historia concluida.", {"percent": 100})
         return result
 
+    async def _fetch_detail_records(
+        self,
+        hits: list[SearchHit],
+        payload: AcervoStoryRequest,
+    ) -> list[AcervoRecord]:
+        """Le os detalhes dos candidatos com ``detail_fetch_workers`` workers.
+
+        O resultado e o mesmo da leitura sequencial: os primeiros
+        ``max_detail_records`` aceitos na ordem dos candidatos. A fila entrega os
+        candidatos em ordem e uma leitura ja iniciada sempre termina; o corte so
+        descarta candidatos que ainda nao comecaram, com indice maior que todos
+        os ja iniciados. Nenhum documento e baixado aqui; o download so comeca
+        depois do ranqueamento, para o orcamento ir para os registros que de fato
+        serao digeridos.
+        """
+        stats = self._pipeline_stats or InvestigationPipelineStats()
+        hit_queue: asyncio.Queue = asyncio.Queue(maxsize=max(self.pipeline_queue_size, 1))
+        results: dict[int, AcervoRecord] = {}
+        enough = asyncio.Event()
+
+        async def feed() -> None:
+            for item in enumerate(hits):
+                if enough.is_set():
+                    break
+                await hit_queue.put(item)
+            await hit_queue.put(_STAGE_DONE)
+
+        async def handle(item: tuple[int, SearchHit]) -> None:
+            index, hit = item
+            # So pula quem ainda nao comecou: leituras em andamento (indices menores) terminam
+            if enough.is_set():
+                return None
+            record = await self._fetch_detail_record(hit, payload)
+            if record is None:
+                return None
+            results[index] = record
+            if len(results) >= payload.max_detail_records:
+                enough.set()
+            return None
+
+        await asyncio.gather(
+            feed(),
+            _run_stage_workers(stats.stage("detail_fetch", self.detail_fetch_workers), hit_queue, handle),
+        )
+        return [results[index] for index in sorted(results)][: payload.max_detail_records]
+
+    async def _fetch_detail_record(self, hit: SearchHit, payload: AcervoStoryRequest) -> AcervoRecord | None:
+        if hit.source_kind in {"hemeroteca_pdf", "bndigital_page", "objdigital_document", "direct_document"}:
+            return self._build_external_record_from_search_hit(hit)
+        try:
+            record = await self._fetch_record(hit.detail_url)
+        except Exception as exc:
+            logger.warning("Falha ao ler detalhe do Sophia %s: %s", hit.detail_url, exc)
+            if "bloqueio_cloudflare" in str(exc):
+                return self._build_partial_record_from_search_hit(hit)
+            return None
+        if not payload.include_authority_pages and "/autoridade/" in record.detail_url.lower():
+            return None
+        if not record.raw_text and hit.snippet:
+            record.raw_text = hit.snippet
+        if hit.snippet and "snippet_busca" not in record.metadata:
+            record.metadata["snippet_busca"] = hit.snippet
+        return record
+
+    def _prefetch_document(self, url: str) -> bool:
+        if url in self._prefetched_documents:
+            return False
+        self._prefetched_documents[url] = asyncio.create_task(self._download_with_slot(url))
+        return True
+
+    def _discard_prefetched_documents(self) -> None:
+        for task in self._prefetched_documents.values():
+            if task.done():
+                if not task.cancelled():
+                    task.exception()  # evita "Task exception was never retrieved"
+            else:
+                task.cancel()
+        self._prefetched_documents.clear()
+
+    async def _download_with_slot(self, url: str) -> DownloadedDocument:
+        stats = (self._pipeline_stats or InvestigationPipelineStats()).stage("document_download", self.download_workers)
+        async with self.download_semaphore:
+            stats.started_at = stats.started_at or time.monotonic()
+            started = time.monotonic()
+            try:
+                return await self._download_document(url)
+            finally:
+                stats.items += 1
+                stats.busy_seconds += time.monotonic() - started
+                stats.finished_at = time.monotonic()
+
+    async def _obtain_document(self, url: str) -> DownloadedDocument:
+        task = self._prefetched_documents.pop(url, None)
+        if task is not None:
+            return await task
+        return await self._download_with_slot(url)
+
     def _build_contingency_result(
         self,
         payload: AcervoStoryRequest,
@@ -3037,43 +3764,90 @@ class BnAcervoAgent:
         max_ocr_pages_per_document: int,
         prefer_ocr: bool,
     ) -> None:
+        """Pipeline download -> OCR/extracao (GPU0) -> resumo (GPU1) com filas limitadas.
+
+        O orcamento ``max_download_documents`` e consumido na ordem dos registros
+        ja ranqueados, como antes. Os downloads escolhidos comecam logo (limitados
+        por ``download_semaphore``) enquanto o OCR do primeiro documento roda, e o
+        resumo de um documento roda enquanto o proximo faz OCR.
+        """
+        jobs: list[tuple[AcervoRecord, str]] = []
         remaining = max_download_documents
-        if remaining <= 0:
-            return
         for record in records:
             if remaining <= 0:
                 break
             for document_url in record.document_links:
                 if remaining <= 0:
                     break
-                try:
-                    document = await self._download_document(document_url)
-                except Exception as exc:
-                    logger.warning("Falha baixando documento %s: %s", document_url, exc)
-                    record.documents.append(
-                        DownloadedDocument(
-                            source_url=document_url,
-                            media_type=self._guess_media_type_from_url(document_url),
-                            skipped_reason=f"download_falhou:{type(exc).__name__}",
-                        )
-                    )
-                    remaining -= 1
-                    continue
-                record.documents.append(document)
-                if document.local_path:
-                    try:
-                        await self._digest_document(
-                            document,
-                            max_ocr_pages_per_document=max_ocr_pages_per_document,
-                            prefer_ocr=prefer_ocr,
-                        )
-                    except Exception as exc:
-                        logger.warning("Falha digerindo documento %s: %s", document.source_url, exc)
-                        if document.extracted_text and not document.summary:
-                            document.summary = self._heuristic_document_summary(document.extracted_text)
-                        if not document.skipped_reason:
-                            document.skipped_reason = f"digestao_falhou:{type(exc).__name__}"
+                jobs.append((record, document_url))
                 remaining -= 1
+        if not jobs:
+            return
+        for _record, document_url in jobs:
+            self._prefetch_document(document_url)
+
+        stats = self._pipeline_stats or InvestigationPipelineStats()
+        queue_size = max(self.pipeline_queue_size, 1)
+        download_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        ocr_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        summary_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        documents: list[DownloadedDocument | None] = [None] * len(jobs)
+
+        async def feed() -> None:
+            for index, (_record, document_url) in enumerate(jobs):
+                await download_queue.put((index, document_url))
+            await download_queue.put(_STAGE_DONE)
+
+        async def download(item: tuple[int, str]) -> DownloadedDocument | None:
+            index, document_url = item
+            try:
+                document = await self._obtain_document(document_url)
+            except Exception as exc:
+                logger.warning("Falha baixando documento %s: %s", document_url, exc)
+                documents[index] = DownloadedDocument(
+                    source_url=document_url,
+                    media_type=self._guess_media_type_from_url(document_url),
+                    skipped_reason=f"download_falhou:{type(exc).__name__}",
+                )
+                return None
+            documents[index] = document
+            return document if document.local_path else None
+
+        async def digest(document: DownloadedDocument) -> None:
+            sink: list[PendingSummary] = []
+            token = _SUMMARY_SINK.set(sink)
+            try:
+                await self._digest_document(
+                    document,
+                    max_ocr_pages_per_document=max_ocr_pages_per_document,
+                    prefer_ocr=prefer_ocr,
+                )
+            except Exception as exc:
+                logger.warning("Falha digerindo documento %s: %s", document.source_url, exc)
+                if document.extracted_text and not document.summary:
+                    document.summary = self._heuristic_document_summary(document.extracted_text)
+                if not document.skipped_reason:
+                    document.skipped_reason = f"digestao_falhou:{type(exc).__name__}"
+            finally:
+                _SUMMARY_SINK.reset(token)
+            for pending in sink:
+                await summary_queue.put(pending)
+
+        async def summarize(pending: PendingSummary) -> None:
+            started = time.monotonic()
+            pending.document.summary = await self._summarize_document_text(pending.text)
+            if pending.on_done is not None:
+                pending.on_done(time.monotonic() - started)
+
+        await asyncio.gather(
+            feed(),
+            _run_stage_workers(stats.stage("document_dispatch", self.download_workers), download_queue, download, ocr_queue),
+            _run_stage_workers(stats.stage("ocr", self.ocr_workers), ocr_queue, digest, summary_queue),
+            _run_stage_workers(stats.stage("summarize", self.summary_workers), summary_queue, summarize),
+        )
+        for (record, _document_url), document in zip(jobs, documents):
+            if document is not None:
+                record.documents.append(document)
 
     async def _download_document(self, url: str) -> DownloadedDocument:
         parsed = urllib.parse.urlparse(url)
@@ -3083,7 +3857,20 @@ class BnAcervoAgent:
                 media_type=self._guess_media_type_from_url(url),
                 skipped_reason="url_documento_invalida",
             )
+        cache = self.document_cache
+        cached = cache.lookup_url(url) if cache is not None else None
+        if cached is not None:
+            cache.record("download", hit=True)
+            return DownloadedDocument(
+                source_url=url,
+                media_type=cached["media_type"],
+                local_path=str(cached["path"]),
+                bytes_downloaded=int(cached["size"]),
+                sha256=cached["sha256"],
+                cache_hit=True,
+            )
         headers = {"User-Agent": self._browser_user_agent()}
+        digest = hashlib.sha256()
         async with httpx.AsyncClient(timeout=self.download_timeout_seconds, follow_redirects=True, headers=headers, trust_env=self.http_trust_env) as client:
             async with client.stream("GET", url) as response:
                 response.raise_for_status()
@@ -3101,7 +3888,7 @@ class BnAcervoAgent:
                         pass
                 suffix = self._suffix_from_url(url, content_type)
                 filename = hashlib.sha1(url.encode("utf-8")).hexdigest() + suffix
-                target = self.download_dir / filename
+                target = self.download_dir / (filename + ".part" if cache is not None else filename)
                 bytes_written = 0
                 with target.open("wb") as handle:
                     async for chunk in response.aiter_bytes():
@@ -3114,12 +3901,18 @@ class BnAcervoAgent:
                                 media_type=content_type,
                                 skipped_reason=f"download_abortado_por_limite:{bytes_written}",
                             )
+                        digest.update(chunk)
                         handle.write(chunk)
+        sha256 = digest.hexdigest()
+        if cache is not None:
+            cache.record("download", hit=False)
+            target = cache.store_blob(url, target, sha256=sha256, media_type=content_type, suffix=suffix)
         return DownloadedDocument(
             source_url=url,
             media_type=content_type,
             local_path=str(target),
             bytes_downloaded=bytes_written,
+            sha256=sha256,
         )
 
     def _guess_media_type_from_url(self, url: str) -> str:
@@ -3141,6 +3934,20 @@ class BnAcervoAgent:
         max_ocr_pages_per_document: int,
         prefer_ocr: bool,
     ) -> None:
+        cache = self.document_cache if document.sha256 else None
+        variant = self._digest_cache_variant(max_ocr_pages_per_document=max_ocr_pages_per_document, prefer_ocr=prefer_ocr)
+        if cache is not None:
+            cached = cache.get_digest(str(document.sha256), variant)
+            if cached is not None:
+                document.extraction_mode = cached["extraction_mode"]
+                document.extracted_text = cached["extracted_text"]
+                document.summary = cached["summary"]
+                document.cache_hit = True
+                cache.record("digest", hit=True, gpu_seconds_saved=float(cached["gpu_seconds"]))
+                return
+        sink = _SUMMARY_SINK.get()
+        pending_before = len(sink) if sink is not None else 0
+        started = time.monotonic()
         digested = await self.document_digester.digest(
             self,
             document,
@@ -3149,15 +3956,62 @@ class BnAcervoAgent:
         )
         if not digested and not document.skipped_reason:
             document.skipped_reason = "nenhum_digester_suportou_arquivo"
+        if cache is not None:
+            cache.record("digest", hit=False)
+            # Extracao vazia (OCR/digester falhou) nao e cacheada: a proxima investigacao tenta de novo
+            if digested and (document.extracted_text or "").strip():
+                extraction_seconds = time.monotonic() - started
+
+                def store(summary_seconds: float = 0.0) -> None:
+                    cache.put_digest(str(document.sha256), variant, document, extraction_seconds + summary_seconds)
+
+                # Com resumo adiado ao estagio de GPU1, grava so depois do resumo pronto
+                deferred = [item for item in (sink or [])[pending_before:] if item.document is document]
+                if deferred:
+                    deferred[-1].on_done = store
+                else:
+                    store()
+
+    async def _set_document_summary(self, document: DownloadedDocument, text: str) -> None:
+        sink = _SUMMARY_SINK.get()
+        if sink is not None:
+            sink.append(PendingSummary(document=document, text=text))
+            return
+        document.summary = await self._summarize_document_text(text)
 
-    async def _ocr_pdf_pages(self, pdf_path: Path, max_pages: int) -> str:
+    def _digest_cache_variant(self, *, max_ocr_pages_per_document: int, prefer_ocr: bool) -> str:
+        """Chave da configuracao que determina o resultado da digestao."""
+        digesters = ",".join(item.name for item in self.document_digester.digesters if item.is_available())
+        return "|".join(
+            [
+                digesters,
+                f"ocr={int(prefer_ocr)}:{max_ocr_pages_per_document}",
+                self.vision_model,
+                self.planner_model,
+            ]
+        )
+
+    async def _ocr_pdf_pages(self, pdf_path: Path, max_pages: int, *, sha256: str | None = None) -> str:
+        cache = self.document_cache if sha256 else None
+        cached_pages: dict[int, tuple[str, float]] = {}
+        first_page = 1
+        pages_found = 0
+        if cache is not None:
+            cached_pages, max_requested, pages_found = cache.get_pages(str(sha256))
+            # Com pages_found < max_requested o PDF acabou antes: nao ha paginas alem dele
+            last_page = min(max_pages, pages_found) if max_requested and pages_found < max_requested else max_pages
+            missing = [number for number in range(1, last_page + 1) if number not in cached_pages]
+            if not missing:
+                return self._join_cached_pages(cached_pages, max_pages, str(sha256))
+            # Paginas sem texto (OCR vazio ou falho) nao entram no cache e sao refeitas aqui
+            first_page = missing[0]
         page_dir = self.download_dir / (pdf_path.stem + "_pages")
         page_dir.mkdir(parents=True, exist_ok=True)
         stem = page_dir / "page"
         command = [
             "pdftoppm",
             "-f",
-            "1",
+            str(first_page),
             "-l",
             str(max_pages),
             "-png",
@@ -3168,14 +4022,40 @@ class BnAcervoAgent:
             await asyncio.to_thread(subprocess.run, command, check=True, capture_output=True, text=True)
         except Exception as exc:
             logger.warning("pdftoppm falhou para %s: %s", pdf_path, exc)
+            if cached_pages:
+                return self._join_cached_pages(cached_pages, max_pages, str(sha256))
             return ""
-        images = sorted(page_dir.glob("page-*.png"))
-        chunks: list[str] = []
-        for index, image_path in enumerate(images, start=1):
+        images = sorted(page_dir.glob("page-*.png"), key=lambda item: int(item.stem.rsplit("-", 1)[-1]))
+        new_pages: dict[int, tuple[str, float]] = {}
+        for image_path in images:
+            index = int(image_path.stem.rsplit("-", 1)[-1])
+            if index < first_page or index > max_pages or index in cached_pages:
+                continue
+            started = time.monotonic()
             text = await self._ocr_image(image_path, page_number=index)
-            if text:
-                chunks.append(f"[Pagina {index}] {text}")
-        return "\n\n".join(chunks)
+            new_pages[index] = (text, time.monotonic() - started)
+        if cache is not None:
+            cache.record("page", hit=False)
+            rendered = [int(image_path.stem.rsplit("-", 1)[-1]) for image_path in images]
+            cache.put_pages(
+                str(sha256),
+                {index: page for index, page in new_pages.items() if page[0].strip()},
+                max_requested=max_pages,
+                pages_found=max([pages_found, *rendered]),
+            )
+            for image_path in images:
+                image_path.unlink(missing_ok=True)
+            cached_pages.update(new_pages)
+            return "\n\n".join(
+                f"[Pagina {index}] {text}" for index, (text, _seconds) in sorted(cached_pages.items()) if text and index <= max_pages
+            )
+        return "\n\n".join(f"[Pagina {index}] {text}" for index, (text, _seconds) in sorted(new_pages.items()) if text)
+
+    def _join_cached_pages(self, pages: dict[int, tuple[str, float]], max_pages: int, sha256: str) -> str:
+        selected = [(index, text, seconds) for index, (text, seconds) in sorted(pages.items()) if index <= max_pages]
+        if self.document_cache is not None:
+            self.document_cache.record("page", hit=True, gpu_seconds_saved=sum(seconds for _i, _t, seconds in selected))
+        return "\n\n".join(f"[Pagina {index}] {text}" for index, text, _seconds in selected if text)
 
     async def _ocr_image(self, image_path: Path, *, page_number: int | None = None) -> str:
         prompt = (
@@ -4466,6 +5346,22 @@ async def bn_acervo_health() -> dict[str, Any]:
     }
 
 
+@router.get("/cache/stats")
+async def bn_acervo_cache_stats() -> dict[str, Any]:
+    agent = BnAcervoAgent()
+    if agent.document_cache is None:
+        return {"status": "disabled"}
+    return {"status": "ok", **agent.document_cache.stats()}
+
+
+@router.get("/metrics")
+@router.get("/cache/metrics")
+async def bn_acervo_cache_metrics() -> Response:
+    if _METRICS_REGISTRY is None:
+        raise HTTPException(status_code=503, detail="prometheus_client_indisponivel")
+    return Response(generate_latest(_METRICS_REGISTRY), media_type="text/plain; version=0.0.4")
+
+
 @router.get("/debug/logs")
 async def bn_acervo_debug_logs(limit: int = 120, clear: bool = False) -> dict[str, Any]:
     safe_limit = max(10, min(limit, 400))
@@ -4540,7 +5436,7 @@ def _reconcile_active_jobs(store: InvestigationJobStore) -> list[dict[str, Any]]
 
 
 async def _cancel_job(store: InvestigationJobStore, job_id: str, *, reason: str) -> dict[str, Any] | None:
-    record = store.load(job_id)
+    record = store.status(job_id)
     if record is None:
         return None
     task = _JOB_TASKS.get(job_id)
@@ -4552,7 +5448,7 @@ async def _cancel_job(store: InvestigationJobStore, job_id: str, *, reason: str)
             pass
         except Exception:
             logger.warning("Falha aguardando cancelamento do job %s", job_id, exc_info=True)
-    record = store.update(
+    store.update(
         job_id,
         status="cancelled",
         phase="cancelled",
@@ -4560,7 +5456,7 @@ async def _cancel_job(store: InvestigationJobStore, job_id: str, *, reason: str)
         error=reason,
     )
     store.append_log(job_id, level="warn", message=f"Job cancelado: {reason}.")
-    return record
+    return store.load(job_id)
 
 
 def _bn_acervo_langgraph():
@@ -4612,10 +5508,22 @@ async def bn_acervo_cancel_active_jobs() -> dict[str, Any]:
     return {"status": "ok", "cancelled_job_ids": cancelled, "count": len(cancelled)}
 
 
+@router.get("/jobs")
+async def bn_acervo_list_jobs(status: str | None = None, limit: int = 50) -> dict[str, Any]:
+    agent = BnAcervoAgent()
+    statuses = [item for item in (status or "").split(",") if item.strip()]
+    jobs = agent.job_store.list_jobs(statuses=statuses, limit=max(1, min(limit, 500)))
+    return {"status": "ok", "jobs": jobs, "count": len(jobs)}
+
+
 @router.get("/jobs/{job_id}", response_model=AcervoJobStatusResponse)
-async def bn_acervo_get_job(job_id: str) -> AcervoJobStatusResponse:
+async def bn_acervo_get_job(job_id: str, include_results: bool = True, log_limit: int = 250) -> AcervoJobStatusResponse:
     agent = BnAcervoAgent()
-    record = agent.job_store.load(job_id)
+    record = agent.job_store.load(
+        job_id,
+        include_results=include_results,
+        log_limit=max(0, min(log_limit, InvestigationJobStore.LOG_LIMIT)),
+    )
     if record is None:
         raise HTTPException(status_code=404, detail="job_not_found")
     return AcervoJobStatusResponse(**record)
@@ -7,29 +7,37 @@ Endpoints:
   GET  /tape/hba-test/status — status do job em andamento
   GET  /tape/hba-test/report — último relatório gerado
   GET  /tape/health          — healthcheck da rota
+  GET  /tape/catalog/locate  — onde está um arquivo (catálogo LTFS indexado)
+  GET  /tape/catalog/sha256/{sha256} — entradas do catálogo com esse hash
 """
 
 from __future__ import annotations
 
 import asyncio
 import logging
+import os
+import threading
 import uuid
 from datetime import datetime
 from typing import Any
 
-from fastapi import APIRouter, BackgroundTasks, HTTPException
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query
 from pydantic import BaseModel, Field
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/tape", tags=["tape"])
 
+LTFS_CATALOG_DB = os.getenv("LTFS_CATALOG_DB", "/var/lib/ltfs-cache-flush/catalog.db")
+
 # ─── Estado em memória (single-process) ──────────────────────────────────────
 
 _last_report: dict[str, Any] | None = None
 _active_job: dict[str, Any] | None = None  # {"job_id", "started_at", "status"}
 _last_component_quality_report: dict[str, Any] | None = None
 _active_component_quality_job: dict[str, Any] | None = None
+_catalog_store: Any = None  # CatalogStore aberto uma vez por processo
+_catalog_lock = threading.Lock()
 
 
 # ─── Schemas ──────────────────────────────────────────────────────────────────
@@ -294,3 +302,45 @@ async def get_component_quality_report() -> dict[str, Any]:
             detail="Nenhum relatorio disponivel. Execute POST /tape/component-quality primeiro.",
         )
     return _last_component_quality_report
+
+
+def _open_catalog_store():
+    """Catálogo SQLite do flush LTFS, aberto uma vez por processo (404 se não existir).
+
+    Deve ser chamado com ``_catalog_lock`` adquirido: PRAGMA/schema só rodam
+    na primeira abertura e a conexão é compartilhada entre requisições.
+    """
+    global _catalog_store
+    from tools.ltfs_catalog_db import CatalogStore
+
+    if _catalog_store is not None and str(_catalog_store.db_path) == str(LTFS_CATALOG_DB):
+        return _catalog_store
+    if not os.path.exists(LTFS_CATALOG_DB):
+        raise HTTPException(status_code=404, detail=f"Catálogo LTFS não encontrado: {LTFS_CATALOG_DB}")
+    if _catalog_store is not None:
+        _catalog_store.close()
+    _catalog_store = CatalogStore(LTFS_CATALOG_DB)
+    return _catalog_store
+
+
+def _query_catalog(query):
+    with _catalog_lock:
+        return query(_open_catalog_store())
+
+
+@router.get("/catalog/locate")
+async def locate_in_catalog(path: str = Query(..., description="rel_path do arquivo no catálogo")) -> dict[str, Any]:
+    """Retorna placement atual, volser e último flush de um arquivo."""
+    result = await asyncio.to_thread(_query_catalog, lambda store: store.locate(path))
+    if result is None:
+        raise HTTPException(status_code=404, detail=f"Arquivo não catalogado: {path}")
+    return result
+
+
+@router.get("/catalog/sha256/{sha256}")
+async def find_in_catalog_by_sha256(sha256: str) -> dict[str, Any]:
+    """Lista entradas do catálogo com o SHA256 informado (deduplicação/restore)."""
+    entries = await asyncio.to_thread(_query_catalog, lambda store: store.find_by_sha256(sha256.lower()))
+    if not entries:
+        raise HTTPException(status_code=404, detail=f"SHA256 não catalogado: {sha256}")
+    return {"sha256": sha256.lower(), "entries": entries}
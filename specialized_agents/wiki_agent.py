@@ -11,14 +11,24 @@ Endpoints:
   POST /wiki/evolve   — busca página existente, mescla com novo conteúdo via copilot
   POST /wiki/raw      — publica markdown sem passar pelo copilot
   GET  /wiki/health
+
+Cada publicação é registrada num manifesto local (id, título e hash do
+conteúdo). Conteúdo idêntico ao último publicado é pulado sem round trip, e o
+índice é remontado a partir do manifesto, com debounce entre publicações.
 """
 
 from __future__ import annotations
 
+import atexit
 import logging
 import os
+import threading
+import time
+import weakref
 from collections import defaultdict
-from typing import Any
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator
 
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
@@ -29,6 +39,7 @@ from specialized_agents.copilot_model_router import (
     get_copilot_router,
 )
 from specialized_agents.wiki_client import WikiJsClient
+from specialized_agents.wiki_manifest import WikiPageManifest, page_fingerprint
 from specialized_agents.wiki_refactor import (
     WikiRefactorRequest,
     WikiRefactorResponse,
@@ -41,6 +52,19 @@ WIKI_URL = os.getenv("WIKI_URL", "http://192.168.15.2:3009/graphql")
 WIKI_TOKEN = os.getenv("WIKI_TOKEN", "")
 WIKI_LOCALE = os.getenv("WIKI_LOCALE", "en")
 COPILOT_TIMEOUT = int(os.getenv("WIKI_COPILOT_TIMEOUT", "120"))
+WIKI_MANIFEST_PATH = Path(
+    os.getenv(
+        "WIKI_MANIFEST_PATH",
+        str(Path(__file__).resolve().parents[1] / "data" / "wiki" / "page_manifest.json"),
+    )
+)
+# Publicações dentro da janela de debounce geram um único rebuild do índice;
+# WIKI_INDEX_MAX_DELAY limita quanto tempo o índice pode ficar atrasado.
+INDEX_DEBOUNCE_SECONDS = float(os.getenv("WIKI_INDEX_DEBOUNCE_SECONDS", "5"))
+INDEX_MAX_DELAY_SECONDS = float(os.getenv("WIKI_INDEX_MAX_DELAY_SECONDS", "60"))
+# A listagem completa via GraphQL só é refeita após este intervalo (captura
+# páginas criadas/apagadas fora do agent); no resto o índice sai do manifesto.
+INDEX_FULL_SYNC_SECONDS = float(os.getenv("WIKI_INDEX_FULL_SYNC_SECONDS", "21600"))
 
 # ─────────────────────────────────────────────────────────────────────────────
 # Prompts do sistema
@@ -131,6 +155,7 @@ class WikiResponse(BaseModel):
     model_used: str | None = None
     gpu: str | None = None
     message: str = ""
+    skipped: bool = False
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -158,7 +183,13 @@ class WikiAgent:
             token=self._token,
             default_locale=self._locale,
         )
-        self._refactor_skill = WikiRefactorSkill(self._client)
+        self._manifest = WikiPageManifest(WIKI_MANIFEST_PATH)
+        self._refactor_skill = WikiRefactorSkill(self._client, manifest=self._manifest)
+        self._index_lock = threading.Lock()
+        self._index_timer: threading.Timer | None = None
+        self._index_dirty_since: float | None = None
+        self._index_batch_depth = 0
+        _LIVE_AGENTS.add(self)
         self._skills = {
             "publish": self.publish,
             "evolve": self.evolve,
@@ -344,57 +375,156 @@ class WikiAgent:
         """
         Cria ou atualiza dependendo se página já existe.
 
+        Conteúdo igual ao último publicado (fingerprint no manifesto) não gera
+        nenhuma chamada à wiki.
+
         Returns:
-            (page_dict, operation) onde operation é 'created' ou 'updated'
+            (page_dict, operation) onde operation é 'created', 'updated' ou 'unchanged'
         """
+        effective_locale = self._effective_locale(locale)
+        fingerprint = page_fingerprint(title, content, tags)
+        if self._manifest.is_unchanged(effective_locale, wiki_path, fingerprint):
+            entry = self._manifest.get(effective_locale, wiki_path) or {}
+            return {"id": entry["page_id"], "path": wiki_path}, "unchanged"
+
         existing = self._get_page(wiki_path, locale=locale)
         if existing:
             page = self._update_page(
                 existing["id"], wiki_path, title, content, tags, locale
             )
-            return page, "updated"
-        page = self._create_page(wiki_path, title, content, tags, locale)
-        return page, "created"
+            operation = "updated"
+        else:
+            page = self._create_page(wiki_path, title, content, tags, locale)
+            operation = "created"
+        self._record_page(page, wiki_path, title, fingerprint, locale)
+        return page, operation
+
+    def _record_page(
+        self,
+        page: dict[str, Any],
+        wiki_path: str,
+        title: str,
+        fingerprint: str | None,
+        locale: str | None = None,
+    ) -> None:
+        """Registra a página publicada no manifesto local."""
+        try:
+            self._manifest.record(
+                self._effective_locale(locale),
+                wiki_path,
+                page_id=page.get("id"),
+                title=title,
+                fingerprint=fingerprint,
+                updated_at=page.get("updatedAt"),
+            )
+        except OSError as exc:
+            logger.warning("Falha ao gravar manifesto da wiki: %s", exc)
+
+    # ── Índice ────────────────────────────────────────────────────────────────
+
+    def _schedule_index_rebuild(self) -> None:
+        """Marca o índice como desatualizado e agenda um rebuild com debounce.
+
+        Publicações em sequência reiniciam o timer (até INDEX_MAX_DELAY_SECONDS
+        desde a primeira pendente). Dentro de ``index_batch()`` o rebuild fica
+        para o fim do lote.
+        """
+        with self._index_lock:
+            now = time.monotonic()
+            if self._index_dirty_since is None:
+                self._index_dirty_since = now
+            if self._index_batch_depth:
+                return
+            if self._index_timer is not None:
+                self._index_timer.cancel()
+            remaining = INDEX_MAX_DELAY_SECONDS - (now - self._index_dirty_since)
+            delay = max(0.0, min(INDEX_DEBOUNCE_SECONDS, remaining))
+            if delay <= 0:
+                self._index_timer = None
+            else:
+                self._index_timer = threading.Timer(delay, self.flush_index)
+                self._index_timer.daemon = True
+                self._index_timer.start()
+                return
+        self.flush_index()
+
+    def flush_index(self) -> bool:
+        """Executa o rebuild pendente agora. Retorna False se não havia nada pendente."""
+        with self._index_lock:
+            if self._index_timer is not None:
+                self._index_timer.cancel()
+                self._index_timer = None
+            if self._index_dirty_since is None:
+                return False
+            self._index_dirty_since = None
+        self._rebuild_index()
+        return True
+
+    @contextmanager
+    def index_batch(self) -> Iterator[None]:
+        """Agrupa várias publicações num único rebuild do índice ao final."""
+        with self._index_lock:
+            self._index_batch_depth += 1
+        try:
+            yield
+        finally:
+            with self._index_lock:
+                self._index_batch_depth -= 1
+                pending = self._index_batch_depth == 0 and self._index_dirty_since is not None
+            if pending:
+                self.flush_index()
+
+    def _render_index(self, pages: list[dict[str, Any]]) -> str:
+        groups: dict = defaultdict(list)
+        for p in pages:
+            seg = p["path"].split("/")[0]
+            groups[seg].append(p)
+
+        lines = [
+            "# Índice de Páginas",
+            "",
+            "_Atualizado automaticamente. Não editar manualmente._",
+            "",
+        ]
+        for grp in sorted(groups.keys()):
+            lines.append(f"## {grp}")
+            for p in sorted(groups[grp], key=lambda x: (x["title"], x["path"])):
+                desc = f" — {p['description']}" if p.get("description") else ""
+                lines.append(f"- [{p['title']}](/{p['path']}){desc}")
+            lines.append("")
+        return "\n".join(lines)
 
     def _rebuild_index(self) -> None:
-        """Reconstrói o índice agrupando todas as páginas por prefixo de path.
+        """Reconstrói o índice agrupando as páginas do manifesto por prefixo de path.
 
-        Chamado automaticamente após publish/evolve. Falha silenciosa para não
-        interromper o fluxo principal caso o índice não seja crítico.
+        A listagem completa via GraphQL só é feita quando o manifesto está vazio
+        ou a última sincronização passou de INDEX_FULL_SYNC_SECONDS; se o markdown
+        resultante não mudou, o upsert do índice é pulado pelo fingerprint.
+        Falha silenciosa para não interromper o fluxo principal.
         """
         try:
-            query = "{ pages { list(orderBy: TITLE) { id path title description } } }"
-            result = self._graphql(query, {})
-            pages = [
-                p for p in result.get("data", {}).get("pages", {}).get("list", [])
-                if p["path"] != "index"
-            ]
-
-            groups: dict = defaultdict(list)
-            for p in pages:
-                seg = p["path"].split("/")[0]
-                groups[seg].append(p)
-
-            lines = [
-                "# Índice de Páginas",
-                "",
-                "_Atualizado automaticamente. Não editar manualmente._",
-                "",
-            ]
-            for grp in sorted(groups.keys()):
-                lines.append(f"## {grp}")
-                for p in sorted(groups[grp], key=lambda x: x["title"]):
-                    desc = f" — {p['description']}" if p.get("description") else ""
-                    lines.append(f"- [{p['title']}](/{p['path']}){desc}")
-                lines.append("")
-
-            self._upsert_page(
+            stale = time.time() - self._manifest.last_full_sync > INDEX_FULL_SYNC_SECONDS
+            if stale or not len(self._manifest):
+                query = (
+                    "{ pages { list(orderBy: TITLE) "
+                    "{ id path title description locale updatedAt } } }"
+                )
+                result = self._graphql(query, {})
+                if result.get("errors"):
+                    raise RuntimeError(str(result["errors"]))
+                self._manifest.sync_listing(
+                    result.get("data", {}).get("pages", {}).get("list", []),
+                    self._locale,
+                )
+            pages = [p for p in self._manifest.entries() if p["path"] != "index"]
+
+            _, operation = self._upsert_page(
                 wiki_path="index",
                 title="Índice de Páginas",
-                content="\n".join(lines),
+                content=self._render_index(pages),
                 tags=["index", "auto-generated"],
             )
-            logger.info("Índice reconstruído: %d páginas", len(pages))
+            logger.info("Índice %s: %d páginas", operation, len(pages))
         except Exception as exc:
             logger.warning("Falha ao reconstruir índice: %s", exc)
 
@@ -426,8 +556,8 @@ class WikiAgent:
         )
 
         logger.info("Wiki %s: %s (id=%s)", operation, req.wiki_path, page["id"])
-        if req.wiki_path != "index":
-            self._rebuild_index()
+        if req.wiki_path != "index" and operation != "unchanged":
+            self._schedule_index_rebuild()
         return WikiResponse(
             ok=True,
             page_id=page["id"],
@@ -435,6 +565,7 @@ class WikiAgent:
             model_used=model_used,
             gpu=gpu_label,
             message=f"Página {operation} com sucesso",
+            skipped=operation == "unchanged",
         )
 
     async def evolve(self, req: WikiEvolveRequest) -> WikiResponse:
@@ -465,17 +596,22 @@ class WikiAgent:
             gpu_label, model_used, len(current_content), len(evolved_content),
         )
 
+        tags = req.tags or []
         page = self._update_page(
             page_id=existing["id"],
             wiki_path=req.wiki_path,
             title=current_title,
             content=evolved_content,
-            tags=req.tags or [],
+            tags=tags,
             locale=req.locale,
         )
+        self._record_page(
+            page, req.wiki_path, current_title,
+            page_fingerprint(current_title, evolved_content, tags), req.locale,
+        )
 
         if req.wiki_path != "index":
-            self._rebuild_index()
+            self._schedule_index_rebuild()
         return WikiResponse(
             ok=True,
             page_id=page["id"],
@@ -501,6 +637,17 @@ class WikiAgent:
 # ─────────────────────────────────────────────────────────────────────────────
 
 _agent: WikiAgent | None = None
+# O timer de debounce é daemon: no exit o rebuild pendente rodaria nunca.
+_LIVE_AGENTS: "weakref.WeakSet[WikiAgent]" = weakref.WeakSet()
+
+
+def _flush_pending_indexes() -> None:
+    """Executa os rebuilds de índice ainda pendentes ao encerrar o processo."""
+    for agent in list(_LIVE_AGENTS):
+        agent.flush_index()
+
+
+atexit.register(_flush_pending_indexes)
 
 
 def get_wiki_agent():
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Iterable
+
+
+def page_fingerprint(
+    title: str,
+    content: str,
+    tags: Iterable[str] | None = None,
+    description: str = "",
+) -> str:
+    """SHA-256 do que é publicado numa página (título, descrição, tags e corpo)."""
+    digest = hashlib.sha256()
+    for part in (title, description, "\x1f".join(sorted(tags or [])), content):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class WikiPageManifest:
+    """Manifesto local das páginas publicadas no Wiki.js.
+
+    Guarda, por ``locale:path``, o id da página, título, descrição e o
+    fingerprint do último conteúdo publicado. Serve para pular publicações sem
+    mudança (sem round trip) e para montar o índice sem listar a wiki inteira.
+    É o mesmo arquivo para o WikiAgent e para ``tools/wiki_bulk_publish.py``.
+    Persistido em JSON com escrita atômica; seguro para uso entre threads.
+    """
+
+    def __init__(self, path: Path | str) -> None:
+        self.path = Path(path)
+        self._lock = threading.RLock()
+        self._pages: dict[str, dict[str, Any]] = {}
+        self.last_full_sync = 0.0
+        self._load()
+
+    @staticmethod
+    def key(locale: str, wiki_path: str) -> str:
+        return f"{locale}:{wiki_path.strip('/')}"
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        self._pages = dict(data.get("pages") or {})
+        self.last_full_sync = float(data.get("last_full_sync") or 0.0)
+
+    def save(self) -> None:
+        with self._lock:
+            payload = {"last_full_sync": self.last_full_sync, "pages": self._pages}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+            tmp.write_text(json.dumps(payload, ensure_ascii=False, sort_keys=True), encoding="utf-8")
+            tmp.replace(self.path)
+
+    def get(self, locale: str, wiki_path: str) -> dict[str, Any] | None:
+        with self._lock:
+            entry = self._pages.get(self.key(locale, wiki_path))
+            return dict(entry) if entry else None
+
+    def is_unchanged(self, locale: str, wiki_path: str, fingerprint: str) -> bool:
+        entry = self.get(locale, wiki_path)
+        return bool(entry and entry.get("page_id") and entry.get("fingerprint") == fingerprint)
+
+    def record(
+        self,
+        locale: str,
+        wiki_path: str,
+        *,
+        page_id: int | None,
+        title: str,
+        description: str | None = None,
+        fingerprint: str | None = None,
+        updated_at: str | None = None,
+        persist: bool = True,
+    ) -> None:
+        """Registra a publicação; ``description=None`` mantém a já conhecida.
+
+        ``persist=False`` deixa a gravação para um ``save()`` posterior (lotes).
+        """
+        with self._lock:
+            key = self.key(locale, wiki_path)
+            entry = self._pages.get(key, {})
+            entry.update(
+                {
+                    "locale": locale,
+                    "path": wiki_path.strip("/"),
+                    "page_id": page_id,
+                    "title": title,
+                    "recorded_at": time.time(),
+                }
+            )
+            if description is not None:
+                entry["description"] = description
+            entry.setdefault("description", "")
+            if fingerprint is not None:
+                entry["fingerprint"] = fingerprint
+            if updated_at:
+                entry["updatedAt"] = updated_at
+            self._pages[key] = entry
+            if persist:
+                self.save()
+
+    def invalidate(self, locale: str, wiki_paths: Iterable[str]) -> None:
+        """Esquece páginas alteradas fora do ``record`` (refactor, movimentações).
+
+        A próxima publicação delas faz o round trip normal, e a próxima
+        reconstrução do índice refaz a listagem completa para achar os paths novos.
+        """
+        with self._lock:
+            for wiki_path in wiki_paths:
+                self._pages.pop(self.key(locale, wiki_path), None)
+            self.last_full_sync = 0.0
+            self.save()
+
+    def sync_listing(self, pages: Iterable[dict[str, Any]], default_locale: str) -> None:
+        """Reconcilia com a listagem completa da wiki (remove páginas apagadas).
+
+        Mantém o fingerprint de páginas cujo ``updatedAt`` não mudou; nas demais
+        ele é descartado para que a próxima publicação não seja pulada.
+        """
+        with self._lock:
+            fresh: dict[str, dict[str, Any]] = {}
+            for page in pages:
+                locale = page.get("locale") or default_locale
+                key = self.key(locale, page["path"])
+                old = self._pages.get(key, {})
+                entry = {
+                    "locale": locale,
+                    "path": page["path"].strip("/"),
+                    "page_id": page.get("id"),
+                    "title": page.get("title") or page["path"],
+                    "description": page.get("description") or "",
+                    "updatedAt": page.get("updatedAt"),
+                }
+                if old.get("fingerprint") and old.get("updatedAt") == page.get("updatedAt"):
+                    entry["fingerprint"] = old["fingerprint"]
+                fresh[key] = entry
+            self._pages = fresh
+            self.last_full_sync = time.time()
+            self.save()
+
+    def entries(self) -> list[dict[str, Any]]:
+        with self._lock:
+            return [dict(entry) for entry in self._pages.values()]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pages)
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
 import os
 import sys
 import uuid
@@ -33,7 +34,9 @@ from pydantic import BaseModel, Field
 
 from specialized_agents.config import LLM_CONFIG, LLM_GPU1_CONFIG, get_dynamic_num_ctx
 from specialized_agents.wiki_client import WikiJsClient
+from specialized_agents.wiki_manifest import WikiPageManifest
 from specialized_agents.wiki_paths import canonical_wiki_path, normalize_slug
+from specialized_agents.wiki_similarity import SimilarityIndex
 
 
 _ROOT_INDEX_TITLES = {
@@ -56,6 +59,13 @@ def _env_int(name: str, default: int) -> int:
     return int(raw) if raw.isdigit() else default
 
 
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)))
+    except ValueError:
+        return default
+
+
 def _extract_title(path: Path, content: str) -> str:
     for line in content.splitlines():
         stripped = line.strip()
@@ -158,8 +168,15 @@ class WikiRefactorResponse(BaseModel):
 
 
 class WikiRefactorSkill:
-    def __init__(self, wiki_client: WikiJsClient, repo_root: Path | None = None) -> None:
+    def __init__(
+        self,
+        wiki_client: WikiJsClient,
+        repo_root: Path | None = None,
+        manifest: WikiPageManifest | None = None,
+    ) -> None:
         self.client = wiki_client
+        # Manifesto de publicação do WikiAgent: páginas alteradas aqui saem dele
+        self.manifest = manifest
         self.repo_root = _resolve_repo_root(repo_root)
         self._page_detail_cache: dict[tuple[str, str], dict[str, Any] | None] = {}
         self.gpu0_url = LLM_CONFIG.get("base_url", "http://192.168.15.2:11434")
@@ -171,6 +188,19 @@ class WikiRefactorSkill:
         self.max_cluster_pages = _env_int("WIKI_REFACTOR_MAX_CLUSTER_PAGES", 6)
         self.max_source_chars = _env_int("WIKI_REFACTOR_MAX_SOURCE_CHARS", 18000)
         self.archive_root = os.getenv("WIKI_REFACTOR_ARCHIVE_ROOT", "archive/wiki-refactor")
+        # Quase-duplicatas por conteúdo (MinHash/LSH); assinaturas em cache por updatedAt
+        self.similarity_enabled = os.getenv("WIKI_REFACTOR_SIMILARITY", "1").strip().lower() not in {"0", "false", "no"}
+        self.similarity_threshold = _env_float("WIKI_REFACTOR_SIMILARITY_THRESHOLD", 0.8)
+        self.similarity_num_perm = _env_int("WIKI_REFACTOR_SIMILARITY_NUM_PERM", 128)
+        self.similarity_bands = _env_int("WIKI_REFACTOR_SIMILARITY_BANDS", 32)
+        self.similarity_min_tokens = _env_int("WIKI_REFACTOR_SIMILARITY_MIN_TOKENS", 40)
+        self.signature_cache_path = Path(
+            os.getenv(
+                "WIKI_REFACTOR_SIGNATURE_CACHE",
+                str(self.repo_root / "data" / "wiki" / "minhash_signatures.json"),
+            )
+        )
+        self._similarity_summary: dict[str, Any] = {}
         self._gpu0_sem = asyncio.Semaphore(_env_int("WIKI_REFACTOR_GPU0_CONCURRENCY", 1))
         self._gpu1_sem = asyncio.Semaphore(_env_int("WIKI_REFACTOR_GPU1_CONCURRENCY", 1))
         self._gpu_usage: dict[str, Any] = {
@@ -226,6 +256,7 @@ class WikiRefactorSkill:
             "slug_duplicates": self._count_slug_duplicates(live_pages),
             "root_distribution": self._root_distribution(live_pages),
             "index_targets": [plan["path"] for plan in index_plans],
+            "content_similarity": self._similarity_summary,
         }
 
         if req.mode == "apply":
@@ -361,6 +392,11 @@ class WikiRefactorSkill:
             for other in group[1:]:
                 union(base, other)
 
+        similar_ids: set[int] = set()
+        for first, second, _score in self._similar_page_pairs(live_pages, repo_docs, locale):
+            union(first, second)
+            similar_ids.update((first, second))
+
         clusters: dict[int, list[dict[str, Any]]] = defaultdict(list)
         for page in live_pages:
             clusters[find(page["id"])].append(page)
@@ -376,7 +412,7 @@ class WikiRefactorSkill:
             plans.append(
                 {
                     "cluster_key": f"{locale}:{canonical_page['path']}",
-                    "reason": self._cluster_reason(members, repo_doc),
+                    "reason": self._cluster_reason(members, repo_doc, similar_ids),
                     "canonical": {
                         "page_id": canonical_page["id"],
                         "current_path": canonical_page["path"],
@@ -398,6 +434,78 @@ class WikiRefactorSkill:
         plans.sort(key=lambda item: item["canonical"]["target_path"])
         return plans
 
+    def _similar_page_pairs(
+        self,
+        live_pages: list[dict[str, Any]],
+        repo_docs: dict[str, RepoDocument],
+        locale: str,
+    ) -> list[tuple[int, int, float]]:
+        """Pares de páginas com conteúdo quase idêntico (Jaccard estimado >= limiar).
+
+        Uma passada só por páginas e docs do repo: o corpo de uma página só é
+        buscado quando o ``updatedAt`` dela difere do cache de assinaturas.
+        Página que não pôde ser lida fica fora do índice (e do cache) nesta
+        execução. Um doc do repo parecido com várias páginas liga essas páginas
+        entre si.
+        """
+        self._similarity_summary = {}
+        if not self.similarity_enabled:
+            return []
+        try:
+            index = SimilarityIndex(
+                self.signature_cache_path,
+                num_perm=self.similarity_num_perm,
+                bands=self.similarity_bands,
+                min_tokens=self.similarity_min_tokens,
+            )
+        except ValueError as exc:
+            self._similarity_summary = {"error": str(exc)}
+            return []
+
+        page_ids: dict[str, int] = {}
+        unreadable = 0
+        archive_prefix = self.archive_root.strip("/") + "/"
+        for page in live_pages:
+            if page["path"] in _ROOT_INDEX_TITLES or page["path"].startswith(archive_prefix):
+                continue
+            key = f"page:{locale}:{page['path']}"
+            page_ids[key] = page["id"]
+            version = page.get("updatedAt") or None
+            if index.cached(key, version):
+                index.add(key, version)
+                continue
+            try:
+                detail = self._get_page_detail(page["path"], locale)
+            except HTTPException:
+                detail = None
+            if detail is None:
+                unreadable += 1
+                continue
+            index.add(key, version, detail.get("content") or "")
+        for wiki_path, doc in repo_docs.items():
+            version = hashlib.sha1(doc.content.encode("utf-8")).hexdigest()
+            index.add(f"repo:{wiki_path}", version, doc.content)
+
+        pairs: list[tuple[int, int, float]] = []
+        bridged: dict[str, list[tuple[int, float]]] = defaultdict(list)
+        for first, second, score in index.similar_pairs(self.similarity_threshold):
+            if first in page_ids and second in page_ids:
+                pairs.append((page_ids[first], page_ids[second], score))
+            elif first in page_ids or second in page_ids:
+                page_key, repo_key = (first, second) if first in page_ids else (second, first)
+                bridged[repo_key].append((page_ids[page_key], score))
+        for members in bridged.values():
+            base_id, base_score = members[0]
+            for other_id, other_score in members[1:]:
+                pairs.append((base_id, other_id, min(base_score, other_score)))
+
+        try:
+            index.save()
+        except OSError as exc:
+            self._similarity_summary["cache_error"] = str(exc)
+        self._similarity_summary.update({**index.stats, "similar_pairs": len(pairs), "unreadable_pages": unreadable})
+        return pairs
+
     def _should_group_by_alias(
         self,
         page: dict[str, Any],
@@ -451,7 +559,10 @@ class WikiRefactorSkill:
     def _get_page_detail(self, wiki_path: str, locale: str) -> dict[str, Any] | None:
         cache_key = (locale, wiki_path)
         if cache_key not in self._page_detail_cache:
-            self._page_detail_cache[cache_key] = self.client.get_page(wiki_path, locale=locale)
+            detail = self.client.get_page(wiki_path, locale=locale)
+            if detail is None:
+                return None  # erro transitório não fica no cache da execução
+            self._page_detail_cache[cache_key] = detail
         return self._page_detail_cache[cache_key]
 
     def _pick_canonical_page(
@@ -488,7 +599,12 @@ class WikiRefactorSkill:
         canonical = sorted(members, key=rank)[0]
         return canonical, repo_doc
 
-    def _cluster_reason(self, members: list[dict[str, Any]], repo_doc: RepoDocument | None) -> str:
+    def _cluster_reason(
+        self,
+        members: list[dict[str, Any]],
+        repo_doc: RepoDocument | None,
+        similar_ids: set[int] | None = None,
+    ) -> str:
         slugs = {m["path"].split("/")[-1] for m in members}
         titles = {_normalize_title(m["title"]) for m in members}
         if repo_doc:
@@ -497,6 +613,8 @@ class WikiRefactorSkill:
             return "duplicate_slug"
         if len(titles) == 1:
             return "duplicate_title"
+        if similar_ids and any(m["id"] in similar_ids for m in members):
+            return "similar_content"
         return "parallel_tree"
 
     def _archive_path_for(self, old_path: str, page_id: int) -> str:
@@ -583,6 +701,7 @@ class WikiRefactorSkill:
                 tags=None,
                 locale=req.locale,
             )
+            self._forget_pages(req.locale, [canonical["current_path"], target_path], warnings)
             updated_pages.append(
                 {
                     "page_id": canonical_page["id"],
@@ -605,6 +724,7 @@ class WikiRefactorSkill:
                         content=archived_content,
                         locale=req.locale,
                     )
+                    self._forget_pages(req.locale, [duplicate["path"], duplicate["archive_path"]], warnings)
                     archived_pages.append(
                         {
                             "page_id": duplicate_page["id"],
@@ -635,9 +755,18 @@ class WikiRefactorSkill:
                     locale=req.locale,
                 )
                 updated_indexes.append({"page_id": result["id"], "path": result["path"], "op": "created"})
+            self._forget_pages(req.locale, [plan["path"]], warnings)
 
         return warnings
 
+    def _forget_pages(self, locale: str | None, wiki_paths: list[str], warnings: list[str]) -> None:
+        if self.manifest is None:
+            return
+        try:
+            self.manifest.invalidate(self.client.effective_locale(locale), wiki_paths)
+        except OSError as exc:
+            warnings.append(f"falha ao invalidar manifesto da wiki: {exc}")
+
     async def _resolve_cluster_content(
         self,
         cluster: dict[str, Any],
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import random
+import re
+import struct
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - fallback puro Python, mesmo resultado
+    np = None  # type: ignore[assignment]
+
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_MASK64 = (1 << 64) - 1
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_CODE_FENCE_RE = re.compile(r"```.*?```", re.DOTALL)
+
+
+def tokenize(text: str) -> list[str]:
+    """Palavras normalizadas do corpo markdown (sem blocos de código)."""
+    return _WORD_RE.findall(_CODE_FENCE_RE.sub(" ", text or "").lower())
+
+
+def shingle_hashes(tokens: Sequence[str], size: int) -> set[int]:
+    """Hashes de 32 bits dos k-gramas de palavras (k=``size``)."""
+    if len(tokens) < size:
+        grams = [" ".join(tokens)] if tokens else []
+    else:
+        grams = [" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)]
+    return {
+        struct.unpack("<I", hashlib.blake2b(gram.encode("utf-8"), digest_size=4).digest())[0]
+        for gram in grams
+    }
+
+
+class MinHasher:
+    """Família de permutações ``(a*x + b) mod p`` truncadas em 32 bits.
+
+    A aritmética estoura em 64 bits do mesmo jeito com e sem numpy, então as
+    assinaturas são idênticas nos dois caminhos e podem ir para o cache.
+    """
+
+    def __init__(self, num_perm: int = 128, seed: int = 1) -> None:
+        self.num_perm = num_perm
+        self.seed = seed
+        rng = random.Random(seed)
+        self._a = [rng.randint(1, _MERSENNE_PRIME - 1) for _ in range(num_perm)]
+        self._b = [rng.randint(0, _MERSENNE_PRIME - 1) for _ in range(num_perm)]
+        if np is not None:
+            self._a_np = np.array(self._a, dtype=np.uint64)
+            self._b_np = np.array(self._b, dtype=np.uint64)
+
+    def signature(self, hashes: Iterable[int]) -> list[int]:
+        values = list(hashes)
+        if not values:
+            return [_MAX_HASH] * self.num_perm
+        if np is not None:
+            hv = np.array(values, dtype=np.uint64)[:, None]
+            with np.errstate(over="ignore"):
+                perm = (hv * self._a_np + self._b_np) % np.uint64(_MERSENNE_PRIME)
+            return (perm & np.uint64(_MAX_HASH)).min(axis=0).astype(np.int64).tolist()
+        return [
+            min((((a * hv + b) & _MASK64) % _MERSENNE_PRIME) & _MAX_HASH for hv in values)
+            for a, b in zip(self._a, self._b)
+        ]
+
+
+def estimate_jaccard(sig_a: Sequence[int], sig_b: Sequence[int]) -> float:
+    if not sig_a or len(sig_a) != len(sig_b):
+        return 0.0
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+class SimilarityIndex:
+    """Índice de quase-duplicatas (shingles + MinHash + bandas LSH).
+
+    Cada documento entra uma única vez via :meth:`add`; as assinaturas ficam
+    num cache JSON indexado pela chave do documento e sua versão (``updatedAt``
+    das páginas, hash do arquivo nos docs do repo), de modo que uma nova
+    execução só recalcula — e só precisa do corpo de — documentos alterados.
+    Pares candidatos vêm das colisões de banda e são confirmados pela
+    similaridade de Jaccard estimada.
+    """
+
+    def __init__(
+        self,
+        cache_path: Path | str | None = None,
+        *,
+        num_perm: int = 128,
+        bands: int = 32,
+        shingle_size: int = 5,
+        min_tokens: int = 40,
+        seed: int = 1,
+    ) -> None:
+        if num_perm % bands:
+            raise ValueError("num_perm precisa ser múltiplo de bands")
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.min_tokens = min_tokens
+        self.hasher = MinHasher(num_perm, seed)
+        self._params = {"num_perm": num_perm, "shingle_size": shingle_size, "min_tokens": min_tokens, "seed": seed}
+        self._cache: dict[str, dict[str, Any]] = {}
+        self._signatures: dict[str, list[int] | None] = {}
+        self._buckets: dict[tuple[int, tuple[int, ...]], list[str]] = defaultdict(list)
+        self.stats = {"cached": 0, "hashed": 0, "skipped_short": 0}
+        self._load()
+
+    def _load(self) -> None:
+        if not self.cache_path:
+            return
+        try:
+            data = json.loads(self.cache_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if data.get("params") == self._params:
+            self._cache = dict(data.get("entries") or {})
+
+    def save(self) -> None:
+        """Persiste só as assinaturas vistas nesta execução (descarta páginas removidas)."""
+        if not self.cache_path:
+            return
+        entries = {key: self._cache[key] for key in self._signatures if key in self._cache}
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.cache_path.with_suffix(self.cache_path.suffix + ".tmp")
+        tmp.write_text(json.dumps({"params": self._params, "entries": entries}), encoding="utf-8")
+        tmp.replace(self.cache_path)
+
+    def cached(self, key: str, version: str | None) -> bool:
+        entry = self._cache.get(key)
+        return bool(version) and entry is not None and entry.get("version") == version
+
+    def add(self, key: str, version: str | None, text: str | None = None) -> None:
+        """Indexa ``key``; ``text`` só é necessário quando não há cache válido."""
+        if self.cached(key, version):
+            signature = self._cache[key]["signature"]
+            self.stats["cached"] += 1
+        else:
+            if text is None:
+                return
+            tokens = tokenize(text)
+            if len(tokens) < self.min_tokens:
+                signature = None
+                self.stats["skipped_short"] += 1
+            else:
+                signature = self.hasher.signature(shingle_hashes(tokens, self.shingle_size))
+                self.stats["hashed"] += 1
+            if version:
+                self._cache[key] = {"version": version, "signature": signature}
+        self._signatures[key] = signature
+        if signature is None:
+            return
+        for band in range(self.bands):
+            start = band * self.rows
+            self._buckets[(band, tuple(signature[start:start + self.rows]))].append(key)
+
+    def candidate_pairs(self) -> Iterator[tuple[str, str]]:
+        seen: set[tuple[str, str]] = set()
+        for keys in self._buckets.values():
+            if len(keys) < 2:
+                continue
+            for i, first in enumerate(keys):
+                for second in keys[i + 1:]:
+                    pair = (first, second) if first < second else (second, first)
+                    if pair not in seen:
+                        seen.add(pair)
+                        yield pair
+
+    def similar_pairs(self, threshold: float) -> list[tuple[str, str, float]]:
+        result = []
+        for first, second in self.candidate_pairs():
+            score = estimate_jaccard(self._signatures[first], self._signatures[second])  # type: ignore[arg-type]
+            if score >= threshold:
+                result.append((first, second, score))
+        result.sort()
+        return result
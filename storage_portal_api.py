@@ -16,7 +16,10 @@ https://www.rpa4all.com/storage-portal.html.
 
 from __future__ import annotations
 
+import asyncio
 import base64
+import bisect
+import fcntl
 import hashlib
 import html
 import json
@@ -29,15 +32,19 @@ import shutil
 import smtplib
 import sqlite3
 import string
+import threading
+import time
+from collections import OrderedDict
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from pathlib import Path
-from typing import Any
+from typing import Any, AsyncIterator
 
 import requests
-from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+from fastapi import FastAPI, File, Form, HTTPException, Request, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
@@ -45,6 +52,17 @@ from pydantic import BaseModel, Field
 
 logger = logging.getLogger(__name__)
 
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+UPLOAD_SESSIONS_DIRNAME = ".upload-sessions"
+UPLOAD_SESSION_TTL_SECONDS = float(os.getenv("STORAGE_PORTAL_UPLOAD_TTL", str(7 * 86400)))
+FILES_PAGE_SIZE = 500
+FILES_PAGE_SIZE_MAX = 5000
+LISTING_CACHE_MAX_DIRS = 512
+LISTING_REVALIDATE_SECONDS = float(os.getenv("STORAGE_PORTAL_LISTING_REVALIDATE", "5"))
+USAGE_RESCAN_SECONDS = 6 * 3600
+TOKEN_CACHE_TTL_SECONDS = float(os.getenv("STORAGE_PORTAL_TOKEN_CACHE_TTL", "15"))
+SQLITE_BUSY_TIMEOUT_MS = 5000
+
 
 def utcnow_iso() -> str:
     return datetime.now(timezone.utc).replace(microsecond=0).isoformat()
@@ -251,6 +269,14 @@ class PortalFolderCreatePayload(BaseModel):
     folder_path: str
 
 
+class PortalUploadStartPayload(BaseModel):
+    portal_token: str
+    filename: str
+    total_size: int = Field(ge=0)
+    relative_dir: str = "."
+    sha256: str | None = None
+
+
 class FinalizeContractPayload(BaseModel):
     contract_code: str | None = None
     portal_token: str | None = None
@@ -261,16 +287,56 @@ class FinalizeContractPayload(BaseModel):
 
 
 class StorageRepository:
-    def __init__(self, database_path: Path):
+    """Persistência SQLite do portal.
+
+    Cada thread reutiliza uma única conexão (o cache de statements do ``sqlite3``
+    evita re-preparar o SQL a cada chamada) e o banco roda em WAL, então leituras
+    dos workers do FastAPI não bloqueiam atrás das escritas. A resolução
+    portal_token→contrato fica num cache em memória com TTL, limpo a cada escrita
+    local; o TTL limita a defasagem entre processos distintos.
+    """
+
+    def __init__(self, database_path: Path, token_cache_ttl: float = TOKEN_CACHE_TTL_SECONDS):
         self.database_path = database_path
         self.database_path.parent.mkdir(parents=True, exist_ok=True)
+        self.token_cache_ttl = token_cache_ttl
+        self._local = threading.local()
+        self._connections: list[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._token_cache: dict[str, tuple[float, tuple[dict[str, Any], dict[str, Any]]]] = {}
         self._init_db()
 
     def _connect(self) -> sqlite3.Connection:
-        connection = sqlite3.connect(self.database_path)
-        connection.row_factory = sqlite3.Row
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.database_path,
+                timeout=SQLITE_BUSY_TIMEOUT_MS / 1000,
+                cached_statements=256,
+            )
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+            connection.execute("PRAGMA foreign_keys=ON")
+            self._local.connection = connection
+            with self._connections_lock:
+                self._connections.append(connection)
         return connection
 
+    def close(self) -> None:
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            try:
+                connection.close()
+            except sqlite3.ProgrammingError:
+                pass  # conexão de outra thread já finalizada
+        self._local = threading.local()
+
+    def _invalidate_token_cache(self) -> None:
+        self._token_cache.clear()
+
     def _init_db(self) -> None:
         with self._connect() as conn:
             conn.executescript(
@@ -339,6 +405,8 @@ class StorageRepository:
                     FOREIGN KEY(contract_id) REFERENCES contracts(id)
                 );
 
+                CREATE INDEX IF NOT EXISTS idx_portal_users_contract ON portal_users(contract_id);
+
                 CREATE TABLE IF NOT EXISTS payments (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     contract_id INTEGER NOT NULL,
@@ -352,9 +420,15 @@ class StorageRepository:
                 );
                 """
             )
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(contracts)")}
+            if "usage_bytes" not in columns:
+                conn.execute("ALTER TABLE contracts ADD COLUMN usage_bytes INTEGER NOT NULL DEFAULT 0")
+            if "usage_scanned_at" not in columns:
+                conn.execute("ALTER TABLE contracts ADD COLUMN usage_scanned_at REAL")
 
     def create_contract(self, payload: dict[str, Any], documents: dict[str, Any], primary_user: dict[str, Any]) -> dict[str, Any]:
         now = utcnow_iso()
+        self._invalidate_token_cache()
         with self._connect() as conn:
             cursor = conn.execute(
                 """
@@ -436,6 +510,16 @@ class StorageRepository:
 
     def get_contract_by_portal_token(self, portal_token: str) -> tuple[dict[str, Any], dict[str, Any]] | None:
         token_hash = hashlib.sha256(portal_token.encode("utf-8")).hexdigest()
+        cached = self._token_cache.get(token_hash)
+        if cached is not None and cached[0] > time.monotonic():
+            return dict(cached[1][0]), dict(cached[1][1])
+        result = self._load_contract_by_token_hash(token_hash)
+        if result is not None and self.token_cache_ttl > 0:
+            self._token_cache[token_hash] = (time.monotonic() + self.token_cache_ttl, result)
+            return dict(result[0]), dict(result[1])
+        return result
+
+    def _load_contract_by_token_hash(self, token_hash: str) -> tuple[dict[str, Any], dict[str, Any]] | None:
         with self._connect() as conn:
             row = conn.execute(
                 """
@@ -484,6 +568,7 @@ class StorageRepository:
 
     def create_subuser(self, contract_id: int, user: dict[str, Any]) -> dict[str, Any]:
         now = utcnow_iso()
+        self._invalidate_token_cache()
         with self._connect() as conn:
             cursor = conn.execute(
                 """
@@ -536,6 +621,7 @@ class StorageRepository:
         with self._connect() as conn:
             conn.execute(f"UPDATE portal_users SET {', '.join(assignments)} WHERE id = ?", values)
             conn.commit()
+        self._invalidate_token_cache()
 
     def create_api_token(self, contract_id: int, label: str, token_hash: str, preview: str) -> None:
         with self._connect() as conn:
@@ -596,6 +682,30 @@ class StorageRepository:
         payments = self.list_payments(contract_id)
         return payments[0] if payments else {}
 
+    def get_usage(self, contract_id: int) -> tuple[int, float | None]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT usage_bytes, usage_scanned_at FROM contracts WHERE id = ?", (contract_id,)
+            ).fetchone()
+        return (row["usage_bytes"], row["usage_scanned_at"]) if row else (0, None)
+
+    # Os contadores de uso não invalidam o cache de token: são sempre lidos via get_usage().
+    def set_usage(self, contract_id: int, usage_bytes: int) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE contracts SET usage_bytes = ?, usage_scanned_at = ? WHERE id = ?",
+                (max(usage_bytes, 0), time.time(), contract_id),
+            )
+            conn.commit()
+
+    def add_usage(self, contract_id: int, delta_bytes: int) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE contracts SET usage_bytes = MAX(usage_bytes + ?, 0) WHERE id = ?",
+                (delta_bytes, contract_id),
+            )
+            conn.commit()
+
     def update_contract_documents(self, contract_id: int, documents: dict[str, Any], onboarding_sent_at: str | None = None) -> None:
         with self._connect() as conn:
             conn.execute(
@@ -607,6 +717,7 @@ class StorageRepository:
                 (safe_json_dumps(documents), onboarding_sent_at, utcnow_iso(), contract_id),
             )
             conn.commit()
+        self._invalidate_token_cache()
 
 
 class AuthentikClient:
@@ -835,6 +946,361 @@ class OnboardingMailer:
                 smtp.send_message(message)
 
 
+def _listing_sort_key(is_file: bool, name: str) -> tuple[int, str, str]:
+    return (int(is_file), name.lower(), name)
+
+
+def encode_listing_cursor(key: tuple[int, str, str]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_listing_cursor(cursor: str) -> tuple[int, str, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        is_file, lowered, name = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return (int(is_file), str(lowered), str(name))
+    except Exception as exc:
+        raise HTTPException(status_code=400, detail="Cursor de listagem inválido.") from exc
+
+
+@dataclass
+class DirectoryListing:
+    mtime_ns: int
+    keys: list[tuple[int, str, str]]
+    entries: list[dict[str, Any]]
+    total_bytes: int
+    file_stats: list[tuple[str, int, int]]  # (nome, tamanho, st_mtime_ns) dos arquivos
+    checked_at: float
+
+
+class WorkspaceListingCache:
+    """Cache LRU das listagens por diretório, montadas com uma única passada de ``os.scandir``.
+
+    Cada entrada é revalidada pelo ``st_mtime_ns`` do diretório (um ``stat`` por
+    requisição), o que cobre arquivos criados, removidos ou renomeados por
+    escritores externos (Nextcloud, ingest). Modificações no lugar não mudam o
+    mtime do diretório, então tamanho/mtime de cada arquivo são conferidos de
+    novo a cada ``revalidate_seconds``. As escritas do portal invalidam
+    explicitamente o diretório afetado.
+    """
+
+    def __init__(self, max_dirs: int = LISTING_CACHE_MAX_DIRS, revalidate_seconds: float = LISTING_REVALIDATE_SECONDS):
+        self.max_dirs = max_dirs
+        self.revalidate_seconds = revalidate_seconds
+        self._listings: OrderedDict[str, DirectoryListing] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, directory: Path, workspace: Path) -> DirectoryListing:
+        key = str(directory)
+        mtime_ns = os.stat(directory).st_mtime_ns
+        with self._lock:
+            cached = self._listings.get(key)
+        if cached is not None and cached.mtime_ns == mtime_ns:
+            now = time.monotonic()
+            if now - cached.checked_at < self.revalidate_seconds or self._files_unchanged(directory, cached):
+                cached.checked_at = now
+                with self._lock:
+                    if key in self._listings:
+                        self._listings.move_to_end(key)
+                return cached
+        listing = self._scan(directory, workspace, mtime_ns)
+        with self._lock:
+            self._listings[key] = listing
+            self._listings.move_to_end(key)
+            while len(self._listings) > self.max_dirs:
+                self._listings.popitem(last=False)
+        return listing
+
+    def invalidate(self, directory: Path) -> None:
+        with self._lock:
+            self._listings.pop(str(directory), None)
+
+    @staticmethod
+    def _files_unchanged(directory: Path, listing: DirectoryListing) -> bool:
+        for name, size, mtime_ns in listing.file_stats:
+            try:
+                stat = os.stat(directory / name)
+            except OSError:
+                return False
+            if stat.st_size != size or stat.st_mtime_ns != mtime_ns:
+                return False
+        return True
+
+    @staticmethod
+    def _scan(directory: Path, workspace: Path, mtime_ns: int) -> DirectoryListing:
+        prefix = "" if directory == workspace else str(directory.relative_to(workspace)) + "/"
+        rows: list[tuple[tuple[int, str, str], dict[str, Any]]] = []
+        file_stats: list[tuple[str, int, int]] = []
+        total_bytes = 0
+        with os.scandir(directory) as iterator:
+            for item in iterator:
+                try:
+                    is_file = item.is_file()
+                    stat = item.stat()
+                except OSError:
+                    continue  # removido durante a varredura
+                size = stat.st_size if is_file else 0
+                total_bytes += size
+                if is_file:
+                    file_stats.append((item.name, size, stat.st_mtime_ns))
+                rows.append(
+                    (
+                        _listing_sort_key(is_file, item.name),
+                        {
+                            "name": item.name,
+                            "path": prefix + item.name,
+                            "kind": "file" if is_file else "folder",
+                            "size": size,
+                            "modified_at": datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc).isoformat(),
+                        },
+                    )
+                )
+        rows.sort(key=lambda row: row[0])
+        return DirectoryListing(
+            mtime_ns=mtime_ns,
+            keys=[row[0] for row in rows],
+            entries=[row[1] for row in rows],
+            total_bytes=total_bytes,
+            file_stats=file_stats,
+            checked_at=time.monotonic(),
+        )
+
+
+def scan_tree_bytes(root: Path) -> int:
+    """Soma os bytes de arquivos sob ``root`` com ``os.scandir`` (sem seguir symlinks)."""
+    total = 0
+    pending = [root]
+    while pending:
+        current = pending.pop()
+        try:
+            with os.scandir(current) as iterator:
+                for item in iterator:
+                    try:
+                        if item.is_dir(follow_symlinks=False):
+                            pending.append(Path(item.path))
+                        elif item.is_file(follow_symlinks=False):
+                            total += item.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+    return total
+
+
+class ResumableUploadStore:
+    """Sessões de upload em disco: ``<id>.part`` com os bytes e ``<id>.json`` com metadados.
+
+    O offset confirmado é sempre o tamanho do ``.part``, então a sessão sobrevive
+    a quedas de conexão, a reinícios da API e a múltiplos workers. Os arquivos
+    ficam sob a raiz dos workspaces para que o rename final seja atômico (mesmo
+    filesystem). Escritas e o fechamento da sessão seguram ``flock`` no
+    ``.part``; o hash incremental em memória só é usado se cobrir exatamente o
+    ``.part`` atual, senão é recalculado a partir do disco.
+    """
+
+    def __init__(self, root: Path, ttl_seconds: float = UPLOAD_SESSION_TTL_SECONDS):
+        self.root = root
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = ttl_seconds
+        self._hashers: dict[str, tuple[Any, int]] = {}  # upload_id -> (sha256, bytes cobertos)
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._last_sweep = 0.0
+
+    def _paths(self, upload_id: str) -> tuple[Path, Path]:
+        if not re.fullmatch(r"[A-Za-z0-9_-]{16,64}", upload_id or ""):
+            raise HTTPException(status_code=404, detail="Upload não encontrado.")
+        return self.root / f"{upload_id}.part", self.root / f"{upload_id}.json"
+
+    def create(self, metadata: dict[str, Any]) -> dict[str, Any]:
+        if time.time() - self._last_sweep > min(self.ttl_seconds, 3600):
+            self.sweep()
+        upload_id = secrets.token_urlsafe(18)
+        part_path, meta_path = self._paths(upload_id)
+        part_path.touch()
+        session = {**metadata, "upload_id": upload_id, "created_at": utcnow_iso()}
+        meta_path.write_text(safe_json_dumps(session), encoding="utf-8")
+        self._hashers[upload_id] = (hashlib.sha256(), 0)
+        return self.status(session)
+
+    def load(self, upload_id: str) -> dict[str, Any]:
+        _, meta_path = self._paths(upload_id)
+        try:
+            return json.loads(meta_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Upload não encontrado.") from None
+
+    def offset(self, upload_id: str) -> int:
+        part_path, _ = self._paths(upload_id)
+        return part_path.stat().st_size if part_path.exists() else 0
+
+    def status(self, session: dict[str, Any]) -> dict[str, Any]:
+        completed = session.get("completed")
+        return {
+            "upload_id": session["upload_id"],
+            "filename": session["filename"],
+            "relative_dir": session["relative_dir"],
+            "total_size": session["total_size"],
+            "offset": session["total_size"] if completed else self.offset(session["upload_id"]),
+            "chunk_size": UPLOAD_CHUNK_SIZE,
+            **({"completed": True, "sha256": completed["sha256"]} if completed else {}),
+        }
+
+    def _hasher(self, upload_id: str, size: int) -> Any:
+        """Hash do prefixo de ``size`` bytes; recalcula do disco se o estado em memória não cobre o ``.part``."""
+        hasher, covered = self._hashers.get(upload_id, (None, -1))
+        if hasher is None or covered != size:
+            # Retomada após reinício ou chunk gravado por outro worker
+            part_path, _ = self._paths(upload_id)
+            hasher = hashlib.sha256()
+            with part_path.open("rb") as handle:
+                for block in iter(lambda: handle.read(UPLOAD_CHUNK_SIZE), b""):
+                    hasher.update(block)
+            self._hashers[upload_id] = (hasher, size)
+        return hasher
+
+    def _open_locked(self, upload_id: str, mode: str) -> Any:
+        part_path, _ = self._paths(upload_id)
+        handle = part_path.open(mode)
+        try:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+        except BaseException:
+            handle.close()
+            raise
+        return handle
+
+    async def append(
+        self,
+        upload_id: str,
+        offset: int,
+        chunks: AsyncIterator[bytes],
+        limit: int,
+        limit_detail: str = "Chunk excede o tamanho declarado do upload.",
+    ) -> int:
+        """Grava ``chunks`` a partir de ``offset`` sem ultrapassar ``limit`` bytes no total."""
+        async with self._locks.setdefault(upload_id, asyncio.Lock()):
+            part_path, _ = self._paths(upload_id)
+            if not part_path.exists():
+                raise HTTPException(status_code=404, detail="Upload não encontrado.")
+            handle = await run_in_threadpool(self._open_locked, upload_id, "ab")
+            try:
+                current = os.fstat(handle.fileno()).st_size
+                if offset != current:
+                    raise HTTPException(status_code=409, detail={"message": "Offset divergente.", "offset": current})
+                hasher = await run_in_threadpool(self._hasher, upload_id, current)
+                written = current
+                try:
+                    async for chunk in chunks:
+                        if not chunk:
+                            continue
+                        if written + len(chunk) > limit:
+                            raise HTTPException(status_code=413, detail=limit_detail)
+                        await run_in_threadpool(_write_chunk, handle, hasher, chunk)
+                        written += len(chunk)
+                    await run_in_threadpool(handle.flush)
+                except BaseException:
+                    # Descarta o estado do hash; a próxima retomada recalcula a partir do .part
+                    self._hashers.pop(upload_id, None)
+                    raise
+                self._hashers[upload_id] = (hasher, written)
+            finally:
+                await run_in_threadpool(handle.close)
+            return written
+
+    def finish(
+        self, upload_id: str, target: Path, expected_sha256: str | None = None, keep_result: bool = False
+    ) -> str:
+        """Move o ``.part`` completo para ``target`` (rename atômico) e retorna o SHA256.
+
+        Com ``expected_sha256`` divergente a sessão é descartada e nada é publicado.
+        Com ``keep_result`` os metadados ficam com o resultado (até o TTL), então
+        um ``finish`` repetido — retry do último chunk — devolve o mesmo SHA256.
+        """
+        part_path, meta_path = self._paths(upload_id)
+        try:
+            handle = self._open_locked(upload_id, "rb")
+        except FileNotFoundError:
+            completed = self.load(upload_id).get("completed")
+            if completed:
+                return completed["sha256"]
+            raise HTTPException(status_code=404, detail="Upload não encontrado.") from None
+        try:
+            if not part_path.exists():
+                # Outro worker publicou enquanto esperávamos o lock
+                completed = self.load(upload_id).get("completed")
+                if completed:
+                    return completed["sha256"]
+                raise HTTPException(status_code=404, detail="Upload não encontrado.")
+            digest = self._hasher(upload_id, os.fstat(handle.fileno()).st_size).hexdigest()
+            if expected_sha256 and digest != expected_sha256:
+                self.discard(upload_id)
+                raise HTTPException(status_code=422, detail="SHA256 do upload não confere; reenvie o arquivo.")
+            os.fsync(handle.fileno())
+            if keep_result:
+                session = {**self.load(upload_id), "completed": {"sha256": digest, "finished_at": utcnow_iso()}}
+                tmp = meta_path.with_name(f".{meta_path.name}.{os.getpid()}.tmp")
+                tmp.write_text(safe_json_dumps(session), encoding="utf-8")
+                os.replace(tmp, meta_path)
+            os.replace(part_path, target)
+            if not keep_result:
+                meta_path.unlink(missing_ok=True)
+        finally:
+            handle.close()
+        self._forget(upload_id)
+        return digest
+
+    def discard(self, upload_id: str) -> None:
+        part_path, meta_path = self._paths(upload_id)
+        part_path.unlink(missing_ok=True)
+        meta_path.unlink(missing_ok=True)
+        self._forget(upload_id)
+
+    def sweep(self, now: float | None = None) -> int:
+        """Remove sessões (``.part`` órfãos e resultados guardados) sem atividade há mais de ``ttl_seconds``."""
+        now = time.time() if now is None else now
+        self._last_sweep = now
+        removed: set[str] = set()
+        for path in self.root.iterdir():
+            if path.suffix not in (".part", ".json") or path.stem in removed:
+                continue
+            try:
+                idle = now - path.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            if idle <= self.ttl_seconds:
+                continue
+            sibling = path.with_suffix(".json" if path.suffix == ".part" else ".part")
+            try:
+                if sibling.exists() and now - sibling.stat().st_mtime <= self.ttl_seconds:
+                    continue
+            except FileNotFoundError:
+                pass
+            try:
+                self.discard(path.stem)
+            except HTTPException:
+                path.unlink(missing_ok=True)
+            removed.add(path.stem)
+        if removed:
+            logger.info("Sessões de upload expiradas removidas: %d", len(removed))
+        return len(removed)
+
+    def _forget(self, upload_id: str) -> None:
+        self._hashers.pop(upload_id, None)
+        self._locks.pop(upload_id, None)
+
+
+def _write_chunk(handle: Any, hasher: Any, chunk: bytes) -> None:
+    handle.write(chunk)
+    hasher.update(chunk)
+
+
+async def _iter_upload_file(upload: UploadFile) -> AsyncIterator[bytes]:
+    while True:
+        chunk = await upload.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+
 class StoragePortalService:
     PROFILE_LABELS = {
         "manager": "Gestor",
@@ -858,6 +1324,8 @@ class StoragePortalService:
         self.onboarding_mailer = onboarding_mailer
         self.settings.data_dir.mkdir(parents=True, exist_ok=True)
         self.settings.workspace_root.mkdir(parents=True, exist_ok=True)
+        self.uploads = ResumableUploadStore(self.settings.workspace_root / UPLOAD_SESSIONS_DIRNAME)
+        self.listings = WorkspaceListingCache()
 
     def _workspace_for_contract(self, contract_code: str) -> tuple[Path, str]:
         relative_dir = f"contracts/{contract_code.lower()}"
@@ -1159,6 +1627,7 @@ class StoragePortalService:
         api_tokens = self.repository.list_api_tokens(contract["id"])
         users = self._decorate_users(self.repository.list_users(contract["id"]))
         files = self.list_files(contract, ".")
+        usage = self.workspace_usage(contract)
         return {
             "contract": {
                 "contract_code": contract["contract_code"],
@@ -1186,6 +1655,7 @@ class StoragePortalService:
             "users": users,
             "payments": self.repository.list_payments(contract["id"]),
             "files": files,
+            "usage": usage,
             "inventory": self._inventory(),
         }
 
@@ -1299,29 +1769,73 @@ class StoragePortalService:
             raise HTTPException(status_code=400, detail="Caminho fora do workspace do contrato.")
         return target
 
-    def list_files(self, contract: dict[str, Any], relative_path: str) -> dict[str, Any]:
+    def list_files(
+        self,
+        contract: dict[str, Any],
+        relative_path: str,
+        cursor: str | None = None,
+        limit: int = FILES_PAGE_SIZE,
+    ) -> dict[str, Any]:
         target = self._resolve_workspace_path(contract, relative_path)
-        if not target.exists():
+        workspace = Path(contract["workspace_path"]).resolve()
+        try:
+            listing = self.listings.get(target, workspace)
+        except FileNotFoundError:
             raise HTTPException(status_code=404, detail="Diretório não encontrado.")
-        if not target.is_dir():
+        except NotADirectoryError:
             raise HTTPException(status_code=400, detail="O caminho informado não é um diretório.")
-        entries = []
-        total_bytes = 0
-        for child in sorted(target.iterdir(), key=lambda item: (item.is_file(), item.name.lower())):
-            stat = child.stat()
-            size = stat.st_size if child.is_file() else 0
-            total_bytes += size
-            entries.append(
-                {
-                    "name": child.name,
-                    "path": str(child.relative_to(contract["workspace_path"])),
-                    "kind": "folder" if child.is_dir() else "file",
-                    "size": size,
-                    "modified_at": datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc).isoformat(),
-                }
-            )
-        visible_path = "." if target == Path(contract["workspace_path"]) else str(target.relative_to(contract["workspace_path"]))
-        return {"path": visible_path, "entries": entries, "total_bytes": total_bytes}
+        limit = max(1, min(int(limit), FILES_PAGE_SIZE_MAX))
+        start = bisect.bisect_right(listing.keys, decode_listing_cursor(cursor)) if cursor else 0
+        end = start + limit
+        next_cursor = encode_listing_cursor(listing.keys[end - 1]) if end < len(listing.keys) else None
+        return {
+            "path": self._visible_dir(contract, target),
+            "entries": listing.entries[start:end],
+            "total_bytes": listing.total_bytes,
+            "total_entries": len(listing.entries),
+            "next_cursor": next_cursor,
+        }
+
+    def _quota_bytes(self, contract: dict[str, Any]) -> int | None:
+        try:
+            volume_tb = float(json.loads(contract["request_payload_json"]).get("volume") or 0)
+        except (TypeError, ValueError):
+            return None
+        return int(volume_tb * 1024**4) if volume_tb > 0 else None
+
+    def workspace_usage(self, contract: dict[str, Any]) -> dict[str, Any]:
+        """Uso do contrato mantido incrementalmente; varredura completa só na semeadura/reconciliação."""
+        used, scanned_at = self.repository.get_usage(contract["id"])
+        if scanned_at is None or time.time() - scanned_at > USAGE_RESCAN_SECONDS:
+            used = scan_tree_bytes(Path(contract["workspace_path"]))
+            self.repository.set_usage(contract["id"], used)
+        quota = self._quota_bytes(contract)
+        return {
+            "used_bytes": used,
+            "quota_bytes": quota,
+            "available_bytes": None if quota is None else max(quota - used, 0),
+        }
+
+    def _ensure_quota(self, contract: dict[str, Any], incoming_bytes: int) -> int | None:
+        available = self.workspace_usage(contract)["available_bytes"]
+        if available is not None and incoming_bytes > available:
+            raise HTTPException(status_code=413, detail="Cota de armazenamento do contrato excedida.")
+        return available
+
+    def _publish_upload(
+        self,
+        contract: dict[str, Any],
+        upload_id: str,
+        target: Path,
+        expected_sha256: str | None = None,
+        keep_result: bool = False,
+    ) -> str:
+        """Rename atômico do upload + invalidação da listagem + ajuste do contador de uso."""
+        previous_size = target.stat().st_size if target.is_file() else 0
+        digest = self.uploads.finish(upload_id, target, expected_sha256, keep_result=keep_result)
+        self.repository.add_usage(contract["id"], target.stat().st_size - previous_size)
+        self.listings.invalidate(target.parent)
+        return digest
 
     def create_folder(self, portal_token: str, folder_path: str) -> dict[str, Any]:
         result = self.repository.get_contract_by_portal_token(portal_token)
@@ -1332,23 +1846,113 @@ class StoragePortalService:
             raise HTTPException(status_code=403, detail="Seu perfil não pode criar pastas.")
         target = self._resolve_workspace_path(contract, folder_path)
         target.mkdir(parents=True, exist_ok=True)
+        self.listings.invalidate(target.parent)
         parent = "." if target.parent == Path(contract["workspace_path"]) else str(target.parent.relative_to(contract["workspace_path"]))
         return {"files": self.list_files(contract, parent)}
 
-    async def upload_file(self, portal_token: str, relative_dir: str, upload: UploadFile) -> dict[str, Any]:
+    def _writable_contract(self, portal_token: str) -> dict[str, Any]:
         result = self.repository.get_contract_by_portal_token(portal_token)
         if not result:
             raise HTTPException(status_code=404, detail="Portal token inválido.")
         contract, current_user = result
         if current_user["profile"] == "readonly":
             raise HTTPException(status_code=403, detail="Seu perfil não pode enviar arquivos.")
+        return contract
+
+    def _visible_dir(self, contract: dict[str, Any], directory: Path) -> str:
+        return "." if directory == Path(contract["workspace_path"]) else str(directory.relative_to(contract["workspace_path"]))
+
+    async def upload_file(self, portal_token: str, relative_dir: str, upload: UploadFile) -> dict[str, Any]:
+        """Upload em uma requisição, gravado em chunks num ``.part`` e renomeado no fim.
+
+        O corpo nunca é carregado inteiro em memória e a escrita roda fora do event loop.
+        """
+        contract = self._writable_contract(portal_token)
         directory = self._resolve_workspace_path(contract, relative_dir or ".")
         directory.mkdir(parents=True, exist_ok=True)
-        target = directory / Path(upload.filename or "upload.bin").name
-        content = await upload.read()
-        target.write_bytes(content)
-        visible_path = "." if directory == Path(contract["workspace_path"]) else str(directory.relative_to(contract["workspace_path"]))
-        return {"files": self.list_files(contract, visible_path)}
+        filename = Path(upload.filename or "upload.bin").name
+        session = self.uploads.create(
+            {"contract_id": contract["id"], "relative_dir": relative_dir or ".", "filename": filename, "total_size": None}
+        )
+        upload_id = session["upload_id"]
+        available = await run_in_threadpool(self._ensure_quota, contract, 0)
+        try:
+            await self.uploads.append(
+                upload_id, 0, _iter_upload_file(upload),
+                limit=2**63 if available is None else available,
+                limit_detail="Cota de armazenamento do contrato excedida.",
+            )
+            digest = await run_in_threadpool(self._publish_upload, contract, upload_id, directory / filename)
+        except BaseException:
+            self.uploads.discard(upload_id)
+            raise
+        return {"files": self.list_files(contract, self._visible_dir(contract, directory)), "sha256": digest}
+
+    def start_upload(self, payload: PortalUploadStartPayload) -> dict[str, Any]:
+        """Abre uma sessão de upload retomável (``PUT`` por chunk com offset)."""
+        contract = self._writable_contract(payload.portal_token)
+        directory = self._resolve_workspace_path(contract, payload.relative_dir or ".")
+        expected = (payload.sha256 or "").strip().lower() or None
+        if expected and not re.fullmatch(r"[0-9a-f]{64}", expected):
+            raise HTTPException(status_code=400, detail="SHA256 inválido.")
+        self._ensure_quota(contract, payload.total_size)
+        return self.uploads.create(
+            {
+                "contract_id": contract["id"],
+                "relative_dir": self._visible_dir(contract, directory),
+                "filename": Path(payload.filename or "upload.bin").name,
+                "total_size": payload.total_size,
+                "sha256": expected,
+            }
+        )
+
+    def _upload_session(self, portal_token: str, upload_id: str) -> tuple[dict[str, Any], dict[str, Any]]:
+        contract = self._writable_contract(portal_token)
+        session = self.uploads.load(upload_id)
+        if session.get("contract_id") != contract["id"] or session.get("total_size") is None:
+            raise HTTPException(status_code=404, detail="Upload não encontrado.")
+        return contract, session
+
+    def upload_status(self, portal_token: str, upload_id: str) -> dict[str, Any]:
+        _, session = self._upload_session(portal_token, upload_id)
+        return self.uploads.status(session)
+
+    async def upload_chunk(self, portal_token: str, upload_id: str, offset: int, chunks: AsyncIterator[bytes]) -> dict[str, Any]:
+        contract, session = self._upload_session(portal_token, upload_id)
+        total_size = session["total_size"]
+        if session.get("completed"):
+            # Retry do último chunk depois de publicado: devolve o resultado guardado
+            sha256 = session["completed"]["sha256"]
+        else:
+            # Cota conferida a cada chunk: outros uploads podem ter consumido espaço desde o início da sessão
+            available = await run_in_threadpool(self._ensure_quota, contract, 0)
+            if available is not None and offset + available < total_size:
+                written = await self.uploads.append(
+                    upload_id, offset, chunks, limit=offset + available,
+                    limit_detail="Cota de armazenamento do contrato excedida.",
+                )
+            else:
+                written = await self.uploads.append(upload_id, offset, chunks, limit=total_size)
+            if written < total_size:
+                return self.uploads.status(session)
+
+            directory = self._resolve_workspace_path(contract, session["relative_dir"])
+            directory.mkdir(parents=True, exist_ok=True)
+            sha256 = await run_in_threadpool(
+                self._publish_upload, contract, upload_id, directory / session["filename"], session.get("sha256"), True
+            )
+        return {
+            **self.uploads.status(session),
+            "offset": total_size,
+            "completed": True,
+            "sha256": sha256,
+            "files": self.list_files(contract, session["relative_dir"]),
+        }
+
+    def abort_upload(self, portal_token: str, upload_id: str) -> dict[str, Any]:
+        self._upload_session(portal_token, upload_id)
+        self.uploads.discard(upload_id)
+        return {"upload_id": upload_id, "aborted": True}
 
     def create_payment(self, portal_token: str, amount_brl: float, description: str) -> dict[str, Any]:
         result = self.repository.get_contract_by_portal_token(portal_token)
@@ -1468,12 +2072,22 @@ def storage_portal_update_user(user_id: int, payload: PortalUserUpdatePayload) -
 
 # taxonomy: tables=public.contracts
 @app.get("/storage/portal/files")
-def storage_portal_files(portal_token: str, path: str = ".") -> JSONResponse:
+def storage_portal_files(portal_token: str, path: str = ".", cursor: str | None = None, limit: int = FILES_PAGE_SIZE) -> JSONResponse:
+    result = get_service().repository.get_contract_by_portal_token(portal_token)
+    if not result:
+        raise HTTPException(status_code=404, detail="Portal token inválido.")
+    contract, _ = result
+    return JSONResponse(get_service().list_files(contract, path, cursor=cursor, limit=limit))
+
+
+# taxonomy: tables=public.contracts
+@app.get("/storage/portal/usage")
+def storage_portal_usage(portal_token: str) -> JSONResponse:
     result = get_service().repository.get_contract_by_portal_token(portal_token)
     if not result:
         raise HTTPException(status_code=404, detail="Portal token inválido.")
     contract, _ = result
-    return JSONResponse(get_service().list_files(contract, path))
+    return JSONResponse(get_service().workspace_usage(contract))
 
 
 @app.post("/storage/portal/files/folder")
@@ -1490,6 +2104,26 @@ async def storage_portal_upload_file(
     return JSONResponse(await get_service().upload_file(portal_token, relative_dir, upload))
 
 
+@app.post("/storage/portal/uploads")
+def storage_portal_start_upload(payload: PortalUploadStartPayload) -> JSONResponse:
+    return JSONResponse(get_service().start_upload(payload), status_code=201)
+
+
+@app.get("/storage/portal/uploads/{upload_id}")
+def storage_portal_upload_status(upload_id: str, portal_token: str) -> JSONResponse:
+    return JSONResponse(get_service().upload_status(portal_token, upload_id))
+
+
+@app.put("/storage/portal/uploads/{upload_id}")
+async def storage_portal_upload_chunk(upload_id: str, portal_token: str, offset: int, request: Request) -> JSONResponse:
+    return JSONResponse(await get_service().upload_chunk(portal_token, upload_id, offset, request.stream()))
+
+
+@app.delete("/storage/portal/uploads/{upload_id}")
+def storage_portal_abort_upload(upload_id: str, portal_token: str) -> JSONResponse:
+    return JSONResponse(get_service().abort_upload(portal_token, upload_id))
+
+
 # taxonomy: tables=public.payments,public.contracts
 @app.post("/storage/portal/payments")
 def storage_portal_payments(payload: PortalPaymentPayload) -> JSONResponse:
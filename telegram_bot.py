@@ -12,9 +12,11 @@ import json
 import re
 import time
 import fcntl
+from collections import deque
+from dataclasses import dataclass, field
 from urllib.parse import urlparse
 from datetime import datetime
-from typing import Optional, Dict, Any, List, Tuple
+from typing import Optional, Dict, Any, List, Tuple, Awaitable, Callable, Deque, Iterable
 from pathlib import Path
 import sys
 from specialized_agents.agent_communication_bus import get_communication_bus, MessageType
@@ -96,6 +98,13 @@ except ImportError:
 
 # Configurações
 BOT_TOKEN = os.environ.get("TELEGRAM_BOT_TOKEN", "")
+if not (BOT_TOKEN and os.getenv("TRADING_TELEGRAM_CHAT_ID") and os.getenv("TRADING_TELEGRAM_THREAD_ID")):
+    # Uma chamada /secrets/bulk aquece os lookups abaixo (cada um seria um round trip)
+    try:
+        from tools.secrets_loader import TELEGRAM_BOT_SECRET_REFS, prefetch
+        prefetch(TELEGRAM_BOT_SECRET_REFS)
+    except Exception:
+        pass
 if not BOT_TOKEN:
     try:
         from tools.secrets_loader import get_telegram_token
@@ -172,6 +181,36 @@ def _resolve_trading_fixed_thread_id() -> Optional[int]:
 TRADING_FIXED_CHAT_ID = _resolve_trading_fixed_chat_id()
 TRADING_FIXED_THREAD_ID = _resolve_trading_fixed_thread_id()
 
+# Dispatcher de updates: chats diferentes são processados em paralelo, cada chat
+# em ordem. O pool global limita handlers simultâneos; chats prioritários (grupo
+# de trading) têm um pool próprio para nunca esperar atrás de jobs longos.
+DISPATCH_WORKERS = max(1, _parse_optional_int_env("TELEGRAM_DISPATCH_WORKERS") or 8)
+DISPATCH_PRIORITY_WORKERS = max(1, _parse_optional_int_env("TELEGRAM_DISPATCH_PRIORITY_WORKERS") or 2)
+DISPATCH_PER_USER = max(1, _parse_optional_int_env("TELEGRAM_DISPATCH_PER_USER") or 2)
+DISPATCH_CHAT_QUEUE = max(1, _parse_optional_int_env("TELEGRAM_DISPATCH_CHAT_QUEUE") or 50)
+
+# Limites de envio do Telegram (~30 msg/s no bot, ~1 msg/s por chat, 20 msg/min
+# em grupos). O OutboundScheduler aplica token buckets e trata 429 retry_after.
+OUTBOUND_GLOBAL_RATE = float(os.getenv("TELEGRAM_OUTBOUND_GLOBAL_RATE", "30"))
+OUTBOUND_CHAT_RATE = float(os.getenv("TELEGRAM_OUTBOUND_CHAT_RATE", "1"))
+OUTBOUND_GROUP_RATE = float(os.getenv("TELEGRAM_OUTBOUND_GROUP_PER_MIN", "20")) / 60.0
+OUTBOUND_CHAT_BURST = float(os.getenv("TELEGRAM_OUTBOUND_CHAT_BURST", "3"))
+OUTBOUND_MAX_RETRIES = max(0, _parse_optional_int_env("TELEGRAM_OUTBOUND_MAX_RETRIES") or 3)
+# Métodos que contam nos limites de envio (sendChatAction fica de fora)
+RATE_LIMITED_METHODS = {
+    "sendMessage", "editMessageText", "forwardMessage", "copyMessage",
+    "sendPhoto", "sendDocument", "sendAudio", "sendVideo", "sendVoice",
+    "sendAnimation", "sendSticker", "sendLocation", "sendVenue", "sendContact",
+    "sendPoll", "sendMediaGroup", "deleteMessage",
+}
+
+# Streaming de respostas do Ollama: primeira parte enviada logo, depois edições
+# espaçadas de pelo menos STREAM_EDIT_INTERVAL segundos.
+STREAM_REPLIES = os.getenv("TELEGRAM_STREAM_REPLIES", "1").lower() not in ("0", "false", "no")
+STREAM_EDIT_INTERVAL = float(os.getenv("TELEGRAM_STREAM_EDIT_INTERVAL", "1.5"))
+STREAM_FIRST_CHARS = max(1, _parse_optional_int_env("TELEGRAM_STREAM_FIRST_CHARS") or 40)
+STREAM_FIRST_SECONDS = float(os.getenv("TELEGRAM_STREAM_FIRST_SECONDS", "1.0"))
+
 # Mapeamento de perfis para uso rápido
 PROFILE_ALIASES = {
     "code": "coder", "dev": "coder", "programar": "coder",
@@ -211,6 +250,243 @@ INABILITY_PATTERNS = [
 ]
 
 
+class TokenBucket:
+    """Token bucket assíncrono: ``rate`` tokens/s com rajada de até ``capacity``."""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def delay(self) -> float:
+        """Segundos até haver um token (0 se já disponível)."""
+        now = time.monotonic()
+        self._refill(now)
+        wait = max(0.0, self.blocked_until - now)
+        if self.tokens < 1.0:
+            wait = max(wait, (1.0 - self.tokens) / self.rate)
+        return wait
+
+    def block(self, seconds: float) -> None:
+        """Suspende o bucket (429 retry_after) e zera os tokens acumulados."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+        self.updated = self.blocked_until
+
+    async def acquire(self) -> None:
+        while True:
+            wait = self.delay()
+            if wait <= 0:
+                self.tokens -= 1.0
+                return
+            await asyncio.sleep(wait)
+
+
+@dataclass
+class _Outbound:
+    method: str
+    params: Dict[str, Any]
+    files: Optional[dict]
+    future: asyncio.Future
+    extra: List[asyncio.Future] = field(default_factory=list)
+
+
+class OutboundScheduler:
+    """Fila de saída por chat com token buckets (global e por chat).
+
+    Cada chat tem uma fila e um único worker, então a ordem de envio é
+    preservada (inclusive ``deleteMessage`` depois das edições da mensagem).
+    Enquanto um item espera por token, ``editMessageText`` repetidos da mesma
+    mensagem colapsam na edição mais recente. ``sendMessage`` nunca é agrupado:
+    quem envia usa o ``message_id`` devolvido para editar ou apagar depois.
+    Respostas 429 suspendem o bucket do chat e o global por ``retry_after`` e a
+    requisição é refeita.
+    """
+
+    def __init__(
+        self,
+        send: Callable[..., Awaitable[dict]],
+        global_rate: float = OUTBOUND_GLOBAL_RATE,
+        chat_rate: float = OUTBOUND_CHAT_RATE,
+        group_rate: float = OUTBOUND_GROUP_RATE,
+        chat_burst: float = OUTBOUND_CHAT_BURST,
+        max_retries: int = OUTBOUND_MAX_RETRIES,
+    ):
+        self._send = send
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.chat_rate = chat_rate
+        self.group_rate = group_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self._buckets: Dict[Any, TokenBucket] = {}
+        self._queues: Dict[Any, Deque[_Outbound]] = {}
+        self._workers: Dict[Any, asyncio.Task] = {}
+        self.stats = {"sent": 0, "coalesced": 0, "retried": 0, "throttled_s": 0.0}
+
+    def _bucket(self, chat_id: Any) -> TokenBucket:
+        bucket = self._buckets.get(chat_id)
+        if bucket is None:
+            # Grupos/canais têm ids negativos e limite por minuto bem menor
+            is_group = isinstance(chat_id, int) and chat_id < 0 or str(chat_id).startswith("@")
+            rate = self.group_rate if is_group else self.chat_rate
+            bucket = self._buckets[chat_id] = TokenBucket(rate, self.chat_burst)
+        return bucket
+
+    def queue_depth(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    async def submit(self, method: str, params: Dict[str, Any], files: Optional[dict] = None) -> dict:
+        chat_id = params.get("chat_id")
+        item = _Outbound(method, params, files, asyncio.get_running_loop().create_future())
+        self._queues.setdefault(chat_id, deque()).append(item)
+        worker = self._workers.get(chat_id)
+        if worker is None or worker.done():
+            self._workers[chat_id] = asyncio.create_task(self._drain(chat_id))
+        return await item.future
+
+    @staticmethod
+    def _can_merge(head: _Outbound, nxt: _Outbound) -> bool:
+        if head.files or nxt.files or head.method != nxt.method or head.method != "editMessageText":
+            return False
+        return head.params.get("message_id") == nxt.params.get("message_id")
+
+    def _coalesce(self, head: _Outbound, queue: Deque[_Outbound]) -> None:
+        while queue and self._can_merge(head, queue[0]):
+            nxt = queue.popleft()
+            head.params = nxt.params  # só a edição mais recente importa
+            head.extra.append(nxt.future)
+            self.stats["coalesced"] += 1
+
+    async def _drain(self, chat_id: Any) -> None:
+        queue = self._queues[chat_id]
+        bucket = self._bucket(chat_id)
+        try:
+            while queue:
+                head = queue.popleft()
+                if head.future.cancelled():
+                    continue  # quem enviou desistiu (ex.: /stop)
+                futures = [head.future]
+                try:
+                    result = await self._deliver(head, queue, bucket)
+                    futures += head.extra
+                    for future in futures:
+                        if not future.done():
+                            future.set_result(result)
+                except Exception as exc:
+                    for future in futures + head.extra:
+                        if not future.done():
+                            future.set_exception(exc)
+        finally:
+            if not queue:
+                self._queues.pop(chat_id, None)
+                self._workers.pop(chat_id, None)
+
+    async def _deliver(self, head: _Outbound, queue: Deque[_Outbound], bucket: TokenBucket) -> dict:
+        attempt = 0
+        while True:
+            t0 = time.monotonic()
+            await bucket.acquire()
+            await self.global_bucket.acquire()
+            self.stats["throttled_s"] += time.monotonic() - t0
+            # Itens que chegaram enquanto esperávamos o token entram no mesmo envio
+            self._coalesce(head, queue)
+            result = await self._send(head.method, head.files, **head.params)
+            retry_after = (result.get("parameters") or {}).get("retry_after")
+            if result.get("error_code") != 429 or retry_after is None or attempt >= self.max_retries:
+                self.stats["sent"] += 1
+                return result
+            attempt += 1
+            self.stats["retried"] += 1
+            print(f"[API] {head.method} 429 — aguardando {retry_after}s (tentativa {attempt})")
+            # O 429 pode vir do limite global do bot: segura todos os chats também.
+            bucket.block(float(retry_after))
+            self.global_bucket.block(float(retry_after))
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"queue_depth": self.queue_depth(), **self.stats}
+
+
+class StreamingReply:
+    """Resposta que cresce em tempo real: envia a primeira parte e depois edita.
+
+    ``update`` recebe o texto acumulado; a primeira mensagem sai assim que há
+    ``first_chars`` caracteres (ou ``first_seconds`` se passaram) e as edições
+    seguintes respeitam ``edit_interval``. As parciais vão sem parse_mode (o
+    Markdown pode estar incompleto); ``finish`` aplica o texto final.
+    """
+
+    CURSOR = " ▌"
+
+    def __init__(
+        self,
+        api: "TelegramAPI",
+        chat_id: int,
+        reply_to_message_id: int = None,
+        edit_interval: float = STREAM_EDIT_INTERVAL,
+        first_chars: int = STREAM_FIRST_CHARS,
+        first_seconds: float = STREAM_FIRST_SECONDS,
+    ):
+        self.api = api
+        self.chat_id = chat_id
+        self.reply_to_message_id = reply_to_message_id
+        self.edit_interval = edit_interval
+        self.first_chars = first_chars
+        self.first_seconds = first_seconds
+        self.message_id: Optional[int] = None
+        self.started = time.monotonic()
+        self.first_sent_at: Optional[float] = None
+        self._last_edit = 0.0
+        self._shown = ""
+        self.edits = 0
+
+    async def update(self, text: str) -> None:
+        text = text.strip()
+        if not text:
+            return
+        now = time.monotonic()
+        preview = text[:4000]
+        if self.message_id is None:
+            if len(text) < self.first_chars and now - self.started < self.first_seconds:
+                return
+            result = await self.api.send_message(
+                self.chat_id, preview + self.CURSOR, parse_mode=None,
+                reply_to_message_id=self.reply_to_message_id,
+            )
+            if result.get("ok"):
+                self.message_id = result["result"]["message_id"]
+                self.first_sent_at = time.monotonic()
+                self._last_edit = self.first_sent_at
+                self._shown = preview
+            return
+        if preview != self._shown and now - self._last_edit >= self.edit_interval:
+            await self.api.edit_message_text(
+                self.chat_id, self.message_id, preview + self.CURSOR, parse_mode=None
+            )
+            self._last_edit = time.monotonic()
+            self._shown = preview
+            self.edits += 1
+
+    async def finish(self, text: str) -> bool:
+        """Aplica o texto final; False se nada foi enviado (o caller envia normalmente)."""
+        if self.message_id is None:
+            return False
+        head, rest = text[:4000], text[4000:]
+        result = await self.api.edit_message_text(self.chat_id, self.message_id, head)
+        if not result.get("ok") and "not modified" not in str(result.get("description", "")):
+            # Markdown inválido na resposta final: reaplica como texto puro
+            await self.api.edit_message_text(self.chat_id, self.message_id, head, parse_mode=None)
+        for i in range(0, len(rest), 4000):
+            await self.api.send_message(self.chat_id, rest[i:i + 4000])
+        return True
+
+
 class TelegramAPI:
     """Classe para interagir com todas as funcionalidades da API do Telegram"""
     
@@ -218,11 +494,21 @@ class TelegramAPI:
         self.token = token
         self.base = f"https://api.telegram.org/bot{token}"
         self.client = httpx.AsyncClient(timeout=120.0)
+        self.scheduler = OutboundScheduler(self._send_request)
     
     async def _request(self, method: str, files: dict = None, **params) -> dict:
-        """Faz requisição para a API do Telegram"""
+        """Faz requisição para a API do Telegram (envios passam pelo scheduler)"""
+        params = {k: v for k, v in params.items() if v is not None}
+        if method in RATE_LIMITED_METHODS and "chat_id" in params:
+            try:
+                return await self.scheduler.submit(method, params, files)
+            except Exception as e:
+                return {"ok": False, "error": str(e)}
+        return await self._send_request(method, files, **params)
+
+    async def _send_request(self, method: str, files: dict = None, **params) -> dict:
+        """Requisição HTTP direta, sem controle de taxa"""
         try:
-            params = {k: v for k, v in params.items() if v is not None}
             if files:
                 response = await self.client.post(f"{self.base}/{method}", files=files, data=params)
             else:
@@ -1544,6 +1830,195 @@ _O CI/CD do GitHub fará deploy automático no servidor!_
         await self.client.aclose()
 
 
+@dataclass
+class DispatchStats:
+    """Métricas do dispatcher (profundidade de fila e latência dos handlers)."""
+
+    window: int = 500
+    submitted: int = 0
+    completed: int = 0
+    failed: int = 0
+    cancelled: int = 0
+    dropped: int = 0
+    max_queue_depth: int = 0
+    handler_seconds: Deque[float] = field(default_factory=deque)
+    wait_seconds: Deque[float] = field(default_factory=deque)
+
+    def observe(self, waited: float, elapsed: float) -> None:
+        for samples, value in ((self.wait_seconds, waited), (self.handler_seconds, elapsed)):
+            samples.append(value)
+            if len(samples) > self.window:
+                samples.popleft()
+
+    @staticmethod
+    def _percentile(samples: Iterable[float], q: float) -> float:
+        ordered = sorted(samples)
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "dropped": self.dropped,
+            "max_queue_depth": self.max_queue_depth,
+            "handler_p50_s": round(self._percentile(self.handler_seconds, 0.5), 3),
+            "handler_p95_s": round(self._percentile(self.handler_seconds, 0.95), 3),
+            "handler_max_s": round(max(self.handler_seconds, default=0.0), 3),
+            "wait_p95_s": round(self._percentile(self.wait_seconds, 0.95), 3),
+        }
+
+
+@dataclass
+class _ChatLane:
+    pending: Deque[Tuple[dict, float]] = field(default_factory=deque)
+    runner: Optional[asyncio.Task] = None
+    current: Optional[asyncio.Task] = None
+    current_message: Optional[dict] = None
+
+
+class UpdateDispatcher:
+    """Despacha mensagens por chat: ordem preservada dentro do chat, chats em paralelo.
+
+    Cada chat tem uma fila e no máximo um handler ativo. Antes de rodar, o
+    handler obtém uma vaga do usuário (``per_user``) e depois uma vaga do pool
+    global (``workers``). ``priority_chats`` usam só o pool prioritário: não
+    disputam a vaga do usuário com os jobs longos dele em outros chats.
+    ``cancel`` interrompe o handler em andamento e descarta a fila do usuário.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[dict], Awaitable[Any]],
+        workers: int = DISPATCH_WORKERS,
+        per_user: int = DISPATCH_PER_USER,
+        max_chat_queue: int = DISPATCH_CHAT_QUEUE,
+        priority_chats: Iterable[int] = (),
+        priority_workers: int = DISPATCH_PRIORITY_WORKERS,
+    ):
+        self.handler = handler
+        self.per_user = per_user
+        self.max_chat_queue = max_chat_queue
+        self.priority_chats = set(priority_chats)
+        self._pool = asyncio.Semaphore(workers)
+        self._priority_pool = asyncio.Semaphore(priority_workers)
+        self._user_slots: Dict[int, asyncio.Semaphore] = {}
+        self._user_refs: Dict[int, int] = {}
+        self._lanes: Dict[int, _ChatLane] = {}
+        self._active = 0
+        self.stats = DispatchStats()
+
+    def queue_depth(self) -> int:
+        return sum(len(lane.pending) for lane in self._lanes.values())
+
+    def active(self) -> int:
+        return self._active
+
+    def submit(self, message: dict) -> bool:
+        """Enfileira a mensagem no chat; False se a fila do chat estiver cheia."""
+        chat_id = message["chat"]["id"]
+        lane = self._lanes.setdefault(chat_id, _ChatLane())
+        if len(lane.pending) >= self.max_chat_queue:
+            self.stats.dropped += 1
+            print(f"[Dispatch] Fila do chat {chat_id} cheia — mensagem descartada")
+            return False
+        lane.pending.append((message, time.monotonic()))
+        self.stats.submitted += 1
+        self.stats.max_queue_depth = max(self.stats.max_queue_depth, self.queue_depth())
+        if lane.runner is None or lane.runner.done():
+            lane.runner = asyncio.create_task(self._drain(chat_id, lane))
+        return True
+
+    def cancel(self, chat_id: int, user_id: Optional[int] = None) -> int:
+        """Cancela o handler ativo e a fila do chat (só do ``user_id``, se dado)."""
+        lane = self._lanes.get(chat_id)
+        if lane is None:
+            return 0
+
+        def _owned(message: dict) -> bool:
+            return user_id is None or message.get("from", {}).get("id") == user_id
+
+        kept = deque(item for item in lane.pending if not _owned(item[0]))
+        cancelled = len(lane.pending) - len(kept)
+        lane.pending = kept
+        if lane.current and not lane.current.done() and _owned(lane.current_message or {}):
+            lane.current.cancel()
+            cancelled += 1
+        self.stats.cancelled += cancelled
+        return cancelled
+
+    async def _drain(self, chat_id: int, lane: _ChatLane) -> None:
+        while lane.pending:
+            message, queued_at = lane.pending.popleft()
+            lane.current_message = message
+            lane.current = asyncio.create_task(self._run_one(chat_id, message, queued_at))
+            try:
+                # wait() não propaga o cancelamento do handler (/stop): a fila segue.
+                await asyncio.wait([lane.current])
+            finally:
+                lane.current = None
+                lane.current_message = None
+        if self._lanes.get(chat_id) is lane and not lane.pending:
+            del self._lanes[chat_id]
+
+    async def _run_one(self, chat_id: int, message: dict, queued_at: float) -> None:
+        if chat_id in self.priority_chats:
+            async with self._priority_pool:
+                await self._invoke(message, queued_at)
+            return
+        user_id = message.get("from", {}).get("id", chat_id)
+        user_slot = self._user_slots.setdefault(user_id, asyncio.Semaphore(self.per_user))
+        self._user_refs[user_id] = self._user_refs.get(user_id, 0) + 1
+        try:
+            async with user_slot, self._pool:
+                await self._invoke(message, queued_at)
+        finally:
+            # Sem handler ativo nem à espera, a vaga do usuário sai do dicionário.
+            self._user_refs[user_id] -= 1
+            if not self._user_refs[user_id]:
+                del self._user_refs[user_id]
+                self._user_slots.pop(user_id, None)
+
+    async def _invoke(self, message: dict, queued_at: float) -> None:
+        started = time.monotonic()
+        self._active += 1
+        try:
+            await self.handler(message)
+            self.stats.completed += 1
+        except Exception as exc:
+            self.stats.failed += 1
+            print(f"[Erro] Processando mensagem: {exc}")
+            import traceback
+            traceback.print_exc()
+        finally:
+            self._active -= 1
+            self.stats.observe(started - queued_at, time.monotonic() - started)
+
+    async def close(self) -> None:
+        """Cancela filas e handlers em andamento (shutdown do bot)."""
+        tasks = []
+        for lane in list(self._lanes.values()):
+            lane.pending.clear()
+            for task in (lane.current, lane.runner):
+                if task and not task.done():
+                    task.cancel()
+                    tasks.append(task)
+        self._lanes.clear()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self.queue_depth(),
+            "active_handlers": self._active,
+            "chats": len(self._lanes),
+            **self.stats.snapshot(),
+        }
+
+
 class TelegramBot:
     """Bot completo com todas as funcionalidades, Auto-Desenvolvimento e Integração de Modelos"""
     
@@ -1572,6 +2047,12 @@ class TelegramBot:
         self.integration = get_integration_client() if INTEGRATION_AVAILABLE else None
         self.user_profiles: Dict[int, str] = {}  # Perfil por usuário
         self.auto_profile = True  # Seleção automática de perfil
+
+        # Updates despachados por chat (ordem por chat, chats em paralelo)
+        self.dispatcher = UpdateDispatcher(
+            self.handle_message,
+            priority_chats={TRADING_GROUP_CHAT_ID},
+        )
         
         self._load_state()
 
@@ -1749,8 +2230,13 @@ class TelegramBot:
 
         return full_response
 
-    async def ask_ollama(self, prompt: str, user_id: int = None, profile: str = None) -> str:
-        """Consulta modelo com contexto e seleção inteligente de modelo"""
+    async def ask_ollama(self, prompt: str, user_id: int = None, profile: str = None,
+                         stream: Optional[StreamingReply] = None) -> str:
+        """Consulta modelo com contexto e seleção inteligente de modelo
+
+        Com ``stream``, a chamada direta ao Ollama usa ``"stream": true`` e
+        repassa o texto acumulado a ``stream.update`` conforme os tokens chegam.
+        """
         try:
             # Usar integração se disponível
             if self.integration:
@@ -1803,40 +2289,72 @@ class TelegramBot:
             except ImportError:
                 _ctx = 8192
 
-            response = await self.ollama.post(
-                f"{OLLAMA_HOST}/api/chat",
-                json={
-                    "model": MODEL,
-                    "messages": messages,
-                    "stream": False,
-                    "keep_alive": f"{self.keep_alive_seconds}s",
-                    "options": {"num_ctx": _ctx}
-                },
-                timeout=600.0  # 10 minutos para CPU
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                answer = data.get("message", {}).get("content", "Sem resposta")
-                
-                # Salva contexto
-                if user_id:
-                    if user_id not in self.user_contexts:
-                        self.user_contexts[user_id] = []
-                    self.user_contexts[user_id].append({"role": "user", "content": prompt})
-                    self.user_contexts[user_id].append({"role": "assistant", "content": answer})
-                    # Mantém apenas últimas 10 mensagens
-                    self.user_contexts[user_id] = self.user_contexts[user_id][-10:]
-                
-                return answer
-            print(f"[Ollama] Erro HTTP: {response.status_code} - {response.text[:200]}")
-            return f"Erro: {response.status_code}"
+            payload = {
+                "model": MODEL,
+                "messages": messages,
+                "stream": stream is not None,
+                "keep_alive": f"{self.keep_alive_seconds}s",
+                "options": {"num_ctx": _ctx}
+            }
+            if stream is not None:
+                answer, error = await self._stream_ollama_chat(payload, stream)
+                if error:
+                    return error
+            else:
+                response = await self.ollama.post(
+                    f"{OLLAMA_HOST}/api/chat",
+                    json=payload,
+                    timeout=600.0  # 10 minutos para CPU
+                )
+                if response.status_code != 200:
+                    print(f"[Ollama] Erro HTTP: {response.status_code} - {response.text[:200]}")
+                    return f"Erro: {response.status_code}"
+                answer = response.json().get("message", {}).get("content", "Sem resposta")
+
+            # Salva contexto
+            if user_id:
+                if user_id not in self.user_contexts:
+                    self.user_contexts[user_id] = []
+                self.user_contexts[user_id].append({"role": "user", "content": prompt})
+                self.user_contexts[user_id].append({"role": "assistant", "content": answer})
+                # Mantém apenas últimas 10 mensagens
+                self.user_contexts[user_id] = self.user_contexts[user_id][-10:]
+            
+            return answer
         except Exception as e:
             import traceback
             print(f"[Ollama] Exceção: {type(e).__name__}: {e}")
             print(f"[Ollama] Traceback: {traceback.format_exc()}")
             return f"Erro: {type(e).__name__}: {e}"
     
+    async def _stream_ollama_chat(self, payload: dict, stream: StreamingReply) -> Tuple[str, Optional[str]]:
+        """Lê o NDJSON de /api/chat com stream e atualiza a resposta no chat.
+
+        Retorna ``(texto, erro)``; ``erro`` é None em caso de sucesso.
+        """
+        parts: List[str] = []
+        async with self.ollama.stream(
+            "POST", f"{OLLAMA_HOST}/api/chat", json=payload, timeout=600.0
+        ) as response:
+            if response.status_code != 200:
+                body = (await response.aread()).decode(errors="replace")
+                print(f"[Ollama] Erro HTTP: {response.status_code} - {body[:200]}")
+                return "", f"Erro: {response.status_code}"
+            async for line in response.aiter_lines():
+                if not line.strip():
+                    continue
+                try:
+                    chunk = json.loads(line)
+                except ValueError:
+                    continue
+                token = chunk.get("message", {}).get("content", "")
+                if token:
+                    parts.append(token)
+                    await stream.update("".join(parts))
+                if chunk.get("done"):
+                    break
+        return "".join(parts) or "Sem resposta", None
+
     async def clear_old_updates(self, drop_all: bool = False):
         """
         Ignora apenas mensagens muito antigas (mais de 2 minutos).
@@ -1928,6 +2446,7 @@ class TelegramBot:
 *Conversa IA:*
 /ask [texto] - Perguntar à IA
 /clear - Limpar contexto
+/stop - Interromper tarefa em andamento
 
 *🤖 Modelos e Perfis:*
 /models - Listar modelos Ollama
@@ -2035,6 +2554,7 @@ class TelegramBot:
             
             auto_dev_status = "🟢 Ativado" if self.auto_dev_enabled else "🔴 Desativado"
             dev_count = len(self.auto_dev.developments)
+            dispatch = self.dispatcher.snapshot()
             
             # Status da integração
             integration_status = "🔴 Offline"
@@ -2066,7 +2586,13 @@ class TelegramBot:
                 f"Open WebUI: `{OPENWEBUI_HOST}`\n"
                 f"Modelos: `{models_count}`\n"
                 f"Auto-Profile: `{'Sim' if self.auto_profile else 'Não'}`\n"
-                f"Desenvolvimentos: `{dev_count}`",
+                f"Desenvolvimentos: `{dev_count}`\n\n"
+                f"📬 *Dispatcher:*\n"
+                f"Fila: `{dispatch['queue_depth']}` (máx `{dispatch['max_queue_depth']}`)\n"
+                f"Handlers ativos: `{dispatch['active_handlers']}`\n"
+                f"Latência p50/p95: `{dispatch['handler_p50_s']}s / {dispatch['handler_p95_s']}s`\n"
+                f"Espera p95: `{dispatch['wait_p95_s']}s`\n"
+                f"Canceladas/descartadas: `{dispatch['cancelled']}/{dispatch['dropped']}`",
                 reply_to_message_id=msg_id)
         
         elif cmd == "/id":
@@ -2495,8 +3021,10 @@ class TelegramBot:
                 return
             
             await self.api.send_chat_action(chat_id, "typing")
-            response = await self.ask_ollama(args, user_id)
-            await self.api.send_message(chat_id, response, reply_to_message_id=msg_id)
+            stream = StreamingReply(self.api, chat_id, msg_id) if STREAM_REPLIES else None
+            response = await self.ask_ollama(args, user_id, stream=stream)
+            if not (stream and await stream.finish(response)):
+                await self.api.send_message(chat_id, response, reply_to_message_id=msg_id)
         
         # === Agentes de Código ===
         elif cmd == "/agents":
@@ -3208,6 +3736,7 @@ class TelegramBot:
             cookie_args = ["--cookies", str(cookies_file)]
         # sem fallback para browser — ambiente headless não tem Firefox
 
+        proc = None
         try:
             proc = await asyncio.create_subprocess_exec(
                 ytdlp_bin,
@@ -3238,6 +3767,11 @@ class TelegramBot:
         except asyncio.TimeoutError:
             print("[yt-dlp] Timeout 90s")
             return []
+        except asyncio.CancelledError:
+            # /stop: não deixar o yt-dlp órfão rodando em background
+            if proc is not None and proc.returncode is None:
+                proc.kill()
+            raise
         except Exception as e:
             print(f"[yt-dlp] Error: {e}")
             return []
@@ -3405,6 +3939,7 @@ class TelegramBot:
         print(f"[{datetime.now().strftime('%H:%M:%S')}] {user_name}: {text[:50]}...")
         
         await self.api.send_chat_action(chat_id, "typing")
+        stream = StreamingReply(self.api, chat_id, msg_id) if STREAM_REPLIES else None
 
         # Roteie a pergunta para o DIRETOR primeiro (regra do repositório).
         # Aguardamos uma resposta curta do DIRETOR; se não houver, usamos o fluxo normal.
@@ -3476,10 +4011,12 @@ class TelegramBot:
                     else:
                         await self.api.send_message(chat_id, "⚠️ O DIRETOR pediu para prosseguir, mas o Auto-Dev está desabilitado.", reply_to_message_id=msg_id)
             else:
-                response = await self.ask_ollama(text, user_id)
+                response = await self.ask_ollama(text, user_id, stream=stream)
         except Exception as e:
             print(f"[Routing] Erro ao enviar para DIRETOR: {e}")
-            response = await self.ask_ollama(text, user_id)
+            response = await self.ask_ollama(text, user_id, stream=stream)
+        # Resposta já exibida via streaming: só falta aplicar o texto final
+        streamed = bool(stream and await stream.finish(response))
         
         print(f"[Debug] Resposta Ollama: {response[:100]}...")
         print(f"[Debug] Auto-Dev habilitado: {self.auto_dev_enabled}")
@@ -3545,7 +4082,9 @@ class TelegramBot:
                 print(f"[Auto-Dev] Falha: {dev_response}")
         
         # Enviar resposta normal (quebrar se muito grande)
-        if len(response) > 4000:
+        if streamed:
+            pass
+        elif len(response) > 4000:
             for i in range(0, len(response), 4000):
                 await self.api.send_message(chat_id, response[i:i+4000],
                                             reply_to_message_id=msg_id if i == 0 else None)
@@ -3574,6 +4113,7 @@ class TelegramBot:
             {"command": "id", "description": "🔢 Ver IDs do chat/usuário"},
             {"command": "me", "description": "👤 Informações do usuário"},
             {"command": "clear", "description": "🗑️ Limpar contexto"},
+            {"command": "stop", "description": "🛑 Interromper tarefa em andamento"},
             
             # === IA e Modelos ===
             {"command": "ask", "description": "🤖 Perguntar à IA"},
@@ -3704,12 +4244,7 @@ class TelegramBot:
                             self._save_state()
                         
                         if "message" in update:
-                            try:
-                                await self.handle_message(update["message"])
-                            except Exception as msg_error:
-                                print(f"[Erro] Processando mensagem: {msg_error}")
-                                import traceback
-                                traceback.print_exc()
+                            await self._dispatch_update(update["message"])
                     # Pausa breve entre ciclos sem updates
                     if not updates:
                         await asyncio.sleep(0.3)
@@ -3735,9 +4270,33 @@ class TelegramBot:
                 traceback.print_exc()
                 await asyncio.sleep(5)
     
+    async def _dispatch_update(self, message: dict) -> None:
+        """Entrega a mensagem ao dispatcher; ``/stop`` é tratado na hora, fora da fila."""
+        text = (message.get("text") or "").strip()
+        cmd = text.split(maxsplit=1)[0].lower().split("@", 1)[0] if text else ""
+        if cmd != "/stop":
+            self.dispatcher.submit(message)
+            return
+
+        chat_id = message["chat"]["id"]
+        user_id = message.get("from", {}).get("id")
+        if user_id is None:
+            # Sem remetente (post de canal) não há dono a conferir: não cancela nada.
+            print(f"[Dispatch] /stop sem remetente ignorado no chat {chat_id}")
+            return
+        # Admin pode interromper qualquer job do chat; demais só os próprios.
+        cancelled = self.dispatcher.cancel(chat_id, None if self.is_admin(user_id) else user_id)
+        reply = (f"🛑 {cancelled} tarefa(s) interrompida(s)." if cancelled
+                 else "ℹ️ Nenhuma tarefa em andamento neste chat.")
+        try:
+            await self.api.send_message(chat_id, reply, reply_to_message_id=message.get("message_id"))
+        except Exception as e:
+            print(f"[Erro] Resposta do /stop: {e}")
+
     async def stop(self):
         """Para o bot"""
         self.running = False
+        await self.dispatcher.close()
         await self.api.close()
         await self.agents.close()
         await self.auto_dev.close()
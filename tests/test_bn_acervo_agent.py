@@ -4,8 +4,10 @@ from __future__ import annotations
 
 import asyncio
 import importlib.util
+import json
 import sys
 import tempfile
+import time
 from pathlib import Path
 
 import pytest
@@ -23,6 +25,12 @@ sys.modules["bn_acervo_agent"] = mod
 _SPEC.loader.exec_module(mod)
 
 
+@pytest.fixture(autouse=True)
+def _isolated_data_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """BnAcervoAgent() cria jobs/ e doc_cache/ sob DATA_DIR; nos testes, fora do repo."""
+    monkeypatch.setattr(mod, "DATA_DIR", tmp_path / "agent_data")
+
+
 def test_extract_duckduckgo_result_urls_decodes_uddg_and_filters_domain() -> None:
     html = """
     <html><body>
@@ -268,6 +276,153 @@ def test_download_document_rejects_invalid_url_without_network() -> None:
     assert document.media_type == "application/octet-stream"
 
 
+def test_download_document_cache_hit_skips_network(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    agent = mod.BnAcervoAgent()
+    agent.download_dir = tmp_path / "downloads"
+    agent.download_dir.mkdir()
+    agent.document_cache = mod.DocumentCache(tmp_path / "cache", max_bytes=10_000, url_ttl_seconds=3600)
+    requests_seen: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests_seen.append(str(request.url))
+        return httpx.Response(200, content=b"%PDF-1.4 conteudo", headers={"content-type": "application/pdf"})
+
+    real_client = httpx.AsyncClient
+    monkeypatch.setattr(
+        mod.httpx,
+        "AsyncClient",
+        lambda **kwargs: real_client(transport=httpx.MockTransport(handler), **kwargs),
+    )
+    url = "https://objdigital.bn.br/doc.pdf"
+    first = asyncio.run(agent._download_document(url))
+    second = asyncio.run(agent._download_document(url))
+    mirror = asyncio.run(agent._download_document("https://objdigital.bn.br/espelho.pdf"))
+
+    assert len(requests_seen) == 2
+    assert second.cache_hit and not first.cache_hit
+    assert first.sha256 == second.sha256 == mirror.sha256
+    assert first.local_path == second.local_path == mirror.local_path
+    assert not list(agent.download_dir.iterdir())
+    stats = agent.document_cache.stats()
+    assert stats["download"] == {"hits": 1, "misses": 2, "hit_ratio": 0.3333}
+    assert stats["blobs"] == 1
+
+
+def test_digest_document_cache_skips_gpu_and_counts_seconds_saved(tmp_path: Path) -> None:
+    agent = mod.BnAcervoAgent()
+    agent.document_cache = mod.DocumentCache(tmp_path / "cache", max_bytes=10_000, url_ttl_seconds=3600)
+    calls: list[str] = []
+
+    class FakeDigester(mod.BaseDocumentDigester):
+        name = "fake"
+
+        async def digest(self, agent, document, *, max_ocr_pages_per_document, prefer_ocr) -> bool:
+            calls.append(document.source_url)
+            await asyncio.sleep(0.05)
+            document.extraction_mode = "pdf_ocr_gpu0"
+            document.extracted_text = "texto ocr"
+            document.summary = "resumo"
+            return True
+
+    agent.document_digester = mod.DocumentDigesterRegistry([FakeDigester()])
+
+    def make_document() -> mod.DownloadedDocument:
+        return mod.DownloadedDocument(
+            source_url="https://objdigital.bn.br/doc.pdf",
+            media_type="application/pdf",
+            local_path=str(tmp_path / "doc.pdf"),
+            sha256="a" * 64,
+        )
+
+    first, second = make_document(), make_document()
+    asyncio.run(agent._digest_document(first, max_ocr_pages_per_document=2, prefer_ocr=True))
+    asyncio.run(agent._digest_document(second, max_ocr_pages_per_document=2, prefer_ocr=True))
+    other_variant = make_document()
+    asyncio.run(agent._digest_document(other_variant, max_ocr_pages_per_document=4, prefer_ocr=True))
+
+    assert len(calls) == 2
+    assert second.cache_hit and second.summary == "resumo" and second.extraction_mode == "pdf_ocr_gpu0"
+    stats = agent.document_cache.stats()
+    assert stats["digest"]["hits"] == 1
+    assert stats["gpu_seconds_saved"] >= 0.05
+
+
+def test_ocr_pdf_pages_reuses_cached_pages(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    agent = mod.BnAcervoAgent()
+    agent.download_dir = tmp_path
+    agent.document_cache = mod.DocumentCache(tmp_path / "cache", max_bytes=10_000, url_ttl_seconds=3600)
+    rendered: list[tuple[int, int]] = []
+    ocr_calls: list[int] = []
+
+    def fake_run(command, **kwargs):
+        first, last, stem = int(command[2]), int(command[4]), Path(command[-1])
+        rendered.append((first, last))
+        for page in range(first, min(last, 3) + 1):  # PDF com 3 paginas
+            Path(f"{stem}-{page}.png").write_bytes(b"png")
+
+    async def fake_ocr(image_path: Path, *, page_number: int | None = None) -> str:
+        ocr_calls.append(page_number or 0)
+        return f"Pagina {page_number}: texto"
+
+    monkeypatch.setattr(mod.subprocess, "run", fake_run)
+    agent._ocr_image = fake_ocr  # type: ignore[method-assign]
+    pdf = tmp_path / ("b" * 64 + ".pdf")
+
+    two = asyncio.run(agent._ocr_pdf_pages(pdf, 2, sha256="b" * 64))
+    five = asyncio.run(agent._ocr_pdf_pages(pdf, 5, sha256="b" * 64))
+    again = asyncio.run(agent._ocr_pdf_pages(pdf, 8, sha256="b" * 64))
+
+    assert rendered == [(1, 2), (3, 5)]
+    assert ocr_calls == [1, 2, 3]
+    assert two.count("[Pagina") == 2
+    assert five == again and five.count("[Pagina") == 3
+
+
+def test_ocr_pdf_pages_retries_pages_without_text(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    agent = mod.BnAcervoAgent()
+    agent.download_dir = tmp_path
+    agent.document_cache = mod.DocumentCache(tmp_path / "cache", max_bytes=10_000, url_ttl_seconds=3600)
+    ocr_calls: list[int] = []
+    failing = {2}
+
+    def fake_run(command, **kwargs):
+        first, last, stem = int(command[2]), int(command[4]), Path(command[-1])
+        for page in range(first, min(last, 3) + 1):
+            Path(f"{stem}-{page}.png").write_bytes(b"png")
+
+    async def fake_ocr(image_path: Path, *, page_number: int | None = None) -> str:
+        ocr_calls.append(page_number or 0)
+        return "" if page_number in failing else f"Pagina {page_number}: texto"
+
+    monkeypatch.setattr(mod.subprocess, "run", fake_run)
+    agent._ocr_image = fake_ocr  # type: ignore[method-assign]
+    pdf = tmp_path / ("c" * 64 + ".pdf")
+
+    first = asyncio.run(agent._ocr_pdf_pages(pdf, 3, sha256="c" * 64))
+    failing.clear()  # falha transitoria do OCR
+    second = asyncio.run(agent._ocr_pdf_pages(pdf, 3, sha256="c" * 64))
+
+    assert first.count("[Pagina") == 2
+    assert ocr_calls == [1, 2, 3, 2]
+    assert second.count("[Pagina") == 3
+
+
+def test_document_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    cache = mod.DocumentCache(tmp_path / "cache", max_bytes=25, url_ttl_seconds=3600)
+    for name in ("a", "b", "c"):
+        source = tmp_path / f"{name}.part"
+        source.write_bytes(name.encode() * 10)
+        cache.store_blob(f"https://h/{name}", source, sha256=name * 64, media_type="application/pdf", suffix=".pdf")
+        if name == "a":
+            time.sleep(0.01)
+        if name == "b":
+            assert cache.lookup_url("https://h/a") is not None  # "a" passa a ser o mais recente
+
+    assert cache.lookup_url("https://h/b") is None
+    assert cache.lookup_url("https://h/a") is not None
+    assert cache.total_bytes() == 20
+
+
 def test_download_and_digest_documents_skips_failed_download_and_continues() -> None:
     agent = mod.BnAcervoAgent()
     first = mod.AcervoRecord(
@@ -317,6 +472,115 @@ def test_download_and_digest_documents_skips_failed_download_and_continues() ->
     assert second.documents[0].summary == "ok"
 
 
+def test_document_pipeline_overlaps_ocr_and_summaries() -> None:
+    agent = mod.BnAcervoAgent()
+    agent.document_cache = None
+    events: list[str] = []
+    ocr_started: dict[str, asyncio.Event] = {}
+
+    async def fake_download(url: str) -> mod.DownloadedDocument:
+        await asyncio.sleep(0)
+        return mod.DownloadedDocument(source_url=url, media_type="application/pdf", local_path=f"/tmp/{url[-5:]}")
+
+    class SlowOcrDigester(mod.BaseDocumentDigester):
+        name = "slow_ocr"
+
+        async def digest(self, agent, document, *, max_ocr_pages_per_document, prefer_ocr) -> bool:
+            async with agent.gpu0_semaphore:
+                events.append(f"ocr:{document.source_url[-5:]}")
+                ocr_started.setdefault(document.source_url[-5:], asyncio.Event()).set()
+                await asyncio.sleep(0)
+            document.extraction_mode = "pdf_ocr_gpu0"
+            await agent._set_document_summary(document, f"texto {document.source_url[-5:]}")
+            return True
+
+    async def fake_summary(text: str) -> str:
+        events.append(f"sum:{text[-5:]}")
+        if text.endswith("0.pdf"):
+            # so termina se o OCR do proximo documento comecar em paralelo; em serie estoura o timeout
+            await asyncio.wait_for(ocr_started.setdefault("1.pdf", asyncio.Event()).wait(), timeout=5)
+        return f"resumo de {text}"
+
+    agent._download_document = fake_download  # type: ignore[method-assign]
+    agent._summarize_document_text = fake_summary  # type: ignore[method-assign]
+    agent.document_digester = mod.DocumentDigesterRegistry([SlowOcrDigester()])
+    records = [
+        mod.AcervoRecord(detail_url=f"https://example.com/r{index}", title=f"R{index}", document_links=[f"https://x/d{index}.pdf"])
+        for index in range(4)
+    ]
+    stats = mod.InvestigationPipelineStats()
+    agent._pipeline_stats = stats
+
+    asyncio.run(
+        agent._download_and_digest_documents(records, max_download_documents=3, max_ocr_pages_per_document=2, prefer_ocr=True)
+    )
+
+    assert [len(record.documents) for record in records] == [1, 1, 1, 0]
+    assert records[0].documents[0].summary == "resumo de texto 0.pdf"
+    assert records[1].documents[0].summary == "resumo de texto 1.pdf"
+    assert set(events) == {"ocr:0.pdf", "ocr:1.pdf", "ocr:2.pdf", "sum:0.pdf", "sum:1.pdf", "sum:2.pdf"}
+    summary = stats.finish()
+    assert summary["stages"]["ocr"]["items"] == 3
+    assert summary["stages"]["summarize"]["items"] == 3
+    assert summary["stages"]["document_download"]["items"] == 3
+    assert summary["stages"]["document_dispatch"]["items"] == 3
+
+
+def test_fetch_detail_records_keeps_order_without_downloading() -> None:
+    agent = mod.BnAcervoAgent()
+    agent.document_cache = None
+    downloads: list[str] = []
+
+    async def fake_fetch_record(url: str) -> mod.AcervoRecord:
+        await asyncio.sleep(0.02)
+        if url.endswith("/bloqueado"):
+            raise RuntimeError("falha_qualquer")
+        return mod.AcervoRecord(detail_url=url, title=url, raw_text="texto", document_links=[f"{url}/doc.pdf"])
+
+    async def fake_download(url: str) -> mod.DownloadedDocument:
+        downloads.append(url)
+        return mod.DownloadedDocument(source_url=url, media_type="application/pdf", local_path="/tmp/doc.pdf")
+
+    agent._fetch_record = fake_fetch_record  # type: ignore[method-assign]
+    agent._download_document = fake_download  # type: ignore[method-assign]
+    hits = [
+        mod.SearchHit(detail_url="https://acervo.bn.gov.br/sophia_web/acervo/detalhe/1", title="1", source_kind="sophia_detail"),
+        mod.SearchHit(detail_url="https://acervo.bn.gov.br/sophia_web/acervo/detalhe/bloqueado", title="b", source_kind="sophia_detail"),
+        mod.SearchHit(detail_url="https://objdigital.bn.br/acervo_digital/div/doc.pdf", title="pdf", source_kind="objdigital_document"),
+        mod.SearchHit(detail_url="https://acervo.bn.gov.br/sophia_web/acervo/detalhe/3", title="3", source_kind="sophia_detail"),
+        mod.SearchHit(detail_url="https://acervo.bn.gov.br/sophia_web/acervo/detalhe/4", title="4", source_kind="sophia_detail"),
+    ]
+    payload = mod.AcervoStoryRequest(query="Gurgel", max_detail_records=3, max_download_documents=2)
+
+    records = asyncio.run(agent._fetch_detail_records(hits, payload))
+
+    assert [record.detail_url for record in records] == [hits[0].detail_url, hits[2].detail_url, hits[3].detail_url]
+    # download so depois do ranqueamento
+    assert downloads == []
+    assert agent._prefetched_documents == {}
+
+
+def test_fetch_detail_records_slow_first_hit_is_not_displaced() -> None:
+    agent = mod.BnAcervoAgent()
+    agent.detail_fetch_workers = 4
+
+    async def fake_fetch_record(url: str) -> mod.AcervoRecord:
+        # o primeiro candidato demora; os seguintes chegam antes dele
+        await asyncio.sleep(0.1 if url.endswith("/0") else 0.01)
+        return mod.AcervoRecord(detail_url=url, title=url, raw_text="texto")
+
+    agent._fetch_record = fake_fetch_record  # type: ignore[method-assign]
+    hits = [
+        mod.SearchHit(detail_url=f"https://acervo.bn.gov.br/sophia_web/acervo/detalhe/{index}", title=str(index), source_kind="sophia_detail")
+        for index in range(6)
+    ]
+    payload = mod.AcervoStoryRequest(query="Gurgel", max_detail_records=2)
+
+    records = asyncio.run(agent._fetch_detail_records(hits, payload))
+
+    assert [record.detail_url for record in records] == [hits[0].detail_url, hits[1].detail_url]
+
+
 def test_expand_deep_search_terms_composes_axes_without_duplicates() -> None:
     agent = mod.BnAcervoAgent()
     terms = agent._expand_deep_search_terms(
@@ -1068,6 +1332,85 @@ def test_investigation_job_store_persists_status_and_logs(tmp_path: Path) -> Non
     assert any("Planejamento iniciado" in item["message"] for item in loaded["logs"])
 
 
+def test_investigation_job_store_append_log_is_append_only(tmp_path: Path) -> None:
+    store = mod.InvestigationJobStore(tmp_path)
+    created = store.create(mod.AcervoStoryRequest(query="João Amaral Gurgel", output_mode="dossier"))
+    job_id = created["job_id"]
+    store.update(job_id, status="running", partial_result={"dossier": {"summary": "x" * 50_000}})
+    partial_path = tmp_path / job_id / "partial_result.json"
+    partial_mtime = partial_path.stat().st_mtime_ns
+
+    for index in range(300):
+        store.append_log(job_id, level="info", message=f"evento {index}")
+
+    assert partial_path.stat().st_mtime_ns == partial_mtime
+    logs = store.read_logs(job_id)
+    assert len(logs) == store.LOG_LIMIT
+    assert logs[-1]["message"] == "evento 299"
+    light = store.load(job_id, include_results=False, log_limit=3)
+    assert light["partial_result"] is None
+    assert [item["message"] for item in light["logs"]] == ["evento 297", "evento 298", "evento 299"]
+    assert store.load(job_id)["partial_result"]["dossier"]["summary"].startswith("xxx")
+    assert store.append_log("inexistente", level="info", message="x") is None
+
+
+def test_investigation_job_store_update_returns_light_record_and_save_keeps_heavy(tmp_path: Path, monkeypatch) -> None:
+    store = mod.InvestigationJobStore(tmp_path)
+    job_id = store.create(mod.AcervoStoryRequest(query="Gurgel"))["job_id"]
+    store.update(job_id, status="running", partial_result={"parcial": True})
+    store.append_log(job_id, level="info", message="baixando")
+
+    cancelled = store.update(job_id, status="cancelled", phase="cancelled", error="user")
+    assert cancelled["status"] == "cancelled"
+    assert "partial_result" not in cancelled and "logs" not in cancelled
+    full = store.load(job_id)
+    assert full["partial_result"] == {"parcial": True}
+    assert full["logs"][-1]["message"] == "baixando"
+
+    store.save(store.status(job_id))  # registro leve: sem logs nem campos pesados
+    assert store.load(job_id)["partial_result"] == {"parcial": True}
+    assert store.read_logs(job_id)[-1]["message"] == "baixando"
+
+    monkeypatch.setattr(store, "EVENTS_MAX_BYTES", 32 * 1024)
+    for index in range(600):
+        store.append_log(job_id, level="info", message=f"evento {index}")
+    events = tmp_path / job_id / "events.jsonl"
+    assert events.stat().st_size <= 32 * 1024
+    assert len(events.read_text(encoding="utf-8").splitlines()) < 600
+    assert store.read_logs(job_id, limit=1)[0]["message"] == "evento 599"
+
+
+def test_investigation_job_store_lists_by_status_and_imports_legacy(tmp_path: Path) -> None:
+    legacy = {
+        "job_id": "legacy1",
+        "status": "running",
+        "created_at": "2026-01-01T00:00:00",
+        "updated_at": "2026-01-01T00:00:00",
+        "phase": "documents",
+        "progress_percent": 40,
+        "payload": {"query": "Gurgel"},
+        "partial_result": {"partial_snapshot": True},
+        "result": None,
+        "error": None,
+        "logs": [{"timestamp": "2026-01-01T00:00:00", "level": "info", "message": "legado"}],
+    }
+    (tmp_path / "legacy1.json").write_text(json.dumps(legacy), encoding="utf-8")
+    store = mod.InvestigationJobStore(tmp_path)
+    done = store.create(mod.AcervoStoryRequest(query="Outro"))
+    store.update(done["job_id"], status="completed", phase="completed", progress_percent=100)
+
+    assert [item["job_id"] for item in store.list_active()] == ["legacy1"]
+    assert [item["job_id"] for item in store.list_jobs(statuses=["completed"])] == [done["job_id"]]
+    loaded = store.load("legacy1")
+    assert loaded["partial_result"] == {"partial_snapshot": True}
+    assert loaded["logs"][0]["message"] == "legado"
+    assert not (tmp_path / "legacy1.json").exists()
+    plan = store._connect().execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM jobs WHERE status IN ('queued', 'running') ORDER BY updated_at DESC"
+    ).fetchall()
+    assert "idx_jobs_status_updated" in " ".join(str(row["detail"]) for row in plan)
+
+
 def test_reconcile_active_jobs_marks_stale_records_as_cancelled(tmp_path: Path) -> None:
     store = mod.InvestigationJobStore(tmp_path)
     payload = mod.AcervoStoryRequest(query="João Amaral Gurgel", output_mode="dossier")
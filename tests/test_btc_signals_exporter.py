@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""Testes da coleta paralela do btc_signals_exporter contra um servidor HTTP stub local.
+
+Cobertura:
+  - run_cycle coleta todas as fontes em paralelo (fonte lenta não trava o ciclo)
+  - cache TTL por fonte evita requisições repetidas
+  - fallback stale com gauge de idade e contadores de erro por fonte
+"""
+from __future__ import annotations
+
+import importlib.util
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+_EXPORTER_PATH = Path(__file__).resolve().parents[1] / "grafana" / "exporters" / "btc_signals_exporter.py"
+_spec = importlib.util.spec_from_file_location("btc_signals_exporter", str(_EXPORTER_PATH))
+exporter = importlib.util.module_from_spec(_spec)
+sys.modules["btc_signals_exporter"] = exporter
+_spec.loader.exec_module(exporter)
+
+PAYLOADS = {
+    "/futures/data/globalLongShortAccountRatio": [{"longAccount": "0.60"}],
+    "/futures/data/topLongShortAccountRatio": [{"longAccount": "0.55"}],
+    "/futures/data/takerlongshortRatio": [{"buySellRatio": "1.10"}],
+    "/fapi/v1/fundingRate": [{"fundingRate": "0.0001"}],
+    "/api/v5/rubik/stat/contracts/long-short-account-ratio": {"data": [["0", "1.5"]]},
+    "/api/v5/public/funding-rate": {"data": [{"fundingRate": "0.0002"}]},
+    "/v5/market/tickers": {"result": {"list": [{"fundingRate": "0.0001", "markPrice": "65000"}]}},
+    "/v5/market/open-interest": {"result": {"list": [{"openInterest": "51000"}, {"openInterest": "50000"}]}},
+    "/api/v2/public/get_book_summary_by_currency": {"result": [
+        {"instrument_name": "BTC-1-P", "open_interest": 80},
+        {"instrument_name": "BTC-1-C", "open_interest": 100},
+    ]},
+    "/fng/": {"data": [{"value": "30", "value_classification": "Fear"}]},
+    "/v2/prices/BTC-USD/spot": {"data": {"amount": "65100"}},
+    "/api/v3/simple/price": {"bitcoin": {"usd": 65000}},
+    "/api/v1/fees/recommended": {"fastestFee": 12},
+    "/api/mempool": {"vsize": 1000000},
+    "/api/v3/global": {"data": {"market_cap_percentage": {"btc": 55.5}}},
+    "/stats": {"n_tx": 400000, "total_btc_sent": 50000000000000},
+    "/bitcoin/stats": {"data": {"transactions_24h": 390000, "volume_24h": 45000000000000}},
+}
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):  # noqa: N802
+        path = self.path.split("?", 1)[0]
+        server = self.server
+        with server.lock:
+            server.hits[path] = server.hits.get(path, 0) + 1
+        delay = server.delays.get(path, 0)
+        if delay:
+            time.sleep(delay)
+        if path in server.failing or path not in PAYLOADS:
+            self.send_response(500)
+            self.end_headers()
+            return
+        body = json.dumps(PAYLOADS[path]).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def stub(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.hits, server.delays, server.failing = {}, {}, set()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    monkeypatch.setattr(exporter, "BASE_URL_OVERRIDE", f"http://127.0.0.1:{server.server_address[1]}")
+    monkeypatch.setattr(exporter, "persist", lambda row: None)
+    exporter.reset_source_cache()
+    exporter._prom.clear()
+    exporter._prom_sources.clear()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _source_metric(name: str, source: str):
+    return exporter._prom_sources.get(name, ("", "", {}))[2].get(source)
+
+
+def test_run_cycle_collects_all_sources(stub) -> None:
+    exporter.run_cycle()
+
+    assert exporter._prom["btc_fear_greed_raw"][1] == 30
+    assert exporter._prom["btc_dominance_pct"][1] == 55.5
+    assert exporter._prom["btc_open_interest_raw"][1] == 51000.0
+    assert exporter._prom["btc_onchain_bc_tx24"][1] == 390000
+    assert len(exporter._prom_sources["btc_signals_source_latency_seconds"][2]) == len(exporter.SOURCES)
+    assert not exporter._prom_sources.get("btc_signals_source_errors_total")
+
+
+def test_ttl_cache_skips_fresh_sources(stub) -> None:
+    exporter.collect_sources()
+    time.sleep(0.1)  # callbacks do pool gravam o cache
+    exporter.collect_sources()
+
+    assert stub.hits["/fng/"] == 1
+    assert _source_metric("btc_signals_source_cache_hits_total", "fear_greed") == 1
+
+
+def test_slow_source_does_not_stall_cycle(stub, monkeypatch) -> None:
+    monkeypatch.setattr(exporter, "COLLECT_DEADLINE", 0.5)
+    stub.delays["/api/v3/global"] = 1.5
+
+    t0 = time.monotonic()
+    data = exporter.collect_sources()
+    assert time.monotonic() - t0 < 1.2
+    assert data["btc_dominance"] is None
+    assert data["fear_greed"] == (30, "Fear")
+    assert _source_metric("btc_signals_source_timeouts_total", "btc_dominance") == 1
+
+
+def test_failed_source_falls_back_to_stale_value(stub) -> None:
+    exporter.collect_sources()
+    time.sleep(0.1)
+    stub.failing.add("/fng/")
+    entry = exporter._source_cache["fear_greed"]
+    exporter._source_cache["fear_greed"] = exporter._CacheEntry(entry.value, entry.fetched_at - 7200)
+
+    data = exporter.collect_sources()
+    time.sleep(0.1)
+
+    assert data["fear_greed"] == (30, "Fear")
+    assert _source_metric("btc_signals_source_stale", "fear_greed") == 1
+    assert _source_metric("btc_signals_source_age_seconds", "fear_greed") >= 7200
+    assert _source_metric("btc_signals_source_errors_total", "fear_greed") == 1
+
+
+def test_partial_composite_source_keeps_valid_value(stub) -> None:
+    stub.failing.add("/api/mempool")  # blockstream fora; mempool.space responde
+
+    data = exporter.collect_sources()
+    time.sleep(0.1)
+
+    assert data["mempool"] == (12, None)
+    assert _source_metric("btc_signals_source_stale", "mempool") == 0
+    assert _source_metric("btc_signals_source_errors_total", "mempool") is None
+    assert exporter._source_cache["mempool"].value == (12, None)
@@ -153,3 +153,32 @@ def test_generate_with_llm_chain_tenta_segundo_endpoint(monkeypatch) -> None:
     assert endpoint == "gpu1:gemma3:1b"
     assert _FakeOllamaClient.attempts[0] == ("http://gpu0:11434", "mistral:7b")
     assert _FakeOllamaClient.attempts[1] == ("http://gpu1:11435", "gemma3:1b")
+
+
+def test_ensure_piper_voice_baixa_uma_vez_com_threads(monkeypatch, tmp_path) -> None:
+    import threading
+    import time
+
+    monkeypatch.setattr(tts_tool, "PIPER_VENV_PYTHON", Path(sys.executable))
+    downloads: list[str] = []
+
+    def fake_download(voice_name: str, data_dir: Path) -> None:
+        downloads.append(voice_name)
+        time.sleep(0.05)
+        data_dir.mkdir(parents=True, exist_ok=True)
+        (data_dir / f"{voice_name}.onnx").write_bytes(b"modelo")
+        (data_dir / f"{voice_name}.onnx.json").write_text("{}", encoding="utf-8")
+
+    monkeypatch.setattr(tts_tool, "_download_piper_voice", fake_download)
+    results: list[tuple[Path, Path]] = []
+    threads = [
+        threading.Thread(target=lambda: results.append(tts_tool.ensure_piper_voice("pt_BR-faber-medium", tmp_path)))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert downloads == ["pt_BR-faber-medium"]
+    assert len(results) == 4 and len(set(results)) == 1
@@ -1,6 +1,7 @@
 """Testes do pipeline modular de segmentos da agenda diária."""
 from __future__ import annotations
 
+import json
 import struct
 import wave
 from pathlib import Path
@@ -337,6 +338,38 @@ def test_reorder_and_dedupe_editor_heuristic() -> None:
     assert "vale destacar o significado prático" not in joined
 
 
+def test_dedupe_sentences_index_matches_pairwise_scan() -> None:
+    import random
+
+    def pairwise(texts: list[str], threshold: float) -> tuple[list[str], int]:
+        seen: list[str] = []
+        cuts = 0
+        out: list[str] = []
+        for block in texts:
+            kept = []
+            for sentence in segs._split_sentences(block):
+                if len(segs._normalize_sentence_key(sentence).split()) < 4:
+                    kept.append(sentence)
+                elif any(segs._sentence_similarity(sentence, prev) >= threshold for prev in seen):
+                    cuts += 1
+                else:
+                    seen.append(sentence)
+                    kept.append(sentence)
+            if kept:
+                out.append(" ".join(kept))
+        return out, cuts
+
+    rng = random.Random(11)
+    vocab = [f"termo{i}" for i in range(20)] + ["de", "que", "o", "a"]
+    for _ in range(200):
+        threshold = rng.choice([0.0, 0.5, 0.7, 0.82, 1.0])
+        texts = [
+            " ".join(" ".join(rng.choices(vocab, k=rng.randint(3, 10))) + "." for _ in range(rng.randint(1, 6)))
+            for _ in range(rng.randint(1, 5))
+        ]
+        assert segs.dedupe_sentences(texts, similarity_threshold=threshold) == pairwise(texts, threshold)
+
+
 def test_run_editor_desk_heuristic_without_llm() -> None:
     drafts = [
         segs.SegmentResult(
@@ -460,3 +493,115 @@ def test_prepare_locution_uses_modular_when_long(tmp_path, monkeypatch) -> None:
     assert called["modular"] is True
     assert text == "texto modular"
     assert endpoint == "coord:m"
+
+
+def test_tts_parallel_preserves_order_and_reuses_cache(tmp_path: Path) -> None:
+    import threading
+    import time as _time
+    from types import SimpleNamespace
+
+    tts_mod = MagicMock()
+    tts_mod.generate_with_llm_chain.side_effect = RuntimeError("sem LLM")
+    tts_mod.normalize_for_speech.side_effect = lambda t: t
+    tts_mod.heuristic_rewrite_for_broadcast.side_effect = lambda t: t
+    tts_mod.clean_generated_text.side_effect = lambda t: t
+    settings = SimpleNamespace(backend="piper-cpu", piper_voice="pt_BR-faber-medium")
+
+    lock = threading.Lock()
+    state = {"active": 0, "peak": 0}
+    synth_texts: list[str] = []
+
+    def _synth(text, *, tts_mod, wav_output, tts_settings):
+        with lock:
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+            synth_texts.append(text)
+        # Blocos iniciais demoram mais: a ordem final não pode depender do término
+        _time.sleep(0.08 if "seg_01" in wav_output.name else 0.02)
+        _write_silent_wav(wav_output, seconds=1.0, rate=22050)
+        with lock:
+            state["active"] -= 1
+        return "piper-cpu"
+
+    kwargs = dict(
+        day_dir=tmp_path,
+        wav_output=tmp_path / "locution.wav",
+        tts_mod=tts_mod,
+        llm_endpoints=(),
+        tts_settings=settings,
+        synthesize_fn=_synth,
+        min_duration_seconds=720,
+        segment_target_seconds=180,
+        no_expand=True,
+        editor_enabled=False,
+        tts_parallel=4,
+    )
+    source = "Agenda de Flávio Bolsonaro com comissão às 10h e cobertura de aliados."
+    first = segs.generate_modular_locution(source, **kwargs)
+
+    assert state["peak"] > 1
+    assert [s.index for s in first.segments] == list(range(1, len(first.segments) + 1))
+    assert all(s.wav_path and s.wav_path.name.startswith(f"seg_{s.index:02d}_") for s in first.segments)
+
+    calls_before = len(synth_texts)
+    second = segs.generate_modular_locution(source, **kwargs)
+    assert len(synth_texts) == calls_before  # tudo veio do cache
+    assert second.tts_backend == "piper-cpu"
+    manifest = json.loads((tmp_path / "segments" / "manifest.json").read_text(encoding="utf-8"))
+    assert manifest["tts"]["cache_hit_rate"] == 1.0
+
+
+def test_tts_cache_key_and_device_slots() -> None:
+    from types import SimpleNamespace
+
+    piper = SimpleNamespace(backend="piper-cpu", piper_voice="faber")
+    assert segs.tts_cache_key("Olá,  mundo.\n", piper) == segs.tts_cache_key("Olá, mundo.", piper)
+    assert segs.tts_cache_key("Olá, mundo.", piper) != segs.tts_cache_key(
+        "Olá, mundo.", SimpleNamespace(backend="piper-cpu", piper_voice="edresson")
+    )
+    kokoro_fast = SimpleNamespace(backend="kokoro-gpu0", kokoro_voice="pm_santa", speed=1.2)
+    kokoro_slow = SimpleNamespace(backend="kokoro-gpu0", kokoro_voice="pm_santa", speed=1.0)
+    assert segs.tts_cache_key("Olá.", kokoro_fast) != segs.tts_cache_key("Olá.", kokoro_slow)
+    kokoro = SimpleNamespace(backend="kokoro-gpu0", kokoro_device="cuda:0", kokoro_voice="pm_santa")
+    assert segs.tts_parallel_slots(kokoro) == ("cuda:0", 1)
+    gpu_piper = SimpleNamespace(backend="piper-gpu", piper_use_cuda=True, piper_cuda_device="1")
+    assert segs.tts_parallel_slots(gpu_piper, 3) == ("cuda:1", 3)
+    assert segs.tts_parallel_slots(piper)[0] == "cpu"
+
+
+def test_tts_cache_skips_audio_from_fallback_backend(tmp_path: Path) -> None:
+    from types import SimpleNamespace
+
+    tts_mod = MagicMock()
+    tts_mod.generate_with_llm_chain.side_effect = RuntimeError("sem LLM")
+    tts_mod.normalize_for_speech.side_effect = lambda t: t
+    tts_mod.heuristic_rewrite_for_broadcast.side_effect = lambda t: t
+    tts_mod.clean_generated_text.side_effect = lambda t: t
+    settings = SimpleNamespace(backend="kokoro-gpu0", kokoro_voice="pm_santa")
+    synth_calls: list[str] = []
+
+    def _synth(text, *, tts_mod, wav_output, tts_settings):
+        synth_calls.append(text)
+        _write_silent_wav(wav_output, seconds=1.0, rate=22050)
+        return "piper-cpu"  # Kokoro indisponível: caiu no fallback
+
+    kwargs = dict(
+        day_dir=tmp_path,
+        wav_output=tmp_path / "locution.wav",
+        tts_mod=tts_mod,
+        llm_endpoints=(),
+        tts_settings=settings,
+        synthesize_fn=_synth,
+        min_duration_seconds=360,
+        segment_target_seconds=180,
+        no_expand=True,
+        editor_enabled=False,
+    )
+    source = "Agenda de Flávio Bolsonaro com comissão às 10h e cobertura de aliados."
+    segs.generate_modular_locution(source, **kwargs)
+    first_calls = len(synth_calls)
+    assert first_calls > 0
+    assert not list((tmp_path / "tts_cache").glob("*.wav"))
+
+    segs.generate_modular_locution(source, **kwargs)
+    assert len(synth_calls) == 2 * first_calls  # sintetiza de novo no backend pedido
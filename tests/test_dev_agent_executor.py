@@ -0,0 +1,140 @@
+"""Testes do executor paralelo e do cache de resultados do DevAgent."""
+
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from dev_agent.agent import DevAgent  # noqa: E402
+from dev_agent.coordinator import CoordinatorAgent  # noqa: E402
+
+
+class _SlowCodegen:
+    """Substitui o CodeGenerator: demora ``delay`` e conta chamadas simultâneas."""
+
+    def __init__(self, delay: float = 0.1, fail_on: str = "") -> None:
+        self.delay = delay
+        self.fail_on = fail_on
+        self.calls: list[str] = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def generate_code(self, description: str, language: str = "python") -> dict:
+        with self._lock:
+            self.calls.append(description)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        if self.fail_on and self.fail_on in description:
+            return {"success": False, "code": "", "error": "falhou"}
+        return {"success": True, "code": f"# {description[:20]}", "error": ""}
+
+
+def _agent(tmp_path: Path, codegen: _SlowCodegen) -> DevAgent:
+    agent = DevAgent(llm_url="http://llm.invalid", model="m1", cache_dir=str(tmp_path / "cache"))
+    agent.codegen = codegen
+    return agent
+
+
+def test_repeated_request_is_served_from_cache(tmp_path: Path) -> None:
+    codegen = _SlowCodegen(delay=0.05)
+    agent = _agent(tmp_path, codegen)
+    first = agent.develop("somar dois numeros", "python")
+    second = agent.develop("somar dois numeros", "python")
+    assert first["success"] and not first["cached"]
+    assert second["cached"] and second["code"] == first["code"]
+    assert len(codegen.calls) == 1
+
+    # Outro processo/instância lê do disco; outro modelo é outra chave
+    fresh = _agent(tmp_path, codegen)
+    assert fresh.develop("somar dois numeros", "python")["cached"]
+    fresh.model = "m2"
+    assert not fresh.develop("somar dois numeros", "python")["cached"]
+    assert len(codegen.calls) == 2
+
+
+def test_explicit_retry_bypasses_cache(tmp_path: Path) -> None:
+    codegen = _SlowCodegen(delay=0.0)
+    agent = _agent(tmp_path, codegen)
+    agent.develop("somar dois numeros", "python")
+
+    retried = agent.develop("somar dois numeros", "python", refresh=True)
+    assert retried["success"] and not retried["cached"]
+    assert len(codegen.calls) == 2
+
+    coordinator = CoordinatorAgent(dev_agent=agent)
+    assert coordinator.decide_and_execute("somar dois numeros", refresh=True)["success"]
+    assert len(codegen.calls) == 3
+    assert agent.develop("somar dois numeros", "python")["cached"]
+
+
+def test_default_cache_is_memory_only(tmp_path: Path, monkeypatch) -> None:
+    from dev_agent import config
+
+    monkeypatch.chdir(tmp_path)
+    assert config.TASK_CACHE_DIR == ""
+    agent = DevAgent(llm_url="http://llm.invalid", model="m1")
+    agent.codegen = _SlowCodegen(delay=0.0)
+    agent.develop("somar dois numeros", "python")
+    assert agent.cache.cache_dir is None and not any(tmp_path.iterdir())
+
+
+def test_develop_many_runs_in_parallel_within_squad_capacity(tmp_path: Path) -> None:
+    codegen = _SlowCodegen(delay=0.1)
+    agent = _agent(tmp_path, codegen)
+    agent.set_squad_capacity(3)
+    t0 = time.monotonic()
+    results = agent.develop_many([(f"tarefa {i}", "python") for i in range(6)])
+    elapsed = time.monotonic() - t0
+    assert all(r["success"] for r in results)
+    assert [r["code"] for r in results] == [f"# tarefa {i}" for i in range(6)]
+    assert codegen.max_active == 3
+    assert elapsed < 0.45  # 2 ondas de 0.1s, não 6 em série
+    agent.cleanup()
+
+
+def test_split_retry_only_reruns_failed_subtasks(tmp_path: Path) -> None:
+    codegen = _SlowCodegen(delay=0.05, fail_on="Tipo de tarefa: tests")
+    agent = _agent(tmp_path, codegen)
+    coordinator = CoordinatorAgent(dev_agent=agent)
+    coordinator._get_cpu_usage_percent = lambda: None
+
+    first = coordinator._split_and_execute("criar API de tarefas", "python", attempt=0)
+    assert not first["success"] and len(codegen.calls) == 3
+    assert codegen.max_active == 3
+
+    codegen.fail_on = ""
+    retry = coordinator._split_and_execute("criar API de tarefas", "python", attempt=1)
+    assert retry["success"]
+    assert [r["cached"] for r in retry["results"]] == [True, True, False]
+    assert len(codegen.calls) == 4
+    agent.cleanup()
+
+
+def test_autoscale_moves_squad_toward_cpu_target(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("SQUAD_MIN", "1")
+    monkeypatch.setenv("SQUAD_MAX", "4")
+    agent = _agent(tmp_path, _SlowCodegen())
+    coordinator = CoordinatorAgent(dev_agent=agent)
+    coordinator.autoscale_interval = 0
+    agent.set_squad_capacity(2)
+
+    coordinator._get_cpu_usage_percent = lambda: 30.0
+    coordinator._autoscale_to_target()
+    assert agent.squad_capacity == 3
+    coordinator._get_cpu_usage_percent = lambda: 95.0
+    coordinator._autoscale_to_target()
+    coordinator._autoscale_to_target()
+    assert agent.squad_capacity == 1
+
+    agent.disable_squad_autoscale()
+    coordinator._get_cpu_usage_percent = lambda: 10.0
+    coordinator._autoscale_to_target()
+    assert agent.squad_capacity == 1
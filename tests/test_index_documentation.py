@@ -0,0 +1,94 @@
+"""Testes da sincronização incremental do index_documentation (coleção e embedder falsos)."""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("chromadb")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import index_documentation as idx  # noqa: E402
+
+
+class _FakeCollection:
+    def __init__(self, name: str, space: str | None = "cosine") -> None:
+        self.name = name
+        self.metadata = {"description": name, **({"hnsw:space": space} if space else {})}
+        self.docs: dict[str, str] = {}
+        self.upserts: list[dict] = []
+
+    def upsert(self, ids, documents, metadatas, embeddings=None) -> None:
+        self.upserts.append({"ids": list(ids), "embeddings": embeddings})
+        self.docs.update(zip(ids, documents))
+
+    def delete(self, ids=None, where=None) -> None:
+        if ids is not None:
+            for chunk_id in ids:
+                self.docs.pop(chunk_id, None)
+        elif where is not None:
+            self.docs = {k: v for k, v in self.docs.items() if not k.startswith(where["source"])}
+
+
+class _FakeEmbedder:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def embed(self, texts: list) -> list:
+        self.calls += 1
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+@pytest.fixture
+def indexer(tmp_path: Path) -> idx.RAGIndexer:
+    indexer = idx.RAGIndexer.__new__(idx.RAGIndexer)
+    indexer.force = False
+    indexer.manifest = idx.IndexManifest(tmp_path / "index_manifest.json")
+    indexer.stats = {"unchanged": 0, "changed": 0, "removed": 0, "chunks": 0, "deleted_chunks": 0}
+    indexer.embedder = _FakeEmbedder()
+    return indexer
+
+
+def _build_records(source: str, content: str) -> list:
+    return [(f"{source}_{i}", line, {"source": source}) for i, line in enumerate(content.splitlines())]
+
+
+def test_unchanged_sources_are_skipped_and_stale_chunks_removed(indexer) -> None:
+    collection = _FakeCollection("docs")
+    indexer._sync_sources(collection, {"a": "um\ndois\ntres", "b": "x"}, _build_records)
+    assert set(collection.docs) == {"a_0", "a_1", "a_2", "b_0"}
+
+    indexer._sync_sources(collection, {"a": "um\ndois", "b": "x"}, _build_records)
+
+    assert set(collection.docs) == {"a_0", "a_1", "b_0"}
+    assert collection.upserts[-1]["ids"] == ["a_0", "a_1"]
+    assert indexer.stats["unchanged"] == 1 and indexer.stats["deleted_chunks"] == 1
+
+
+def test_unreadable_source_keeps_its_chunks(indexer) -> None:
+    collection = _FakeCollection("docs")
+    indexer._sync_sources(collection, {"a": "um\ndois", "b": "x"}, _build_records)
+
+    indexer._sync_sources(collection, {"b": "x"}, _build_records, unreadable={"a"})
+
+    assert set(collection.docs) == {"a_0", "a_1", "b_0"}
+    assert indexer.manifest.get("docs", "a") is not None
+    assert indexer.stats["removed"] == 0
+
+    indexer._sync_sources(collection, {"b": "x"}, _build_records)  # agora apagado de fato
+    assert set(collection.docs) == {"b_0"}
+    assert indexer.stats["removed"] == 1
+
+
+def test_batch_embeddings_only_for_cosine_collections(indexer) -> None:
+    cosine = _FakeCollection("docs")
+    legacy_l2 = _FakeCollection("code", space=None)
+
+    indexer._sync_sources(cosine, {"a": "um"}, _build_records)
+    indexer._sync_sources(legacy_l2, {"a": "um"}, _build_records)
+
+    assert cosine.upserts[0]["embeddings"] == [[2.0, 1.0]]
+    assert legacy_l2.upserts[0]["embeddings"] is None
+    assert indexer.embedder.calls == 1
@@ -4,7 +4,9 @@ from __future__ import annotations
 
 import asyncio
 import importlib.util
+import os
 import sys
+import time
 from pathlib import Path
 
 import pytest
@@ -20,6 +22,13 @@ sys.modules["intelligent_searcher"] = mod
 _SPEC.loader.exec_module(mod)
 
 
+@pytest.fixture(autouse=True)
+def _isolated_index(tmp_path_factory: pytest.TempPathFactory, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Cada teste usa um indice SQLite proprio, fora do ~/.cache."""
+    index_dir = tmp_path_factory.mktemp("index")
+    monkeypatch.setattr(mod, "DEFAULT_INDEX_PATH", index_dir / "index.sqlite3")
+
+
 def test_analyze_request_usa_json_da_gpu1() -> None:
     """Deve aproveitar JSON valido retornado pela GPU1."""
     searcher = mod.IntelligentSearcher()
@@ -51,20 +60,33 @@ def test_analyze_request_fallback_quando_json_invalido() -> None:
 
 
 def test_find_candidates_pontua_por_keywords(tmp_path: Path) -> None:
-    """Arquivos com keywords no nome devem vir primeiro."""
+    """Arquivos com keywords no nome devem vir primeiro; sem match nao entram."""
     target = tmp_path / "laudo_medico_pcd.pdf"
     other = tmp_path / "arquivo_generico.txt"
+    unrelated = tmp_path / "notas.txt"
     target.write_text("x", encoding="utf-8")
-    other.write_text("y", encoding="utf-8")
+    other.write_text("copia do laudo", encoding="utf-8")
+    unrelated.write_text("lista de compras", encoding="utf-8")
 
     searcher = mod.IntelligentSearcher()
     results = asyncio.run(searcher._find_candidates(tmp_path, ["laudo", "medico"], limit=5))
 
-    assert results
-    assert results[0][0].name == "laudo_medico_pcd.pdf"
+    assert [path.name for path, _ in results] == ["laudo_medico_pcd.pdf", "arquivo_generico.txt"]
     assert results[0][1] > results[-1][1]
 
 
+def test_find_candidates_ve_arquivo_novo_sem_esperar_intervalo(tmp_path: Path) -> None:
+    """A subarvore pesquisada e revarrida a cada busca."""
+    (tmp_path / "laudo_antigo.pdf").write_bytes(b"%PDF")
+    searcher = mod.IntelligentSearcher()
+    first = asyncio.run(searcher._find_candidates(tmp_path, ["laudo"], limit=5))
+    assert [path.name for path, _ in first] == ["laudo_antigo.pdf"]
+
+    (tmp_path / "laudo_novo.pdf").write_bytes(b"%PDF")
+    second = asyncio.run(searcher._find_candidates(tmp_path, ["laudo"], limit=5))
+    assert sorted(path.name for path, _ in second) == ["laudo_antigo.pdf", "laudo_novo.pdf"]
+
+
 def test_interpret_content_text_file(tmp_path: Path) -> None:
     """Arquivo textual deve ser retornado sem uso de visao."""
     fpath = tmp_path / "info.txt"
@@ -116,3 +138,88 @@ def test_search_pipeline_completo(tmp_path: Path) -> None:
     assert result["keywords"] == ["laudo", "medico"]
     assert result["results"]
     assert result["results"][0]["summary"] == "conteudo interpretado"
+
+
+def test_find_candidates_pontua_conteudo_indexado(tmp_path: Path) -> None:
+    """Keyword no conteudo tambem gera candidato, abaixo do match no nome."""
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "relatorio.txt").write_text("Laudo com CID M21.7", encoding="utf-8")
+    (tmp_path / "laudo_scan.pdf").write_bytes(b"%PDF")
+    (tmp_path / "notas.txt").write_text("lista de compras", encoding="utf-8")
+
+    searcher = mod.IntelligentSearcher()
+    results = asyncio.run(searcher._find_candidates(tmp_path, ["laudo", "cid"], limit=2))
+
+    assert [path.name for path, _ in results] == ["laudo_scan.pdf", "relatorio.txt"]
+    assert results[1][1] > searcher._score_file(results[1][0], ["laudo", "cid"])
+
+
+def test_file_index_refresh_incremental(tmp_path: Path) -> None:
+    """Refresh relê so arquivos alterados e remove os apagados."""
+    keep = tmp_path / "a.txt"
+    edit = tmp_path / "b.txt"
+    gone = tmp_path / "c.md"
+    for path in (keep, edit, gone):
+        path.write_text("inicial", encoding="utf-8")
+    (tmp_path / "ignorado.bin").write_bytes(b"x")
+
+    index = mod.FileIndex(tmp_path / "idx" / "files.sqlite3", refresh_interval=3600)
+    assert index.refresh(tmp_path)["added"] == 3
+    assert index.refresh(tmp_path) == {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+
+    edit.write_text("conteudo novo com atestado", encoding="utf-8")
+    gone.unlink()
+    stats = index.refresh(tmp_path, force=True)
+
+    assert stats == {"added": 0, "updated": 1, "removed": 1, "unchanged": 1}
+    assert [Path(path).name for path, _ in index.search(tmp_path, ["atestado"], 10)] == ["b.txt"]
+    index.close()
+
+
+def test_file_index_nao_relista_diretorio_inalterado(tmp_path: Path) -> None:
+    """Diretorio com mtime igual nao e relistado; edicoes ainda sao vistas e --reindex relista."""
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    edit = docs / "a.txt"
+    edit.write_text("inicial", encoding="utf-8")
+    old = time.time() - 3600
+    os.utime(docs, (old, old))
+    os.utime(tmp_path, (old, old))
+
+    index = mod.FileIndex(":memory:")
+    assert index.refresh(tmp_path)["added"] == 1
+
+    # Arquivo criado sem mudar o mtime do diretorio: a listagem nao e refeita
+    (docs / "escondido.txt").write_text("x", encoding="utf-8")
+    edit.write_text("conteudo novo com atestado", encoding="utf-8")
+    os.utime(docs, (old, old))
+    assert index.refresh(tmp_path) == {"added": 0, "updated": 1, "removed": 0, "unchanged": 0}
+
+    assert index.refresh(tmp_path, force=True)["added"] == 1
+    index.close()
+
+
+def test_resumo_de_visao_reaproveitado_entre_consultas(tmp_path: Path) -> None:
+    """Resumo OCR fica no indice e so e refeito quando o arquivo muda."""
+    image_path = tmp_path / "exame.jpg"
+    image_path.write_bytes(b"img")
+    searcher = mod.IntelligentSearcher()
+    calls: list[Path] = []
+
+    async def fake_vision(path: Path) -> str:
+        calls.append(path)
+        return "OCR: laudo ortopedico"
+
+    searcher._vision_summary = fake_vision  # type: ignore[method-assign]
+    asyncio.run(searcher._find_candidates(tmp_path, ["exame"], limit=5))
+    assert asyncio.run(searcher._interpret_content_with_gpu0(image_path)) == "OCR: laudo ortopedico"
+    assert asyncio.run(searcher._interpret_content_with_gpu0(image_path)) == "OCR: laudo ortopedico"
+    assert len(calls) == 1
+
+    # O texto do OCR passa a ser pesquisavel
+    assert searcher._get_index().search(tmp_path, ["ortopedico"], 5)
+
+    image_path.write_bytes(b"img-atualizada")
+    searcher._get_index().refresh(tmp_path, force=True)
+    asyncio.run(searcher._interpret_content_with_gpu0(image_path))
+    assert len(calls) == 2
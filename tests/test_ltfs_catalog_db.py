@@ -0,0 +1,218 @@
+"""Testes unitários para tools/ltfs_catalog_db.py.
+
+Cobre:
+- import_jsonl(): import incremental por offset, linhas inválidas e parciais
+- locate()/find_by_sha256(): consultas indexadas (sem full scan)
+- PlacementsView: mapping compatível com placements.json
+- ltfs_catalog_verify com --catalog-db
+- rotas /tape/catalog/*
+"""
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "tools"))
+import ltfs_catalog_db as cdb  # noqa: E402
+import ltfs_catalog_verify  # noqa: E402
+
+
+def _entry(rel: str, sha: str, **extra) -> dict:
+    entry = {
+        "timestamp": "2026-10-01T00:00:00Z",
+        "action": "flush",
+        "src_root": "/mnt/pretape/lto6-cache",
+        "rel_path": rel,
+        "size": 10,
+        "sha256": sha,
+        "target_root": "/mnt/lto6-smb-proof/backups",
+        "policy": "newest-first",
+    }
+    entry.update(extra)
+    return entry
+
+
+def _write_jsonl(path: Path, entries: list[dict]) -> None:
+    with path.open("a") as f:
+        for e in entries:
+            f.write(json.dumps(e) + "\n")
+
+
+@pytest.fixture()
+def store(tmp_path: Path):
+    with cdb.CatalogStore(tmp_path / "catalog.db") as s:
+        yield s
+
+
+class TestImportJsonl:
+    def test_incremental_import(self, store, tmp_path) -> None:
+        catalog = tmp_path / "catalog.jsonl"
+        _write_jsonl(catalog, [_entry("a.bin", "a" * 64), _entry("b.bin", "b" * 64)])
+        assert store.import_jsonl(catalog) == 2
+        assert store.import_jsonl(catalog) == 0
+
+        _write_jsonl(catalog, [_entry("c.bin", "c" * 64, volser="LTO001")])
+        assert store.import_jsonl(catalog) == 1
+        assert store.count() == 3
+
+    def test_concurrent_import_does_not_duplicate(self, store, tmp_path, monkeypatch) -> None:
+        catalog = tmp_path / "catalog.jsonl"
+        _write_jsonl(catalog, [_entry(f"{i}.bin", f"{i:064d}") for i in range(5)])
+        monkeypatch.setattr(cdb, "IMPORT_BATCH_SIZE", 2)
+        other = cdb.CatalogStore(tmp_path / "catalog.db")  # ex.: verify rodando junto com o flush
+        real_start = store._start_offset
+        raced = []
+
+        def racing_start(catalog_file, key):
+            offset = real_start(catalog_file, key)
+            if not raced:
+                raced.append(other.import_jsonl(catalog))  # avança o offset antes do 1º lote
+            return offset
+
+        monkeypatch.setattr(store, "_start_offset", racing_start)
+        assert store.import_jsonl(catalog) == 0
+        other.close()
+        assert raced == [5] and store.count() == 5
+
+    def test_skips_invalid_and_partial_lines(self, store, tmp_path) -> None:
+        catalog = tmp_path / "catalog.jsonl"
+        catalog.write_text(json.dumps(_entry("a.bin", "a" * 64)) + "\n{invalido\n" + '{"rel_path": "x"')
+        assert store.import_jsonl(catalog) == 1
+
+        # A linha parcial é completada depois e importada no próximo ciclo
+        with catalog.open("a") as f:
+            f.write(', "action": "flush"}\n')
+        assert store.import_jsonl(catalog) == 1
+        assert store.history("x")[0]["action"] == "flush"
+
+    def test_extra_fields_round_trip(self, store) -> None:
+        store.append(_entry("a.bin", "a" * 64, custom={"k": 1}))
+        assert store.history("a.bin")[0]["custom"] == {"k": 1}
+
+
+class TestQueries:
+    def test_locate_prefers_placement_volser(self, store) -> None:
+        store.append(_entry("dir/a.bin", "a" * 64, volser="LTO001"))
+        store.upsert_placement("dir/a.bin", {"sha256": "a" * 64, "size": 10, "volser": "LTO002"})
+
+        result = store.locate("dir/a.bin")
+        assert result["volser"] == "LTO002"
+        assert result["last_flush"]["volser"] == "LTO001"
+        assert store.locate("nope") is None
+
+    def test_find_by_sha256_and_filters(self, store) -> None:
+        store.append_many([
+            _entry("a.bin", "a" * 64, volser="LTO001"),
+            _entry("a-copy.bin", "a" * 64, volser="LTO002", timestamp="2026-10-05T00:00:00Z"),
+            _entry("b.bin", "b" * 64, action="cleanup"),
+        ])
+        assert [e["rel_path"] for e in store.find_by_sha256("a" * 64)] == ["a.bin", "a-copy.bin"]
+        assert [e["rel_path"] for e in store.iter_entries(volser="LTO002")] == ["a-copy.bin"]
+        assert [e["rel_path"] for e in store.iter_entries(since="2026-10-02")] == ["a-copy.bin"]
+        assert store.count("flush") == 2
+        assert len(store.sample(10)) == 2
+
+    @pytest.mark.parametrize("column", ["rel_path", "sha256", "volser", "timestamp"])
+    def test_lookups_use_index(self, store, column) -> None:
+        plan = store._conn.execute(
+            f"EXPLAIN QUERY PLAN SELECT * FROM catalog WHERE {column} = ?", ("x",)
+        ).fetchall()
+        assert "USING INDEX" in " ".join(row["detail"] for row in plan)
+
+
+class TestPlacementsView:
+    def test_mapping_semantics(self, store, tmp_path) -> None:
+        placements_file = tmp_path / "placements.json"
+        placements_file.write_text(json.dumps({"a.bin": {"sha256": "a" * 64, "size": 10}}))
+        assert store.import_placements_json(placements_file) == 1
+
+        view = store.placements_view()
+        assert len(view) == 1 and "a.bin" in view
+        view["b.bin"] = {"sha256": "b" * 64, "size": 3, "flushed_at": "t"}
+        assert view["b.bin"]["size"] == 3
+        assert list(view) == ["a.bin", "b.bin"]
+        del view["a.bin"]
+        assert view.get("a.bin") is None
+
+
+def test_catalog_verify_with_catalog_db(tmp_path, monkeypatch) -> None:
+    import hashlib
+
+    tape = tmp_path / "tape"
+    tape.mkdir()
+    (tape / "a.bin").write_bytes(b"conteudo")
+    sha = hashlib.sha256(b"conteudo").hexdigest()
+
+    catalog = tmp_path / "catalog.jsonl"
+    _write_jsonl(catalog, [_entry("a.bin", sha, target_root=str(tape))])
+    db = tmp_path / "catalog.db"
+    with cdb.CatalogStore(db) as s:
+        s.upsert_placement("a.bin", {"sha256": sha, "size": 10, "target_root": str(tape)})
+
+    metrics = tmp_path / "metrics.prom"
+    monkeypatch.setattr(sys, "argv", [
+        "ltfs-catalog-verify", "--catalog", str(catalog), "--catalog-db", str(db),
+        "--tape-root", str(tape),
+        "--metrics-file", str(metrics),
+    ])
+    assert ltfs_catalog_verify.main() == 0
+    assert "ltfs_catalog_tape_verified 1" in metrics.read_text()
+
+
+def test_catalog_verify_seeds_empty_db_from_placements_json(tmp_path, monkeypatch) -> None:
+    import hashlib
+
+    tape = tmp_path / "tape"
+    tape.mkdir()
+    (tape / "a.bin").write_bytes(b"conteudo")
+    sha = hashlib.sha256(b"conteudo").hexdigest()
+    catalog = tmp_path / "catalog.jsonl"
+    _write_jsonl(catalog, [_entry("a.bin", sha, target_root=str(tape))])
+    placements = tmp_path / "placements.json"
+    placements.write_text(json.dumps({"a.bin": {"sha256": sha, "size": 10, "target_root": str(tape)}}))
+
+    metrics = tmp_path / "metrics.prom"
+    monkeypatch.setattr(sys, "argv", [
+        "ltfs-catalog-verify", "--catalog", str(catalog), "--catalog-db", str(tmp_path / "novo.db"),
+        "--placements", str(placements), "--tape-root", str(tape), "--metrics-file", str(metrics),
+    ])
+    assert ltfs_catalog_verify.main() == 0
+    assert "ltfs_catalog_tape_verified 1" in metrics.read_text()
+
+
+def test_flush_and_verify_units_share_catalog_db() -> None:
+    systemd = Path(__file__).parent.parent / "systemd"
+    flush = (systemd / "ltfs-cache-flush.service.d" / "60-tape-gate.conf").read_text()
+    verify = (systemd / "ltfs-catalog-verify.service").read_text()
+    setting = "Environment=CATALOG_DB=/var/lib/ltfs-cache-flush/catalog.db"
+    assert setting in flush and setting in verify
+    assert '[ -f "$$CATALOG_DB" ]' not in verify  # mesma variável decide nos dois units
+
+
+def test_tape_routes_catalog_endpoints(tmp_path, monkeypatch) -> None:
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from specialized_agents import tape_routes
+
+    db = tmp_path / "catalog.db"
+    with cdb.CatalogStore(db) as s:
+        s.append(_entry("a.bin", "a" * 64, volser="LTO001"))
+    monkeypatch.setattr(tape_routes, "LTFS_CATALOG_DB", str(db))
+
+    app = FastAPI()
+    app.include_router(tape_routes.router)
+    client = TestClient(app)
+
+    assert client.get("/tape/catalog/locate", params={"path": "a.bin"}).json()["volser"] == "LTO001"
+    assert client.get("/tape/catalog/locate", params={"path": "zzz"}).status_code == 404
+    assert len(client.get(f"/tape/catalog/sha256/{'A' * 64}").json()["entries"]) == 1
+    # Conexão aberta uma única vez e reaproveitada entre requisições
+    opened = tape_routes._catalog_store
+    client.get("/tape/catalog/locate", params={"path": "a.bin"})
+    assert tape_routes._catalog_store is opened
+    opened.close()
+    monkeypatch.setattr(tape_routes, "_catalog_store", None)
@@ -0,0 +1,198 @@
+"""Testes unitários para tools/ltfs_tape_order.py.
+
+Cobre:
+- parse_ltfs_index(): extents por caminho a partir de um XML ltfsindex sintético
+- build_read_plan(): ordenação por (partition, startblock) e seeks estimados
+- restore_files(): passada única sobre diretório local simulando a fita
+- ltfs_catalog_verify.sample_verify_tape(): amostra lida na ordem da fita
+"""
+from __future__ import annotations
+
+import hashlib
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "tools"))
+import ltfs_catalog_verify  # noqa: E402
+import ltfs_tape_order as lto  # noqa: E402
+
+BLOCK = lto.DEFAULT_BLOCKSIZE
+
+INDEX_XML = f"""<?xml version="1.0" encoding="UTF-8"?>
+<ltfsindex version="2.4.0">
+  <creator>LTFS 2.4</creator>
+  <directory>
+    <name>VOL001</name>
+    <contents>
+      <directory>
+        <name>backups</name>
+        <contents>
+          <file>
+            <name>c.bin</name>
+            <length>{BLOCK}</length>
+            <extentinfo>
+              <extent><fileoffset>0</fileoffset><partition>b</partition>
+                <startblock>30</startblock><byteoffset>0</byteoffset><bytecount>{BLOCK}</bytecount></extent>
+            </extentinfo>
+          </file>
+          <file>
+            <name>a.bin</name>
+            <length>{BLOCK}</length>
+            <extentinfo>
+              <extent><fileoffset>0</fileoffset><partition>b</partition>
+                <startblock>10</startblock><byteoffset>0</byteoffset><bytecount>{BLOCK}</bytecount></extent>
+            </extentinfo>
+          </file>
+          <file>
+            <name>b.bin</name>
+            <length>{2 * BLOCK}</length>
+            <extentinfo>
+              <extent><fileoffset>{BLOCK}</fileoffset><partition>b</partition>
+                <startblock>12</startblock><byteoffset>0</byteoffset><bytecount>{BLOCK}</bytecount></extent>
+              <extent><fileoffset>0</fileoffset><partition>b</partition>
+                <startblock>11</startblock><byteoffset>0</byteoffset><bytecount>{BLOCK}</bytecount></extent>
+            </extentinfo>
+          </file>
+        </contents>
+      </directory>
+      <file>
+        <name>label.txt</name>
+        <length>5</length>
+        <extentinfo>
+          <extent><fileoffset>0</fileoffset><partition>a</partition>
+            <startblock>5</startblock><byteoffset>0</byteoffset><bytecount>5</bytecount></extent>
+        </extentinfo>
+      </file>
+    </contents>
+  </directory>
+</ltfsindex>
+"""
+
+
+@pytest.fixture()
+def index(tmp_path: Path) -> dict[str, lto.TapeFile]:
+    xml_path = tmp_path / "VOL001_latest.xml"
+    xml_path.write_text(INDEX_XML)
+    return lto.parse_ltfs_index(xml_path)
+
+
+@pytest.fixture()
+def tape_root(tmp_path: Path) -> Path:
+    root = tmp_path / "tape"
+    (root / "backups").mkdir(parents=True)
+    for name in ("a.bin", "b.bin", "c.bin"):
+        (root / "backups" / name).write_bytes(name.encode() * 100)
+    (root / "label.txt").write_bytes(b"label")
+    return root
+
+
+class TestParseIndex:
+    def test_paths_exclude_volume_name(self, index) -> None:
+        assert set(index) == {"backups/a.bin", "backups/b.bin", "backups/c.bin", "label.txt"}
+
+    def test_extents_sorted_by_fileoffset(self, index) -> None:
+        b = index["backups/b.bin"]
+        assert [e.startblock for e in b.extents] == [11, 12]
+        assert b.position == ("b", 11)
+        assert b.length == 2 * BLOCK
+
+
+class TestBuildReadPlan:
+    def test_sorts_by_partition_and_block(self, index) -> None:
+        plan = lto.build_read_plan(
+            ["backups/c.bin", "/backups/a.bin", "label.txt", "backups/b.bin"], index
+        )
+        assert [f.path for f in plan.ordered] == [
+            "label.txt", "backups/a.bin", "backups/b.bin", "backups/c.bin",
+        ]
+        assert plan.unindexed == []
+
+    def test_single_forward_pass_reduces_seeks(self, index) -> None:
+        plan = lto.build_read_plan(["backups/c.bin", "backups/b.bin", "backups/a.bin"], index)
+        # a(10) -> b(11,12) é contíguo; c(30) exige um locate à frente
+        assert plan.estimated_seeks == 2
+        assert plan.estimated_seeks_requested_order == 3
+
+    def test_unindexed_and_duplicates(self, index) -> None:
+        plan = lto.build_read_plan(["nope.bin", "backups/a.bin", "backups/a.bin"], index)
+        assert [f.path for f in plan.ordered] == ["backups/a.bin"]
+        assert plan.unindexed == ["nope.bin"]
+        assert plan.as_dict()["order"] == ["backups/a.bin", "nope.bin"]
+
+
+class TestRestoreFiles:
+    def test_restores_in_tape_order_with_checksum(self, index, tape_root, tmp_path, monkeypatch) -> None:
+        dest = tmp_path / "restore"
+        plan = lto.build_read_plan(["backups/c.bin", "backups/a.bin"], index)
+        order: list[str] = []
+        original = lto.run_read_plan
+
+        def _spy(plan, root, handler, blocksize=BLOCK):
+            def _wrapped(rel, path):
+                order.append(rel)
+                handler(rel, path)
+            return original(plan, root, _wrapped, blocksize)
+
+        monkeypatch.setattr(lto, "run_read_plan", _spy)
+        results = lto.restore_files(plan, tape_root, dest)
+
+        assert order == ["backups/a.bin", "backups/c.bin"]
+        assert results["read"] == 2 and results["failed"] == 0
+        assert results["actual_seeks"] == 2
+        data = (dest / "backups/c.bin").read_bytes()
+        assert data == (tape_root / "backups/c.bin").read_bytes()
+        assert results["sha256"]["backups/c.bin"] == hashlib.sha256(data).hexdigest()
+
+    def test_sha_mismatch_removes_partial(self, index, tape_root, tmp_path) -> None:
+        dest = tmp_path / "restore"
+        plan = lto.build_read_plan(["backups/a.bin"], index)
+        results = lto.restore_files(plan, tape_root, dest, {"backups/a.bin": "0" * 64})
+        assert results["failed"] == 1
+        assert not (dest / "backups/a.bin").exists()
+        assert list((dest / "backups").iterdir()) == []
+
+    def test_rejects_paths_outside_dest(self, index, tape_root, tmp_path) -> None:
+        (tmp_path / "outside.bin").write_bytes(b"x")
+        dest = tmp_path / "restore"
+        plan = lto.build_read_plan(["backups/../../outside.bin"], index)
+        results = lto.restore_files(plan, tape_root, dest)
+        assert results["failed"] == 1 and results["read"] == 0
+        assert "fora do destino" in results["errors"][0]
+        assert (tmp_path / "outside.bin").read_bytes() == b"x"
+
+    def test_blocksize_reaches_actual_seeks(self, index, tape_root, tmp_path, monkeypatch) -> None:
+        seen: list[int] = []
+        original = lto.count_seeks
+        monkeypatch.setattr(lto, "count_seeks", lambda files, blocksize=BLOCK: seen.append(blocksize) or original(files, blocksize))
+        plan = lto.build_read_plan(["backups/a.bin"], index)
+        lto.restore_files(plan, tape_root, tmp_path / "restore", blocksize=2 * BLOCK)
+        assert seen[-1] == 2 * BLOCK  # actual_seeks da passada
+
+    def test_missing_on_tape(self, index, tape_root, tmp_path) -> None:
+        (tape_root / "backups/a.bin").unlink()
+        plan = lto.build_read_plan(["backups/a.bin", "backups/b.bin"], index)
+        results = lto.restore_files(plan, tape_root, tmp_path / "restore")
+        assert results["missing"] == 1
+        assert results["read"] == 1
+
+
+def test_sample_verify_tape_uses_tape_order(index, tape_root) -> None:
+    entries = []
+    for name in ("c.bin", "b.bin", "a.bin"):
+        data = (tape_root / "backups" / name).read_bytes()
+        entries.append({
+            "action": "flush",
+            "rel_path": name,
+            "sha256": hashlib.sha256(data).hexdigest(),
+            "target_root": str(tape_root / "backups"),
+        })
+
+    results = ltfs_catalog_verify.sample_verify_tape(
+        entries, tape_root, 100, 100, tape_index=index,
+    )
+
+    assert results["verified"] == 3
+    assert results["estimated_seeks"] == 2
+    assert results["estimated_seeks_requested_order"] == 3
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""Testes — lookup vetorizado de preço por timestamp (btc_trading_agent/price_lookup.py).
+
+Cobertura:
+  - nearest_indices/nearest_values equivalem à varredura linear (empates e duplicatas)
+  - fetch_prices_at faz uma consulta por faixa contígua e resolve tudo em lote
+  - backfill_retro_rewards resolve os preços dos estados numa chamada a fetch_prices_at
+  - MarketRAG._update_outcomes rotula via lookup em lote
+"""
+import random
+import sys
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "btc_trading_agent"))
+
+import price_lookup  # noqa: E402
+
+
+def _linear_nearest(timestamps, targets, tolerance, inclusive=True):
+    """Referência: mesma regra do antigo MarketRAG._find_price_at (troca só se estritamente menor)."""
+    result = []
+    for target in targets:
+        best, best_diff = -1, float("inf")
+        for i, ts in enumerate(timestamps):
+            diff = abs(ts - target)
+            ok = diff <= tolerance if inclusive else diff < tolerance
+            if diff < best_diff and ok:
+                best, best_diff = i, diff
+        result.append(best)
+    return result
+
+
+def test_nearest_indices_matches_linear_scan() -> None:
+    rng = random.Random(42)
+    timestamps = sorted(rng.choice(range(0, 5000, 10)) for _ in range(400))  # com duplicatas
+    targets = [rng.uniform(-100, 5100) for _ in range(300)] + [15.0, 25.0, 5.0]
+    for inclusive in (True, False):
+        got = price_lookup.nearest_indices(timestamps, targets, 5, inclusive=inclusive)
+        assert got.tolist() == _linear_nearest(timestamps, targets, 5, inclusive=inclusive)
+
+
+def test_nearest_values_handles_empty_and_out_of_window() -> None:
+    assert np.isnan(price_lookup.nearest_values([], [], [1.0], 10)).all()
+    values = price_lookup.nearest_values([100, 200], [1.0, 2.0], [50, 104, 196, 400], 10)
+    assert np.isnan(values[0]) and np.isnan(values[3])
+    assert values[1:3].tolist() == [1.0, 2.0]
+
+
+def test_fetch_prices_at_one_query_per_contiguous_range() -> None:
+    conn = MagicMock()
+    cur = conn.cursor.return_value.__enter__.return_value
+    candles = {
+        (0, 5000): [(60 * i, 100.0 + i) for i in range(0, 84)],
+        (10_000_000, 10_003_600): [(10_000_000 + 60 * i, 500.0 + i) for i in range(0, 61)],
+    }
+
+    def _execute(sql, params):
+        symbol, lo, hi = params
+        cur.fetchall.return_value = [
+            row for (start, end), rows in candles.items() for row in rows if lo <= row[0] <= hi
+        ]
+
+    cur.execute.side_effect = _execute
+    requests = [("BTC-USDT", 1000), ("BTC-USDT", 1000 + 3600), ("BTC-USDT", 10_001_830), ("BTC-USDT", 10**9)]
+
+    prices = price_lookup.fetch_prices_at(conn, requests, window_sec=600)
+
+    assert cur.execute.call_count == 3  # [1000, 4600], [10_001_830], [10**9]
+    assert prices[("BTC-USDT", 1000)] == 117.0   # 1020 é o candle mais próximo
+    assert prices[("BTC-USDT", 4600)] == 177.0
+    assert prices[("BTC-USDT", 10_001_830)] == 530.0  # empate 1800/1860 → anterior
+    assert prices[("BTC-USDT", 10**9)] is None
+
+
+def test_backfill_prices_states_in_one_batch() -> None:
+    pytest.importorskip("psycopg2")
+    import backfill_retro_rewards
+
+    conn = MagicMock()
+    cur = conn.cursor.return_value.__enter__.return_value
+    cur.fetchall.return_value = [(60 * i, 200.0 + i) for i in range(10)]  # sem candle a partir de 600
+    states = [{"id": i, "timestamp": 60.0 * i, "price": 100.0 + i} for i in range(20)]
+
+    priced = backfill_retro_rewards.attach_candle_prices(conn, states, "BTC-USDT")
+
+    assert cur.execute.call_count == 1  # uma faixa contígua, não uma query por estado
+    assert [s["price"] for s in priced[:2]] == [200.0, 201.0]
+    assert priced[11]["price"] == 111.0  # fora da janela: mantém o preço do snapshot
+    assert states[0]["price"] == 100.0
+
+
+def test_market_rag_update_outcomes_uses_batch_lookup(monkeypatch) -> None:
+    import market_rag
+
+    rag = market_rag.MarketRAG.__new__(market_rag.MarketRAG)
+    now = time.time()
+    snaps = []
+    for i in range(10):
+        snap = market_rag.MarketSnapshot(timestamp=now - 1200 + 60 * i, symbol="BTC-USDT", price=100.0 * (1.01 ** i))
+        snaps.append(snap)
+    rag._recent_snapshots = __import__("collections").deque(snaps, maxlen=200)
+    rag._stats = {"outcomes_updated": 0}
+    updated = []
+    monkeypatch.setattr(rag, "_update_store_metadata", updated.append, raising=False)
+
+    rag._update_outcomes()
+
+    first = snaps[0]
+    assert first.outcome == "BULL"
+    assert abs(first.price_change_5m - (1.01 ** 5 - 1)) < 1e-9
+    assert first.price_change_15m is None  # sem snapshot a T+15m
+    assert rag._find_price_at(first.timestamp + 30) == first.price
+    assert len(updated) == rag._stats["outcomes_updated"]
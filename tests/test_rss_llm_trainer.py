@@ -497,6 +497,42 @@ class TestGetPriceAtTs(unittest.TestCase):
         # Deve ser convertido para int (segundos, não ms)
         self.assertEqual(ts_in_query, int(ts_seconds))
 
+    def test_busca_por_faixa_sem_abs(self) -> None:
+        """A query usa faixas indexáveis (timestamp <= / >) e não ABS() no WHERE."""
+        conn = MagicMock()
+        cur = MagicMock()
+        conn.cursor.return_value.__enter__ = MagicMock(return_value=cur)
+        conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
+        cur.fetchone.return_value = (100.0, 1700000000)
+
+        get_price_at_ts(conn, "BTC-USDT", 1700000000.0, window_min=10)
+
+        sql, params = cur.execute.call_args[0]
+        where_clauses = sql.split("ORDER BY ABS")[0]
+        self.assertNotIn("ABS(", where_clauses)
+        self.assertEqual(params[2], 1700000000 - 600)
+        self.assertEqual(params[5], 1700000000 + 600)
+
+
+class TestGetPricesAtTimestamps(unittest.TestCase):
+    """Testes do lookup em lote (uma consulta por faixa + searchsorted)."""
+
+    def test_resolve_varios_timestamps_com_uma_consulta(self) -> None:
+        conn = MagicMock()
+        cur = MagicMock()
+        conn.cursor.return_value.__enter__ = MagicMock(return_value=cur)
+        conn.cursor.return_value.__exit__ = MagicMock(return_value=False)
+        cur.fetchall.return_value = [(1000 + 60 * i, 100.0 + i) for i in range(300)]
+
+        prices = _mod.get_prices_at_timestamps(
+            conn, [("BTC-USDT", 1000), ("BTC-USDT", 1000 + 14400), ("BTC-USDT", 1095)], window_min=60,
+        )
+
+        self.assertEqual(cur.execute.call_count, 1)
+        self.assertEqual(prices[("BTC-USDT", 1000)], 100.0)
+        self.assertEqual(prices[("BTC-USDT", 1095)], 102.0)
+        self.assertEqual(prices[("BTC-USDT", 15400)], 340.0)
+
 
 # ── TestEnsureTrainingTable ────────────────────────────────────────────────────
 
@@ -948,7 +984,7 @@ class TestModeCollect(unittest.TestCase):
     @patch(f"{_MOD_NAME}.ensure_training_table")
     @patch(f"{_MOD_NAME}.get_db_connection")
     @patch(f"{_MOD_NAME}.classify_with_ollama")
-    @patch(f"{_MOD_NAME}.get_price_at_ts")
+    @patch(f"{_MOD_NAME}.get_prices_at_timestamps")
     @patch(f"{_MOD_NAME}.collect_all_feeds")
     @patch(f"{_MOD_NAME}.time.sleep")
     def test_mode_collect_basico(
@@ -971,7 +1007,10 @@ class TestModeCollect(unittest.TestCase):
                 "published_ts": 1772000000.0,
             }
         ]
-        mock_price.side_effect = [95000.0, 96500.0]  # pub, impact
+        mock_price.return_value = {
+            ("BTC-USDT", 1772000000): 95000.0,
+            ("BTC-USDT", 1772000000 + _mod.PRICE_IMPACT_HOURS * 3600): 96500.0,
+        }
         mock_classify.return_value = (0.85, 0.90, "BULLISH", "regulation")
 
         _mod.mode_collect(limit_per_feed=5)
@@ -986,7 +1025,7 @@ class TestModeCollect(unittest.TestCase):
     @patch(f"{_MOD_NAME}.ensure_training_table")
     @patch(f"{_MOD_NAME}.get_db_connection")
     @patch(f"{_MOD_NAME}.classify_with_ollama")
-    @patch(f"{_MOD_NAME}.get_price_at_ts")
+    @patch(f"{_MOD_NAME}.get_prices_at_timestamps")
     @patch(f"{_MOD_NAME}.collect_all_feeds")
     @patch(f"{_MOD_NAME}.time.sleep")
     def test_mode_collect_sem_preco_disponivel(
@@ -1009,7 +1048,7 @@ class TestModeCollect(unittest.TestCase):
                 "published_ts": 1772000000.0,
             }
         ]
-        mock_price.return_value = None  # sem candle
+        mock_price.return_value = {}  # sem candle
         mock_classify.return_value = (0.5, 0.7, "BULLISH", "technical")
 
         _mod.mode_collect(limit_per_feed=5)
@@ -14,6 +14,7 @@ import importlib.util
 import json
 import socket
 import sys
+import threading
 import time
 import urllib.error
 import urllib.request
@@ -127,6 +128,8 @@ def mock_db() -> MagicMock:
     db = MagicMock(spec=NewsDatabase)
     db.url_exists.return_value = False
     db.insert_sentiment.return_value = True
+    db.existing_pairs.return_value = set()
+    db.insert_sentiments.side_effect = lambda rows: len(rows)
     db.get_sentiment_stats.return_value = {
         "avg_sentiment": 0.5,
         "count": 10,
@@ -650,10 +653,8 @@ class TestProcessArticles:
     """Testes para process_articles()."""
 
     @patch.object(_mod, "classify_sentiment_ollama")
-    @patch.object(_mod, "time")
     def test_processa_artigo_novo(
         self,
-        mock_time: MagicMock,
         mock_classify: MagicMock,
         sample_article: NewsArticle,
         mock_db: MagicMock,
@@ -663,55 +664,50 @@ class TestProcessArticles:
         mock_classify.return_value = SentimentResult(
             sentiment=0.8, confidence=0.9, category="adoption"
         )
-        mock_time.sleep = MagicMock()
 
         count = process_articles([sample_article], mock_db, mock_metrics)
         assert count == 1
-        mock_db.insert_sentiment.assert_called_once()
+        mock_db.existing_pairs.assert_called_once_with([(sample_article.url, "BTC")])
+        mock_db.insert_sentiments.assert_called_once()
 
     @patch.object(_mod, "classify_sentiment_ollama")
-    @patch.object(_mod, "time")
     def test_pula_artigo_duplicado(
         self,
-        mock_time: MagicMock,
         mock_classify: MagicMock,
         sample_article: NewsArticle,
         mock_db: MagicMock,
         mock_metrics: Dict,
     ) -> None:
         """Deve pular artigo já existente no banco (deduplicação)."""
-        mock_db.url_exists.return_value = True
-        mock_time.sleep = MagicMock()
+        mock_db.existing_pairs.return_value = {(sample_article.url, "BTC")}
 
         count = process_articles([sample_article], mock_db, mock_metrics)
         assert count == 0
         mock_classify.assert_not_called()
+        mock_db.insert_sentiments.assert_not_called()
 
     @patch.object(_mod, "classify_sentiment_ollama")
-    @patch.object(_mod, "time")
     def test_multi_coin_processa_cada_coin(
         self,
-        mock_time: MagicMock,
         mock_classify: MagicMock,
         multi_coin_article: NewsArticle,
         mock_db: MagicMock,
         mock_metrics: Dict,
     ) -> None:
-        """Artigo com múltiplas moedas gera um registro por moeda."""
+        """Artigo com múltiplas moedas gera um registro por moeda e uma só classificação."""
         mock_classify.return_value = SentimentResult(
             sentiment=0.6, confidence=0.8, category="price"
         )
-        mock_time.sleep = MagicMock()
 
         count = process_articles([multi_coin_article], mock_db, mock_metrics)
         assert count == 3  # BTC, ETH, SOL
-        assert mock_db.insert_sentiment.call_count == 3
+        assert mock_classify.call_count == 1
+        rows = mock_db.insert_sentiments.call_args[0][0]
+        assert [coin for _, coin, _ in rows] == ["BTC", "ETH", "SOL"]
 
     @patch.object(_mod, "classify_sentiment_ollama")
-    @patch.object(_mod, "time")
     def test_sem_db_ainda_conta(
         self,
-        mock_time: MagicMock,
         mock_classify: MagicMock,
         sample_article: NewsArticle,
         mock_metrics: Dict,
@@ -720,25 +716,67 @@ class TestProcessArticles:
         mock_classify.return_value = SentimentResult(
             sentiment=0.5, confidence=0.7, category="price"
         )
-        mock_time.sleep = MagicMock()
 
         count = process_articles([sample_article], None, mock_metrics)
         assert count == 1
 
     @patch.object(_mod, "classify_sentiment_ollama")
-    @patch.object(_mod, "time")
     def test_artigo_vazio(
         self,
-        mock_time: MagicMock,
         mock_classify: MagicMock,
         mock_db: MagicMock,
     ) -> None:
         """Lista vazia de artigos retorna 0."""
-        mock_time.sleep = MagicMock()
         count = process_articles([], mock_db, None)
         assert count == 0
         mock_classify.assert_not_called()
 
+    @patch.object(_mod, "INSERT_BATCH_SIZE", 2)
+    @patch.object(_mod, "CLASSIFY_WORKERS", 3)
+    @patch.object(_mod, "classify_sentiment_ollama")
+    def test_backlog_classifica_em_paralelo_e_insere_em_lotes(
+        self,
+        mock_classify: MagicMock,
+        mock_db: MagicMock,
+    ) -> None:
+        """Backlog usa pool limitado de classificação e inserts em lote."""
+        active = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def _slow_classify(article: NewsArticle) -> SentimentResult:
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.02)
+            with lock:
+                active -= 1
+            return SentimentResult(sentiment=0.1, confidence=0.5)
+
+        mock_classify.side_effect = _slow_classify
+        articles = [
+            NewsArticle(
+                title=f"Bitcoin {i}",
+                url=f"https://example.com/{i}",
+                source="test",
+                published=datetime.now(timezone.utc),
+                coins=["BTC"],
+            )
+            for i in range(7)
+        ]
+        backlog = MagicMock()
+        metrics = {"articles_processed": MagicMock(), "backlog": backlog}
+
+        count = process_articles(articles + articles[:2], mock_db, metrics)
+
+        assert count == 7
+        assert mock_classify.call_count == 7
+        assert 1 < peak <= 3
+        assert [len(call[0][0]) for call in mock_db.insert_sentiments.call_args_list] == [2, 2, 2, 1]
+        assert backlog.set.call_args_list[0][0][0] == 7
+        assert backlog.set.call_args_list[-1][0][0] == 0
+
 
 # ═══════════════════════════════════════════════════════════════════════
 # Testes: update_prometheus_metrics
@@ -781,7 +819,8 @@ class TestSetupPrometheusMetrics:
             expected_keys = {
                 "sentiment", "count", "bullish_pct", "bearish_pct",
                 "latest_sentiment", "confidence", "fetch_errors",
-                "articles_processed",
+                "articles_processed", "stage_items", "stage_seconds",
+                "stage_throughput", "feed_not_modified", "backlog",
             }
             assert set(metrics.keys()) == expected_keys
 
@@ -1241,6 +1280,59 @@ class TestFetchAllFeeds:
         _mod.fetch_all_feeds()
         mock_kucoin.assert_not_called()
 
+    @patch.object(_mod, "KUCOIN_NEWS_ENABLED", False)
+    @patch.object(_mod, "feedparser")
+    def test_not_modified_conta_apenas_304(self, mock_fp: MagicMock) -> None:
+        """Só um 304 real incrementa feed_not_modified; 200 sem artigos relevantes não."""
+        def _parse(url, etag=None, modified=None):
+            feed = MagicMock(bozo=False, etag='"v1"', modified=None)
+            feed.status = 304 if url == RSS_FEEDS[0]["url"] else 200
+            feed.entries = []
+            return feed
+
+        mock_fp.parse.side_effect = _parse
+        counter = MagicMock()
+        original = _mod.HAS_FEEDPARSER
+        _mod.HAS_FEEDPARSER = True
+        try:
+            with patch.dict(_mod.FEED_VALIDATORS, {f["name"]: {"etag": '"v0"'} for f in RSS_FEEDS}, clear=True):
+                _mod.fetch_all_feeds({"feed_not_modified": counter})
+        finally:
+            _mod.HAS_FEEDPARSER = original
+
+        counter.labels.assert_called_once_with(feed=RSS_FEEDS[0]["name"])
+
+    @patch.object(_mod, "process_articles")
+    @patch.object(_mod, "feedparser")
+    def test_validadores_so_valem_apos_gravar(self, mock_fp: MagicMock, mock_process: MagicMock) -> None:
+        """Falha no banco descarta os validadores novos: o próximo ciclo não recebe 304."""
+        feed = MagicMock(bozo=False, status=200, etag='"v1"', modified=None)
+        feed.entries = []
+        mock_fp.parse.return_value = feed
+        db = MagicMock(spec=NewsDatabase)
+        db.write_failures = 0
+
+        def _failing_write(articles, database, metrics):
+            database.write_failures += 1
+            return 0
+
+        original = _mod.HAS_FEEDPARSER
+        _mod.HAS_FEEDPARSER = True
+        try:
+            with patch.dict(_mod.FEED_VALIDATORS, {f["name"]: {"etag": '"v0"'} for f in RSS_FEEDS}, clear=True):
+                mock_process.side_effect = _failing_write
+                _mod.run_cycle(db, None)
+                assert all(v == {"etag": '"v0"'} for v in _mod.FEED_VALIDATORS.values())
+                assert _mod.FEED_PENDING_VALIDATORS == {}
+
+                mock_process.side_effect = None
+                mock_process.return_value = 0
+                _mod.run_cycle(db, None)
+                assert all(v == {"etag": '"v1"'} for v in _mod.FEED_VALIDATORS.values())
+        finally:
+            _mod.HAS_FEEDPARSER = original
+            _mod.FEED_PENDING_VALIDATORS.clear()
+
 
 # ═══════════════════════════════════════════════════════════════════════
 # Testes: NewsDatabase.ensure_table
@@ -1405,6 +1497,30 @@ class TestFetchRssFeedEdgeCases:
             _mod.HAS_FEEDPARSER = original
 
 
+    @patch.object(_mod, "feedparser")
+    def test_get_condicional_com_etag(self, mock_fp: MagicMock) -> None:
+        """Deve reenviar ETag/Last-Modified e tratar 304 como feed sem novidades."""
+        first = MagicMock(bozo=False, status=200, etag='"abc"', modified="Mon, 01 Jan 2026 00:00:00 GMT")
+        first.entries = [{"title": "Bitcoin up", "link": "https://example.com/b", "description": ""}]
+        not_modified = MagicMock(bozo=False, status=304, etag='"abc"', modified=None)
+        not_modified.entries = []
+        mock_fp.parse.side_effect = [first, not_modified]
+
+        validators: Dict[str, str] = {}
+        original = _mod.HAS_FEEDPARSER
+        _mod.HAS_FEEDPARSER = True
+        try:
+            assert len(fetch_rss_feed("https://example.com/rss", "test", validators)) == 1
+            assert fetch_rss_feed("https://example.com/rss", "test", validators) == []
+        finally:
+            _mod.HAS_FEEDPARSER = original
+
+        assert validators == {"etag": '"abc"', "modified": "Mon, 01 Jan 2026 00:00:00 GMT"}
+        second_call = mock_fp.parse.call_args_list[1]
+        assert second_call.kwargs == {"etag": '"abc"', "modified": "Mon, 01 Jan 2026 00:00:00 GMT"}
+        assert socket.getdefaulttimeout() is None
+
+
 # ═══════════════════════════════════════════════════════════════════════
 # Testes: main() function
 # ═══════════════════════════════════════════════════════════════════════
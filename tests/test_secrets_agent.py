@@ -19,6 +19,8 @@ os.environ.setdefault("AUTHENTIK_TOKEN", "test-token")
 
 from tools.secrets_agent.secrets_agent import (
     AUDIT_EVENTS,
+    AuditStore,
+    FailureWindow,
     app,
     ak_manager,
 )
@@ -223,7 +225,7 @@ class TestAuthentikFallback:
 
 
 class TestAudit:
-    """Testes de auditoria em memória."""
+    """Testes da trilha de auditoria persistente."""
 
     @patch(
         "tools.secrets_agent.secrets_agent.AuthentikSecretManager.upsert_secret",
@@ -237,10 +239,65 @@ class TestAudit:
         )
         assert resp.status_code == 200
 
-        audit = client.get("/audit/recent?limit=1").json()
+        audit = client.get("/audit/recent?limit=1", headers=HEADERS).json()
         assert len(audit["rows"]) == 1
         assert audit["rows"][0][2] == "store"
 
+    def test_filters_by_ip_secret_and_time(self) -> None:
+        AUDIT_EVENTS.append(100, "10.0.0.1", "fetch", "a", "ok")
+        AUDIT_EVENTS.append(200, "10.0.0.2", "fetch", "b", "denied")
+        AUDIT_EVENTS.append(300, "10.0.0.1", "fetch", "b", "ok")
+
+        rows = client.get("/audit/recent?ip=10.0.0.1", headers=HEADERS).json()["rows"]
+        assert [row[0] for row in rows] == [300, 100]
+        rows = client.get("/audit/recent?secret_id=b&since=150&until=250", headers=HEADERS).json()["rows"]
+        assert rows == [[200, "10.0.0.2", "fetch", "b", "denied"]]
+
+    def test_recent_audit_requires_api_key(self) -> None:
+        AUDIT_EVENTS.append(100, "10.0.0.1", "fetch", "a", "ok")
+        assert client.get("/audit/recent").status_code == 401
+        assert client.get("/audit/recent", headers={"X-API-KEY": "wrong"}).status_code == 401
+        rows = client.get("/audit/recent", headers=HEADERS).json()["rows"]
+        assert [row[2] for row in rows] == ["audit_recent", "audit_recent", "fetch"]
+
+    def test_survives_reopen_and_rotates(self, tmp_path: Path) -> None:
+        store = AuditStore(tmp_path / "audit.db", max_bytes=1, keep=2)
+        store._CHECK_EVERY = 2
+        for ts in range(1, 7):
+            store.append(ts, "ip", "fetch", f"s{ts}", "ok")
+        store.close()
+
+        # 3 rotações com keep=2: o segmento mais antigo (ts 1-2) foi descartado
+        assert not (tmp_path / "audit.db.3").exists()
+        reopened = AuditStore(tmp_path / "audit.db", max_bytes=1, keep=2)
+        assert [row[0] for row in reopened.query(limit=10)] == [6, 5, 4, 3]
+        assert reopened.query(limit=10, secret_id="s3") == [(3, "ip", "fetch", "s3", "ok")]
+        reopened.close()
+
+
+class TestFailureWindow:
+    """Testes da janela deslizante de falhas por IP."""
+
+    def test_counts_expire_with_the_window(self) -> None:
+        window = FailureWindow(window=60, buckets=12)
+        for offset in (0, 10, 20):
+            window.record("1.2.3.4", now=1000 + offset)
+        assert window.count("1.2.3.4", now=1030) == 3
+        assert window.count("1.2.3.4", now=1062) == 2
+        assert window.count("1.2.3.4", now=1200) == 0
+        assert window.count("5.6.7.8", now=1200) == 0
+
+    def test_repeated_denials_raise_leak_alert(self) -> None:
+        from tools.secrets_agent import secrets_agent as sa
+
+        sa.FAILED_IP.clear()
+        before = sa.LEAK_ALERTS._value.get()
+        for _ in range(sa.FAIL_THRESHOLD + 2):
+            assert client.get("/secrets/x", headers={"X-API-KEY": "wrong"}).status_code == 401
+        assert sa.check_rate("testclient") == sa.FAIL_THRESHOLD + 2
+        assert sa.LEAK_ALERTS._value.get() - before == 2
+        sa.FAILED_IP.clear()
+
 
 class TestClientId:
     """Testes da convenção de client_id."""
@@ -258,3 +315,186 @@ class TestClientId:
     def test_uppercase_normalized(self) -> None:
         cid = ak_manager._client_id("KuCoin/Homelab", "ApiKey")
         assert cid == "secret-kucoin-homelab-apikey"
+
+
+class _FakeResponse:
+    def __init__(self, payload: dict, status_code: int = 200) -> None:
+        self._payload = payload
+        self.status_code = status_code
+
+    def json(self) -> dict:
+        return self._payload
+
+
+_PROVIDERS = [
+    {"pk": 1, "name": "secret-holder:kucoin/homelab#password", "client_id": "secret-kucoin-homelab",
+     "client_secret": "pw"},
+    {"pk": 2, "name": "secret-holder:kucoin/homelab#api_key", "client_id": "secret-kucoin-homelab-api-key",
+     "client_secret": "key"},
+    {"pk": 3, "name": "outro provider", "client_id": "grafana", "client_secret": "x"},
+]
+
+
+@pytest.fixture
+def warm_index():
+    ak_manager.index.clear()
+    calls: list[dict] = []
+
+    def fake_get(url, headers=None, params=None, timeout=None):
+        calls.append(dict(params or {}))
+        if "search" in (params or {}):
+            needle = params["search"].lower()
+            return _FakeResponse({"results": [p for p in _PROVIDERS if needle in p["name"].lower()]})
+        return _FakeResponse({"results": _PROVIDERS, "pagination": {"next": 0}})
+
+    with patch.object(ak_manager._http, "get", side_effect=fake_get):
+        assert ak_manager.sync_index() == 2
+        calls.clear()
+        yield calls
+    ak_manager.index.clear()
+
+
+class TestAuthentikIndex:
+    """Leituras servidas pelo índice em memória, sem round trip ao Authentik."""
+
+    def test_lookups_hit_index_without_http(self, warm_index) -> None:
+        assert ak_manager.get_secret("kucoin/homelab") == "pw"
+        assert ak_manager.get_secret("kucoin/homelab", "api_key") == "key"
+        assert ak_manager.get_secret_fields("kucoin/homelab") == {"password": "pw", "api-key": "key"}
+        assert warm_index == []
+
+    def test_warm_index_answers_misses_without_http(self, warm_index) -> None:
+        assert ak_manager.get_secret("nao/existe") is None
+        assert ak_manager.get_secret_fields("nao/existe") == {}
+        assert warm_index == []
+
+    def test_miss_after_stale_sync_falls_through_to_live_search(self, warm_index) -> None:
+        created = {"pk": 9, "name": "secret-holder:novo/item#password", "client_id": "secret-novo-item",
+                   "client_secret": "criado-depois-do-sync"}
+        _PROVIDERS.append(created)
+        try:
+            with patch.object(ak_manager.index, "_last_full_sync", 0.0):
+                assert ak_manager.get_secret("novo/item") == "criado-depois-do-sync"
+                assert ak_manager.get_secret_fields("nao/existe") == {}
+        finally:
+            _PROVIDERS.remove(created)
+        assert [call["search"] for call in warm_index] == ["novo/item", "nao/existe"]
+
+    def test_live_search_clears_only_the_looked_up_key(self, warm_index) -> None:
+        ak_manager.invalidate("kucoin/homelab")
+        ak_manager.invalidate("kucoin/homelab", "api_key")
+        assert ak_manager.get_secret("kucoin/homelab", "api_key") == "key"
+        assert ak_manager.index.lookup("secret-kucoin-homelab") == (False, None)
+        assert ak_manager.index.lookup("secret-kucoin-homelab-api-key") == (True, "key")
+
+    def test_invalidate_forces_live_search(self, warm_index) -> None:
+        ak_manager.invalidate("kucoin/homelab", "api_key")
+        assert ak_manager.get_secret("kucoin/homelab", "api_key") == "key"
+        assert warm_index == [{"search": "kucoin/homelab", "page_size": 20}]
+        assert ak_manager.get_secret("kucoin/homelab", "api_key") == "key"
+        assert len(warm_index) == 1  # a busca ao vivo repôs a entrada
+
+    def test_sync_started_before_invalidation_keeps_key_dirty(self) -> None:
+        ak_manager.index.clear()
+        started = __import__("time").time() - 1
+        ak_manager.invalidate("kucoin/homelab")
+        ak_manager.index.replace_all(_PROVIDERS[:1], started)
+        assert ak_manager.index.lookup("secret-kucoin-homelab") == (False, None)
+        ak_manager.index.clear()
+
+
+class TestBulkSecrets:
+    """Testes de POST /secrets/bulk."""
+
+    def test_bulk_mixes_authentik_local_and_missing(self, warm_index) -> None:
+        from tools.secrets_agent.secrets_agent import local_vault
+        local_vault.store("shared/database_url", "postgres://db", field="url")
+        resp = client.post(
+            "/secrets/bulk",
+            json={"items": [
+                {"name": "kucoin/homelab", "field": "api_key"},
+                {"name": "shared/database_url", "field": "url"},
+                {"name": "nao/existe"},
+            ]},
+            headers=HEADERS,
+        )
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["found"] == 2
+        first, second, third = data["items"]
+        assert (first["value"], first["source"]) == ("key", "authentik")
+        assert (second["value"], second["source"]) == ("postgres://db", "local_vault")
+        assert third == {"name": "nao/existe", "field": "password", "error": "not_found"}
+        # Índice quente: hit e miss respondidos sem round trip ao Authentik
+        assert warm_index == []
+
+    def test_bulk_requires_api_key(self) -> None:
+        resp = client.post("/secrets/bulk", json={"items": [{"name": "x"}]})
+        assert resp.status_code == 401
+
+
+class TestClientPrefetch:
+    """Cache de prefetch do SecretsAgentClient, separado por agente e endpoint."""
+
+    def _client(self, base_url: str, calls: list[str]):
+        import httpx
+
+        from tools.secrets_agent_client import SecretsAgentClient
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            calls.append(request.url.path)
+            if request.url.path == "/secrets/bulk":
+                return httpx.Response(200, json={"items": [
+                    {"name": "kucoin/homelab", "field": "password", "value": "pw", "source": "authentik"},
+                    {"name": "shared/database_url", "field": "url", "value": "postgres://db",
+                     "source": "local_vault"},
+                ]})
+            return httpx.Response(404, json={"detail": "not found"})
+
+        agent_client = SecretsAgentClient(base_url, api_key=API_KEY)
+        agent_client.client = httpx.Client(transport=httpx.MockTransport(handler))
+        return agent_client
+
+    def test_local_lookups_only_served_from_local_results(self) -> None:
+        from tools.secrets_agent_client import clear_prefetched
+
+        clear_prefetched()
+        calls: list[str] = []
+        agent_client = self._client("http://agent-a", calls)
+        assert agent_client.prefetch([("kucoin/homelab", "password"), ("shared/database_url", "url")]) == 2
+        calls.clear()
+
+        assert agent_client.get_local_secret("shared/database_url", field="url") == "postgres://db"
+        assert calls == []
+        # Valor do Authentik não responde pelo LocalVault...
+        assert agent_client.get_local_secret("kucoin/homelab") is None
+        assert calls == ["/secrets/local/kucoin/homelab"]
+        # ...mas serve a resolução completa sem ir a /secrets/{id}
+        assert agent_client.get_secret("kucoin/homelab") == "pw"
+        assert "/secrets/kucoin/homelab" not in calls
+
+        other_calls: list[str] = []
+        other = self._client("http://agent-b", other_calls)
+        assert other.get_local_secret("shared/database_url", field="url") is None
+        assert other_calls == ["/secrets/local/shared/database_url"]
+        clear_prefetched()
+
+    def test_telegram_bot_refs_cover_startup_lookups(self) -> None:
+        from tools import secrets_loader
+
+        read: list[tuple[str, str]] = []
+
+        class _Recorder:
+            def get_local_secret(self, name: str, field: str = "password"):
+                read.append((name, field))
+                return None
+
+            def close(self) -> None:
+                pass
+
+        with patch.object(secrets_loader, "_get_client", return_value=_Recorder()), \
+                patch.dict(os.environ, {"TELEGRAM_BOT_TOKEN": "env-token"}):
+            secrets_loader.get_telegram_token()
+            secrets_loader.get_trading_telegram_chat_id()
+            secrets_loader.get_trading_telegram_thread_id()
+        assert read and set(read) <= set(secrets_loader.TELEGRAM_BOT_SECRET_REFS)
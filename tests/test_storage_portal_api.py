@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from pathlib import Path
+import os
 import sys
 
 import pytest
@@ -277,3 +278,264 @@ def test_request_access_degrades_when_dependencies_fail(tmp_path: Path, monkeypa
 
     bootstrap_response = client.get("/storage/portal/bootstrap", params={"portal_token": create_data["portal_token"]})
     assert bootstrap_response.status_code == 200
+
+
+def test_upload_file_streams_to_workspace_with_checksum(tmp_path: Path, monkeypatch) -> None:
+    import hashlib
+
+    service, _, _, _ = build_service(tmp_path)
+    monkeypatch.setattr(api, "_service_instance", service)
+    monkeypatch.setattr(api, "UPLOAD_CHUNK_SIZE", 1024)
+    client = TestClient(api.app)
+    portal_token = client.post("/storage/request-access", json=sample_request_payload()).json()["portal_token"]
+
+    content = bytes(range(256)) * 20
+    response = client.post(
+        "/storage/portal/files/upload",
+        data={"portal_token": portal_token, "relative_dir": "uploads"},
+        files={"upload": ("exames.bin", content, "application/octet-stream")},
+    )
+
+    assert response.status_code == 200
+    payload = response.json()
+    assert payload["sha256"] == hashlib.sha256(content).hexdigest()
+    assert [entry["name"] for entry in payload["files"]["entries"]] == ["exames.bin"]
+    sessions_dir = tmp_path / "data" / "contracts" / api.UPLOAD_SESSIONS_DIRNAME
+    assert list(sessions_dir.iterdir()) == []
+
+
+def test_resumable_upload_survives_dropped_chunk(tmp_path: Path, monkeypatch) -> None:
+    import hashlib
+
+    service, _, _, _ = build_service(tmp_path)
+    monkeypatch.setattr(api, "_service_instance", service)
+    client = TestClient(api.app)
+    portal_token = client.post("/storage/request-access", json=sample_request_payload()).json()["portal_token"]
+
+    content = b"lote-de-exames-" * 1000
+    start = client.post(
+        "/storage/portal/uploads",
+        json={
+            "portal_token": portal_token,
+            "filename": "lote.bin",
+            "total_size": len(content),
+            "relative_dir": "uploads",
+            "sha256": hashlib.sha256(content).hexdigest(),
+        },
+    )
+    assert start.status_code == 201
+    upload_id = start.json()["upload_id"]
+    params = {"portal_token": portal_token}
+
+    first = client.put(f"/storage/portal/uploads/{upload_id}", params={**params, "offset": 0}, content=content[:5000])
+    assert first.json()["offset"] == 5000
+
+    # Simula reinício da API: estado do hash em memória perdido
+    service.uploads._hashers.clear()
+    stale = client.put(f"/storage/portal/uploads/{upload_id}", params={**params, "offset": 0}, content=content[:10])
+    assert stale.status_code == 409
+    assert client.get(f"/storage/portal/uploads/{upload_id}", params=params).json()["offset"] == 5000
+
+    too_big = client.put(f"/storage/portal/uploads/{upload_id}", params={**params, "offset": 5000}, content=content[5000:] + b"x")
+    assert too_big.status_code == 413
+    assert client.get(f"/storage/portal/uploads/{upload_id}", params=params).json()["offset"] <= len(content)
+
+    resume_at = client.get(f"/storage/portal/uploads/{upload_id}", params=params).json()["offset"]
+    done = client.put(f"/storage/portal/uploads/{upload_id}", params={**params, "offset": resume_at}, content=content[resume_at:])
+    assert done.status_code == 200
+    assert done.json()["completed"] is True
+    assert done.json()["sha256"] == hashlib.sha256(content).hexdigest()
+    workspace = Path(service.repository.get_contract_by_portal_token(portal_token)[0]["workspace_path"])
+    assert (workspace / "uploads" / "lote.bin").read_bytes() == content
+    status = client.get(f"/storage/portal/uploads/{upload_id}", params=params).json()
+    assert status["completed"] is True and status["offset"] == len(content)
+
+    # Retry do último chunk (resposta perdida) devolve o resultado guardado, não 500
+    retry = client.put(f"/storage/portal/uploads/{upload_id}", params={**params, "offset": resume_at}, content=content[resume_at:])
+    assert retry.status_code == 200
+    assert retry.json()["sha256"] == done.json()["sha256"]
+
+
+def test_resumable_upload_hash_follows_chunks_from_other_workers(tmp_path: Path) -> None:
+    import asyncio
+    import hashlib
+
+    async def _chunks(data: bytes):
+        yield data
+
+    root = tmp_path / "sessions"
+    worker_a = api.ResumableUploadStore(root)
+    worker_b = api.ResumableUploadStore(root)  # outro processo: mesmo disco, memória própria
+    content = b"0123456789" * 300
+    upload_id = worker_a.create({"filename": "x.bin", "relative_dir": ".", "total_size": len(content)})["upload_id"]
+
+    asyncio.run(worker_a.append(upload_id, 0, _chunks(content[:1000]), limit=len(content)))
+    asyncio.run(worker_b.append(upload_id, 1000, _chunks(content[1000:]), limit=len(content)))
+
+    target = tmp_path / "x.bin"
+    expected = hashlib.sha256(content).hexdigest()
+    assert worker_a.finish(upload_id, target, expected, keep_result=True) == expected
+    assert worker_b.finish(upload_id, target, expected, keep_result=True) == expected
+    assert target.read_bytes() == content
+
+
+def test_upload_sessions_expire_after_ttl(tmp_path: Path) -> None:
+    import time
+
+    store = api.ResumableUploadStore(tmp_path / "sessions", ttl_seconds=60)
+    stale = store.create({"filename": "a.bin", "relative_dir": ".", "total_size": 1})["upload_id"]
+    fresh = store.create({"filename": "b.bin", "relative_dir": ".", "total_size": 1})["upload_id"]
+    (store.root / f"{fresh}.part").write_bytes(b"x")
+    old = time.time() - 120
+    for suffix in (".part", ".json"):
+        os.utime(store.root / f"{stale}{suffix}", (old, old))
+
+    assert store.sweep() == 1
+    assert sorted(p.name for p in store.root.iterdir()) == [f"{fresh}.json", f"{fresh}.part"]
+
+
+def test_resumable_upload_rejects_checksum_mismatch(tmp_path: Path, monkeypatch) -> None:
+    service, _, _, _ = build_service(tmp_path)
+    monkeypatch.setattr(api, "_service_instance", service)
+    client = TestClient(api.app)
+    portal_token = client.post("/storage/request-access", json=sample_request_payload()).json()["portal_token"]
+
+    upload_id = client.post(
+        "/storage/portal/uploads",
+        json={"portal_token": portal_token, "filename": "x.bin", "total_size": 3, "sha256": "0" * 64},
+    ).json()["upload_id"]
+    response = client.put(
+        f"/storage/portal/uploads/{upload_id}", params={"portal_token": portal_token, "offset": 0}, content=b"abc"
+    )
+
+    assert response.status_code == 422
+    workspace = Path(service.repository.get_contract_by_portal_token(portal_token)[0]["workspace_path"])
+    assert not (workspace / "x.bin").exists()
+
+
+def test_list_files_paginates_with_cursor_and_invalidates_cache(tmp_path: Path, monkeypatch) -> None:
+    service, _, _, _ = build_service(tmp_path)
+    monkeypatch.setattr(api, "_service_instance", service)
+    client = TestClient(api.app)
+    portal_token = client.post("/storage/request-access", json=sample_request_payload()).json()["portal_token"]
+    workspace = Path(service.repository.get_contract_by_portal_token(portal_token)[0]["workspace_path"])
+    bulk = workspace / "bulk"
+    bulk.mkdir()
+    for index in range(7):
+        (bulk / f"f{index}.bin").write_bytes(b"x" * index)
+    (bulk / "Sub").mkdir()
+
+    names: list[str] = []
+    cursor = None
+    while True:
+        params = {"portal_token": portal_token, "path": "bulk", "limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        page = client.get("/storage/portal/files", params=params).json()
+        assert page["total_entries"] == 8
+        assert page["total_bytes"] == sum(range(7))
+        names.extend(entry["name"] for entry in page["entries"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert names == ["Sub"] + [f"f{index}.bin" for index in range(7)]
+
+    bad = client.get("/storage/portal/files", params={"portal_token": portal_token, "path": "bulk", "cursor": "%%%"})
+    assert bad.status_code == 400
+
+    # Escrita do portal invalida a listagem em cache do diretório pai
+    client.post("/storage/portal/files/folder", json={"portal_token": portal_token, "folder_path": "bulk/Nova"})
+    page = client.get("/storage/portal/files", params={"portal_token": portal_token, "path": "bulk"}).json()
+    assert page["total_entries"] == 9
+
+
+def test_uploads_update_usage_and_enforce_quota(tmp_path: Path, monkeypatch) -> None:
+    service, _, _, _ = build_service(tmp_path)
+    monkeypatch.setattr(api, "_service_instance", service)
+    client = TestClient(api.app)
+    portal_token = client.post("/storage/request-access", json=sample_request_payload()).json()["portal_token"]
+    baseline = client.get("/storage/portal/usage", params={"portal_token": portal_token}).json()
+    assert baseline["quota_bytes"] == 20 * 1024**4
+
+    content = b"a" * 4096
+    for _ in range(2):  # sobrescrita não conta em dobro
+        response = client.post(
+            "/storage/portal/files/upload",
+            data={"portal_token": portal_token, "relative_dir": "."},
+            files={"upload": ("dados.bin", content, "application/octet-stream")},
+        )
+        assert response.status_code == 200
+    usage = client.get("/storage/portal/usage", params={"portal_token": portal_token}).json()
+    assert usage["used_bytes"] == baseline["used_bytes"] + len(content)
+
+    contract_id = service.repository.get_contract_by_portal_token(portal_token)[0]["id"]
+    service.repository.set_usage(contract_id, baseline["quota_bytes"] - 10)
+    over_quota = client.post(
+        "/storage/portal/uploads",
+        json={"portal_token": portal_token, "filename": "grande.bin", "total_size": 11},
+    )
+    assert over_quota.status_code == 413
+    single_shot = client.post(
+        "/storage/portal/files/upload",
+        data={"portal_token": portal_token, "relative_dir": "."},
+        files={"upload": ("grande.bin", b"b" * 11, "application/octet-stream")},
+    )
+    assert single_shot.status_code == 413
+
+
+def test_resumable_upload_checks_quota_per_chunk(tmp_path: Path, monkeypatch) -> None:
+    service, _, _, _ = build_service(tmp_path)
+    monkeypatch.setattr(api, "_service_instance", service)
+    client = TestClient(api.app)
+    portal_token = client.post("/storage/request-access", json=sample_request_payload()).json()["portal_token"]
+    quota = client.get("/storage/portal/usage", params={"portal_token": portal_token}).json()["quota_bytes"]
+    params = {"portal_token": portal_token}
+
+    upload_id = client.post(
+        "/storage/portal/uploads", json={"portal_token": portal_token, "filename": "big.bin", "total_size": 100}
+    ).json()["upload_id"]
+    assert client.put(f"/storage/portal/uploads/{upload_id}", params={**params, "offset": 0}, content=b"a" * 40).status_code == 200
+
+    # Outro upload consumiu a cota depois que a sessão foi aberta
+    contract_id = service.repository.get_contract_by_portal_token(portal_token)[0]["id"]
+    service.repository.set_usage(contract_id, quota - 30)
+    over = client.put(f"/storage/portal/uploads/{upload_id}", params={**params, "offset": 40}, content=b"a" * 60)
+    assert over.status_code == 413
+    assert "Cota" in over.json()["detail"]
+
+
+def test_listing_cache_sees_in_place_modifications(tmp_path: Path) -> None:
+    workspace = tmp_path / "ws"
+    workspace.mkdir()
+    data = workspace / "dados.bin"
+    data.write_bytes(b"x")
+    cache = api.WorkspaceListingCache(revalidate_seconds=0)
+    assert cache.get(workspace, workspace).entries[0]["size"] == 1
+
+    dir_mtime = os.stat(workspace).st_mtime_ns
+    data.write_bytes(b"x" * 10)  # modificação no lugar: mtime do diretório não muda
+    assert os.stat(workspace).st_mtime_ns == dir_mtime
+    assert cache.get(workspace, workspace).entries[0]["size"] == 10
+
+
+def test_repository_reuses_thread_connection_in_wal_and_caches_token(tmp_path: Path, monkeypatch) -> None:
+    service, _, _, _ = build_service(tmp_path)
+    monkeypatch.setattr(api, "_service_instance", service)
+    client = TestClient(api.app)
+    portal_token = client.post("/storage/request-access", json=sample_request_payload()).json()["portal_token"]
+    repository = service.repository
+
+    assert repository._connect() is repository._connect()
+    assert repository._connect().execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    contract, user = repository.get_contract_by_portal_token(portal_token)
+    calls: list[str] = []
+    original = repository._load_contract_by_token_hash
+    monkeypatch.setattr(repository, "_load_contract_by_token_hash", lambda token_hash: calls.append(token_hash) or original(token_hash))
+    contract["status"] = "mutado"  # cópia: não contamina o cache
+    assert repository.get_contract_by_portal_token(portal_token)[0]["status"] != "mutado"
+    assert calls == []
+
+    repository.update_user(user["id"], status="disabled")
+    assert repository.get_contract_by_portal_token(portal_token)[1]["status"] == "disabled"
+    assert len(calls) == 1
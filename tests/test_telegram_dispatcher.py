@@ -0,0 +1,231 @@
+"""Testes do dispatcher concorrente de updates do TelegramBot.
+
+Cobertura:
+  - ordem preservada dentro do chat, chats diferentes em paralelo
+  - chat prioritário (grupo de trading) não espera atrás do pool global cheio
+  - limite de handlers simultâneos por usuário (sem valer para o chat prioritário)
+  - /stop cancela o handler ativo e a fila do usuário; sem remetente não cancela
+  - métricas de fila e latência
+"""
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from telegram_bot import ADMIN_CHAT_ID, TelegramBot, UpdateDispatcher
+
+
+def _msg(chat_id: int, text: str, user_id: int = 1, message_id: int = 1) -> dict:
+    return {"chat": {"id": chat_id}, "from": {"id": user_id}, "text": text, "message_id": message_id}
+
+
+async def _until(predicate, timeout: float = 2.0) -> None:
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not predicate():
+        assert loop.time() < deadline, "condição não atingida"
+        await asyncio.sleep(0.005)
+
+
+def test_per_chat_order_and_cross_chat_concurrency() -> None:
+    async def scenario() -> None:
+        log: list[tuple[int, str]] = []
+        release = asyncio.Event()
+
+        async def handler(message: dict) -> None:
+            if message["text"] == "lento":
+                await release.wait()
+            log.append((message["chat"]["id"], message["text"]))
+
+        dispatcher = UpdateDispatcher(handler, workers=4, per_user=4)
+        dispatcher.submit(_msg(1, "lento"))
+        dispatcher.submit(_msg(1, "depois"))
+        dispatcher.submit(_msg(2, "outro chat", user_id=2))
+
+        await _until(lambda: (2, "outro chat") in log)
+        assert (1, "depois") not in log  # aguarda o "lento" do mesmo chat
+        assert dispatcher.queue_depth() == 1
+
+        release.set()
+        await _until(lambda: len(log) == 3)
+        assert [text for chat, text in log if chat == 1] == ["lento", "depois"]
+        snapshot = dispatcher.snapshot()
+        assert snapshot["completed"] == 3 and snapshot["queue_depth"] == 0
+        assert snapshot["max_queue_depth"] >= 1
+        assert snapshot["handler_max_s"] > 0
+
+    asyncio.run(scenario())
+
+
+def test_priority_chat_bypasses_busy_pool() -> None:
+    async def scenario() -> None:
+        release = asyncio.Event()
+        done: list[int] = []
+
+        async def handler(message: dict) -> None:
+            if message["chat"]["id"] != 99:
+                await release.wait()
+            done.append(message["chat"]["id"])
+
+        dispatcher = UpdateDispatcher(handler, workers=2, per_user=5, priority_chats={99})
+        for chat_id in (1, 2, 3):
+            dispatcher.submit(_msg(chat_id, "job longo", user_id=chat_id))
+        await _until(lambda: dispatcher.active() == 2)  # pool global cheio
+        dispatcher.submit(_msg(99, "alerta"))
+
+        await _until(lambda: 99 in done)
+        assert dispatcher.active() == 2
+        release.set()
+        await _until(lambda: len(done) == 4)
+
+    asyncio.run(scenario())
+
+
+def test_per_user_cap() -> None:
+    async def scenario() -> None:
+        release = asyncio.Event()
+        running: list[int] = []
+
+        async def handler(message: dict) -> None:
+            running.append(message["chat"]["id"])
+            await release.wait()
+
+        dispatcher = UpdateDispatcher(handler, workers=10, per_user=2)
+        for chat_id in (1, 2, 3):
+            dispatcher.submit(_msg(chat_id, "x", user_id=7))
+        dispatcher.submit(_msg(4, "x", user_id=8))
+
+        await _until(lambda: len(running) == 3)
+        await asyncio.sleep(0.05)
+        assert len(running) == 3 and 4 in running  # o 3º chat do usuário 7 espera
+        release.set()
+        await _until(lambda: len(running) == 4)
+        await dispatcher.close()
+
+    asyncio.run(scenario())
+
+
+def test_priority_chat_skips_user_slot_and_slots_are_pruned() -> None:
+    async def scenario() -> None:
+        release = asyncio.Event()
+        done: list[int] = []
+
+        async def handler(message: dict) -> None:
+            if message["chat"]["id"] != 99:
+                await release.wait()
+            done.append(message["chat"]["id"])
+
+        dispatcher = UpdateDispatcher(handler, workers=4, per_user=1, priority_chats={99})
+        dispatcher.submit(_msg(1, "job longo", user_id=7))
+        await _until(lambda: dispatcher.active() == 1)
+        dispatcher.submit(_msg(99, "alerta", user_id=7))  # mesmo usuário, vaga dele ocupada
+
+        await _until(lambda: 99 in done)
+        assert 1 not in done
+        release.set()
+        await _until(lambda: len(done) == 2)
+        await _until(lambda: not dispatcher._lanes)
+        assert dispatcher._user_slots == {} and dispatcher._user_refs == {}
+
+    asyncio.run(scenario())
+
+
+class _FakeAPI:
+    def __init__(self) -> None:
+        self.messages: list[str] = []
+
+    async def send_message(self, chat_id: int, text: str, **kwargs: Any) -> dict:
+        self.messages.append(text)
+        return {"ok": True}
+
+
+def test_stop_command_cancels_running_handler() -> None:
+    async def scenario() -> None:
+        started = asyncio.Event()
+        cancelled: list[str] = []
+        handled: list[str] = []
+
+        async def handler(message: dict) -> None:
+            if message["text"] == "longo":
+                started.set()
+                try:
+                    await asyncio.sleep(60)
+                except asyncio.CancelledError:
+                    cancelled.append(message["text"])
+                    raise
+            handled.append(message["text"])
+
+        bot = TelegramBot.__new__(TelegramBot)
+        bot.api = _FakeAPI()
+        bot.dispatcher = UpdateDispatcher(handler, workers=2, per_user=2)
+
+        await bot._dispatch_update(_msg(5, "longo", user_id=3))
+        await bot._dispatch_update(_msg(5, "fila", user_id=3))
+        await bot._dispatch_update(_msg(5, "de outro", user_id=4))
+        await started.wait()
+
+        await bot._dispatch_update(_msg(5, "/stop@bot", user_id=3))
+        await _until(lambda: handled == ["de outro"])
+
+        assert cancelled == ["longo"]
+        assert "2 tarefa(s) interrompida(s)" in bot.api.messages[0]
+        assert bot.dispatcher.snapshot()["cancelled"] == 2
+
+        await bot._dispatch_update(_msg(6, "/stop", user_id=3))
+        assert "Nenhuma tarefa" in bot.api.messages[-1]
+
+    asyncio.run(scenario())
+
+
+def test_stop_requires_sender_and_admin_stops_everyone() -> None:
+    async def scenario() -> None:
+        started = asyncio.Event()
+        cancelled: list[int] = []
+
+        async def handler(message: dict) -> None:
+            started.set()
+            try:
+                await asyncio.sleep(60)
+            except asyncio.CancelledError:
+                cancelled.append(message["from"]["id"])
+                raise
+
+        bot = TelegramBot.__new__(TelegramBot)
+        bot.api = _FakeAPI()
+        bot.dispatcher = UpdateDispatcher(handler, workers=2, per_user=2)
+        await bot._dispatch_update(_msg(5, "longo", user_id=3))
+        await started.wait()
+
+        await bot._dispatch_update({"chat": {"id": 5}, "text": "/stop", "message_id": 2})
+        assert cancelled == [] and bot.api.messages == []
+
+        await bot._dispatch_update(_msg(5, "/stop", user_id=4))
+        assert cancelled == [] and "Nenhuma tarefa" in bot.api.messages[-1]
+
+        await bot._dispatch_update(_msg(5, "/stop", user_id=ADMIN_CHAT_ID))
+        await _until(lambda: cancelled == [3])
+        await bot.dispatcher.close()
+
+    asyncio.run(scenario())
+
+
+def test_full_chat_queue_drops_messages() -> None:
+    async def scenario() -> None:
+        release = asyncio.Event()
+
+        async def handler(message: dict) -> None:
+            await release.wait()
+
+        dispatcher = UpdateDispatcher(handler, max_chat_queue=2)
+        results = [dispatcher.submit(_msg(1, str(i))) for i in range(4)]
+        assert results == [True, True, False, False]
+        assert dispatcher.snapshot()["dropped"] == 2
+        release.set()
+        await _until(lambda: dispatcher.stats.completed == 2)
+
+    asyncio.run(scenario())
+
@@ -0,0 +1,210 @@
+"""Testes do envio com controle de taxa e do streaming de respostas do TelegramBot.
+
+Cobertura:
+  - token bucket por chat limita a taxa de envio
+  - sendMessage nunca é agrupado (cada um recebe o próprio message_id);
+    edições repetidas colapsam na última; deleteMessage segue a fila do chat
+  - 429 com retry_after suspende o chat e o bucket global e refaz a requisição
+  - ask_ollama com stream envia a primeira parte antes do fim da geração
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import telegram_bot
+from telegram_bot import OutboundScheduler, StreamingReply, TelegramAPI, TelegramBot, TokenBucket
+
+
+class _Recorder:
+    """Substitui o envio HTTP e registra (método, params, instante)."""
+
+    def __init__(self, responses: list[dict] | None = None) -> None:
+        self.calls: list[tuple[str, dict, float]] = []
+        self.responses = list(responses or [])
+
+    async def __call__(self, method: str, files: dict | None = None, **params) -> dict:
+        self.calls.append((method, params, time.monotonic()))
+        if self.responses:
+            return self.responses.pop(0)
+        return {"ok": True, "result": {"message_id": len(self.calls)}}
+
+
+def test_token_bucket_rate() -> None:
+    async def scenario() -> float:
+        bucket = TokenBucket(rate=20, capacity=1)
+        t0 = time.monotonic()
+        for _ in range(5):
+            await bucket.acquire()
+        return time.monotonic() - t0
+
+    elapsed = asyncio.run(scenario())
+    assert 0.18 <= elapsed < 0.5  # 1 token imediato + 4 a 20/s
+
+
+def test_burst_of_messages_keeps_one_send_per_caller() -> None:
+    async def scenario() -> tuple[_Recorder, list[dict], dict]:
+        send = _Recorder()
+        scheduler = OutboundScheduler(send, global_rate=100, chat_rate=50, chat_burst=1)
+        results = await asyncio.gather(
+            *(scheduler.submit("sendMessage", {"chat_id": 1, "text": f"linha {i}"}) for i in range(4)),
+            scheduler.submit("sendMessage", {"chat_id": 2, "text": "outro chat"}),
+        )
+        return send, results, scheduler.snapshot()
+
+    send, results, stats = asyncio.run(scenario())
+    chat1 = [params["text"] for method, params, _ in send.calls if params["chat_id"] == 1]
+    assert chat1 == [f"linha {i}" for i in range(4)]
+    # Cada caller recebe o próprio message_id para editar/apagar depois
+    assert len({result["result"]["message_id"] for result in results}) == 5
+    assert stats["coalesced"] == 0 and stats["queue_depth"] == 0
+
+
+def test_edits_collapse_and_reply_markup_is_not_merged() -> None:
+    async def scenario() -> _Recorder:
+        send = _Recorder()
+        scheduler = OutboundScheduler(send, global_rate=100, chat_rate=10, chat_burst=1)
+        await asyncio.gather(
+            scheduler.submit("sendMessage", {"chat_id": 1, "text": "a"}),
+            *(scheduler.submit("editMessageText", {"chat_id": 1, "message_id": 9, "text": f"v{i}"})
+              for i in range(3)),
+            scheduler.submit("sendMessage", {"chat_id": 1, "text": "b", "reply_markup": {"k": 1}}),
+            scheduler.submit("sendMessage", {"chat_id": 1, "text": "c"}),
+        )
+        return send
+
+    send = asyncio.run(scenario())
+    assert [(m, p["text"]) for m, p, _ in send.calls] == [
+        ("sendMessage", "a"), ("editMessageText", "v2"), ("sendMessage", "b"), ("sendMessage", "c"),
+    ]
+
+
+def test_delete_message_follows_chat_queue() -> None:
+    async def scenario() -> list[tuple[str, dict]]:
+        send = _Recorder()
+        api = TelegramAPI("TOKEN")
+        api.scheduler = OutboundScheduler(send, global_rate=100, chat_rate=50, chat_burst=1)
+        await asyncio.gather(
+            api.edit_message_text(1, 9, "v1"),
+            api.delete_message(1, 9),
+        )
+        return [(method, params) for method, params, _ in send.calls]
+
+    calls = asyncio.run(scenario())
+    assert [method for method, _ in calls] == ["editMessageText", "deleteMessage"]
+
+
+def test_429_retry_after_blocks_global_bucket() -> None:
+    async def scenario() -> _Recorder:
+        send = _Recorder([
+            {"ok": False, "error_code": 429, "description": "Too Many Requests",
+             "parameters": {"retry_after": 0.2}},
+        ])
+        scheduler = OutboundScheduler(send, global_rate=100, chat_rate=100, chat_burst=5)
+        first = asyncio.create_task(scheduler.submit("sendMessage", {"chat_id": 1, "text": "oi"}))
+        await asyncio.sleep(0.05)  # o 429 já suspendeu os buckets
+        await scheduler.submit("sendMessage", {"chat_id": 2, "text": "outro chat"})
+        await first
+        return send
+
+    send = asyncio.run(scenario())
+    other_chat_at = next(at for _, params, at in send.calls if params["chat_id"] == 2)
+    assert other_chat_at - send.calls[0][2] >= 0.19
+
+
+def test_429_retry_after_blocks_chat_and_retries() -> None:
+    async def scenario() -> tuple[_Recorder, dict, dict]:
+        send = _Recorder([
+            {"ok": False, "error_code": 429, "description": "Too Many Requests",
+             "parameters": {"retry_after": 0.2}},
+        ])
+        scheduler = OutboundScheduler(send, global_rate=100, chat_rate=100, chat_burst=5)
+        result = await scheduler.submit("sendMessage", {"chat_id": 1, "text": "oi"})
+        return send, result, scheduler.snapshot()
+
+    send, result, stats = asyncio.run(scenario())
+    assert result["ok"] and len(send.calls) == 2
+    assert send.calls[1][2] - send.calls[0][2] >= 0.19
+    assert stats["retried"] == 1
+
+
+def test_telegram_api_routes_sends_through_scheduler() -> None:
+    async def scenario() -> list[str]:
+        seen: list[str] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            seen.append(request.url.path.rsplit("/", 1)[-1])
+            return httpx.Response(200, json={"ok": True, "result": {"message_id": 1}})
+
+        api = TelegramAPI("TOKEN")
+        api.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        await api.send_message(1, "oi")
+        await api.get_me()
+        await api.close()
+        assert api.scheduler.snapshot()["sent"] == 1
+        return seen
+
+    assert asyncio.run(scenario()) == ["sendMessage", "getMe"]
+
+
+def test_ask_ollama_streams_first_chunk_before_generation_ends(monkeypatch) -> None:
+    tokens = ["Olá", ", ", "isto ", "é ", "uma ", "resposta ", "em ", "streaming."]
+
+    class _SlowStream(httpx.AsyncByteStream):
+        async def __aiter__(self):
+            for token in tokens:
+                await asyncio.sleep(0.05)
+                yield (json.dumps({"message": {"content": token}, "done": False}) + "\n").encode()
+            yield (json.dumps({"message": {"content": ""}, "done": True}) + "\n").encode()
+
+    def ollama_handler(request: httpx.Request) -> httpx.Response:
+        assert json.loads(request.content)["stream"] is True
+        return httpx.Response(200, stream=_SlowStream())
+
+    async def scenario():
+        bot = TelegramBot.__new__(TelegramBot)
+        bot.integration = None
+        bot.user_contexts = {}
+        bot.keep_alive_seconds = 60
+        bot.ollama = httpx.AsyncClient(transport=httpx.MockTransport(ollama_handler))
+        send = _Recorder()
+        bot.api = TelegramAPI("TOKEN")
+        bot.api.scheduler = OutboundScheduler(send, global_rate=100, chat_rate=100, chat_burst=10)
+
+        stream = StreamingReply(bot.api, 5, reply_to_message_id=7, edit_interval=0.1,
+                                first_chars=5, first_seconds=10)
+        t0 = time.monotonic()
+        answer = await bot.ask_ollama("pergunta", user_id=3, stream=stream)
+        total = time.monotonic() - t0
+        assert await stream.finish(answer)
+        await bot.ollama.aclose()
+        return send, stream, answer, total, bot.user_contexts, t0
+
+    monkeypatch.setattr(telegram_bot, "OLLAMA_HOST", "http://ollama.test")
+    send, stream, answer, total, contexts, t0 = asyncio.run(scenario())
+
+    assert answer == "".join(tokens)
+    assert contexts[3][-1]["content"] == answer
+    first_method, first_params, first_at = send.calls[0]
+    assert first_method == "sendMessage" and first_params["reply_to_message_id"] == 7
+    assert "parse_mode" not in first_params  # parciais sem Markdown
+    assert first_at - t0 < total / 2
+    assert 1 <= stream.edits < len(tokens)  # edições espaçadas
+    final_method, final_params, _ = send.calls[-1]
+    assert final_method == "editMessageText" and final_params["text"] == answer
+
+
+def test_streaming_reply_without_tokens_falls_back() -> None:
+    async def scenario() -> bool:
+        api = TelegramAPI("TOKEN")
+        api.scheduler = OutboundScheduler(_Recorder())
+        return await StreamingReply(api, 1).finish("texto")
+
+    assert asyncio.run(scenario()) is False
@@ -6,6 +6,7 @@ Cobre:
 - Resolução de modelo dinâmico
 - Geração via Ollama (expand e evolve)
 - Operações GraphQL (create, update, get_page, upsert)
+- Manifesto local: publicação sem mudança pulada, índice incremental com debounce
 - Endpoints FastAPI (publish, evolve, raw, health)
 """
 
@@ -24,10 +25,11 @@ from fastapi.testclient import TestClient
 # ─────────────────────────────────────────────────────────────────────────────
 
 @pytest.fixture
-def agent():
-    """Instância isolada do WikiAgent para cada teste."""
-    from specialized_agents.wiki_agent import WikiAgent
-    return WikiAgent()
+def agent(tmp_path, monkeypatch):
+    """Instância isolada do WikiAgent para cada teste (manifesto em tmp_path)."""
+    from specialized_agents import wiki_agent as wa
+    monkeypatch.setattr(wa, "WIKI_MANIFEST_PATH", tmp_path / "page_manifest.json")
+    return wa.WikiAgent()
 
 
 @pytest.fixture
@@ -475,3 +477,153 @@ def test_endpoint_publish_preserves_explicit_locale(client):
     assert resp.status_code == 200
     call_req = mock_agent.publish.call_args[0][0]
     assert call_req.locale == "pt"
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Testes: manifesto e índice incremental
+# ─────────────────────────────────────────────────────────────────────────────
+
+class _FakeWiki:
+    """GraphQL fake: guarda páginas por path e conta chamadas por operação."""
+
+    def __init__(self) -> None:
+        self.pages: dict[str, dict[str, Any]] = {}
+        self.calls: list[str] = []
+
+    def __call__(self, query: str, variables: dict[str, Any]) -> dict[str, Any]:
+        if "singleByPath" in query:
+            self.calls.append("get")
+            return {"data": {"pages": {"singleByPath": self.pages.get(variables["path"])}}}
+        if "list(" in query:
+            self.calls.append("list")
+            listing = [
+                {k: v for k, v in p.items() if k != "content"} for p in self.pages.values()
+            ]
+            return {"data": {"pages": {"list": listing}}}
+        op = "create" if "create(" in query else "update"
+        self.calls.append(f"{op}:{variables['path']}")
+        page = self.pages.setdefault(
+            variables["path"], {"id": len(self.pages) + 1, "path": variables["path"]}
+        )
+        page.update(
+            title=variables["title"], content=variables["content"],
+            description="", locale=variables["locale"], updatedAt=f"t{len(self.calls)}",
+        )
+        return {"data": {"pages": {op: {
+            "responseResult": {"succeeded": True, "errorCode": 0, "message": ""},
+            "page": {"id": page["id"], "path": page["path"], "updatedAt": page["updatedAt"]},
+        }}}}
+
+
+def _publish_req(path: str, text: str = "## Conteúdo\n\nTexto da página."):
+    from specialized_agents.wiki_agent import WikiPublishRequest
+    return WikiPublishRequest(topic=f"Página {path}", raw_text=text, wiki_path=path, skip_ollama=True)
+
+
+@pytest.mark.asyncio
+async def test_publish_skips_unchanged_content_without_round_trip(agent, monkeypatch):
+    """Republicar o mesmo conteúdo não deve chamar a wiki nem remontar o índice."""
+    from specialized_agents import wiki_agent as wa
+    monkeypatch.setattr(wa, "INDEX_DEBOUNCE_SECONDS", 0)
+    wiki = _FakeWiki()
+    agent._graphql = wiki
+
+    first = await agent.publish(_publish_req("homelab/a"))
+    assert not first.skipped
+    calls_after_first = len(wiki.calls)
+    assert "update:index" in wiki.calls or "create:index" in wiki.calls
+
+    second = await agent.publish(_publish_req("homelab/a"))
+    assert second.skipped and second.page_id == first.page_id
+    assert len(wiki.calls) == calls_after_first
+
+    changed = await agent.publish(_publish_req("homelab/a", "## Conteúdo\n\nTexto novo."))
+    assert not changed.skipped
+    assert "update:homelab/a" in wiki.calls[calls_after_first:]
+
+
+@pytest.mark.asyncio
+async def test_index_batch_rebuilds_once_from_manifest(agent):
+    """Várias publicações num lote geram um único upsert do índice, sem listar a wiki de novo."""
+    wiki = _FakeWiki()
+    agent._graphql = wiki
+    agent._rebuild_index()  # sincronização inicial (listagem completa)
+    assert wiki.calls.count("list") == 1
+
+    with agent.index_batch():
+        for name in ("a", "b", "c"):
+            await agent.publish(_publish_req(f"docs/{name}"))
+        assert not any(c.endswith(":index") for c in wiki.calls[-6:])
+
+    index_writes = [c for c in wiki.calls if c.endswith(":index")]
+    assert len(index_writes) == 2  # sync inicial + fim do lote
+    assert wiki.calls.count("list") == 1
+    index = wiki.pages["index"]["content"]
+    assert "[Página docs/a](/docs/a)" in index and "[Página docs/c](/docs/c)" in index
+
+    agent._rebuild_index()  # nada mudou: fingerprint do índice evita o upsert
+    assert len([c for c in wiki.calls if c.endswith(":index")]) == 2
+
+
+def test_index_rebuild_is_debounced(agent, monkeypatch):
+    """Agendamentos próximos devem resultar num único rebuild após o debounce."""
+    import time as _time
+    from specialized_agents import wiki_agent as wa
+    monkeypatch.setattr(wa, "INDEX_DEBOUNCE_SECONDS", 0.1)
+    agent._rebuild_index = MagicMock()
+
+    for _ in range(5):
+        agent._schedule_index_rebuild()
+    agent._rebuild_index.assert_not_called()
+    _time.sleep(0.3)
+    agent._rebuild_index.assert_called_once()
+    assert agent.flush_index() is False
+
+
+@pytest.mark.asyncio
+async def test_republish_keeps_description_from_listing(agent):
+    """O registro da publicação não apaga a descrição vinda da listagem completa."""
+    wiki = _FakeWiki()
+    agent._graphql = wiki
+    agent._manifest.sync_listing(
+        [{"id": 7, "path": "docs/a", "title": "A", "description": "Resumo da página", "locale": "en"}],
+        "en",
+    )
+    await agent.publish(_publish_req("docs/a"))
+    agent.flush_index()
+
+    assert agent._manifest.get("en", "docs/a")["description"] == "Resumo da página"
+    assert "Resumo da página" in wiki.pages["index"]["content"]
+
+
+@pytest.mark.asyncio
+async def test_refactor_changes_invalidate_manifest(agent):
+    """Páginas alteradas pelo refactor não podem ser puladas pelo fingerprint antigo."""
+    wiki = _FakeWiki()
+    agent._graphql = wiki
+    await agent.publish(_publish_req("docs/a"))
+    agent.flush_index()
+    assert agent._refactor_skill.manifest is agent._manifest
+
+    agent._refactor_skill._forget_pages(None, ["docs/a"], [])
+    assert agent._manifest.get("en", "docs/a") is None
+    assert agent._manifest.last_full_sync == 0.0
+
+    calls = len(wiki.calls)
+    again = await agent.publish(_publish_req("docs/a"))
+    assert not again.skipped
+    assert "update:docs/a" in wiki.calls[calls:]
+
+
+def test_pending_index_rebuild_runs_at_exit(agent, monkeypatch):
+    """O rebuild ainda no timer de debounce roda no atexit, não se perde."""
+    from specialized_agents import wiki_agent as wa
+    monkeypatch.setattr(wa, "INDEX_DEBOUNCE_SECONDS", 60)
+    agent._rebuild_index = MagicMock()
+
+    agent._schedule_index_rebuild()
+    agent._rebuild_index.assert_not_called()
+    wa._flush_pending_indexes()
+
+    agent._rebuild_index.assert_called_once()
+    assert agent._index_timer is None
@@ -5,6 +5,7 @@ from pathlib import Path
 from unittest.mock import AsyncMock
 
 import pytest
+from fastapi import HTTPException
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
@@ -273,3 +274,102 @@ async def test_refactor_only_links_readme_to_placeholder_parent(tmp_path: Path)
     cluster = response.duplicate_clusters[0]
     assert cluster["canonical"]["target_path"] == "docs/docs"
     assert [dup["path"] for dup in cluster["duplicates"]] == ["docs/docs/index", "docs/docs/readme"]
+
+
+def _long_body(topic: str, variant: str = "") -> str:
+    words = " ".join(f"{topic}{i}" for i in range(120))
+    return f"# {topic}\n\n{words} {variant}\n"
+
+
+def _similarity_pages(updated_b: str = "2026-05-20T10:00:00Z") -> tuple[list[dict], dict[str, dict]]:
+    pages = [
+        {"id": 701, "path": "homelab/backup-nas", "title": "Backup do NAS", "locale": "pt", "updatedAt": "2026-05-20T10:00:00Z"},
+        {"id": 702, "path": "operations/rotina-de-copias", "title": "Rotina de cópias", "locale": "pt", "updatedAt": updated_b},
+        {"id": 703, "path": "trading/estrategia", "title": "Estratégia", "locale": "pt", "updatedAt": "2026-05-20T10:00:00Z"},
+    ]
+    details = {
+        "homelab/backup-nas": {"id": 701, "content": _long_body("backup")},
+        "operations/rotina-de-copias": {"id": 702, "content": _long_body("backup", "revisado")},
+        "trading/estrategia": {"id": 703, "content": _long_body("trade")},
+    }
+    return pages, details
+
+
+@pytest.mark.asyncio
+async def test_refactor_clusters_near_duplicate_content(tmp_path: Path) -> None:
+    pages, details = _similarity_pages()
+    skill = WikiRefactorSkill(FakeWikiClient(pages=pages, page_details=details), repo_root=tmp_path)
+
+    response = await skill.run(WikiRefactorRequest(mode="audit", rebuild_indexes=False))
+
+    assert len(response.duplicate_clusters) == 1
+    cluster = response.duplicate_clusters[0]
+    assert cluster["reason"] == "similar_content"
+    members = {cluster["canonical"]["current_path"], *(dup["path"] for dup in cluster["duplicates"])}
+    assert members == {"homelab/backup-nas", "operations/rotina-de-copias"}
+    assert response.inventory_summary["content_similarity"]["hashed"] == 3
+
+
+@pytest.mark.asyncio
+async def test_refactor_signature_cache_only_rehashes_changed_pages(tmp_path: Path) -> None:
+    pages, details = _similarity_pages()
+    first = WikiRefactorSkill(FakeWikiClient(pages=pages, page_details=details), repo_root=tmp_path)
+    await first.run(WikiRefactorRequest(mode="audit", rebuild_indexes=False))
+    assert (tmp_path / "data" / "wiki" / "minhash_signatures.json").exists()
+
+    pages, details = _similarity_pages(updated_b="2026-05-22T10:00:00Z")
+    client = FakeWikiClient(pages=pages, page_details=details)
+    fetched: list[str] = []
+    original_get_page = client.get_page
+
+    def tracking_get_page(wiki_path: str, locale: str | None = None) -> dict | None:
+        fetched.append(wiki_path)
+        return original_get_page(wiki_path, locale)
+
+    client.get_page = tracking_get_page  # type: ignore[method-assign]
+    second = WikiRefactorSkill(client, repo_root=tmp_path)
+    response = await second.run(WikiRefactorRequest(mode="audit", rebuild_indexes=False))
+
+    assert fetched == ["operations/rotina-de-copias"]
+    assert response.inventory_summary["content_similarity"]["cached"] == 2
+    assert response.inventory_summary["content_similarity"]["hashed"] == 1
+    assert response.duplicate_clusters[0]["reason"] == "similar_content"
+
+
+@pytest.mark.asyncio
+async def test_refactor_skips_unreadable_pages_without_caching(tmp_path: Path) -> None:
+    pages, details = _similarity_pages()
+    client = FakeWikiClient(pages=pages, page_details=details)
+    original_get_page = client.get_page
+
+    def flaky_get_page(wiki_path: str, locale: str | None = None) -> dict | None:
+        if wiki_path == "homelab/backup-nas":
+            raise HTTPException(status_code=503, detail="Erro de conexão com Wiki.js")
+        if wiki_path == "trading/estrategia":
+            return None
+        return original_get_page(wiki_path, locale)
+
+    client.get_page = flaky_get_page  # type: ignore[method-assign]
+    skill = WikiRefactorSkill(client, repo_root=tmp_path)
+    response = await skill.run(WikiRefactorRequest(mode="audit", rebuild_indexes=False))
+
+    similarity = response.inventory_summary["content_similarity"]
+    assert similarity["unreadable_pages"] == 2 and similarity["hashed"] == 1
+    assert response.duplicate_clusters == []
+
+    # Na execução seguinte as páginas ilegíveis são lidas de novo (nada vazio no cache)
+    pages, details = _similarity_pages()
+    retry = WikiRefactorSkill(FakeWikiClient(pages=pages, page_details=details), repo_root=tmp_path)
+    response = await retry.run(WikiRefactorRequest(mode="audit", rebuild_indexes=False))
+    assert response.inventory_summary["content_similarity"]["hashed"] == 2
+    assert response.duplicate_clusters[0]["reason"] == "similar_content"
+
+
+def test_minhash_signature_is_identical_without_numpy(monkeypatch: pytest.MonkeyPatch) -> None:
+    import specialized_agents.wiki_similarity as ws
+
+    hashes = ws.shingle_hashes(ws.tokenize(_long_body("lto")), 5)
+    expected = ws.MinHasher(64, seed=7).signature(hashes)
+    monkeypatch.setattr(ws, "np", None)
+    assert ws.MinHasher(64, seed=7).signature(hashes) == expected
+    assert ws.estimate_jaccard(expected, expected) == 1.0
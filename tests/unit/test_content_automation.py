@@ -3,6 +3,8 @@
 from __future__ import annotations
 
 import json
+import os
+import sys
 from pathlib import Path
 
 import pytest
@@ -131,4 +133,217 @@ def test_end_to_end_pipeline(settings: dict, monkeypatch) -> None:
     assert stats.published >= 1
     posted = scheduler.queue.list_by_status(ContentStatus.POSTED)
     assert posted
-    assert posted[0].video_path
\ No newline at end of file
+    assert posted[0].video_path
+
+
+def test_staged_pipeline_records_stage_timings(settings: dict, monkeypatch) -> None:
+    monkeypatch.setattr("content_automation.video_pipeline.shutil.which", lambda name: None)
+    settings["publisher"]["mode"] = "mock"
+    settings["pipeline"]["render_pool"] = "thread"
+
+    scheduler = ContentScheduler(settings)
+    scheduler.plan_daily_slots()
+    stats = scheduler.process_due(force=True)
+
+    assert stats.failed == 0 and stats.published == stats.generated == 3
+    assert set(stats.stage_counts) == {"generate", "render", "publish"}
+    assert all(count == 3 for count in stats.stage_counts.values())
+    posted = scheduler.queue.list_by_status(ContentStatus.POSTED)
+    assert len(posted) == 3
+    assert all(item.payload["video"]["mp4_path"] == item.video_path for item in posted)
+
+
+def test_render_runs_in_process_pool(settings: dict, monkeypatch, tmp_path: Path) -> None:
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Processos spawn não herdam o monkeypatch, só o ambiente: sem ffmpeg no PATH → render stub
+    monkeypatch.setenv("PATH", str(tmp_path))
+    settings["publisher"]["mode"] = "mock"
+    settings["pipeline"]["render_pool"] = "process"
+    settings["pipeline"]["render_workers"] = 2
+
+    scheduler = ContentScheduler(settings)
+    executors: list = []
+    real_executor = scheduler._render_executor
+
+    def spy_executor(workers: int):
+        executors.append(real_executor(workers))
+        return executors[-1]
+
+    monkeypatch.setattr(scheduler, "_render_executor", spy_executor)
+    scheduler.plan_daily_slots()
+    stats = scheduler.process_due(force=True)
+
+    assert [type(pool) for pool in executors] == [ProcessPoolExecutor]
+    assert stats.failed == 0 and stats.stage_counts["render"] == 3
+    posted = scheduler.queue.list_by_status(ContentStatus.POSTED)
+    assert len(posted) == 3 and all(Path(item.video_path).exists() for item in posted)
+    assert all(item.claimed_at == "" for item in posted)
+
+
+def test_render_workers_capped_to_cores(settings: dict, monkeypatch) -> None:
+    monkeypatch.setattr("content_automation.scheduler.os.cpu_count", lambda: 4)
+    settings["publisher"]["mode"] = "mock"
+    settings["pipeline"]["render_workers"] = 64
+
+    assert ContentScheduler(settings)._pool_sizes()[1] == 4
+
+
+def test_claimed_items_are_skipped_by_concurrent_cycle(settings: dict, monkeypatch) -> None:
+    from datetime import timedelta
+
+    monkeypatch.setattr("content_automation.video_pipeline.shutil.which", lambda name: None)
+    settings["publisher"]["mode"] = "mock"
+    settings["pipeline"]["render_pool"] = "thread"
+
+    scheduler = ContentScheduler(settings)
+    first, *_ = scheduler.plan_daily_slots()
+    assert scheduler.queue.claim(first.id, stale_after=timedelta(minutes=60))  # outro ciclo em andamento
+
+    stats = scheduler.process_due(force=True)
+
+    assert stats.published == 2
+    assert scheduler.queue.get(first.id).status == ContentStatus.PENDING
+    assert not scheduler.queue.claim(first.id, stale_after=timedelta(minutes=60))
+    assert scheduler.queue.claim(first.id, stale_after=timedelta(0))  # reserva vencida é retomada
+
+
+def test_failed_render_resumes_without_regenerating(settings: dict, monkeypatch) -> None:
+    import content_automation.scheduler as scheduler_mod
+
+    monkeypatch.setattr("content_automation.video_pipeline.shutil.which", lambda name: None)
+    settings["publisher"]["mode"] = "mock"
+    settings["pipeline"]["render_pool"] = "thread"
+    settings["scheduler"]["post_times"] = ["00:01"]
+
+    generated: list[str] = []
+    real_generate = scheduler_mod.generate_content
+    real_render = scheduler_mod.render_video
+
+    def counting_generate(trend, **kwargs):
+        generated.append(trend.topic)
+        return real_generate(trend, **kwargs)
+
+    def broken_render(content, **kwargs):
+        raise RuntimeError("ffmpeg caiu")
+
+    monkeypatch.setattr(scheduler_mod, "generate_content", counting_generate)
+    monkeypatch.setattr(scheduler_mod, "render_video", broken_render)
+
+    scheduler = ContentScheduler(settings)
+    scheduler.plan_daily_slots()
+    first = scheduler.process_due(force=True)
+    assert first.failed == 1 and first.generated == 1
+    (item,) = scheduler.queue.list_by_status(ContentStatus.GENERATED)
+    assert item.retries == 1 and item.payload["content"]["title"] == item.title
+
+    monkeypatch.setattr(scheduler_mod, "render_video", real_render)
+    second = scheduler.run_cycle()
+    assert second.resumed == 1 and second.published == 1 and second.generated == 0
+    assert len(generated) == 1
+    assert scheduler.queue.get(item.id).status == ContentStatus.POSTED
+
+
+class _FakeFfmpeg:
+    """Registra os comandos ffmpeg e cria o arquivo de saída (último argumento)."""
+
+    def __init__(self, encoders: str = "", *, nvenc_works: bool = True) -> None:
+        self.calls: list[list[str]] = []
+        self.encoders = encoders
+        self.nvenc_works = nvenc_works
+
+    def __call__(self, cmd, capture_output=True, text=True, check=False):
+        self.calls.append(list(cmd))
+        failed = "h264_nvenc" in cmd and not self.nvenc_works
+
+        class Result:
+            returncode = 1 if failed else 0
+            stderr = "No NVENC capable devices found" if failed else ""
+            stdout = self.encoders if "-encoders" in cmd else ""
+
+        if "-encoders" not in cmd and cmd[-1] != "-" and not failed:
+            out = Path(cmd[-1])
+            out.parent.mkdir(parents=True, exist_ok=True)
+            out.write_bytes(b"fake")
+        return Result()
+
+
+def _patch_ffmpeg(monkeypatch, fake: _FakeFfmpeg) -> None:
+    from content_automation import video_pipeline
+
+    video_pipeline.available_encoders.cache_clear()
+    video_pipeline.nvenc_usable.cache_clear()
+    monkeypatch.setattr(
+        "content_automation.video_pipeline.shutil.which",
+        lambda name: "/usr/bin/ffmpeg" if name == "ffmpeg" else None,
+    )
+    monkeypatch.setattr("content_automation.video_pipeline.subprocess.run", fake)
+
+
+def test_render_reuses_template_and_skips_filter_graph(settings: dict, monkeypatch) -> None:
+    from content_automation.models import GeneratedContent
+    from content_automation.video_pipeline import render_videos
+
+    fake = _FakeFfmpeg()
+    _patch_ffmpeg(monkeypatch, fake)
+    contents = [
+        GeneratedContent(topic="cripto", title=f"Título {i}", script="palavra " * 80, cta="Siga!")
+        for i in range(3)
+    ]
+    output_dir = Path(settings["paths"]["output_dir"])
+    artifacts = render_videos(contents, output_dir=output_dir, workers=3, encoder_preset="auto")
+
+    assert [Path(a.mp4_path).parent.name for a in artifacts] == ["t_tulo_0", "t_tulo_1", "t_tulo_2"]
+    templates = [c for c in fake.calls if c[-1].endswith(".png")]
+    assert len(templates) == 1  # fundo renderizado uma vez para os três vídeos
+    final = [c for c in fake.calls if c[-1].endswith("final.mp4")]
+    assert len(final) == 3
+    assert all("-vf" not in c and c[c.index("-c:v") + 1] == "copy" for c in final)
+
+
+def test_encoder_preset_selection(monkeypatch) -> None:
+    from content_automation.video_pipeline import available_encoders, nvenc_usable, select_encoder_preset
+
+    nvenc_line = " V....D h264_nvenc           NVIDIA NVENC H.264 encoder\n"
+    _patch_ffmpeg(monkeypatch, _FakeFfmpeg(nvenc_line))
+    assert select_encoder_preset("auto").encoder == "h264_nvenc"
+    _patch_ffmpeg(monkeypatch, _FakeFfmpeg(" V....D libx264              H.264\n"))
+    assert select_encoder_preset("auto").name == "copy_loop"
+    assert not select_encoder_preset("fast").loop_clip
+    with pytest.raises(ValueError):
+        select_encoder_preset("turbo")
+
+    # Listado pelo ffmpeg mas sem GPU: o teste de 1 frame falha e cai para x264
+    broken = _FakeFfmpeg(nvenc_line, nvenc_works=False)
+    _patch_ffmpeg(monkeypatch, broken)
+    assert select_encoder_preset("auto").name == "copy_loop"
+    assert select_encoder_preset("auto").name == "copy_loop"
+    assert sum("h264_nvenc" in call for call in broken.calls) == 1  # sondado uma vez por processo
+    available_encoders.cache_clear()
+    nvenc_usable.cache_clear()
+
+
+def test_template_background_uses_unique_tmp_per_writer(tmp_path: Path, monkeypatch) -> None:
+    from content_automation.video_pipeline import RenderTemplate, template_background
+
+    fake = _FakeFfmpeg()
+    _patch_ffmpeg(monkeypatch, fake)
+    monkeypatch.setitem(sys.modules, "PIL", None)  # força o caminho ffmpeg
+    template_background(RenderTemplate(name="a"), width=64, height=64, cache_dir=tmp_path)
+    template_background(RenderTemplate(name="b"), width=64, height=64, cache_dir=tmp_path)
+
+    tmps = [Path(call[-1]).name for call in fake.calls]
+    assert len(set(tmps)) == 2 and all(str(os.getpid()) in name for name in tmps)
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(
+        f"{RenderTemplate(name=n).cache_key(64, 64)}.png" for n in "ab"
+    )
+
+
+def test_cover_font_uses_template_size() -> None:
+    pytest.importorskip("PIL")
+    from content_automation.video_pipeline import _title_font
+
+    font = _title_font("DejaVuSans-Bold.ttf", 60)
+    fallback = _title_font("fonte-que-nao-existe.ttf", 60)
+    assert font.size == 60
+    assert getattr(fallback, "size", 60) == 60
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""Benchmark do motor de áudio da agenda diária (laços puros vs NumPy).
+
+Gera segmentos sintéticos (voz em 22.05/24 kHz e um bed curto) num diretório
+temporário e mede, nos dois caminhos, o resample de um segmento, a
+concatenação de todos os segmentos com gap e o mix voz + bed. Confere também
+que as saídas são idênticas byte a byte.
+
+Uso:
+    python tools/benchmark_agenda_audio.py [--seconds S] [--segments N] [--json]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import struct
+import sys
+import tempfile
+import time
+import wave
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+TOOLS = Path(__file__).resolve().parent
+if str(TOOLS) not in sys.path:
+    sys.path.insert(0, str(TOOLS))
+
+import daily_agenda_audio as audio  # noqa: E402
+import daily_agenda_cues as cues  # noqa: E402
+import daily_agenda_segments as segments  # noqa: E402
+
+
+def _pcm(n: int, seed: int) -> bytes:
+    rng = random.Random(seed)
+    return struct.pack(f"<{n}h", *(rng.randint(-12000, 12000) for _ in range(n)))
+
+
+def _write_wav(path: Path, pcm: bytes, rate: int) -> None:
+    with wave.open(str(path), "wb") as handle:
+        handle.setnchannels(1)
+        handle.setsampwidth(2)
+        handle.setframerate(rate)
+        handle.writeframes(pcm)
+
+
+def _timed(fn: Callable[[], Any]) -> tuple[float, Any]:
+    t0 = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - t0, result
+
+
+def run(seconds: float, count: int) -> List[Dict[str, Any]]:
+    results: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory(prefix="agenda-audio-bench-") as tmp:
+        root = Path(tmp)
+        paths = []
+        for idx in range(count):
+            rate = 22050 if idx % 3 == 0 else 24000
+            path = root / f"seg_{idx:03d}.wav"
+            _write_wav(path, _pcm(int(seconds * rate), idx), rate)
+            paths.append(path)
+        voice = _pcm(int(seconds * 24000), 101)
+        bed = _pcm(24000 * 2, 102)
+
+        legacy_t, legacy_out = _timed(
+            lambda: segments._resample_mono_16bit_py(voice, src_rate=24000, dst_rate=22050)
+        )
+        fast_t, fast_out = _timed(
+            lambda: audio.array_to_pcm(audio.resample_linear(audio.pcm_to_array(voice), 24000, 22050))
+        )
+        results.append(_row("resample", legacy_t, fast_t, legacy_out == fast_out))
+
+        legacy_wav, fast_wav = root / "legacy.wav", root / "fast.wav"
+        legacy_t, _ = _timed(lambda: segments._concat_wav_files_py(paths, legacy_wav, gap_seconds=0.35))
+        fast_t, _ = _timed(lambda: audio.concat_wav_streaming(paths, fast_wav, gap_seconds=0.35))
+        results.append(_row("concat", legacy_t, fast_t, legacy_wav.read_bytes() == fast_wav.read_bytes()))
+
+        legacy_t, legacy_out = _timed(lambda: cues._mix_pcm_py(voice, bed))
+        fast_t, fast_out = _timed(
+            lambda: audio.array_to_pcm(audio.mix(audio.pcm_to_array(voice), audio.pcm_to_array(bed)))
+        )
+        results.append(_row("mix", legacy_t, fast_t, legacy_out == fast_out))
+    return results
+
+
+def _row(stage: str, legacy_s: float, numpy_s: float, identical: bool) -> Dict[str, Any]:
+    return {
+        "stage": stage,
+        "legacy_s": round(legacy_s, 4),
+        "numpy_s": round(numpy_s, 4),
+        "speedup": round(legacy_s / numpy_s, 1) if numpy_s > 0 else None,
+        "identical": identical,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark do motor de áudio da agenda diária")
+    parser.add_argument("--seconds", type=float, default=20.0, help="Duração de cada segmento")
+    parser.add_argument("--segments", type=int, default=12)
+    parser.add_argument("--json", action="store_true", help="Saída em JSON")
+    args = parser.parse_args()
+
+    results = run(args.seconds, args.segments)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+    for row in results:
+        print(
+            f"{row['stage']:>8}: legado={row['legacy_s']:.3f}s  numpy={row['numpy_s']:.3f}s  "
+            f"ganho={row['speedup']}x  idêntico={row['identical']}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""Benchmark de render do content_automation (segundos por vídeo).
+
+Renderiza vídeos de 30 s e 60 s com narração mock num diretório temporário e
+mede o tempo por vídeo no caminho legado (capa refeita + filtro
+scale/pad/drawtext + re-encode completo) e em cada preset de encoder do motor
+atual (template pré-renderado, capa pronta, sem filtros). Também mede o lote
+em paralelo com ``render_videos``. Requer ffmpeg no PATH.
+
+Uso:
+    python tools/benchmark_content_render.py [--videos N] [--durations 30,60] [--json]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from content_automation import video_pipeline as vp  # noqa: E402
+from content_automation.models import GeneratedContent  # noqa: E402
+
+WIDTH, HEIGHT = 1080, 1920
+
+
+def _content(idx: int, seconds: int) -> GeneratedContent:
+    # ~2.5 palavras/s é a estimativa de duração do pipeline
+    words = " ".join(f"palavra{n}" for n in range(int(seconds * 2.5)))
+    return GeneratedContent(topic="bench", title=f"Vídeo de teste {idx} ({seconds}s)", script=words, cta="Siga!")
+
+
+def _legacy_render(content: GeneratedContent, output_dir: Path, seconds: int) -> None:
+    """Fluxo anterior: capa lavfi por item + filter graph completo no encode."""
+    work_dir = output_dir / "legacy" / f"{abs(hash(content.title))}"
+    work_dir.mkdir(parents=True, exist_ok=True)
+    wav_path, cover_path, mp4_path = work_dir / "n.wav", work_dir / "cover.jpg", work_dir / "final.mp4"
+    vp._synthesize_tts_mock(wav_path, content.script, float(seconds))
+    subprocess.run(
+        ["ffmpeg", "-y", "-f", "lavfi", "-i", f"color=c=#0c1220:s={WIDTH}x{HEIGHT}", "-frames:v", "1",
+         str(cover_path)],
+        check=True, capture_output=True, text=True,
+    )
+    safe_title = content.title.replace("'", "\\'")[:80]
+    vf = (
+        f"scale={WIDTH}:{HEIGHT}:force_original_aspect_ratio=decrease,"
+        f"pad={WIDTH}:{HEIGHT}:(ow-iw)/2:(oh-ih)/2:black,"
+        f"drawtext=text='{safe_title}':x=(w-text_w)/2:y=h*0.08:"
+        f"fontsize=42:fontcolor=white:box=1:boxcolor=black@0.45"
+    )
+    subprocess.run(
+        ["ffmpeg", "-y", "-loop", "1", "-i", str(cover_path), "-i", str(wav_path), "-vf", vf,
+         "-c:v", "libx264", "-tune", "stillimage", "-c:a", "aac", "-b:a", "192k", "-pix_fmt", "yuv420p",
+         "-shortest", "-t", str(math.ceil(seconds)), str(mp4_path)],
+        check=True, capture_output=True, text=True,
+    )
+
+
+def _presets() -> List[str]:
+    names = ["fast", "copy_loop"]
+    if "h264_nvenc" in vp.available_encoders():
+        names.append("nvenc")
+    return names
+
+
+def run(videos: int, durations: List[int]) -> List[Dict[str, Any]]:
+    results: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory(prefix="content-render-bench-") as tmp:
+        output_dir = Path(tmp)
+        for seconds in durations:
+            contents = [_content(idx, seconds) for idx in range(videos)]
+            t0 = time.perf_counter()
+            for content in contents:
+                _legacy_render(content, output_dir, seconds)
+            results.append(_row("legacy", seconds, videos, time.perf_counter() - t0))
+
+            for preset in _presets():
+                t0 = time.perf_counter()
+                for content in contents:
+                    vp.render_video(content, output_dir=output_dir / preset, max_duration_seconds=seconds,
+                                    width=WIDTH, height=HEIGHT, encoder_preset=preset)
+                results.append(_row(preset, seconds, videos, time.perf_counter() - t0))
+
+            t0 = time.perf_counter()
+            vp.render_videos(contents, output_dir=output_dir / "parallel", max_duration_seconds=seconds,
+                             width=WIDTH, height=HEIGHT, encoder_preset="auto")
+            results.append(_row("auto+parallel", seconds, videos, time.perf_counter() - t0))
+    return results
+
+
+def _row(mode: str, seconds: int, videos: int, elapsed: float) -> Dict[str, Any]:
+    return {
+        "mode": mode,
+        "video_seconds": seconds,
+        "videos": videos,
+        "elapsed_s": round(elapsed, 3),
+        "s_per_video": round(elapsed / videos, 3),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de render do content_automation")
+    parser.add_argument("--videos", type=int, default=4)
+    parser.add_argument("--durations", default="30,60", help="Durações em segundos, separadas por vírgula")
+    parser.add_argument("--json", action="store_true", help="Saída em JSON")
+    args = parser.parse_args()
+
+    if shutil.which("ffmpeg") is None:
+        print("ffmpeg não encontrado no PATH", file=sys.stderr)
+        return 1
+    durations = [int(value) for value in args.durations.split(",") if value.strip()]
+    results = run(args.videos, durations)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+    for row in results:
+        print(
+            f"{row['mode']:>14} {row['video_seconds']:>3}s: {row['s_per_video']:>7.3f} s/vídeo  "
+            f"({row['videos']} vídeos em {row['elapsed_s']}s)"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""Benchmark de carga dos endpoints do portal de storage (req/s e latência).
+
+Sobe a API em processo (TestClient) sobre um diretório temporário, cria um
+contrato e dispara requisições concorrentes em ``/storage/portal/bootstrap`` e
+``/storage/portal/files``. Roda duas vezes: com o ``StorageRepository`` atual
+(conexão por thread + WAL + cache de token) e com o modo legado (uma conexão
+nova por chamada, sem cache), para comparar o ganho.
+
+Uso:
+    python tools/benchmark_storage_portal.py [--requests N] [--workers N] [--json]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import storage_portal_api as api  # noqa: E402
+
+ENDPOINTS = ["/storage/portal/bootstrap", "/storage/portal/files"]
+
+
+class LegacyStorageRepository(api.StorageRepository):
+    """Comportamento anterior: conexão nova por chamada, rollback journal, sem cache."""
+
+    def __init__(self, database_path: Path):
+        super().__init__(database_path, token_cache_ttl=0)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.database_path)
+        connection.row_factory = sqlite3.Row
+        return connection
+
+
+class _NoopIntegration:
+    def create_or_update_user(self, *args: Any, **kwargs: Any) -> Dict[str, Any]:
+        return {"skipped": True}
+
+    def create_mailbox(self, email_address: str, *args: Any, **kwargs: Any) -> Dict[str, Any]:
+        return {"status": "skipped", "email": email_address}
+
+    def send(self, *args: Any, **kwargs: Any) -> None:
+        return None
+
+
+def _build_service(workdir: Path, legacy: bool) -> api.StoragePortalService:
+    os.environ["STORAGE_PORTAL_DATA_DIR"] = str(workdir)
+    settings = api.load_settings()
+    settings.root_dir = workdir
+    settings.workspace_root.mkdir(parents=True, exist_ok=True)
+    repository_cls = LegacyStorageRepository if legacy else api.StorageRepository
+    noop = _NoopIntegration()
+    return api.StoragePortalService(
+        settings=settings,
+        repository=repository_cls(settings.database_path),
+        authentik_client=noop,
+        mailbox_provisioner=noop,
+        onboarding_mailer=noop,
+    )
+
+
+def _request_payload() -> Dict[str, Any]:
+    return {
+        "mode": "space",
+        "company": "Bench Ltda",
+        "legal_name": "Bench Ltda",
+        "company_document": "12.345.678/0001-90",
+        "contact": "Bench",
+        "role": "TI",
+        "email": "bench@example.com",
+        "phone": "+55 11 99999-0000",
+        "representative_document": "123.456.789-01",
+        "project": "benchmark",
+        "address": "Rua A",
+        "address_number": "1",
+        "district": "Centro",
+        "postal_code": "01010-000",
+        "temperature": "warm",
+        "volume": 10,
+        "ingress": 1,
+        "retention": "12",
+        "retrieval": "rare",
+        "sla": "24h",
+        "compliance": "standard",
+        "redundancy": "single",
+        "billing": "monthly",
+        "term": 12,
+        "city": "Sao Paulo",
+        "state": "SP",
+        "monthly_service": 1000,
+        "setup_fee": 0,
+        "contract_value": 12000,
+        "notice_days": 30,
+        "breach_penalty": 2000,
+    }
+
+
+def run_scenario(legacy: bool, total_requests: int, workers: int) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory(prefix="storage-portal-bench-") as tmp:
+        service = _build_service(Path(tmp), legacy)
+        api._service_instance = service
+        client = TestClient(api.app)
+        response = client.post("/storage/request-access", json=_request_payload())
+        response.raise_for_status()
+        token = response.json()["portal_token"]
+
+        def _one(index: int) -> float:
+            t0 = time.perf_counter()
+            resp = client.get(ENDPOINTS[index % len(ENDPOINTS)], params={"portal_token": token})
+            resp.raise_for_status()
+            return time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            latencies: List[float] = list(pool.map(_one, range(total_requests)))
+        elapsed = time.perf_counter() - t0
+        service.repository.close()
+        api._service_instance = None
+
+    latencies.sort()
+    return {
+        "mode": "legacy" if legacy else "pooled",
+        "requests": total_requests,
+        "workers": workers,
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(total_requests / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de carga do portal de storage")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--json", action="store_true", help="Saída em JSON")
+    args = parser.parse_args()
+
+    results = [run_scenario(legacy, args.requests, args.workers) for legacy in (True, False)]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+    for result in results:
+        print(
+            f"{result['mode']:>7}: {result['rps']:>8} req/s  p50={result['p50_ms']}ms  "
+            f"p95={result['p95_ms']}ms  ({result['requests']} req, {result['workers']} workers)"
+        )
+    legacy, pooled = results
+    print(f"ganho: {pooled['rps'] / legacy['rps']:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
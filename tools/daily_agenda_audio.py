@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""Motor de áudio vetorizado (NumPy) da agenda diária: resample, concat e mix.
+
+Substitui os laços amostra a amostra de ``daily_agenda_segments`` e
+``daily_agenda_cues``:
+  - resample linear com a mesma fórmula de posição (saída idêntica, bit a bit)
+  - downmix multicanal → mono pelo 1º canal (mesmo critério do pipeline)
+  - silêncio e loop de bed sem montar listas Python
+  - concat em streaming: cada segmento vai direto para o WAV de saída em
+    blocos de tamanho fixo, sem acumular o programa inteiro na RAM
+  - mix voz + bed com ganho, truncamento e clip iguais ao ``mix_pcm``
+
+Só trabalha com PCM 16-bit. Quem importa deve tratar ``ImportError`` (numpy
+ausente) e cair para as funções puras originais.
+"""
+from __future__ import annotations
+
+import wave
+from pathlib import Path
+from typing import Iterable, Iterator
+
+import numpy as np
+
+BLOCK_FRAMES = 1 << 16
+
+
+def pcm_to_array(pcm: bytes) -> np.ndarray:
+    """PCM 16-bit little-endian → int16 (descarta byte ímpar final)."""
+    usable = len(pcm) - (len(pcm) % 2)
+    return np.frombuffer(pcm[:usable], dtype="<i2").astype(np.int16, copy=False)
+
+
+def array_to_pcm(samples: np.ndarray) -> bytes:
+    return np.asarray(samples, dtype="<i2").tobytes()
+
+
+def downmix_first_channel(samples: np.ndarray, channels: int) -> np.ndarray:
+    """Multicanal intercalado → mono pelo 1º canal."""
+    if channels <= 1:
+        return samples
+    usable = len(samples) - (len(samples) % channels)
+    return np.ascontiguousarray(samples[:usable:channels])
+
+
+def resample_linear(samples: np.ndarray, src_rate: int, dst_rate: int) -> np.ndarray:
+    """Resample linear mono; mesma posição/interp/truncamento de ``_resample_mono_16bit``."""
+    if src_rate == dst_rate or len(samples) == 0:
+        return samples
+    src_len = len(samples)
+    dst_len = max(1, int(round(src_len * float(dst_rate) / float(src_rate))))
+    if src_len == 1:
+        return np.full(dst_len, samples[0], dtype=np.int16)
+    if dst_len == 1:
+        return samples[:1].copy()
+    pos = np.arange(dst_len, dtype=np.int64) * (src_len - 1) / (dst_len - 1)
+    i0 = pos.astype(np.int64)
+    i1 = np.minimum(i0 + 1, src_len - 1)
+    frac = pos - i0
+    src = samples.astype(np.float64)
+    out = src[i0] * (1.0 - frac) + src[i1] * frac
+    return np.trunc(out).astype(np.int16)
+
+
+def silence(seconds: float, rate: int) -> np.ndarray:
+    n = max(0, int(round(float(seconds) * float(rate))))
+    return np.zeros(n, dtype=np.int16)
+
+
+def loop_to_length(samples: np.ndarray, nframes: int) -> np.ndarray:
+    """Repete ``samples`` até ``nframes`` (silêncio se vazio)."""
+    if nframes <= 0:
+        return np.zeros(0, dtype=np.int16)
+    if len(samples) == 0:
+        return np.zeros(nframes, dtype=np.int16)
+    return np.resize(samples, nframes).astype(np.int16, copy=False)
+
+
+def mix(
+    voice: np.ndarray,
+    bed: np.ndarray,
+    *,
+    voice_gain: float = 1.0,
+    bed_gain: float = 0.09,
+) -> np.ndarray:
+    """Voz + bed (em loop) com ganho; trunca e faz clip em int16 como ``mix_pcm``."""
+    if len(voice) == 0:
+        return bed
+    if len(bed) == 0:
+        return voice
+    looped = loop_to_length(bed, len(voice))
+    mixed = np.trunc(voice.astype(np.float64) * voice_gain + looped.astype(np.float64) * bed_gain)
+    return np.clip(mixed, -32768, 32767).astype(np.int16)
+
+
+def read_wav_mono(path: Path) -> tuple[np.ndarray, int]:
+    """Lê WAV 16-bit inteiro como mono int16 (1º canal)."""
+    with wave.open(str(path), "rb") as handle:
+        channels = handle.getnchannels()
+        sampwidth = handle.getsampwidth()
+        rate = handle.getframerate()
+        frames = handle.readframes(handle.getnframes())
+    if sampwidth != 2:
+        raise RuntimeError(f"WAV precisa ser 16-bit: {path}")
+    return downmix_first_channel(pcm_to_array(frames), channels), rate
+
+
+def iter_wav_blocks(
+    path: Path,
+    *,
+    target_rate: int | None = None,
+    block_frames: int = BLOCK_FRAMES,
+) -> Iterator[np.ndarray]:
+    """Blocos mono int16 de um WAV, já no ``target_rate``.
+
+    Sem troca de taxa o arquivo é lido bloco a bloco; com resample o segmento
+    é carregado inteiro (a interpolação usa o comprimento total) e entregue
+    em blocos.
+    """
+    with wave.open(str(path), "rb") as handle:
+        channels = handle.getnchannels()
+        sampwidth = handle.getsampwidth()
+        rate = handle.getframerate()
+        if sampwidth != 2:
+            raise RuntimeError(f"Apenas PCM 16-bit suportado na concatenação (got {sampwidth}).")
+        if target_rate is None or rate == target_rate:
+            while True:
+                frames = handle.readframes(block_frames)
+                if not frames:
+                    return
+                yield downmix_first_channel(pcm_to_array(frames), channels)
+        samples = downmix_first_channel(pcm_to_array(handle.readframes(handle.getnframes())), channels)
+    resampled = resample_linear(samples, rate, target_rate)
+    for start in range(0, len(resampled), block_frames):
+        yield resampled[start:start + block_frames]
+
+
+class StreamingWavWriter:
+    """WAV mono 16-bit escrito incrementalmente (contexto ``with``)."""
+
+    def __init__(self, path: Path, rate: int) -> None:
+        self.path = Path(path)
+        self.rate = rate
+        self.frames = 0
+        self._handle: wave.Wave_write | None = None
+
+    def __enter__(self) -> "StreamingWavWriter":
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._handle = wave.open(str(self.path), "wb")
+        self._handle.setnchannels(1)
+        self._handle.setsampwidth(2)
+        self._handle.setframerate(self.rate)
+        return self
+
+    def write(self, samples: np.ndarray) -> None:
+        if self._handle is None:
+            raise RuntimeError("StreamingWavWriter fora do contexto")
+        if len(samples):
+            self._handle.writeframesraw(array_to_pcm(samples))
+            self.frames += len(samples)
+
+    def write_silence(self, seconds: float) -> None:
+        remaining = max(0, int(round(float(seconds) * float(self.rate))))
+        while remaining > 0:
+            n = min(remaining, BLOCK_FRAMES)
+            self.write(np.zeros(n, dtype=np.int16))
+            remaining -= n
+
+    @property
+    def duration_seconds(self) -> float:
+        return self.frames / float(self.rate)
+
+    def __exit__(self, *exc: object) -> None:
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+
+def most_common_rate(paths: Iterable[Path]) -> int:
+    """Taxa mais frequente entre os WAVs (mesmo desempate de ``concat_wav_files``)."""
+    rates: list[int] = []
+    for path in paths:
+        with wave.open(str(path), "rb") as handle:
+            rates.append(handle.getframerate())
+    return max(set(rates), key=rates.count)
+
+
+def concat_wav_streaming(
+    wav_paths: list[Path],
+    output_path: Path,
+    *,
+    gap_seconds: float = 0.0,
+    block_frames: int = BLOCK_FRAMES,
+) -> float:
+    """Concatena WAVs (mono 16-bit na taxa mais comum) com silêncio entre partes.
+
+    Retorna a duração total em segundos.
+    """
+    if not wav_paths:
+        raise ValueError("Nenhum WAV para concatenar.")
+    for path in wav_paths:
+        if not Path(path).exists():
+            raise FileNotFoundError(f"WAV ausente: {path}")
+    target_rate = most_common_rate(wav_paths)
+    with StreamingWavWriter(output_path, target_rate) as writer:
+        for idx, path in enumerate(wav_paths):
+            for block in iter_wav_blocks(path, target_rate=target_rate, block_frames=block_frames):
+                writer.write(block)
+            if idx < len(wav_paths) - 1 and gap_seconds > 0:
+                writer.write_silence(gap_seconds)
+    return writer.duration_seconds
@@ -51,6 +51,10 @@ DEFAULT_CONFIG: dict[str, Any] = {
         # Lotes menores: modelos 1B/phi4 colapsam com 3 rascunhos + 1200 palavras.
         "editor_batch_size": 2,
         "llm_parallel": 3,
+        # TTS em paralelo (0 = automático: metade dos núcleos na CPU, 1 por GPU)
+        # e cache de WAV por backend/voz/texto — reexecução só sintetiza o que mudou.
+        "tts_parallel": 0,
+        "tts_cache": True,
         # Cues de produção: vinheta, som de fundo, pausas → artefatos em cues/ + mix.
         "cues_enabled": True,
         "cues": {
@@ -24,6 +24,11 @@ from typing import Any, Iterable, Literal
 
 logger = logging.getLogger(__name__)
 
+try:
+    import daily_agenda_audio as _audio
+except ImportError:  # numpy ausente: laços puros abaixo
+    _audio = None
+
 CueKind = Literal["pause", "bed", "vinheta", "stinger", "speech"]
 
 DEFAULT_RATE = 22050
@@ -416,6 +421,30 @@ def mix_pcm(
     bed_gain: float = 0.09,
 ) -> bytes:
     """Mix mono 16-bit; faz loop do bed até cobrir a voz."""
+    if not voice:
+        return bed
+    if not bed:
+        return voice
+    if _audio is not None:
+        return _audio.array_to_pcm(
+            _audio.mix(
+                _audio.pcm_to_array(voice),
+                _audio.pcm_to_array(bed),
+                voice_gain=voice_gain,
+                bed_gain=bed_gain,
+            )
+        )
+    return _mix_pcm_py(voice, bed, voice_gain=voice_gain, bed_gain=bed_gain)
+
+
+def _mix_pcm_py(
+    voice: bytes,
+    bed: bytes,
+    *,
+    voice_gain: float = 1.0,
+    bed_gain: float = 0.09,
+) -> bytes:
+    """Versão pura (sem numpy) de :func:`mix_pcm`."""
     if not voice:
         return bed
     if not bed:
@@ -544,6 +573,9 @@ class TimelineItem:
 
 
 def _read_wav(path: Path) -> tuple[bytes, int]:
+    if _audio is not None:
+        samples, rate = _audio.read_wav_mono(path)
+        return _audio.array_to_pcm(samples), rate
     with wave.open(str(path), "rb") as handle:
         rate = handle.getframerate()
         channels = handle.getnchannels()
@@ -564,6 +596,10 @@ def _read_wav(path: Path) -> tuple[bytes, int]:
 def _resample_if_needed(pcm: bytes, src_rate: int, dst_rate: int) -> bytes:
     if src_rate == dst_rate or not pcm:
         return pcm
+    if _audio is not None:
+        return _audio.array_to_pcm(
+            _audio.resample_linear(_audio.pcm_to_array(pcm), src_rate, dst_rate)
+        )
     # Import local para evitar ciclo com segments se preferir — reimplementação mínima.
     import array
 
@@ -741,6 +777,19 @@ def render_timeline(
     """Concatena itens da timeline em um único WAV. Retorna duração em segundos."""
     if not timeline:
         raise ValueError("Timeline vazia.")
+    if _audio is not None:
+        # Streaming: cada item vai direto para o WAV, sem acumular o programa
+        with _audio.StreamingWavWriter(output_path, rate) as writer:
+            for item in timeline:
+                if item.pcm is not None:
+                    writer.write(_audio.pcm_to_array(item.pcm))
+                    continue
+                if item.path is None or not item.path.exists():
+                    logger.warning("Item de timeline sem áudio: %s", item.label)
+                    continue
+                for block in _audio.iter_wav_blocks(item.path, target_rate=rate):
+                    writer.write(block)
+        return writer.duration_seconds
     pcm_out = bytearray()
     for item in timeline:
         if item.pcm is not None:
@@ -30,20 +30,33 @@ Config (panel_config.json → audio):
   editor_enabled            mesa de Editor no final (default true)
   editor_batch_size         quantos rascunhos o Editor revisa por vez (default 2;
                             forçado a 1 em SEM_PAUTA)
+  tts_parallel              sínteses TTS simultâneas (default 0 = automático:
+                            metade dos núcleos na CPU, 1 por GPU)
+  tts_cache                 reaproveita WAVs por backend/voz/texto (default true)
 """
 from __future__ import annotations
 
+import hashlib
 import json
 import logging
+import math
+import os
 import re
+import shutil
 import struct
+import time
 import wave
-from dataclasses import dataclass, field
+from dataclasses import asdict, dataclass, field, is_dataclass
 from pathlib import Path
 from typing import Any, Callable
 
 logger = logging.getLogger(__name__)
 
+try:
+    import daily_agenda_audio as _audio
+except ImportError:  # numpy ausente: laços puros abaixo
+    _audio = None
+
 # Estimativa conservadora de locução jornalística em PT-BR.
 DEFAULT_WPM = 140
 DEFAULT_SEGMENT_SECONDS = 180
@@ -836,6 +849,17 @@ def _silence_pcm(*, seconds: float, rate: int, channels: int, sampwidth: int) ->
 
 def _resample_mono_16bit(pcm: bytes, *, src_rate: int, dst_rate: int) -> bytes:
     """Resample linear simples mono 16-bit (suficiente para juntar segmentos TTS)."""
+    if src_rate == dst_rate or not pcm:
+        return pcm
+    if _audio is not None:
+        return _audio.array_to_pcm(
+            _audio.resample_linear(_audio.pcm_to_array(pcm), src_rate, dst_rate)
+        )
+    return _resample_mono_16bit_py(pcm, src_rate=src_rate, dst_rate=dst_rate)
+
+
+def _resample_mono_16bit_py(pcm: bytes, *, src_rate: int, dst_rate: int) -> bytes:
+    """Versão pura (sem numpy) de :func:`_resample_mono_16bit`."""
     if src_rate == dst_rate or not pcm:
         return pcm
     import array
@@ -865,7 +889,22 @@ def concat_wav_files(
     *,
     gap_seconds: float = DEFAULT_GAP_SECONDS,
 ) -> float:
-    """Concatena WAVs em um único arquivo PCM. Retorna duração total em segundos."""
+    """Concatena WAVs em um único arquivo PCM. Retorna duração total em segundos.
+
+    Com numpy, cada segmento é escrito direto no WAV de saída em blocos.
+    """
+    if _audio is not None:
+        return _audio.concat_wav_streaming(list(wav_paths), output_path, gap_seconds=gap_seconds)
+    return _concat_wav_files_py(wav_paths, output_path, gap_seconds=gap_seconds)
+
+
+def _concat_wav_files_py(
+    wav_paths: list[Path],
+    output_path: Path,
+    *,
+    gap_seconds: float = DEFAULT_GAP_SECONDS,
+) -> float:
+    """Versão pura (sem numpy) de :func:`concat_wav_files`: tudo em memória."""
     if not wav_paths:
         raise ValueError("Nenhum WAV para concatenar.")
 
@@ -898,7 +937,7 @@ def concat_wav_files(
         if sampwidth != 2:
             raise RuntimeError(f"Apenas PCM 16-bit suportado na concatenação (got {sampwidth}).")
         if rate != target_rate:
-            pcm = _resample_mono_16bit(pcm, src_rate=rate, dst_rate=target_rate)
+            pcm = _resample_mono_16bit_py(pcm, src_rate=rate, dst_rate=target_rate)
         pcm_out.extend(pcm)
         if idx < len(parts) - 1 and gap_seconds > 0:
             pcm_out.extend(
@@ -1062,31 +1101,104 @@ def reorder_drafts_for_edition(drafts: list[SegmentResult]) -> list[SegmentResul
     return ordered
 
 
+class SentenceSimilarityIndex:
+    """Frases já aceitas pelo dedupe, indexadas para busca por Jaccard.
+
+    Cada frase vira, uma única vez, um conjunto de ids de token ordenado por
+    raridade (ordem global fixa). Pelo *prefix filtering*, duas frases com
+    Jaccard >= limiar compartilham ao menos um token nos prefixos de tamanho
+    ``len - ceil(limiar * len) + 1``; só esses prefixos entram no índice
+    invertido, então os tokens comuns ("de", "que", "o") quase nunca geram
+    candidatos. Cada candidato é confirmado com a mesma conta de
+    :func:`_sentence_similarity`, e o resultado é idêntico ao laço quadrático.
+    """
+
+    # Folga para arredondamento de ponto flutuante: prefixo um pouco maior
+    # nunca perde par, só custa um candidato a mais.
+    _EPS = 1e-9
+
+    def __init__(self, threshold: float, token_rank: dict[str, int] | None = None) -> None:
+        self.threshold = threshold
+        self._rank: dict[str, int] = dict(token_rank or {})
+        self._sets: list[frozenset[int]] = []
+        self._postings: dict[int, list[int]] = {}
+
+    @staticmethod
+    def rank_tokens(sentences: list[str]) -> dict[str, int]:
+        """Ordem global dos tokens: mais raros (menor frequência) primeiro."""
+        df: dict[str, int] = {}
+        for sentence in sentences:
+            for token in set(_normalize_sentence_key(sentence).split()):
+                df[token] = df.get(token, 0) + 1
+        ordered = sorted(df, key=lambda tok: (df[tok], tok))
+        return {tok: idx for idx, tok in enumerate(ordered)}
+
+    def token_ids(self, sentence: str) -> list[int]:
+        ids = set()
+        for token in _normalize_sentence_key(sentence).split():
+            rank = self._rank.get(token)
+            if rank is None:
+                rank = self._rank[token] = len(self._rank)
+            ids.add(rank)
+        return sorted(ids)
+
+    def _prefix(self, ids: list[int]) -> list[int]:
+        overlap = max(1, math.ceil(self.threshold * len(ids) - self._EPS))
+        return ids[: len(ids) - overlap + 1]
+
+    def has_similar(self, ids: list[int]) -> bool:
+        if not ids:
+            return False
+        if self.threshold <= 0:
+            return bool(self._sets)
+        current = frozenset(ids)
+        checked: set[int] = set()
+        for token in self._prefix(ids):
+            for idx in self._postings.get(token, ()):
+                if idx in checked:
+                    continue
+                checked.add(idx)
+                other = self._sets[idx]
+                inter = len(current & other)
+                union = len(current) + len(other) - inter
+                if union and float(inter) / float(union) >= self.threshold:
+                    return True
+        return False
+
+    def add(self, ids: list[int]) -> None:
+        if not ids:
+            return
+        idx = len(self._sets)
+        self._sets.append(frozenset(ids))
+        for token in self._prefix(ids):
+            self._postings.setdefault(token, []).append(idx)
+
+
 def dedupe_sentences(
     texts: list[str],
     *,
     similarity_threshold: float = 0.82,
 ) -> tuple[list[str], int]:
     """Remove frases repetidas/quase-iguais entre blocos. Retorna (textos, cortes)."""
-    seen: list[str] = []
+    split_blocks = [_split_sentences(block) for block in texts]
+    index = SentenceSimilarityIndex(
+        similarity_threshold,
+        SentenceSimilarityIndex.rank_tokens([s for block in split_blocks for s in block]),
+    )
     cuts = 0
     out_blocks: list[str] = []
-    for block in texts:
+    for sentences in split_blocks:
         kept: list[str] = []
-        for sentence in _split_sentences(block):
+        for sentence in sentences:
             key = _normalize_sentence_key(sentence)
             if len(key.split()) < 4:
                 kept.append(sentence)
                 continue
-            dup = False
-            for prev in seen:
-                if _sentence_similarity(sentence, prev) >= similarity_threshold:
-                    dup = True
-                    cuts += 1
-                    break
-            if dup:
+            ids = index.token_ids(sentence)
+            if index.has_similar(ids):
+                cuts += 1
                 continue
-            seen.append(sentence)
+            index.add(ids)
             kept.append(sentence)
         if kept:
             out_blocks.append(" ".join(kept))
@@ -1816,6 +1928,95 @@ def split_text_for_tts(
     return chunks
 
 
+def tts_device_slot(tts_settings: Any) -> str:
+    """Recurso disputado pelo backend TTS principal: cpu, cuda:N ou remote."""
+    backend = str(getattr(tts_settings, "backend", "") or "")
+    if backend.startswith("kokoro"):
+        device = str(getattr(tts_settings, "kokoro_device", "") or "cpu")
+        return device if device.startswith("cuda") else "cpu"
+    if backend == "piper-gpu" and getattr(tts_settings, "piper_use_cuda", False) is True:
+        return f"cuda:{getattr(tts_settings, 'piper_cuda_device', '0')}"
+    if backend.startswith("gemini"):
+        return "remote"
+    return "cpu"
+
+
+def tts_parallel_slots(tts_settings: Any, requested: int = 0) -> tuple[str, int]:
+    """Quantas sínteses cabem ao mesmo tempo no dispositivo do backend.
+
+    Piper/Kokoro rodam como subprocessos, então threads bastam para ocupar
+    vários núcleos. Na CPU usa metade dos núcleos (cada Piper já usa mais de
+    uma thread); cada GPU recebe uma síntese por vez.
+    """
+    device = tts_device_slot(tts_settings)
+    if requested and requested > 0:
+        return device, int(requested)
+    if device == "cpu":
+        return device, max(1, (os.cpu_count() or 2) // 2)
+    if device == "remote":
+        return device, 2
+    return device, 1
+
+
+def _tts_params(tts_settings: Any) -> str:
+    """Todos os parâmetros de síntese (vozes, velocidade, dispositivo) em JSON estável."""
+    if is_dataclass(tts_settings):
+        params = asdict(tts_settings)
+    elif isinstance(tts_settings, dict):
+        params = dict(tts_settings)
+    else:
+        params = {k: v for k, v in vars(tts_settings).items() if not k.startswith("_")}
+    return json.dumps(params, sort_keys=True, default=str)
+
+
+def tts_cache_key(text: str, tts_settings: Any) -> str:
+    """Chave do cache de WAV: backend + parâmetros de síntese + texto normalizado."""
+    backend = str(getattr(tts_settings, "backend", "") or "")
+    normalized = " ".join(text.split())
+    raw = "\x00".join((backend, _tts_params(tts_settings), normalized))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class TtsCache:
+    """WAVs sintetizados, por chave de :func:`tts_cache_key`.
+
+    Cada entrada é ``<chave>.wav`` + ``<chave>.json`` (backend usado). Uma
+    reexecução após ajuste editorial só sintetiza os blocos cujo texto mudou.
+    Só entra áudio do backend configurado: o de um fallback não fica no lugar
+    da síntese pedida.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root)
+
+    def fetch(self, key: str, wav_output: Path) -> str | None:
+        """Copia o WAV em cache para ``wav_output``; retorna o backend ou None."""
+        cached = self.root / f"{key}.wav"
+        meta = self.root / f"{key}.json"
+        if not cached.exists() or not meta.exists():
+            return None
+        try:
+            backend = str(json.loads(meta.read_text(encoding="utf-8")).get("backend") or "")
+            wav_output.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(cached, wav_output)
+        except (OSError, ValueError):
+            return None
+        return backend
+
+    def store(self, key: str, wav_path: Path, backend: str) -> None:
+        try:
+            self.root.mkdir(parents=True, exist_ok=True)
+            tmp = self.root / f"{key}.wav.tmp"
+            shutil.copyfile(wav_path, tmp)
+            tmp.replace(self.root / f"{key}.wav")
+            (self.root / f"{key}.json").write_text(
+                json.dumps({"backend": backend, "stored_at": time.time()}) + "\n",
+                encoding="utf-8",
+            )
+        except OSError:
+            logger.warning("Falha ao gravar cache TTS %s", key, exc_info=True)
+
+
 def generate_modular_locution(
     source_text: str,
     *,
@@ -1840,8 +2041,17 @@ def generate_modular_locution(
     llm_parallel: int = 3,
     sem_pauta_max_duration_seconds: int = DEFAULT_SEM_PAUTA_MAX_DURATION,
     sem_pauta_max_segments: int = DEFAULT_SEM_PAUTA_MAX_SEGMENTS,
+    tts_parallel: int = 0,
+    tts_cache_dir: Path | None = None,
+    tts_cache_enabled: bool = True,
 ) -> ModularLocutionResult:
-    """Pipeline: planeja → rascunhos → mesa de Editor → TTS nos blocos editados → concatena."""
+    """Pipeline: planeja → rascunhos → mesa de Editor → TTS nos blocos editados → concatena.
+
+    O TTS roda em paralelo (``tts_parallel`` sínteses; 0 = automático pelo
+    dispositivo) e mantém a ordem dos blocos; WAVs ficam em cache em
+    ``tts_cache_dir`` (default ``day_dir/tts_cache``).
+    """
+    build_started = time.monotonic()
     source_mode = classify_source_mode(source_text)
     effective_min = effective_duration_for_mode(
         min_duration_seconds,
@@ -2067,48 +2277,98 @@ def generate_modular_locution(
             orig_piece = original if pi == 0 else piece
             tts_units.append((block.role, f"{block.title}{suffix}", piece, orig_piece))
 
-    for unit_idx, (role, title, text, original_text) in enumerate(tts_units, start=1):
+    tts_cache = TtsCache(tts_cache_dir or day_dir / "tts_cache") if tts_cache_enabled else None
+    tts_device, tts_workers = tts_parallel_slots(tts_settings, tts_parallel)
+    tts_workers = max(1, min(tts_workers, len(tts_units) or 1))
+    cache_hits = 0
+
+    def _synth_unit(text: str, wav_path: Path) -> tuple[str, bool]:
+        """Sintetiza (ou copia do cache) um bloco; retorna (backend, veio_do_cache)."""
+        key = tts_cache_key(text, tts_settings) if tts_cache is not None else ""
+        if tts_cache is not None:
+            cached_backend = tts_cache.fetch(key, wav_path)
+            if cached_backend is not None:
+                return cached_backend, True
+        backend = (
+            synthesize_fn(
+                text,
+                tts_mod=tts_mod,
+                wav_output=wav_path,
+                tts_settings=tts_settings,
+            )
+            or ""
+        )
+        configured = str(getattr(tts_settings, "backend", "") or "")
+        if tts_cache is not None and wav_path.exists() and backend == configured:
+            tts_cache.store(key, wav_path, backend)
+        return backend, False
+
+    unit_paths: list[tuple[Path, Path]] = []
+    for unit_idx, (role, _title, text, _original) in enumerate(tts_units, start=1):
         wav_path = segments_dir / f"seg_{unit_idx:02d}_{role}.wav"
         text_path = segments_dir / f"seg_{unit_idx:02d}_{role}.txt"
         text_path.write_text(text + "\n", encoding="utf-8")
+        unit_paths.append((wav_path, text_path))
+
+    outcomes: dict[int, tuple[str, bool] | Exception] = {}
+    tts_started = time.monotonic()
+    if not skip_audio and tts_units:
+        logger.info(
+            "TTS: %s blocos editados, %s síntese(s) simultânea(s) em %s, cache=%s",
+            len(tts_units),
+            tts_workers,
+            tts_device,
+            "on" if tts_cache is not None else "off",
+        )
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=tts_workers) as pool:
+            futures = {
+                unit_idx: pool.submit(_synth_unit, unit[2], unit_paths[unit_idx - 1][0])
+                for unit_idx, unit in enumerate(tts_units, start=1)
+            }
+            for unit_idx, fut in futures.items():
+                try:
+                    outcomes[unit_idx] = fut.result()
+                except Exception as exc:
+                    outcomes[unit_idx] = exc
+    tts_seconds = time.monotonic() - tts_started
+
+    # Resultados na ordem dos blocos, independente da ordem de término
+    for unit_idx, (role, title, text, original_text) in enumerate(tts_units, start=1):
+        wav_path = unit_paths[unit_idx - 1][0]
         duration = 0.0
         backend = ""
         seg_wav: Path | None = None
         err = ""
 
-        if not skip_audio:
-            try:
-                backend = (
-                    synthesize_fn(
-                        text,
-                        tts_mod=tts_mod,
-                        wav_output=wav_path,
-                        tts_settings=tts_settings,
-                    )
-                    or ""
-                )
-                if wav_path.exists():
-                    seg_wav = wav_path
-                    duration = wav_duration_seconds(wav_path)
-                    wav_parts.append(wav_path)
-                    production_units.append((role, original_text, wav_path))
-                    last_tts = backend or last_tts
-                    logger.info(
-                        "TTS bloco editado %s/%s [%s]: %.1fs backend=%s",
-                        unit_idx,
-                        len(tts_units),
-                        role,
-                        duration,
-                        backend,
-                    )
-            except Exception as exc:
-                logger.warning(
-                    "TTS falhou no bloco editado %s: %s",
+        outcome = outcomes.get(unit_idx)
+        if isinstance(outcome, Exception):
+            logger.warning(
+                "TTS falhou no bloco editado %s: %s",
+                unit_idx,
+                outcome,
+                exc_info=outcome,
+            )
+            err = f"tts: {outcome}"
+        elif outcome is not None:
+            backend, from_cache = outcome
+            cache_hits += int(from_cache)
+            if wav_path.exists():
+                seg_wav = wav_path
+                duration = wav_duration_seconds(wav_path)
+                wav_parts.append(wav_path)
+                production_units.append((role, original_text, wav_path))
+                last_tts = backend or last_tts
+                logger.info(
+                    "TTS bloco editado %s/%s [%s]: %.1fs backend=%s%s",
                     unit_idx,
-                    exc,
-                    exc_info=True,
+                    len(tts_units),
+                    role,
+                    duration,
+                    backend,
+                    " (cache)" if from_cache else "",
                 )
-                err = f"tts: {exc}"
 
         results.append(
             SegmentResult(
@@ -2177,6 +2437,29 @@ def generate_modular_locution(
                     final_wav = wav_output
                     total_duration = wav_duration_seconds(wav_output)
 
+    build_seconds = time.monotonic() - build_started
+    synthesized = len(outcomes)
+    tts_stats = {
+        "units": synthesized,
+        "workers": tts_workers if synthesized else 0,
+        "device": tts_device,
+        "cache_hits": cache_hits,
+        "cache_hit_rate": round(cache_hits / synthesized, 3) if synthesized else 0.0,
+        "tts_seconds": round(tts_seconds, 2),
+    }
+    if synthesized:
+        logger.info(
+            "Locução modular pronta em %.1fs (TTS %.1fs em %s com %s síntese(s) simultânea(s); "
+            "cache %s/%s = %.0f%%)",
+            build_seconds,
+            tts_seconds,
+            tts_device,
+            tts_workers,
+            cache_hits,
+            synthesized,
+            100.0 * tts_stats["cache_hit_rate"],
+        )
+
     manifest = {
         "source_mode": source_mode,
         "target_seconds": min_duration_seconds,
@@ -2190,6 +2473,8 @@ def generate_modular_locution(
         "tts_units": len(results),
         "total_duration_seconds": round(total_duration, 2),
         "final_words": len(final_text.split()),
+        "build_seconds": round(build_seconds, 2),
+        "tts": tts_stats,
         "editor_notes": [
             {
                 "batch_index": n.batch_index,
@@ -2280,6 +2565,8 @@ def load_modular_audio_settings(audio_cfg: dict[str, Any] | None = None) -> dict
         "editor_enabled": editor_enabled,
         "editor_batch_size": max(1, min(8, _int("editor_batch_size", DEFAULT_EDITOR_BATCH_SIZE))),
         "llm_parallel": max(1, min(8, _int("llm_parallel", 3))),
+        "tts_parallel": max(0, min(32, _int("tts_parallel", 0))),
+        "tts_cache": bool(cfg.get("tts_cache", True)),
         "cues_enabled": bool(cfg.get("cues_enabled", True)),
         "cues": dict(cfg.get("cues") or {}),
     }
@@ -15,8 +15,12 @@ import asyncio
 import base64
 import json
 import logging
+import os
 import re
+import sqlite3
 import subprocess
+import threading
+import time
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
@@ -49,6 +53,278 @@ DOC_EXTENSIONS = {
 } | TEXT_EXTENSIONS
 
 
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp", ".bmp", ".tif", ".tiff"}
+
+# Indice persistente de arquivos (SQLite FTS5) compartilhado entre buscas
+DEFAULT_INDEX_PATH = Path(
+    os.getenv(
+        "INTELLIGENT_SEARCH_INDEX",
+        str(Path.home() / ".cache" / "intelligent_searcher" / "index.sqlite3"),
+    )
+)
+# Cada busca revarre a subarvore pesquisada, mas diretorio com mtime inalterado
+# nao e relistado (so os arquivos ja indexados nele levam stat), entao arquivos
+# novos aparecem na hora. Um intervalo > 0 troca esse frescor por menos
+# varreduras em arvores muito grandes; --reindex forca a varredura completa.
+REFRESH_INTERVAL_SECONDS = float(os.getenv("INTELLIGENT_SEARCH_REFRESH_SECONDS", "0"))
+# Diretorio alterado ha menos que isso pode mudar de novo no mesmo tique de mtime:
+# fica marcado para ser relistado na proxima varredura
+DIR_MTIME_SETTLE_SECONDS = 2.0
+INDEX_TEXT_CHARS = 20000
+CANDIDATE_POOL = 200
+
+# Respostas de falha nao entram no cache de resumos
+_UNCACHEABLE_SUMMARIES = (
+    "Nao foi possivel extrair",
+    "Resposta vazia do modelo",
+    "Tipo de arquivo nao suportado",
+)
+
+
+class FileIndex:
+    """Indice persistente de arquivos (caminho, nome e texto) em SQLite FTS5.
+
+    O refresh e incremental por mtime/tamanho: so arquivos novos ou alterados
+    tem o texto relido, e entradas de arquivos removidos sao apagadas.
+    Diretorios cujo mtime nao mudou desde a ultima varredura nao sao relistados:
+    criar, apagar ou renomear entradas muda o mtime do diretorio, e edicoes sao
+    pegas pelo stat dos arquivos ja indexados. O mesmo
+    banco guarda os resumos (texto extraido/OCR) por arquivo, validos enquanto
+    o mtime nao mudar, para reaproveitar entre consultas.
+    """
+
+    def __init__(self, db_path: Path | str, refresh_interval: float = REFRESH_INTERVAL_SECONDS) -> None:
+        """Abre (ou cria) o banco do indice.
+
+        Args:
+            db_path: Caminho do arquivo SQLite (ou ":memory:").
+            refresh_interval: Intervalo minimo em segundos entre varreduras da mesma raiz.
+        """
+        if str(db_path) != ":memory:":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+
+    def _create_schema(self) -> None:
+        """Cria tabelas de arquivos, FTS e controle de varredura."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS files ("
+                " id INTEGER PRIMARY KEY, path TEXT UNIQUE NOT NULL, name TEXT NOT NULL,"
+                " suffix TEXT NOT NULL, mtime REAL NOT NULL, size INTEGER NOT NULL,"
+                " text TEXT NOT NULL DEFAULT '', summary TEXT)"
+            )
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS files_fts USING fts5("
+                " path, name, text, tokenize='unicode61 remove_diacritics 2')"
+            )
+            self._conn.execute("CREATE TABLE IF NOT EXISTS roots (root TEXT PRIMARY KEY, refreshed_at REAL NOT NULL)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, mtime REAL NOT NULL)")
+
+    @staticmethod
+    def _prefix_bounds(root: Path) -> tuple[str, str]:
+        """Intervalo [lo, hi) de caminhos abaixo de ``root`` (ordem lexicografica)."""
+        prefix = os.path.join(os.path.abspath(root), "")
+        return prefix, prefix[:-1] + chr(ord(os.sep) + 1)
+
+    def refresh(self, root: Path, force: bool = False) -> dict[str, int]:
+        """Sincroniza o indice com o disco abaixo de ``root``.
+
+        Args:
+            root: Diretorio-base da varredura.
+            force: Ignora o intervalo minimo e relista todos os diretorios.
+
+        Returns:
+            Contadores ``added``, ``updated``, ``removed`` e ``unchanged``.
+        """
+        root_key = os.path.abspath(root)
+        stats = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+        with self._lock:
+            row = self._conn.execute("SELECT refreshed_at FROM roots WHERE root = ?", (root_key,)).fetchone()
+        if row and not force and time.time() - row[0] < self.refresh_interval:
+            return stats
+
+        lo, hi = self._prefix_bounds(root)
+        with self._lock:
+            known = {
+                path: (file_id, mtime, size)
+                for file_id, path, mtime, size in self._conn.execute(
+                    "SELECT id, path, mtime, size FROM files WHERE path >= ? AND path < ?", (lo, hi)
+                )
+            }
+            known_dirs = dict(
+                self._conn.execute(
+                    "SELECT path, mtime FROM dirs WHERE path = ? OR (path >= ? AND path < ?)", (root_key, lo, hi)
+                )
+            )
+        files_by_dir: dict[str, list[str]] = {}
+        for path in known:
+            files_by_dir.setdefault(os.path.dirname(path), []).append(path)
+        subdirs_by_dir: dict[str, list[str]] = {}
+        for path in known_dirs:
+            if path != root_key:
+                subdirs_by_dir.setdefault(os.path.dirname(path), []).append(path)
+
+        changed: list[tuple[str, str, str, float, int]] = []
+        seen: set[str] = set()
+        dir_mtimes: dict[str, float] = {}
+        settled_before = time.time() - DIR_MTIME_SETTLE_SECONDS
+        stack = [root_key]
+        while stack:
+            directory = stack.pop()
+            try:
+                dir_mtime = os.stat(directory).st_mtime
+            except OSError:
+                continue
+            if not force and known_dirs.get(directory) == dir_mtime:
+                # Listagem igual a da ultima varredura: so confere os arquivos ja indexados
+                dir_mtimes[directory] = dir_mtime
+                stack.extend(subdirs_by_dir.get(directory, ()))
+                for path in files_by_dir.get(directory, ()):
+                    try:
+                        info = os.stat(path)
+                    except OSError:
+                        continue
+                    seen.add(path)
+                    previous = known[path]
+                    if previous[1] == info.st_mtime and previous[2] == info.st_size:
+                        stats["unchanged"] += 1
+                        continue
+                    name = os.path.basename(path)
+                    changed.append((path, name, os.path.splitext(name)[1].lower(), info.st_mtime, info.st_size))
+                continue
+            try:
+                entries = os.scandir(directory)
+            except OSError:
+                continue
+            # -1 nunca casa com um mtime real: diretorio recente e relistado da proxima vez
+            dir_mtimes[directory] = dir_mtime if dir_mtime < settled_before else -1.0
+            with entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                            continue
+                        suffix = os.path.splitext(entry.name)[1].lower()
+                        if suffix not in DOC_EXTENSIONS or not entry.is_file():
+                            continue
+                        info = entry.stat()
+                    except OSError:
+                        continue
+                    seen.add(entry.path)
+                    previous = known.get(entry.path)
+                    if previous and previous[1] == info.st_mtime and previous[2] == info.st_size:
+                        stats["unchanged"] += 1
+                        continue
+                    changed.append((entry.path, entry.name, suffix, info.st_mtime, info.st_size))
+
+        with self._lock, self._conn:
+            for path, name, suffix, mtime, size in changed:
+                text = self._read_head(path) if suffix in TEXT_EXTENSIONS else ""
+                previous = known.get(path)
+                if previous:
+                    file_id = previous[0]
+                    self._conn.execute(
+                        "UPDATE files SET name = ?, suffix = ?, mtime = ?, size = ?, text = ?, summary = NULL WHERE id = ?",
+                        (name, suffix, mtime, size, text, file_id),
+                    )
+                    self._conn.execute("DELETE FROM files_fts WHERE rowid = ?", (file_id,))
+                    stats["updated"] += 1
+                else:
+                    file_id = self._conn.execute(
+                        "INSERT INTO files (path, name, suffix, mtime, size, text) VALUES (?, ?, ?, ?, ?, ?)",
+                        (path, name, suffix, mtime, size, text),
+                    ).lastrowid
+                    stats["added"] += 1
+                self._conn.execute(
+                    "INSERT INTO files_fts (rowid, path, name, text) VALUES (?, ?, ?, ?)",
+                    (file_id, path, name, text),
+                )
+            for path, (file_id, _mtime, _size) in known.items():
+                if path not in seen:
+                    self._conn.execute("DELETE FROM files WHERE id = ?", (file_id,))
+                    self._conn.execute("DELETE FROM files_fts WHERE rowid = ?", (file_id,))
+                    stats["removed"] += 1
+            self._conn.execute("DELETE FROM dirs WHERE path = ? OR (path >= ? AND path < ?)", (root_key, lo, hi))
+            self._conn.executemany("INSERT INTO dirs (path, mtime) VALUES (?, ?)", dir_mtimes.items())
+            self._conn.execute(
+                "INSERT OR REPLACE INTO roots (root, refreshed_at) VALUES (?, ?)", (root_key, time.time())
+            )
+        if changed or stats["removed"]:
+            LOGGER.info("Indice de arquivos atualizado em %s: %s", root_key, stats)
+        return stats
+
+    @staticmethod
+    def _read_head(path: str) -> str:
+        """Le o inicio de um arquivo textual para o indice de conteudo."""
+        try:
+            with open(path, encoding="utf-8", errors="ignore") as handle:
+                return handle.read(INDEX_TEXT_CHARS)
+        except OSError:
+            return ""
+
+    def search(self, root: Path, keywords: list[str], limit: int) -> list[tuple[str, str]]:
+        """Retorna ``(caminho, texto)`` que casam com as keywords, por relevancia BM25.
+
+        Nome pesa mais que caminho, que pesa mais que conteudo. Keywords casam
+        por prefixo de token e sem acentos.
+        """
+        terms = [keyword for keyword in keywords if re.search(r"\w", keyword)]
+        if not terms:
+            return []
+        query = " OR ".join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+        lo, hi = self._prefix_bounds(root)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT f.path, f.text FROM files_fts JOIN files f ON f.id = files_fts.rowid"
+                " WHERE files_fts MATCH ? AND f.path >= ? AND f.path < ?"
+                " ORDER BY bm25(files_fts, 2.0, 8.0, 1.0) LIMIT ?",
+                (query, lo, hi, limit),
+            ).fetchall()
+        return [(path, text) for path, text in rows]
+
+    def cached_summary(self, path: Path) -> str | None:
+        """Resumo salvo para o arquivo, se o mtime/tamanho ainda forem os mesmos."""
+        try:
+            info = path.stat()
+        except OSError:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT summary FROM files WHERE path = ? AND mtime = ? AND size = ?",
+                (os.path.abspath(path), info.st_mtime, info.st_size),
+            ).fetchone()
+        return row[0] if row else None
+
+    def store_summary(self, path: Path, summary: str, text: str | None = None) -> None:
+        """Salva o resumo e, se houver, o texto extraido (PDF/OCR) no FTS."""
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT id, name FROM files WHERE path = ?", (os.path.abspath(path),)
+            ).fetchone()
+            if not row:
+                return
+            file_id, name = row
+            self._conn.execute("UPDATE files SET summary = ? WHERE id = ?", (summary, file_id))
+            if text:
+                text = text[:INDEX_TEXT_CHARS]
+                self._conn.execute("UPDATE files SET text = ? WHERE id = ?", (text, file_id))
+                self._conn.execute("DELETE FROM files_fts WHERE rowid = ?", (file_id,))
+                self._conn.execute(
+                    "INSERT INTO files_fts (rowid, path, name, text) VALUES (?, ?, ?, ?)",
+                    (file_id, os.path.abspath(path), name, text),
+                )
+
+    def close(self) -> None:
+        """Fecha a conexao SQLite."""
+        with self._lock:
+            self._conn.close()
+
+
 @dataclass
 class SearchHit:
     """Representa um arquivo candidato e seu resumo."""
@@ -70,6 +346,7 @@ class IntelligentSearcher:
         model_gpu1: str = "gemma3:1b",
         model_gpu0_vision: str = "llava:7b",
         request_timeout: int = 120,
+        index_path: Path | str | None = None,
     ) -> None:
         """Inicializa hosts/modelos das duas GPUs.
 
@@ -79,12 +356,21 @@ class IntelligentSearcher:
             model_gpu1: Modelo textual para interpretar intencao.
             model_gpu0_vision: Modelo multimodal para OCR/imagem.
             request_timeout: Timeout de chamadas HTTP em segundos.
+            index_path: Banco SQLite do indice de arquivos (padrao em ~/.cache).
         """
         self.host_gpu0 = host_gpu0.rstrip("/")
         self.host_gpu1 = host_gpu1.rstrip("/")
         self.model_gpu1 = model_gpu1
         self.model_gpu0_vision = model_gpu0_vision
         self.request_timeout = request_timeout
+        self.index_path = index_path or DEFAULT_INDEX_PATH
+        self._index: FileIndex | None = None
+
+    def _get_index(self) -> FileIndex:
+        """Abre o indice de arquivos sob demanda."""
+        if self._index is None:
+            self._index = FileIndex(self.index_path)
+        return self._index
 
     async def search(self, user_request: str, base_dir: Path, limit: int = 8) -> dict[str, Any]:
         """Executa pipeline completo de busca e interpretacao.
@@ -149,43 +435,62 @@ class IntelligentSearcher:
         }
 
     async def _find_candidates(self, base_dir: Path, keywords: list[str], limit: int) -> list[tuple[Path, int]]:
-        """Busca arquivos no disco e pontua por nome/extensao."""
+        """Busca arquivos no indice e pontua por nome/extensao e conteudo.
+
+        So entram arquivos que casam com alguma keyword: cada candidato custa uma
+        interpretacao na GPU0, entao o limite nao e completado com arquivos sem match.
+        """
         if not base_dir.exists():
             return []
 
-        all_files = await asyncio.to_thread(lambda: [p for p in base_dir.rglob("*") if p.is_file()])
-        scored: list[tuple[Path, int]] = []
-        for file_path in all_files:
-            suffix = file_path.suffix.lower()
-            if suffix not in DOC_EXTENSIONS:
-                continue
-            score = self._score_file(file_path, keywords)
-            if score > 0:
-                scored.append((file_path, score))
+        index = self._get_index()
+        await asyncio.to_thread(index.refresh, base_dir)
+        matches = await asyncio.to_thread(index.search, base_dir, keywords, max(limit, CANDIDATE_POOL))
+        scored: list[tuple[Path, int]] = [
+            (Path(path), self._score_file(Path(path), keywords) + self._score_content(text, keywords))
+            for path, text in matches
+        ]
 
         scored.sort(key=lambda item: item[1], reverse=True)
         return scored[:limit]
 
     async def _interpret_content_with_gpu0(self, file_path: Path) -> str:
-        """Interpreta conteudo usando GPU0 (OCR/visao) ou leitura textual."""
+        """Interpreta conteudo reaproveitando o resumo em cache do indice."""
+        index = self._get_index()
+        cached = await asyncio.to_thread(index.cached_summary, file_path)
+        if cached:
+            return cached
+        summary, text = await self._interpret_uncached(file_path)
+        if summary and not summary.startswith(_UNCACHEABLE_SUMMARIES):
+            await asyncio.to_thread(index.store_summary, file_path, summary, text)
+        return summary
+
+    async def _interpret_uncached(self, file_path: Path) -> tuple[str, str | None]:
+        """Interpreta conteudo usando GPU0 (OCR/visao) ou leitura textual.
+
+        Returns:
+            Resumo e texto extraido para o indice de conteudo (None se ja indexado).
+        """
         suffix = file_path.suffix.lower()
         if suffix in TEXT_EXTENSIONS:
             content = await self._read_text_file(file_path)
-            return self._truncate(content, max_chars=1200)
+            return self._truncate(content, max_chars=1200), None
 
         if suffix == ".pdf":
             text = await self._extract_pdf_text(file_path)
             if text.strip():
-                return self._truncate(text, max_chars=1200)
+                return self._truncate(text, max_chars=1200), text
             image_path = await self._pdf_first_page_to_png(file_path)
             if image_path is None:
-                return "Nao foi possivel extrair texto/imagem do PDF neste ambiente."
-            return await self._vision_summary(image_path)
+                return "Nao foi possivel extrair texto/imagem do PDF neste ambiente.", None
+            summary = await self._vision_summary(image_path)
+            return summary, summary
 
-        if suffix in {".png", ".jpg", ".jpeg", ".webp", ".bmp", ".tif", ".tiff"}:
-            return await self._vision_summary(file_path)
+        if suffix in IMAGE_EXTENSIONS:
+            summary = await self._vision_summary(file_path)
+            return summary, summary
 
-        return "Tipo de arquivo nao suportado para interpretacao."
+        return "Tipo de arquivo nao suportado para interpretacao.", None
 
     async def _vision_summary(self, image_path: Path) -> str:
         """Solicita OCR/descricao para imagem via modelo multimodal na GPU0."""
@@ -347,6 +652,11 @@ class IntelligentSearcher:
             score += 3
         return score
 
+    def _score_content(self, text: str, keywords: list[str]) -> int:
+        """Soma pontos por keyword presente no texto indexado."""
+        lowered = text.lower()
+        return sum(2 for keyword in keywords if keyword in lowered)
+
     def _content_type(self, file_path: Path) -> str:
         """Classifica tipo de conteudo em alto nivel."""
         suffix = file_path.suffix.lower()
@@ -354,7 +664,7 @@ class IntelligentSearcher:
             return "text"
         if suffix == ".pdf":
             return "pdf"
-        if suffix in {".png", ".jpg", ".jpeg", ".webp", ".bmp", ".tif", ".tiff"}:
+        if suffix in IMAGE_EXTENSIONS:
             return "image"
         return "other"
 
@@ -380,6 +690,8 @@ async def _async_main() -> int:
     parser.add_argument("--gpu1-host", type=str, default="http://192.168.15.2:11435", help="Host Ollama GPU1")
     parser.add_argument("--gpu1-model", type=str, default="gemma3:1b", help="Modelo textual GPU1")
     parser.add_argument("--gpu0-vision-model", type=str, default="llava:7b", help="Modelo OCR/visao GPU0")
+    parser.add_argument("--index", type=Path, default=DEFAULT_INDEX_PATH, help="Banco SQLite do indice de arquivos")
+    parser.add_argument("--reindex", action="store_true", help="Forca varredura completa antes da busca")
     args = parser.parse_args()
 
     logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s - %(message)s")
@@ -388,7 +700,11 @@ async def _async_main() -> int:
         host_gpu1=args.gpu1_host,
         model_gpu1=args.gpu1_model,
         model_gpu0_vision=args.gpu0_vision_model,
+        index_path=args.index,
     )
+    if args.reindex:
+        stats = await asyncio.to_thread(searcher._get_index().refresh, args.base_dir, True)
+        LOGGER.info("Reindexacao: %s", stats)
     result = await searcher.search(args.request, args.base_dir, limit=args.limit)
     print(json.dumps(result, ensure_ascii=False, indent=2))
     return 0
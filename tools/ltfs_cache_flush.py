@@ -6,6 +6,7 @@ Fluxo:
   1. Adquire lock exclusivo global (/run/lock/tape-global.lock)
   2. Escaneia buffer roots por arquivos maduros (--min-age-seconds, --min-stable-seconds)
   3. Para cada arquivo: rsync -> verifica SHA256 -> registra em catalog.jsonl + placements.json
+     (ou no catálogo SQLite indexado com --catalog-db, ver ltfs_catalog_db.py)
   4. Atualiza métricas e libera lock
 
 Uso (via systemd drop-in 60-tape-gate.conf):
@@ -40,6 +41,12 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+try:
+    import ltfs_catalog_db
+except ImportError:  # instalação antiga sem o catálogo SQLite
+    ltfs_catalog_db = None
+
 # ─── Configuração ──────────────────────────────────────────────────────────────
 
 logging.basicConfig(
@@ -51,6 +58,7 @@ log = logging.getLogger("ltfs-cache-flush")
 
 GLOBAL_TAPE_LOCK = Path("/run/lock/tape-global.lock")
 LOCAL_FLUSH_LOCK = Path("/run/ltfs-cache-flush.lock")
+LTFS_CURSOR_VOLSER_FILE = Path(os.getenv("LTFS_CURSOR_VOLSER_FILE", "/var/lib/ltfs/current_volser.txt"))
 
 # ─── Helpers ───────────────────────────────────────────────────────────────────
 
@@ -104,6 +112,15 @@ def _atomic_write(path: Path, content: str) -> None:
     tmp.replace(path)
 
 
+def _current_volser() -> str | None:
+    """VOLSER da fita montada (escrito por tape_orchestrator.py), se conhecido."""
+    try:
+        volser = LTFS_CURSOR_VOLSER_FILE.read_text().strip()
+    except OSError:
+        return None
+    return volser or None
+
+
 # ─── Coleta de candidatos ──────────────────────────────────────────────────────
 
 
@@ -211,6 +228,7 @@ def flush_file(
     placements: dict[str, Any],
     catalog_file: Path,
     placement_policy: str,
+    volser: str | None = None,
 ) -> tuple[bool, str]:
     """
     Flush de um arquivo para a fita.
@@ -302,13 +320,16 @@ def flush_file(
     }
 
     # Placements (para recovery: onde cada arquivo está na fita)
-    placements[rel] = {
+    placement = {
         "target_root": str(target_root),
         "size": candidate["size"],
         "sha256": tape_sha,
         "flushed_at": _now_iso(),
         "src_root": candidate["src_root"],
     }
+    if volser:
+        placement["volser"] = volser
+    placements[rel] = placement
 
     # Catalog (append-only log imutável)
     catalog_entry = {
@@ -321,6 +342,8 @@ def flush_file(
         "target_root": str(target_root),
         "policy": placement_policy,
     }
+    if volser:
+        catalog_entry["volser"] = volser
     append_catalog(catalog_file, catalog_entry)
 
     log.info("[OK] %s (%d bytes, %s...)", rel, candidate["size"], tape_sha[:12])
@@ -467,6 +490,7 @@ def main() -> int:
     parser.add_argument("--state-file", required=True, help="Arquivo de estado JSON")
     parser.add_argument("--placement-file", required=True, help="Arquivo de placements JSON")
     parser.add_argument("--catalog-file", required=True, help="Arquivo de catalog JSONL (append-only)")
+    parser.add_argument("--catalog-db", help="Catálogo SQLite indexado; substitui placements.json como fonte de placements")
     parser.add_argument("--metrics-file", required=True, help="Arquivo de métricas JSON")
     parser.add_argument("--metrics-state-file", required=True, help="Arquivo de estado de métricas JSON")
     parser.add_argument("--lock-file", required=True, help="Lock local do flush")
@@ -505,6 +529,7 @@ def main() -> int:
     # Lock global de fita (compartilhado com outros writers)
     global_lock_fd = -1
     local_lock_fd = -1
+    catalog_store = None
     try:
         log.info("Adquirindo lock global de fita: %s", GLOBAL_TAPE_LOCK)
         global_lock_fd = _acquire_lock(GLOBAL_TAPE_LOCK, timeout=600)
@@ -516,7 +541,17 @@ def main() -> int:
 
         # Carrega estado persistente
         state = load_state(Path(args.state_file))
-        placements = load_placements(Path(args.placement_file))
+        if args.catalog_db and ltfs_catalog_db is not None:
+            catalog_store = ltfs_catalog_db.CatalogStore(Path(args.catalog_db))
+            placements = catalog_store.placements_view()
+            if not placements:
+                # Primeira execução com o SQLite: migra placements.json e o histórico
+                catalog_store.import_placements_json(Path(args.placement_file))
+            catalog_store.import_jsonl(Path(args.catalog_file))
+        else:
+            if args.catalog_db:
+                log.warning("ltfs_catalog_db indisponível, usando placements.json")
+            placements = load_placements(Path(args.placement_file))
 
         # Verifica capacidade do target (usa primeiro target root)
         if not check_target_capacity(target_roots[0], args.min_target_total_bytes, args.min_target_free_bytes):
@@ -547,6 +582,7 @@ def main() -> int:
 
         # Flush sequencial (um target root por enquanto)
         target_root = target_roots[0]
+        volser = _current_volser()
         flushed_count = 0
         failed_count = 0
         bytes_flushed = 0
@@ -559,6 +595,7 @@ def main() -> int:
                 placements,
                 Path(args.catalog_file),
                 args.placement_policy,
+                volser,
             )
             if ok and msg == "flushed":
                 flushed_count += 1
@@ -570,7 +607,11 @@ def main() -> int:
 
         # Persiste estado
         save_state(Path(args.state_file), state)
-        save_placements(Path(args.placement_file), placements)
+        if catalog_store is not None:
+            # Placements já gravados linha a linha; só indexa as novas entradas do JSONL
+            catalog_store.import_jsonl(Path(args.catalog_file))
+        else:
+            save_placements(Path(args.placement_file), placements)
 
         # G7: Cleanup do staging após flush confirmado
         cleanup_result = cleanup_flushed_files(
@@ -617,6 +658,8 @@ def main() -> int:
         update_metrics(Path(args.metrics_file), Path(args.metrics_state_file), run_result)
         return 1
     finally:
+        if catalog_store is not None:
+            catalog_store.close()
         if local_lock_fd >= 0:
             _release_lock(local_lock_fd)
         if global_lock_fd >= 0:
@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+ltfs_catalog_db.py — Catálogo indexado (SQLite) do histórico de flush/placement LTFS.
+
+``catalog.jsonl`` continua sendo o log append-only imutável, mas responder
+"qual fita/volser guarda este arquivo" exigia varrer o JSONL inteiro ou
+carregar ``placements.json``. Este módulo mantém o mesmo conteúdo num SQLite
+com índices em ``rel_path``, ``sha256``, ``volser`` e ``timestamp`` e expõe
+consultas em streaming para verify, restore e as rotas ``/tape``.
+
+Uso:
+  ltfs_catalog_db.py import --db /var/lib/ltfs-cache-flush/catalog.db \
+    --catalog /var/lib/ltfs-cache-flush/catalog.jsonl \
+    --placements /var/lib/ltfs-cache-flush/placements.json
+  ltfs_catalog_db.py locate --db ... --path backups/a.bin
+  ltfs_catalog_db.py locate --db ... --sha256 <hex>
+
+O import é idempotente: o offset já importado do JSONL fica salvo na tabela
+``meta`` e novas execuções só leem as linhas acrescentadas desde então.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import sys
+from collections.abc import Iterator, MutableMapping
+from pathlib import Path
+from typing import Any, Iterable
+
+log = logging.getLogger("ltfs-catalog-db")
+
+DEFAULT_DB = Path(os.getenv("LTFS_CATALOG_DB", "/var/lib/ltfs-cache-flush/catalog.db"))
+IMPORT_BATCH_SIZE = 5000
+
+# Campos com coluna própria; o restante da entrada vai em ``extra`` (JSON)
+CATALOG_COLUMNS = (
+    "timestamp", "action", "src_root", "rel_path", "size", "sha256",
+    "target_root", "policy", "volser",
+)
+PLACEMENT_COLUMNS = ("target_root", "size", "sha256", "flushed_at", "src_root", "volser")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS catalog (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT,
+    action TEXT,
+    src_root TEXT,
+    rel_path TEXT,
+    size INTEGER,
+    sha256 TEXT,
+    target_root TEXT,
+    policy TEXT,
+    volser TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_catalog_rel_path ON catalog(rel_path);
+CREATE INDEX IF NOT EXISTS idx_catalog_sha256 ON catalog(sha256);
+CREATE INDEX IF NOT EXISTS idx_catalog_volser ON catalog(volser);
+CREATE INDEX IF NOT EXISTS idx_catalog_timestamp ON catalog(timestamp);
+
+CREATE TABLE IF NOT EXISTS placements (
+    rel_path TEXT PRIMARY KEY,
+    target_root TEXT,
+    size INTEGER,
+    sha256 TEXT,
+    flushed_at TEXT,
+    src_root TEXT,
+    volser TEXT,
+    extra TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_placements_sha256 ON placements(sha256);
+CREATE INDEX IF NOT EXISTS idx_placements_volser ON placements(volser);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _split(entry: dict[str, Any], columns: Iterable[str]) -> tuple[list[Any], str | None]:
+    values = [entry.get(c) for c in columns]
+    extra = {k: v for k, v in entry.items() if k not in columns and k != "rel_path"}
+    return values, (json.dumps(extra, ensure_ascii=False) if extra else None)
+
+
+def _row_to_dict(row: sqlite3.Row) -> dict[str, Any]:
+    data = {k: row[k] for k in row.keys() if k not in ("id", "extra")}
+    if row["extra"]:
+        data.update(json.loads(row["extra"]))
+    return {k: v for k, v in data.items() if v is not None}
+
+
+class CatalogStore:
+    """Catálogo LTFS em SQLite (WAL) com índices por caminho, hash, volser e data."""
+
+    def __init__(self, db_path: Path = DEFAULT_DB) -> None:
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # timeout: flush e verify disputam o lock de escrita durante o import
+        self._conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "CatalogStore":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    # ─── Escrita ──────────────────────────────────────────────────────────
+
+    def append(self, entry: dict[str, Any]) -> None:
+        """Registra uma entrada do catálogo (espelho de ``append_catalog``)."""
+        self.append_many([entry])
+
+    def append_many(self, entries: Iterable[dict[str, Any]]) -> int:
+        with self._conn:
+            return self._insert_entries(entries)
+
+    def _insert_entries(self, entries: Iterable[dict[str, Any]]) -> int:
+        rows = []
+        for entry in entries:
+            values, extra = _split(entry, CATALOG_COLUMNS)
+            rows.append((*values, extra))
+        self._conn.executemany(
+            f"INSERT INTO catalog ({', '.join(CATALOG_COLUMNS)}, extra) "
+            f"VALUES ({', '.join('?' * (len(CATALOG_COLUMNS) + 1))})",
+            rows,
+        )
+        return len(rows)
+
+    def upsert_placement(self, rel_path: str, placement: dict[str, Any]) -> None:
+        self.upsert_placements({rel_path: placement})
+
+    def upsert_placements(self, placements: dict[str, dict[str, Any]]) -> int:
+        rows = []
+        for rel, placement in placements.items():
+            values, extra = _split(placement, PLACEMENT_COLUMNS)
+            rows.append((rel, *values, extra))
+        with self._conn:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO placements (rel_path, {', '.join(PLACEMENT_COLUMNS)}, extra) "
+                f"VALUES ({', '.join('?' * (len(PLACEMENT_COLUMNS) + 2))})",
+                rows,
+            )
+        return len(rows)
+
+    # ─── Import ───────────────────────────────────────────────────────────
+
+    def _meta_get(self, key: str) -> str | None:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def _meta_set(self, key: str, value: str) -> None:
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def import_jsonl(self, catalog_file: Path) -> int:
+        """Importa ``catalog.jsonl`` a partir do último offset importado.
+
+        Linhas inválidas são registradas no log e ignoradas, como em
+        ``ltfs_catalog_verify.load_catalog``. Flush, verify e a CLI importam o
+        mesmo arquivo sem lock entre si: cada lote confere o offset gravado
+        sob ``BEGIN IMMEDIATE`` e, se outro processo já avançou, recomeça de lá.
+        """
+        if not catalog_file.exists():
+            log.warning("Catalog não existe: %s", catalog_file)
+            return 0
+        key = f"jsonl_offset:{catalog_file.resolve()}"
+        imported = 0
+        while True:
+            count = self._import_from_offset(catalog_file, key)
+            if count is None:
+                continue  # outro import avançou o offset no meio; relê a partir dele
+            imported += count
+            break
+        log.info("Catalog importado: %d entradas novas de %s", imported, catalog_file)
+        return imported
+
+    def _start_offset(self, catalog_file: Path, key: str) -> int:
+        with self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            offset = int(self._meta_get(key) or 0)
+            if offset > catalog_file.stat().st_size:
+                log.warning("Catalog %s encolheu; reimportando do início", catalog_file)
+                offset = 0
+                self._meta_set(key, "0")
+        return offset
+
+    def _import_from_offset(self, catalog_file: Path, key: str) -> int | None:
+        """Importa do offset gravado até o fim; None se outro import avançou antes."""
+        offset = start = self._start_offset(catalog_file, key)
+        imported = 0
+        batch: list[dict[str, Any]] = []
+        with catalog_file.open("rb") as f:
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    break  # linha sendo escrita agora; fica para o próximo import
+                offset += len(raw)
+                line = raw.strip()
+                if not line:
+                    continue
+                try:
+                    batch.append(json.loads(line))
+                except json.JSONDecodeError as e:
+                    log.error("Linha inválida no catalog (offset %d): %s", offset, e)
+                    continue
+                if len(batch) >= IMPORT_BATCH_SIZE:
+                    count = self._import_batch(batch, key, start, offset)
+                    if count is None:
+                        return None
+                    imported += count
+                    batch, start = [], offset
+        if offset != start:
+            count = self._import_batch(batch, key, start, offset)
+            if count is None:
+                return None
+            imported += count
+        return imported
+
+    def _import_batch(self, batch: list[dict[str, Any]], key: str, start: int, offset: int) -> int | None:
+        # Confere o offset, insere e avança na mesma transação com lock de escrita:
+        # um import interrompido ou concorrente não duplica linhas
+        with self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            if int(self._meta_get(key) or 0) != start:
+                return None
+            count = self._insert_entries(batch)
+            self._meta_set(key, str(offset))
+        return count
+
+    def import_placements_json(self, placement_file: Path) -> int:
+        if not placement_file.exists():
+            return 0
+        try:
+            placements = json.loads(placement_file.read_text())
+        except Exception as e:
+            log.error("Placements inválido: %s", e)
+            return 0
+        count = self.upsert_placements(placements)
+        log.info("Placements importados: %d de %s", count, placement_file)
+        return count
+
+    # ─── Consultas ────────────────────────────────────────────────────────
+
+    def count(self, action: str | None = None) -> int:
+        if action is None:
+            return self._conn.execute("SELECT COUNT(*) FROM catalog").fetchone()[0]
+        return self._conn.execute(
+            "SELECT COUNT(*) FROM catalog WHERE action = ?", (action,)
+        ).fetchone()[0]
+
+    def iter_entries(
+        self,
+        action: str | None = None,
+        since: str | None = None,
+        until: str | None = None,
+        volser: str | None = None,
+    ) -> Iterator[dict[str, Any]]:
+        """Percorre o catálogo em ordem de inserção sem carregar tudo em memória."""
+        clauses, params = [], []
+        for column, op, value in (
+            ("action", "=", action), ("timestamp", ">=", since),
+            ("timestamp", "<", until), ("volser", "=", volser),
+        ):
+            if value is not None:
+                clauses.append(f"{column} {op} ?")
+                params.append(value)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        cursor = self._conn.execute(f"SELECT * FROM catalog{where} ORDER BY id", params)
+        for row in cursor:
+            yield _row_to_dict(row)
+
+    def history(self, rel_path: str) -> list[dict[str, Any]]:
+        rows = self._conn.execute(
+            "SELECT * FROM catalog WHERE rel_path = ? ORDER BY id", (rel_path,)
+        ).fetchall()
+        return [_row_to_dict(r) for r in rows]
+
+    def find_by_sha256(self, sha256: str) -> list[dict[str, Any]]:
+        rows = self._conn.execute(
+            "SELECT * FROM catalog WHERE sha256 = ? ORDER BY id", (sha256,)
+        ).fetchall()
+        return [_row_to_dict(r) for r in rows]
+
+    def sample(self, k: int, action: str = "flush") -> list[dict[str, Any]]:
+        rows = self._conn.execute(
+            "SELECT * FROM catalog WHERE action = ? ORDER BY RANDOM() LIMIT ?", (action, k)
+        ).fetchall()
+        return [_row_to_dict(r) for r in rows]
+
+    def placement(self, rel_path: str) -> dict[str, Any] | None:
+        row = self._conn.execute(
+            "SELECT * FROM placements WHERE rel_path = ?", (rel_path,)
+        ).fetchone()
+        if row is None:
+            return None
+        data = _row_to_dict(row)
+        data.pop("rel_path", None)
+        return data
+
+    def locate(self, rel_path: str) -> dict[str, Any] | None:
+        """Onde está ``rel_path``: placement atual + último flush conhecido."""
+        placement = self.placement(rel_path)
+        row = self._conn.execute(
+            "SELECT * FROM catalog WHERE rel_path = ? AND action = 'flush' ORDER BY id DESC LIMIT 1",
+            (rel_path,),
+        ).fetchone()
+        if placement is None and row is None:
+            return None
+        last = _row_to_dict(row) if row is not None else {}
+        return {
+            "rel_path": rel_path,
+            "volser": (placement or {}).get("volser") or last.get("volser"),
+            "placement": placement,
+            "last_flush": last or None,
+        }
+
+    def placements_view(self) -> "PlacementsView":
+        return PlacementsView(self)
+
+
+class PlacementsView(MutableMapping):
+    """Mapping ``rel_path -> placement`` sobre a tabela, compatível com ``placements.json``.
+
+    Permite passar o catálogo SQLite onde o código espera o dict de placements
+    (``flush_file``, ``verify_placements_consistency``) sem carregá-lo inteiro.
+    """
+
+    def __init__(self, store: CatalogStore) -> None:
+        self._store = store
+
+    def __getitem__(self, rel_path: str) -> dict[str, Any]:
+        placement = self._store.placement(rel_path)
+        if placement is None:
+            raise KeyError(rel_path)
+        return placement
+
+    def __setitem__(self, rel_path: str, placement: dict[str, Any]) -> None:
+        self._store.upsert_placement(rel_path, placement)
+
+    def __delitem__(self, rel_path: str) -> None:
+        with self._store._conn:
+            cur = self._store._conn.execute("DELETE FROM placements WHERE rel_path = ?", (rel_path,))
+        if cur.rowcount == 0:
+            raise KeyError(rel_path)
+
+    def __iter__(self) -> Iterator[str]:
+        for row in self._store._conn.execute("SELECT rel_path FROM placements ORDER BY rel_path"):
+            yield row["rel_path"]
+
+    def __len__(self) -> int:
+        return self._store._conn.execute("SELECT COUNT(*) FROM placements").fetchone()[0]
+
+
+def main() -> int:
+    # Só na CLI: importado pela API (tape_routes), não pode tomar o logging raiz
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [ltfs-catalog-db] %(levelname)s %(message)s",
+        datefmt="%Y-%m-%dT%H:%M:%S",
+    )
+    parser = argparse.ArgumentParser(description="Catálogo LTFS indexado (SQLite)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    imp = sub.add_parser("import", help="Importa catalog.jsonl/placements.json (incremental)")
+    imp.add_argument("--db", default=str(DEFAULT_DB))
+    imp.add_argument("--catalog", help="catalog.jsonl")
+    imp.add_argument("--placements", help="placements.json")
+
+    loc = sub.add_parser("locate", help="Consulta por caminho ou SHA256")
+    loc.add_argument("--db", default=str(DEFAULT_DB))
+    group = loc.add_mutually_exclusive_group(required=True)
+    group.add_argument("--path")
+    group.add_argument("--sha256")
+
+    args = parser.parse_args()
+    with CatalogStore(Path(args.db)) as store:
+        if args.command == "import":
+            result = {
+                "catalog": store.import_jsonl(Path(args.catalog)) if args.catalog else 0,
+                "placements": store.import_placements_json(Path(args.placements)) if args.placements else 0,
+                "total": store.count(),
+            }
+        elif args.path:
+            result = store.locate(args.path)
+        else:
+            result = store.find_by_sha256(args.sha256)
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    return 0 if result else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,6 +14,10 @@ Uso:
     --tape-root /mnt/lto6-smb-proof/backups \
     --sample-percent 10 --sample-max 100 \
     --metrics-file /var/lib/ltfs-cache-flush/catalog_verify_metrics.json
+
+  Com --catalog-db /var/lib/ltfs-cache-flush/catalog.db o catálogo e os
+  placements são lidos do SQLite indexado (ltfs_catalog_db.py) em streaming,
+  sem carregar o JSONL; nesse modo --placements é dispensável.
 """
 
 from __future__ import annotations
@@ -27,7 +31,17 @@ import sys
 import time
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable, Mapping
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+try:
+    import ltfs_tape_order
+except ImportError:  # instalação antiga sem o agendador por ordem de fita
+    ltfs_tape_order = None
+try:
+    import ltfs_catalog_db
+except ImportError:  # instalação antiga sem o catálogo SQLite
+    ltfs_catalog_db = None
 
 logging.basicConfig(
     level=logging.INFO,
@@ -82,12 +96,13 @@ def load_placements(placements_file: Path) -> dict[str, Any]:
         return {}
 
 
-def verify_catalog_structure(entries: list[dict]) -> dict[str, Any]:
-    """Valida estrutura básica de cada entrada do catalog."""
+def verify_catalog_structure(entries: Iterable[dict]) -> dict[str, Any]:
+    """Valida estrutura básica de cada entrada do catalog (aceita iterador)."""
     required_fields = {"timestamp", "action", "src_root", "rel_path", "size", "sha256", "target_root"}
-    results = {"total": len(entries), "valid": 0, "invalid": 0, "errors": []}
+    results = {"total": 0, "valid": 0, "invalid": 0, "errors": []}
 
     for i, entry in enumerate(entries):
+        results["total"] += 1
         missing = required_fields - set(entry.keys())
         if missing:
             results["invalid"] += 1
@@ -105,7 +120,7 @@ def verify_catalog_structure(entries: list[dict]) -> dict[str, Any]:
 
 
 def verify_placements_consistency(
-    catalog_entries: list[dict], placements: dict
+    catalog_entries: Iterable[dict], placements: Mapping[str, Any]
 ) -> dict[str, Any]:
     """Verifica se placements.json é consistente com catalog."""
     results = {"checked": 0, "consistent": 0, "inconsistent": 0, "missing_in_placements": 0, "errors": []}
@@ -141,13 +156,51 @@ def verify_placements_consistency(
     return results
 
 
+def _tape_index_key(entry: dict, tape_root: Path, index_prefix: str) -> str:
+    """Caminho do arquivo dentro do volume LTFS, como aparece no índice."""
+    rel = entry.get("rel_path") or ""
+    try:
+        rel = str((Path(entry.get("target_root") or "") / rel).relative_to(tape_root))
+    except ValueError:
+        pass
+    return f"{index_prefix.strip('/')}/{rel}".strip("/")
+
+
+def order_by_tape_position(
+    entries: list[dict],
+    tape_index: Mapping[str, Any],
+    tape_root: Path,
+    index_prefix: str = "",
+) -> tuple[list[dict], dict[str, int]]:
+    """Reordena entradas pela posição física na fita (índice LTFS).
+
+    Retorna as entradas ordenadas e os seeks estimados antes/depois.
+    """
+    by_key: dict[str, list[dict]] = {}
+    for entry in entries:
+        by_key.setdefault(_tape_index_key(entry, tape_root, index_prefix), []).append(entry)
+    plan = ltfs_tape_order.build_read_plan(by_key.keys(), tape_index)
+    ordered_keys = [f.path for f in plan.ordered] + plan.unindexed
+    seeks = {
+        "estimated_seeks_requested_order": plan.estimated_seeks_requested_order,
+        "estimated_seeks": plan.estimated_seeks,
+    }
+    return [entry for k in ordered_keys for entry in by_key[k]], seeks
+
+
 def sample_verify_tape(
     catalog_entries: list[dict],
     tape_root: Path,
     sample_percent: int,
     sample_max: int,
+    tape_index: Mapping[str, Any] | None = None,
+    index_prefix: str = "",
 ) -> dict[str, Any]:
-    """Amostra e verifica SHA256 de arquivos na fita."""
+    """Amostra e verifica SHA256 de arquivos na fita.
+
+    Com ``tape_index`` (saída de ``ltfs_tape_order.parse_ltfs_index``) a
+    amostra é lida na ordem física da fita, numa única passada.
+    """
     flush_entries = [e for e in catalog_entries if e.get("action") == "flush"]
     if not flush_entries:
         return {"sampled": 0, "verified": 0, "mismatched": 0, "missing": 0, "errors": []}
@@ -160,6 +213,10 @@ def sample_verify_tape(
 
     results = {"sampled": len(sampled), "verified": 0, "mismatched": 0, "missing": 0, "errors": []}
 
+    if tape_index is not None and ltfs_tape_order is not None:
+        sampled, seeks = order_by_tape_position(sampled, tape_index, tape_root, index_prefix)
+        results.update(seeks)
+
     for entry in sampled:
         rel = entry.get("rel_path")
         expected_sha = entry.get("sha256")
@@ -224,14 +281,19 @@ def export_metrics(metrics_file: Path, results: dict[str, Any]) -> None:
 def main() -> int:
     parser = argparse.ArgumentParser(description="Valida integridade do catálogo LTFS")
     parser.add_argument("--catalog", required=True, help="Caminho para catalog.jsonl")
-    parser.add_argument("--placements", required=True, help="Caminho para placements.json")
+    parser.add_argument("--catalog-db", help="Catálogo SQLite (ltfs_catalog_db); evita carregar o JSONL em memória")
+    parser.add_argument("--placements", help="Caminho para placements.json (obrigatório sem --catalog-db)")
     parser.add_argument("--tape-root", required=True, help="Raiz da fita montada via CIFS")
     parser.add_argument("--sample-percent", type=int, default=10, help="Porcentagem de arquivos para amostrar (1-100)")
     parser.add_argument("--sample-max", type=int, default=100, help="Máximo de arquivos para amostrar")
+    parser.add_argument("--ltfs-index", help="XML ltfsindex exportado; lê a amostra na ordem física da fita")
+    parser.add_argument("--index-prefix", default="", help="Caminho de --tape-root dentro do volume LTFS")
     parser.add_argument("--metrics-file", required=True, help="Arquivo de saída métricas Prometheus")
     parser.add_argument("--log-level", default="INFO", help="Nível de log")
 
     args = parser.parse_args()
+    if not args.placements and not (args.catalog_db and ltfs_catalog_db is not None):
+        parser.error("--placements é obrigatório sem --catalog-db")
     logging.getLogger().setLevel(args.log_level.upper())
 
     log.info("=== Validação de catálogo LTFS iniciada ===")
@@ -242,27 +304,63 @@ def main() -> int:
 
     start_time = time.time()
 
-    # Carrega dados
-    catalog_entries = load_catalog(Path(args.catalog))
-    log.info("Catalog entries carregadas: %d", len(catalog_entries))
+    catalog_store = None
+    if args.catalog_db and ltfs_catalog_db is not None:
+        # Modo indexado: sincroniza o JSONL e consulta o SQLite em streaming
+        catalog_store = ltfs_catalog_db.CatalogStore(Path(args.catalog_db))
+        catalog_store.import_jsonl(Path(args.catalog))
+        placements: Mapping[str, Any] = catalog_store.placements_view()
+        if not placements and args.placements:
+            # DB ainda sem placements (verify antes do 1º flush com SQLite): migra como o flush
+            catalog_store.import_placements_json(Path(args.placements))
+        log.info("Catalog SQLite: %d entradas, %d placements", catalog_store.count(), len(placements))
+        structure_results = verify_catalog_structure(catalog_store.iter_entries())
+    else:
+        if args.catalog_db:
+            log.warning("ltfs_catalog_db indisponível, usando catalog.jsonl")
+        catalog_entries = load_catalog(Path(args.catalog))
+        log.info("Catalog entries carregadas: %d", len(catalog_entries))
 
-    placements = load_placements(Path(args.placements))
-    log.info("Placements carregados: %d", len(placements))
+        placements = load_placements(Path(args.placements))
+        log.info("Placements carregados: %d", len(placements))
 
-    # Verificações
-    structure_results = verify_catalog_structure(catalog_entries)
+        # Verificações
+        structure_results = verify_catalog_structure(catalog_entries)
     log.info("Estrutura: total=%d valid=%d invalid=%d",
              structure_results["total"], structure_results["valid"], structure_results["invalid"])
 
-    placements_results = verify_placements_consistency(catalog_entries, placements)
+    placements_results = verify_placements_consistency(
+        catalog_store.iter_entries(action="flush") if catalog_store else catalog_entries, placements,
+    )
     log.info("Placements: checked=%d consistent=%d inconsistent=%d missing=%d",
              placements_results["checked"], placements_results["consistent"],
              placements_results["inconsistent"], placements_results["missing_in_placements"])
 
-    tape_results = sample_verify_tape(catalog_entries, Path(args.tape_root), args.sample_percent, args.sample_max)
+    tape_index = None
+    if args.ltfs_index:
+        if ltfs_tape_order is None:
+            log.warning("ltfs_tape_order indisponível, ignorando --ltfs-index")
+        else:
+            tape_index = ltfs_tape_order.parse_ltfs_index(Path(args.ltfs_index))
+
+    if catalog_store is not None:
+        sample_size = min(catalog_store.count("flush") * args.sample_percent // 100, args.sample_max)
+        tape_results = sample_verify_tape(
+            catalog_store.sample(max(sample_size, 1)), Path(args.tape_root), 100, args.sample_max,
+            tape_index=tape_index, index_prefix=args.index_prefix,
+        )
+        catalog_store.close()
+    else:
+        tape_results = sample_verify_tape(
+            catalog_entries, Path(args.tape_root), args.sample_percent, args.sample_max,
+            tape_index=tape_index, index_prefix=args.index_prefix,
+        )
     log.info("Tape sample: sampled=%d verified=%d mismatched=%d missing=%d",
              tape_results["sampled"], tape_results["verified"],
              tape_results["mismatched"], tape_results["missing"])
+    if "estimated_seeks" in tape_results:
+        log.info("Tape order: seeks estimados=%d (ordem do catálogo=%d)",
+                 tape_results["estimated_seeks"], tape_results["estimated_seeks_requested_order"])
 
     # Consolida resultados
     all_results = {
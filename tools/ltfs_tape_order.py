@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+ltfs_tape_order.py — Agenda leituras/restores na ordem física da fita LTFS.
+
+Restores e a amostragem de ``ltfs-catalog-verify`` escolhem arquivos na ordem
+do catálogo (ou aleatória), o que faz o drive LTO ir e voltar na fita a cada
+arquivo. Este módulo usa o índice XML exportado por ``ltfs_index_export.py``
+para descobrir a posição de cada arquivo (partição + bloco inicial do extent),
+ordena os pedidos por ``(partition, startblock)`` e lê tudo numa única
+passada para frente.
+
+Uso:
+  ltfs_tape_order.py plan    --index IDX.xml --paths lista.txt
+  ltfs_tape_order.py restore --index IDX.xml --paths lista.txt \
+      --tape-root /mnt/lto6 --dest /srv/restore
+
+Em ambos os modos o resultado é um JSON com ``estimated_seeks_requested_order``
+(seeks lendo na ordem pedida), ``estimated_seeks`` (seeks do plano ordenado) e,
+no restore, ``actual_seeks`` (seeks da sequência efetivamente lida).
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterable, Mapping
+
+log = logging.getLogger("ltfs-tape-order")
+
+# Tamanho de bloco padrão do LTFS (o índice não registra o blocksize)
+DEFAULT_BLOCKSIZE = 524288
+READ_CHUNK_SIZE = 1 << 20
+
+
+# ─── Modelo ────────────────────────────────────────────────────────────────────
+
+
+@dataclass(frozen=True)
+class Extent:
+    """Um extent de arquivo no índice LTFS."""
+
+    partition: str
+    startblock: int
+    byteoffset: int
+    bytecount: int
+    fileoffset: int
+
+    def end_block(self, blocksize: int = DEFAULT_BLOCKSIZE) -> int:
+        """Bloco seguinte ao último bloco ocupado pelo extent."""
+        used = self.byteoffset + self.bytecount
+        return self.startblock + max(1, -(-used // blocksize))
+
+
+@dataclass
+class TapeFile:
+    """Arquivo do índice com seus extents em ordem de ``fileoffset``."""
+
+    path: str
+    length: int
+    extents: list[Extent] = field(default_factory=list)
+
+    @property
+    def position(self) -> tuple[str, int]:
+        """Posição física do primeiro byte do arquivo ``(partition, startblock)``."""
+        if not self.extents:
+            # Arquivo vazio: não ocupa blocos, ordena no fim da partição de dados
+            return ("~", 0)
+        first = self.extents[0]
+        return (first.partition, first.startblock)
+
+
+@dataclass
+class TapeReadPlan:
+    """Plano de leitura ordenado pela posição na fita."""
+
+    ordered: list[TapeFile]
+    unindexed: list[str]
+    estimated_seeks_requested_order: int
+    estimated_seeks: int
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "requested": len(self.ordered) + len(self.unindexed),
+            "indexed": len(self.ordered),
+            "unindexed": len(self.unindexed),
+            "estimated_seeks_requested_order": self.estimated_seeks_requested_order,
+            "estimated_seeks": self.estimated_seeks,
+            "order": [f.path for f in self.ordered] + list(self.unindexed),
+        }
+
+
+# ─── Índice ────────────────────────────────────────────────────────────────────
+
+
+def normalize_tape_path(path: str) -> str:
+    """Normaliza caminho relativo à raiz do volume LTFS (sem ``/`` inicial)."""
+    return str(path).replace("\\", "/").strip("/")
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _child_text(elem: ET.Element, name: str, default: str = "") -> str:
+    for child in elem:
+        if _local(child.tag) == name:
+            return (child.text or default).strip()
+    return default
+
+
+def parse_ltfs_index(xml_path: Path) -> dict[str, TapeFile]:
+    """Extrai ``caminho -> TapeFile`` do XML ltfsindex.
+
+    Usa ``iterparse`` e limpa cada ``<file>`` processado, de modo que índices
+    com centenas de milhares de arquivos não ficam inteiros em memória. O
+    diretório raiz (nome do volume) não entra no caminho.
+    """
+    files: dict[str, TapeFile] = {}
+    tag_stack: list[str] = []
+    dir_names: list[str] = []
+    file_name = ""
+    file_length = 0
+    extents: list[Extent] = []
+
+    for event, elem in ET.iterparse(str(xml_path), events=("start", "end")):
+        tag = _local(elem.tag)
+        if event == "start":
+            tag_stack.append(tag)
+            if tag == "directory":
+                dir_names.append("")
+            elif tag == "file":
+                file_name, file_length, extents = "", 0, []
+            continue
+
+        tag_stack.pop()
+        parent = tag_stack[-1] if tag_stack else ""
+        if tag == "name" and parent == "directory" and dir_names:
+            dir_names[-1] = (elem.text or "").strip()
+        elif tag == "name" and parent == "file":
+            file_name = (elem.text or "").strip()
+        elif tag == "length" and parent == "file":
+            file_length = int((elem.text or "0").strip() or 0)
+        elif tag == "extent":
+            extents.append(
+                Extent(
+                    partition=_child_text(elem, "partition", "b"),
+                    startblock=int(_child_text(elem, "startblock", "0") or 0),
+                    byteoffset=int(_child_text(elem, "byteoffset", "0") or 0),
+                    bytecount=int(_child_text(elem, "bytecount", "0") or 0),
+                    fileoffset=int(_child_text(elem, "fileoffset", "0") or 0),
+                )
+            )
+            elem.clear()
+        elif tag == "file":
+            rel = "/".join([d for d in dir_names[1:] if d] + [file_name])
+            rel = normalize_tape_path(rel)
+            if rel:
+                files[rel] = TapeFile(
+                    path=rel,
+                    length=file_length,
+                    extents=sorted(extents, key=lambda e: e.fileoffset),
+                )
+            elem.clear()
+        elif tag == "directory":
+            dir_names.pop()
+            elem.clear()
+
+    log.info("Índice %s: %d arquivos com extents", xml_path, len(files))
+    return files
+
+
+# ─── Planejamento ──────────────────────────────────────────────────────────────
+
+
+def count_seeks(files: Iterable[TapeFile | None], blocksize: int = DEFAULT_BLOCKSIZE) -> int:
+    """Conta reposicionamentos da cabeça para ler ``files`` nessa ordem.
+
+    Cada extent que não começa exatamente onde o anterior terminou conta como
+    um seek (inclusive o posicionamento inicial). Entradas ``None`` (arquivo
+    sem posição conhecida) contam sempre como um seek.
+    """
+    seeks = 0
+    head: tuple[str, int] | None = None
+    for tape_file in files:
+        if tape_file is None:
+            seeks += 1
+            head = None
+            continue
+        for ext in tape_file.extents:
+            if head != (ext.partition, ext.startblock):
+                seeks += 1
+            head = (ext.partition, ext.end_block(blocksize))
+    return seeks
+
+
+def build_read_plan(
+    requested: Iterable[str],
+    index: Mapping[str, TapeFile],
+    blocksize: int = DEFAULT_BLOCKSIZE,
+) -> TapeReadPlan:
+    """Ordena os caminhos pedidos por ``(partition, startblock)``.
+
+    Caminhos duplicados são lidos uma única vez. Caminhos ausentes do índice
+    vão para ``unindexed`` e devem ser lidos depois da passada ordenada.
+    """
+    seen: set[str] = set()
+    in_request_order: list[TapeFile | None] = []
+    indexed: list[TapeFile] = []
+    unindexed: list[str] = []
+    for raw in requested:
+        rel = normalize_tape_path(raw)
+        if not rel or rel in seen:
+            continue
+        seen.add(rel)
+        tape_file = index.get(rel)
+        in_request_order.append(tape_file)
+        if tape_file is None:
+            unindexed.append(rel)
+        else:
+            indexed.append(tape_file)
+
+    ordered = sorted(indexed, key=lambda f: (f.position, f.path))
+    return TapeReadPlan(
+        ordered=ordered,
+        unindexed=unindexed,
+        estimated_seeks_requested_order=count_seeks(in_request_order, blocksize),
+        estimated_seeks=count_seeks(ordered + [None] * len(unindexed), blocksize),
+    )
+
+
+# ─── Execução ──────────────────────────────────────────────────────────────────
+
+
+def sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(READ_CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def run_read_plan(
+    plan: TapeReadPlan,
+    tape_root: Path,
+    handler: Callable[[str, Path], None],
+    blocksize: int = DEFAULT_BLOCKSIZE,
+) -> dict[str, Any]:
+    """Executa ``handler(rel_path, tape_path)`` para cada arquivo, na ordem do plano.
+
+    ``handler`` deve ler o arquivo inteiro de uma vez (streaming) — releituras
+    anulam a vantagem da ordenação. Exceções são registradas em ``errors`` e a
+    passada continua.
+    """
+    results: dict[str, Any] = {
+        "requested": len(plan.ordered) + len(plan.unindexed),
+        "read": 0,
+        "missing": 0,
+        "failed": 0,
+        "errors": [],
+        "estimated_seeks_requested_order": plan.estimated_seeks_requested_order,
+        "estimated_seeks": plan.estimated_seeks,
+    }
+    read_sequence: list[TapeFile | None] = []
+    steps: list[tuple[str, TapeFile | None]] = [(f.path, f) for f in plan.ordered]
+    steps += [(rel, None) for rel in plan.unindexed]
+
+    for rel, tape_file in steps:
+        tape_path = tape_root / rel
+        if not tape_path.is_file():
+            results["missing"] += 1
+            results["errors"].append(f"Arquivo não encontrado na fita: {tape_path}")
+            continue
+        read_sequence.append(tape_file)
+        try:
+            handler(rel, tape_path)
+            results["read"] += 1
+        except Exception as e:
+            results["failed"] += 1
+            results["errors"].append(f"Erro lendo {tape_path}: {e}")
+
+    results["actual_seeks"] = count_seeks(read_sequence, blocksize)
+    log.info(
+        "Passada concluída: read=%d missing=%d failed=%d seeks estimados=%d (ordem pedida=%d) reais=%d",
+        results["read"], results["missing"], results["failed"],
+        results["estimated_seeks"], results["estimated_seeks_requested_order"],
+        results["actual_seeks"],
+    )
+    return results
+
+
+def restore_files(
+    plan: TapeReadPlan,
+    tape_root: Path,
+    dest_root: Path,
+    expected_sha256: Mapping[str, str] | None = None,
+    blocksize: int = DEFAULT_BLOCKSIZE,
+) -> dict[str, Any]:
+    """Restaura os arquivos do plano para ``dest_root`` numa passada única.
+
+    Cada arquivo é copiado em streaming para ``.<nome>.part`` com SHA256
+    calculado inline e renomeado atomicamente. Se ``expected_sha256`` tiver o
+    caminho, divergências falham o arquivo e o parcial é removido. Caminhos
+    que resolvem fora de ``dest_root`` (``..``, absolutos) são recusados.
+    """
+    expected = {normalize_tape_path(k): v for k, v in (expected_sha256 or {}).items()}
+    restored: dict[str, str] = {}
+    dest_base = dest_root.resolve()
+
+    def _copy(rel: str, tape_path: Path) -> None:
+        target = (dest_base / rel).resolve()
+        if not target.is_relative_to(dest_base) or target == dest_base:
+            raise ValueError(f"caminho fora do destino: {rel}")
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f".{target.name}.part")
+        h = hashlib.sha256()
+        try:
+            with open(tape_path, "rb") as src, open(tmp, "wb") as dst:
+                for chunk in iter(lambda: src.read(READ_CHUNK_SIZE), b""):
+                    h.update(chunk)
+                    dst.write(chunk)
+            digest = h.hexdigest()
+            want = expected.get(rel)
+            if want and want != digest:
+                raise ValueError(f"SHA mismatch: expected={want[:12]}... actual={digest[:12]}...")
+            os.replace(tmp, target)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+        restored[rel] = digest
+
+    results = run_read_plan(plan, tape_root, _copy, blocksize)
+    results["sha256"] = restored
+    return results
+
+
+# ─── CLI ───────────────────────────────────────────────────────────────────────
+
+
+def _read_paths(paths_file: str) -> list[str]:
+    source = sys.stdin if paths_file == "-" else open(paths_file)
+    try:
+        return [line.strip() for line in source if line.strip()]
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+
+def main() -> int:
+    # Só na CLI: importado pela API (tape_routes), não pode tomar o logging raiz
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [ltfs-tape-order] %(levelname)s %(message)s",
+        datefmt="%Y-%m-%dT%H:%M:%S",
+    )
+    parser = argparse.ArgumentParser(description="Agenda leituras LTFS na ordem física da fita")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("plan", "restore"):
+        p = sub.add_parser(name)
+        p.add_argument("--index", required=True, help="XML ltfsindex exportado (ltfs_index_export.py)")
+        p.add_argument("--paths", required=True, help="Arquivo com um caminho por linha ('-' = stdin)")
+        p.add_argument("--blocksize", type=int, default=DEFAULT_BLOCKSIZE, help="Blocksize do volume LTFS")
+    restore = sub.choices["restore"]
+    restore.add_argument("--tape-root", required=True, help="Ponto de montagem LTFS")
+    restore.add_argument("--dest", required=True, help="Diretório de destino do restore")
+    args = parser.parse_args()
+
+    index = parse_ltfs_index(Path(args.index))
+    plan = build_read_plan(_read_paths(args.paths), index, args.blocksize)
+    if args.command == "plan":
+        print(json.dumps(plan.as_dict(), indent=2, ensure_ascii=False))
+        return 0
+
+    results = restore_files(plan, Path(args.tape_root), Path(args.dest), blocksize=args.blocksize)
+    results.pop("sha256", None)
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+    return 0 if not (results["missing"] or results["failed"]) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
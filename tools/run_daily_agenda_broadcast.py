@@ -316,6 +316,8 @@ def prepare_locution_and_audio(
             llm_parallel=int(audio_cfg.get("llm_parallel") or 3),
             sem_pauta_max_duration_seconds=sem_cap,
             sem_pauta_max_segments=sem_max_seg,
+            tts_parallel=int(audio_cfg.get("tts_parallel") or 0),
+            tts_cache_enabled=bool(audio_cfg.get("tts_cache", True)),
         )
         # Se o modular ficou muito abaixo do alvo e ainda há retries, alonga
         # com uma passagem extra de segmentos (re-planeja com alvo residual).
@@ -361,6 +363,9 @@ def prepare_locution_and_audio(
                 llm_parallel=int(audio_cfg.get("llm_parallel") or 3),
                 sem_pauta_max_duration_seconds=sem_cap,
                 sem_pauta_max_segments=sem_max_seg,
+                tts_parallel=int(audio_cfg.get("tts_parallel") or 0),
+                tts_cache_dir=work_dir / "tts_cache",
+                tts_cache_enabled=bool(audio_cfg.get("tts_cache", True)),
             )
             if extra.wav_path and extra.wav_path.exists():
                 from daily_agenda_segments import concat_wav_files
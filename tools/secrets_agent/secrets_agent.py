@@ -5,7 +5,9 @@ Funcionalidades:
  - Armazena/retorna secrets no Authentik via OAuth2 provider API
  - Cache local criptografado (LocalVault) como fallback automático
  - Retorna segredo sob requisição autenticada (X-API-KEY)
- - Mantém auditoria em memória e exporta métricas Prometheus
+ - Mantém auditoria persistente (SQLite rotacionado) e exporta métricas Prometheus
+ - Índice em memória dos providers do Authentik (sync periódico + TTL)
+ - Busca em lote (POST /secrets/bulk) para warm-up de clientes
  - Detecta tentativas de acesso suspeitas (exaustão/erros repetidos)
 
 Backend Authentik (prioridade para leitura/escrita):
@@ -26,9 +28,9 @@ import logging
 import os
 import re
 import secrets as _secrets_mod
+import sqlite3
 import threading
 import time
-from collections import deque
 from pathlib import Path
 from typing import Optional
 
@@ -68,11 +70,138 @@ AK_STATUS_GAUGE = Gauge("secrets_agent_authentik_status", "Authentik: 0=unavaila
 AK_STORE_SUCCESS = Counter("secrets_agent_ak_store_success_total", "Authentik store successes")
 AK_STORE_FAILURE = Counter("secrets_agent_ak_store_failure_total", "Authentik store failures")
 
-FAILED_IP: dict[str, list[float]] = {}
 FAIL_WINDOW = 60
 FAIL_THRESHOLD = int(os.environ.get("SECRETS_AGENT_FAIL_THRESHOLD", "5"))
 AUDIT_MAX = int(os.environ.get("SECRETS_AGENT_AUDIT_MAX", "5000"))
-AUDIT_EVENTS = deque(maxlen=AUDIT_MAX)
+
+
+AK_INDEX_HITS = Counter("secrets_agent_ak_index_hits_total", "Lookups served by the Authentik index")
+AK_INDEX_MISSES = Counter("secrets_agent_ak_index_misses_total", "Lookups that needed a live Authentik search")
+AK_INDEX_SIZE = Gauge("secrets_agent_ak_index_size", "Providers held in the Authentik index")
+AK_SYNC_SECONDS = Gauge("secrets_agent_ak_sync_seconds", "Duration of the last full Authentik sync")
+
+
+# ═══════════════════════════════════════════════════════════════
+#  AuthentikSecretIndex — cache em processo dos providers
+# ═══════════════════════════════════════════════════════════════
+
+class AuthentikSecretIndex:
+    """Índice client_id → (nome do provider, client_secret) em memória.
+
+    Alimentado por syncs completos periódicos (thread em background) e pelas
+    buscas ao vivo. Cada entrada tem TTL próprio. Com um sync completo dentro do
+    TTL o índice é quente e um client_id ausente é resposta negativa (um
+    provider criado fora deste agente aparece no próximo sync); sem ele, o miss
+    vai para a busca ao vivo. ``invalidate`` marca a chave como suja até a
+    próxima leitura ao vivo dela, e um sync iniciado antes da invalidação não a
+    reabilita.
+    """
+
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: dict[str, tuple[str, str, float]] = {}
+        self._dirty: dict[str, float] = {}
+        self._last_full_sync = 0.0
+
+    def _fresh(self, ts: float, now: float) -> bool:
+        return now - ts < self.ttl
+
+    def is_warm(self, now: Optional[float] = None) -> bool:
+        """True se o último sync completo ainda está dentro do TTL."""
+        return self._fresh(self._last_full_sync, time.time() if now is None else now)
+
+    def lookup(self, client_id: str) -> tuple[bool, Optional[str]]:
+        """``(resolvido, valor)``; ``resolvido=False`` pede busca ao vivo.
+
+        Miss com índice quente é resolvido como ``(True, None)``.
+        """
+        now = time.time()
+        with self._lock:
+            if client_id in self._dirty:
+                return False, None
+            entry = self._entries.get(client_id)
+            if entry is not None and self._fresh(entry[2], now):
+                return True, entry[1] or None
+            if entry is None and self.is_warm(now):
+                return True, None
+        return False, None
+
+    def fields(self, name: str, prefix: str) -> Optional[dict[str, str]]:
+        """Fields do secret pelo prefixo de client_id (None se o índice não serve).
+
+        Com índice quente, ``{}`` é resposta: o secret não existe.
+        """
+        needle = name.lower()
+        with self._lock:
+            if not self.is_warm():
+                return None
+            if any(cid == prefix or cid.startswith(prefix + "-") for cid in self._dirty):
+                return None
+            fields: dict[str, str] = {}
+            for cid, (provider_name, secret, _ts) in self._entries.items():
+                # Mesmo critério da busca do Authentik (search icontains no nome)
+                if not secret or needle not in provider_name.lower():
+                    continue
+                if cid == prefix:
+                    fields["password"] = secret
+                elif cid.startswith(prefix + "-") and cid[len(prefix) + 1:]:
+                    fields[cid[len(prefix) + 1:]] = secret
+            return fields
+
+    def update(self, items: list[dict], *, looked_up: str = "", prefix: bool = False) -> None:
+        """Registra providers vindos de uma busca ao vivo por ``looked_up``.
+
+        Só a chave consultada (com ``prefix``, também ``looked_up-*``) deixa de
+        ser suja; os demais resultados da busca por nome seguem sujos até
+        serem lidos ao vivo.
+        """
+        now = time.time()
+        with self._lock:
+            for item in items:
+                cid = item.get("client_id") or ""
+                if not cid:
+                    continue
+                self._entries[cid] = (item.get("name") or "", item.get("client_secret") or "", now)
+            if looked_up:
+                for cid in list(self._dirty):
+                    if cid == looked_up or (prefix and cid.startswith(looked_up + "-")):
+                        del self._dirty[cid]
+            AK_INDEX_SIZE.set(len(self._entries))
+
+    def replace_all(self, items: list[dict], started_at: float) -> None:
+        """Troca o índice pelo resultado de um sync completo iniciado em ``started_at``."""
+        now = time.time()
+        with self._lock:
+            fresh = {
+                item["client_id"]: (item.get("name") or "", item.get("client_secret") or "", now)
+                for item in items
+                if item.get("client_id")
+            }
+            self._entries = fresh
+            self._dirty = {cid: ts for cid, ts in self._dirty.items() if ts >= started_at}
+            self._last_full_sync = now
+            AK_INDEX_SIZE.set(len(fresh))
+
+    def invalidate(self, client_id: str) -> None:
+        with self._lock:
+            self._entries.pop(client_id, None)
+            self._dirty[client_id] = time.time()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._dirty.clear()
+            self._last_full_sync = 0.0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "dirty": len(self._dirty),
+                "last_full_sync": self._last_full_sync,
+                "ttl": self.ttl,
+            }
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -98,6 +227,10 @@ class AuthentikSecretManager:
         self._lock = threading.Lock()
         self._http = requests.Session()
         self._http.verify = False
+        self.index = AuthentikSecretIndex(float(os.environ.get("AUTHENTIK_CACHE_TTL", "300")))
+        self._sync_interval = float(os.environ.get("AUTHENTIK_SYNC_INTERVAL", "60"))
+        self._sync_stop = threading.Event()
+        self._sync_thread: Optional[threading.Thread] = None
 
     @property
     def _headers(self) -> dict:
@@ -169,23 +302,98 @@ class AuthentikSecretManager:
     def _get_invalidation_flow_pk(self) -> Optional[str]:
         return self._get_flow_pk("invalidation", "_invalidation_flow_pk")
 
-    # ── Leitura ──────────────────────────────────────────────
+    # ── Sync do índice ───────────────────────────────────────
 
-    def get_secret(self, name: str, field: str = "password") -> Optional[str]:
-        """Busca secret no Authentik por client_id exato."""
-        client_id = self._client_id(name, field)
-        try:
-            # search do Authentik indexa o campo name (icontains), não o
-            # client_id — buscar pelo nome e filtrar por client_id exato.
+    def sync_index(self) -> int:
+        """Lista todos os providers (paginado) e substitui o índice. Retorna o total."""
+        if not self._base or not self._token:
+            return 0
+        started = time.time()
+        items: list[dict] = []
+        page = 1
+        while True:
             r = self._http.get(
                 f"{self._base}/api/v3/providers/oauth2/",
                 headers=self._headers,
-                params={"search": name, "page_size": 20},
-                timeout=10,
+                params={"page": page, "page_size": 500},
+                timeout=30,
             )
             if r.status_code != 200:
+                raise RuntimeError(f"sync_status:{r.status_code}")
+            data = r.json()
+            items.extend(
+                {
+                    "client_id": item.get("client_id", ""),
+                    "name": item.get("name", ""),
+                    "client_secret": item.get("client_secret", ""),
+                }
+                for item in data.get("results", [])
+                if str(item.get("client_id", "")).startswith("secret-")
+            )
+            next_page = (data.get("pagination") or {}).get("next")
+            if not next_page:
+                break
+            page = int(next_page)
+        self.index.replace_all(items, started)
+        AK_SYNC_SECONDS.set(time.time() - started)
+        return len(items)
+
+    def _sync_loop(self) -> None:
+        while not self._sync_stop.is_set():
+            try:
+                total = self.sync_index()
+                logger.debug("Authentik: índice sincronizado (%d providers)", total)
+            except Exception as exc:
+                logger.warning("Authentik: sync do índice falhou: %s", exc)
+            self._sync_stop.wait(self._sync_interval)
+
+    def start_background_sync(self) -> None:
+        """Inicia a thread de sync periódico (idempotente)."""
+        if self._sync_interval <= 0 or not self._token:
+            return
+        if self._sync_thread and self._sync_thread.is_alive():
+            return
+        self._sync_stop.clear()
+        self._sync_thread = threading.Thread(target=self._sync_loop, daemon=True, name="authentik-sync")
+        self._sync_thread.start()
+
+    def stop_background_sync(self) -> None:
+        self._sync_stop.set()
+
+    def invalidate(self, name: str, field: str = "password") -> None:
+        self.index.invalidate(self._client_id(name, field))
+
+    def _search(self, name: str, page_size: int, looked_up: str, prefix: bool = False) -> Optional[list[dict]]:
+        """Busca ao vivo por nome; alimenta o índice e limpa a chave ``looked_up``."""
+        # search do Authentik indexa o campo name (icontains), não o
+        # client_id — buscar pelo nome e filtrar por client_id exato.
+        r = self._http.get(
+            f"{self._base}/api/v3/providers/oauth2/",
+            headers=self._headers,
+            params={"search": name, "page_size": page_size},
+            timeout=10,
+        )
+        if r.status_code != 200:
+            return None
+        results = r.json().get("results", [])
+        self.index.update(results, looked_up=looked_up, prefix=prefix)
+        return results
+
+    # ── Leitura ──────────────────────────────────────────────
+
+    def get_secret(self, name: str, field: str = "password") -> Optional[str]:
+        """Busca secret por client_id exato (índice em memória, senão Authentik)."""
+        client_id = self._client_id(name, field)
+        resolved, value = self.index.lookup(client_id)
+        if resolved:
+            AK_INDEX_HITS.inc()
+            return value
+        AK_INDEX_MISSES.inc()
+        try:
+            results = self._search(name, 20, client_id)
+            if results is None:
                 return None
-            for item in r.json().get("results", []):
+            for item in results:
                 if item.get("client_id") == client_id:
                     return item.get("client_secret") or None
         except Exception as exc:
@@ -195,17 +403,17 @@ class AuthentikSecretManager:
     def get_secret_fields(self, name: str) -> dict[str, str]:
         """Retorna todos os fields de um secret (busca por prefixo de client_id)."""
         prefix = self._client_id(name, "password")
+        cached = self.index.fields(name, prefix)
+        if cached is not None:
+            AK_INDEX_HITS.inc()
+            return cached
+        AK_INDEX_MISSES.inc()
         try:
-            r = self._http.get(
-                f"{self._base}/api/v3/providers/oauth2/",
-                headers=self._headers,
-                params={"search": name, "page_size": 50},
-                timeout=10,
-            )
-            if r.status_code != 200:
+            results = self._search(name, 50, prefix, prefix=True)
+            if results is None:
                 return {}
             fields: dict[str, str] = {}
-            for item in r.json().get("results", []):
+            for item in results:
                 cid = item.get("client_id", "")
                 secret = item.get("client_secret")
                 if not secret:
@@ -288,6 +496,9 @@ class AuthentikSecretManager:
         except Exception as exc:
             AK_STORE_FAILURE.inc()
             return False, client_id, f"exception:{exc}"
+        finally:
+            # Depois da escrita (ok ou não): a próxima leitura vai ao Authentik
+            self.index.invalidate(client_id)
 
     # ── Remoção ──────────────────────────────────────────────
 
@@ -317,6 +528,8 @@ class AuthentikSecretManager:
             return False, "not_found"
         except Exception as exc:
             return False, f"exception:{exc}"
+        finally:
+            self.index.invalidate(client_id)
 
     # ── Listagem ─────────────────────────────────────────────
 
@@ -353,6 +566,7 @@ class AuthentikSecretManager:
             "authentik_status": "available" if available else "unavailable",
             "authentik_url": self._base,
             "token_configured": bool(self._token),
+            "index": self.index.stats(),
         }
 
 
@@ -494,6 +708,224 @@ class LocalVault:
 local_vault = LocalVault(LOCAL_VAULT_DIR, LOCAL_VAULT_PASSFILE)
 
 
+# ═══════════════════════════════════════════════════════════════
+#  Auditoria persistente e janela de falhas por IP
+# ═══════════════════════════════════════════════════════════════
+
+AUDIT_DB_PATH = APP_DIR / "audit.db"
+AUDIT_MAX_BYTES = int(os.environ.get("SECRETS_AGENT_AUDIT_MAX_BYTES", str(50 * 1024 * 1024)))
+AUDIT_KEEP_SEGMENTS = int(os.environ.get("SECRETS_AGENT_AUDIT_KEEP", "5"))
+FAIL_BUCKETS = int(os.environ.get("SECRETS_AGENT_FAIL_BUCKETS", "12"))
+
+AUDIT_ROTATIONS = Counter("secrets_agent_audit_rotations_total", "Audit store segment rotations")
+
+_AUDIT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS audit (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts INTEGER NOT NULL,
+    ip TEXT NOT NULL,
+    action TEXT NOT NULL,
+    secret_id TEXT NOT NULL,
+    result TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_audit_ts ON audit (ts);
+CREATE INDEX IF NOT EXISTS idx_audit_ip_ts ON audit (ip, ts);
+CREATE INDEX IF NOT EXISTS idx_audit_secret_ts ON audit (secret_id, ts);
+"""
+
+
+class AuditStore:
+    """Trilha de auditoria append-only em SQLite, rotacionada por tamanho.
+
+    O segmento ativo é ``audit.db``; ao passar de ``max_bytes`` ele vira
+    ``audit.db.1`` (os anteriores deslocam para ``.2``, ``.3``...) e os mais
+    antigos que ``keep`` são apagados. Consultas por IP, secret e intervalo
+    de tempo usam índices e percorrem os segmentos do mais novo ao mais
+    antigo até completar ``limit``.
+    """
+
+    _CHECK_EVERY = 256  # appends entre verificações de tamanho
+
+    def __init__(self, path: Path, max_bytes: int = AUDIT_MAX_BYTES, keep: int = AUDIT_KEEP_SEGMENTS) -> None:
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.keep = max(0, keep)
+        self._lock = threading.Lock()
+        self._since_check = 0
+        self._conn = self._open(self.path)
+
+    @staticmethod
+    def _open(path: Path) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_AUDIT_SCHEMA)
+        return conn
+
+    def _segments(self) -> list[Path]:
+        rotated = [self.path.with_name(f"{self.path.name}.{n}") for n in range(1, self.keep + 1)]
+        return [self.path] + [p for p in rotated if p.exists()]
+
+    def _size(self) -> int:
+        total = 0
+        for suffix in ("", "-wal"):
+            try:
+                total += os.path.getsize(f"{self.path}{suffix}")
+            except OSError:
+                pass
+        return total
+
+    def _rotate(self) -> None:
+        self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        self._conn.close()
+        for n in range(self.keep, 0, -1):
+            src = self.path if n == 1 else self.path.with_name(f"{self.path.name}.{n - 1}")
+            dst = self.path.with_name(f"{self.path.name}.{n}")
+            if src.exists():
+                os.replace(src, dst)
+        if self.keep == 0:
+            self.path.unlink(missing_ok=True)
+        for suffix in ("-wal", "-shm"):
+            Path(f"{self.path}{suffix}").unlink(missing_ok=True)
+        self._conn = self._open(self.path)
+        AUDIT_ROTATIONS.inc()
+        logger.info("Auditoria rotacionada: %s", self.path)
+
+    def append(self, ts: int, ip: str, action: str, secret_id: str, result: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO audit (ts, ip, action, secret_id, result) VALUES (?, ?, ?, ?, ?)",
+                (ts, ip, action, secret_id, result),
+            )
+            self._since_check += 1
+            if self._since_check >= self._CHECK_EVERY:
+                self._since_check = 0
+                if self._size() > self.max_bytes:
+                    self._rotate()
+
+    def query(
+        self,
+        limit: int = 50,
+        ip: Optional[str] = None,
+        secret_id: Optional[str] = None,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+    ) -> list[tuple]:
+        """Eventos mais recentes primeiro, como ``(ts, ip, action, secret_id, result)``."""
+        clauses, params = [], []
+        for column, op, value in (
+            ("ip", "=", ip), ("secret_id", "=", secret_id), ("ts", ">=", since), ("ts", "<=", until),
+        ):
+            if value is not None:
+                clauses.append(f"{column} {op} ?")
+                params.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = f"SELECT ts, ip, action, secret_id, result FROM audit {where} ORDER BY ts DESC, id DESC LIMIT ?"
+        rows: list[tuple] = []
+        with self._lock:
+            for segment in self._segments():
+                if len(rows) >= limit:
+                    break
+                if segment == self.path:
+                    conn = self._conn
+                else:
+                    conn = sqlite3.connect(f"file:{segment}?mode=ro", uri=True)
+                try:
+                    rows.extend(conn.execute(sql, (*params, limit - len(rows))).fetchall())
+                finally:
+                    if conn is not self._conn:
+                        conn.close()
+        return rows
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM audit").fetchone()[0]
+
+    def clear(self) -> None:
+        """Descarta todos os segmentos (manutenção/testes; a API nunca apaga)."""
+        with self._lock:
+            self._conn.execute("DELETE FROM audit")
+            for segment in self._segments()[1:]:
+                segment.unlink(missing_ok=True)
+            self._since_check = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class FailureWindow:
+    """Contador de falhas por IP numa janela deslizante de buckets fixos.
+
+    A janela de ``window`` segundos é dividida em ``buckets`` fatias; cada IP
+    guarda um anel de contadores e o total corrente. Registrar e consultar
+    avançam no máximo ``buckets`` posições, então o custo por chamada é
+    constante, independente de quantas falhas o IP acumulou. IPs ociosos são
+    descartados numa varredura amortizada.
+    """
+
+    def __init__(self, window: float = 60, buckets: int = 12) -> None:
+        self.window = float(window)
+        self.buckets = max(1, buckets)
+        self._width = self.window / self.buckets
+        self._lock = threading.Lock()
+        self._clients: dict[str, list] = {}  # ip -> [contadores, último bucket, total]
+        self._sweep_at = 1024
+
+    def _advance(self, state: list, bucket: int) -> None:
+        counts, last = state[0], state[1]
+        steps = bucket - last
+        if steps <= 0:
+            return
+        if steps >= self.buckets:
+            counts[:] = [0] * self.buckets
+            state[2] = 0
+        else:
+            for b in range(last + 1, bucket + 1):
+                slot = b % self.buckets
+                state[2] -= counts[slot]
+                counts[slot] = 0
+        state[1] = bucket
+
+    def record(self, ip: str, now: Optional[float] = None) -> int:
+        """Registra uma falha e retorna o total de falhas na janela."""
+        bucket = int((time.time() if now is None else now) // self._width)
+        with self._lock:
+            state = self._clients.get(ip)
+            if state is None:
+                state = self._clients[ip] = [[0] * self.buckets, bucket, 0]
+                if len(self._clients) > self._sweep_at:
+                    self._sweep(bucket)
+            self._advance(state, bucket)
+            state[0][state[1] % self.buckets] += 1
+            state[2] += 1
+            return state[2]
+
+    def count(self, ip: str, now: Optional[float] = None) -> int:
+        bucket = int((time.time() if now is None else now) // self._width)
+        with self._lock:
+            state = self._clients.get(ip)
+            if state is None:
+                return 0
+            self._advance(state, bucket)
+            return state[2]
+
+    def _sweep(self, bucket: int) -> None:
+        stale = [ip for ip, state in self._clients.items() if bucket - state[1] >= self.buckets]
+        for ip in stale:
+            del self._clients[ip]
+        self._sweep_at = max(1024, 2 * len(self._clients))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clients.clear()
+            self._sweep_at = 1024
+
+
+AUDIT_EVENTS = AuditStore(AUDIT_DB_PATH)
+FAILED_IP = FailureWindow(FAIL_WINDOW, FAIL_BUCKETS)
+
+
 # ═══════════════════════════════════════════════════════════════
 #  FastAPI App
 # ═══════════════════════════════════════════════════════════════
@@ -520,6 +952,7 @@ def startup_event() -> None:
             info = ak_manager.get_info()
             if ok:
                 logger.info("Authentik disponível: %s", info["authentik_url"])
+                ak_manager.start_background_sync()
             else:
                 logger.warning(
                     "Authentik indisponível: url=%s, token=%s. "
@@ -541,15 +974,21 @@ def init_db() -> None:
 
 def audit_log(ip: str, action: str, secret_id: str, result: str) -> None:
     ts = int(time.time())
-    AUDIT_EVENTS.append((ts, ip, action, secret_id, result))
+    try:
+        AUDIT_EVENTS.append(ts, ip, action, secret_id, result)
+    except sqlite3.Error as exc:
+        logger.error("Falha ao gravar auditoria (%s %s %s): %s", action, secret_id, result, exc)
 
 
 def check_rate(ip: str) -> int:
-    now = time.time()
-    times = FAILED_IP.get(ip, [])
-    times = [t for t in times if now - t <= FAIL_WINDOW]
-    FAILED_IP[ip] = times
-    return len(times)
+    """Falhas do IP na janela de ``FAIL_WINDOW`` segundos."""
+    return FAILED_IP.count(ip)
+
+
+def register_failure(ip: str) -> None:
+    """Conta uma falha de autenticação e alerta acima de ``FAIL_THRESHOLD``."""
+    if FAILED_IP.record(ip) > FAIL_THRESHOLD:
+        LEAK_ALERTS.inc()
 
 
 def parse_local_ref(item_id: str, default_field: str = "password") -> tuple[str, str]:
@@ -560,6 +999,44 @@ def parse_local_ref(item_id: str, default_field: str = "password") -> tuple[str,
     return name, field
 
 
+def resolve_secret(item_id: str, field: str = "password") -> Optional[dict]:
+    """Resolve um secret: Authentik (field exato, depois todos os fields) e LocalVault.
+
+    Retorna o corpo de resposta de ``GET /secrets/{item_id}`` ou None.
+    """
+    if item_id.startswith("local:"):
+        name, local_field = parse_local_ref(item_id, field)
+        value = ak_manager.get_secret(name, local_field)
+        if value is None:
+            value = local_vault.get(name, local_field)
+        if value is None:
+            return None
+        return {"id": item_id, "value": value}
+
+    # 1. Tenta Authentik — field exato
+    value = ak_manager.get_secret(item_id, field)
+    if value is not None:
+        return {"id": item_id, "value": value, "source": "authentik"}
+
+    # 2. Tenta Authentik — todos os fields (secrets com múltiplos campos)
+    fields = ak_manager.get_secret_fields(item_id)
+    if fields:
+        response = {"id": item_id, "fields": fields, "source": "authentik"}
+        if field in fields:
+            # Clientes legados leem apenas "value" — sem isso, uma falha
+            # transiente no passo 1 (busca por field exato) faz o passo 2
+            # responder 200 OK com "value" ausente, e o caller silenciosamente
+            # trata como secret vazio em vez de erro.
+            response["value"] = fields[field]
+        return response
+
+    # 3. Fallback: LocalVault
+    local_val = local_vault.get(item_id, field)
+    if local_val is not None:
+        return {"id": item_id, "value": local_val, "source": "local_vault"}
+    return None
+
+
 # ─── Endpoints ────────────────────────────────────────────────
 
 @app.get("/metrics")
@@ -662,9 +1139,7 @@ def get_local_secret(request: Request, name: str, field: str = "password"):
     if key != API_KEY:
         ACCESS_FAILURE.inc()
         audit_log(ip, "fetch_local", name, "denied")
-        FAILED_IP.setdefault(ip, []).append(time.time())
-        if check_rate(ip) > FAIL_THRESHOLD:
-            LEAK_ALERTS.inc()
+        register_failure(ip)
         raise HTTPException(status_code=401, detail="unauthorized")
 
     value = local_vault.get(name, field)
@@ -707,64 +1182,84 @@ def get_secret(request: Request, item_id: str, field: str = "password"):
     if key != API_KEY:
         ACCESS_FAILURE.inc()
         audit_log(ip, "fetch", item_id, "denied")
-        FAILED_IP.setdefault(ip, []).append(time.time())
-        if check_rate(ip) > FAIL_THRESHOLD:
-            LEAK_ALERTS.inc()
+        register_failure(ip)
         raise HTTPException(status_code=401, detail="unauthorized")
 
-    if item_id.startswith("local:"):
-        name, local_field = parse_local_ref(item_id, field)
-        value = ak_manager.get_secret(name, local_field)
-        if value is None:
-            value = local_vault.get(name, local_field)
-        if value is None:
-            ACCESS_FAILURE.inc()
-            audit_log(ip, "fetch", item_id, "not_found")
-            raise HTTPException(status_code=404, detail="secret not found")
-        ACCESS_SUCCESS.inc()
-        audit_log(ip, "fetch", item_id, "ok")
-        return {"id": item_id, "value": value}
+    resolved = resolve_secret(item_id, field)
+    if resolved is None:
+        ACCESS_FAILURE.inc()
+        audit_log(ip, "fetch", item_id, "not_found")
+        raise HTTPException(status_code=404, detail="secret not found")
+    ACCESS_SUCCESS.inc()
+    audit_log(ip, "fetch", item_id, "ok")
+    return resolved
 
-    # 1. Tenta Authentik — field exato
-    value = ak_manager.get_secret(item_id, field)
-    if value is not None:
-        ACCESS_SUCCESS.inc()
-        audit_log(ip, "fetch", item_id, "ok")
-        return {"id": item_id, "value": value, "source": "authentik"}
 
-    # 2. Tenta Authentik — todos os fields (secrets com múltiplos campos)
-    fields = ak_manager.get_secret_fields(item_id)
-    if fields:
-        ACCESS_SUCCESS.inc()
-        audit_log(ip, "fetch", item_id, "ok")
-        response = {"id": item_id, "fields": fields, "source": "authentik"}
-        if field in fields:
-            # Clientes legados leem apenas "value" — sem isso, uma falha
-            # transiente no passo 1 (busca por field exato) faz o passo 2
-            # responder 200 OK com "value" ausente, e o caller silenciosamente
-            # trata como secret vazio em vez de erro.
-            response["value"] = fields[field]
-        return response
+class BulkSecretRef(BaseModel):
+    name: str
+    field: str = "password"
 
-    # 3. Fallback: LocalVault
-    local_val = local_vault.get(item_id, field)
-    if local_val is not None:
-        ACCESS_SUCCESS.inc()
-        audit_log(ip, "fetch", item_id, "ok")
-        return {"id": item_id, "value": local_val, "source": "local_vault"}
 
-    ACCESS_FAILURE.inc()
-    audit_log(ip, "fetch", item_id, "not_found")
-    raise HTTPException(status_code=404, detail="secret not found")
+class BulkSecretRequest(BaseModel):
+    items: list[BulkSecretRef]
+
+
+BULK_MAX_ITEMS = int(os.environ.get("SECRETS_AGENT_BULK_MAX", "100"))
+
+
+@app.post("/secrets/bulk")
+def get_secrets_bulk(request: Request, payload: BulkSecretRequest):
+    """Resolve vários secrets numa chamada (warm-up de clientes no startup).
+
+    Cada item segue a mesma resolução de ``GET /secrets/{item_id}``; itens não
+    encontrados voltam com ``error`` em vez de derrubar a requisição inteira.
+    """
+    ip = request.client.host
+    key = request.headers.get("x-api-key", "")
+    if key != API_KEY:
+        ACCESS_FAILURE.inc()
+        audit_log(ip, "fetch_bulk", f"{len(payload.items)} items", "denied")
+        register_failure(ip)
+        raise HTTPException(status_code=401, detail="unauthorized")
+    if len(payload.items) > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"max {BULK_MAX_ITEMS} items per request")
+
+    results = []
+    found = 0
+    for ref in payload.items:
+        resolved = resolve_secret(ref.name, ref.field)
+        if resolved is None:
+            ACCESS_FAILURE.inc()
+            audit_log(ip, "fetch_bulk", ref.name, "not_found")
+            results.append({"name": ref.name, "field": ref.field, "error": "not_found"})
+            continue
+        ACCESS_SUCCESS.inc()
+        audit_log(ip, "fetch_bulk", ref.name, "ok")
+        found += 1
+        results.append({"name": ref.name, "field": ref.field, **resolved})
+    return {"count": len(results), "found": found, "items": results}
 
 
 @app.get("/audit/recent")
-def recent_audit(limit: int = 50):
+def recent_audit(
+    request: Request,
+    limit: int = 50,
+    ip: Optional[str] = None,
+    secret_id: Optional[str] = None,
+    since: Optional[int] = None,
+    until: Optional[int] = None,
+):
+    """Eventos mais recentes, filtráveis por IP, secret e intervalo (epoch s)."""
+    client_ip = request.client.host
+    if request.headers.get("x-api-key", "") != API_KEY:
+        ACCESS_FAILURE.inc()
+        audit_log(client_ip, "audit_recent", "-", "denied")
+        register_failure(client_ip)
+        raise HTTPException(status_code=401, detail="unauthorized")
     safe_limit = max(0, min(limit, AUDIT_MAX))
     if safe_limit == 0:
         return {"rows": []}
-    rows = list(AUDIT_EVENTS)[-safe_limit:]
-    rows.reverse()
+    rows = AUDIT_EVENTS.query(safe_limit, ip=ip, secret_id=secret_id, since=since, until=until)
     return {"rows": rows}
 
 
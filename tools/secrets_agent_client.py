@@ -4,14 +4,39 @@ Exemplo:
   client = SecretsAgentClient("http://localhost:8088", api_key="...")
   secret = client.get_secret("shared-jira-credentials")
   local  = client.get_local_secret("shared/telegram_bot_token", field="token")
+  client.prefetch([("shared/telegram_bot_token", "token"), ("shared/database_url", "url")])
 """
 import httpx
 import logging
-from typing import Optional, Dict, Any
+import os
+import threading
+import time
+from typing import Optional, Dict, Any, Iterable, Tuple
 from urllib.parse import quote
 
 logger = logging.getLogger(__name__)
 
+# Valores aquecidos via prefetch, compartilhados por todos os clients do processo.
+# Chave (agente, endpoint, nome, field): "local" só guarda o que veio do
+# LocalVault (mesma resposta de /secrets/local); "resolved" guarda a resolução
+# completa de /secrets/{id} (Authentik primeiro).
+_PREFETCH_TTL = float(os.environ.get("SECRETS_PREFETCH_TTL", "300"))
+_prefetched: Dict[Tuple[str, str, str, str], Tuple[str, float]] = {}
+_prefetched_lock = threading.Lock()
+
+
+def _prefetched_value(base_url: str, endpoint: str, name: str, field: str) -> Optional[str]:
+    with _prefetched_lock:
+        entry = _prefetched.get((base_url, endpoint, name, field))
+    if entry and time.time() - entry[1] < _PREFETCH_TTL:
+        return entry[0]
+    return None
+
+
+def clear_prefetched() -> None:
+    with _prefetched_lock:
+        _prefetched.clear()
+
 
 class SecretsAgentClient:
     """Cliente para acessar o Secrets Agent.
@@ -36,8 +61,46 @@ class SecretsAgentClient:
             logger.warning(f"SecretsAgent list_secrets failed: {e}")
             return None
     
+    def prefetch(self, refs: Iterable[Tuple[str, str]]) -> int:
+        """Busca vários ``(nome, field)`` numa única chamada e aquece o cache do processo.
+
+        Retorna quantos foram encontrados. Até expirar ``SECRETS_PREFETCH_TTL``
+        ``get_secret``/``get_secret_field`` servem esses valores sem ida ao
+        agente, e ``get_local_secret`` serve os que vieram do LocalVault.
+        """
+        items = [{"name": name, "field": field} for name, field in refs]
+        if not items:
+            return 0
+        try:
+            resp = self.client.post(
+                f"{self.base_url}/secrets/bulk",
+                json={"items": items},
+                headers={"X-API-KEY": self.api_key},
+            )
+            resp.raise_for_status()
+            data = resp.json()
+        except Exception as e:
+            logger.warning(f"SecretsAgent prefetch failed: {e}")
+            return 0
+        now = time.time()
+        found = 0
+        with _prefetched_lock:
+            for item in data.get("items", []):
+                value = item.get("value")
+                if not value:
+                    continue
+                ref = (item["name"], item["field"])
+                _prefetched[(self.base_url, "resolved", *ref)] = (value, now)
+                if item.get("source") == "local_vault":
+                    _prefetched[(self.base_url, "local", *ref)] = (value, now)
+                found += 1
+        return found
+
     def get_local_secret(self, name: str, field: str = "password") -> Optional[str]:
         """Busca um secret armazenado localmente no Secrets Agent."""
+        cached = _prefetched_value(self.base_url, "local", name, field)
+        if cached is not None:
+            return cached
         try:
             encoded_name = quote(name, safe="")
             resp = self.client.get(
@@ -58,6 +121,9 @@ class SecretsAgentClient:
         val = self.get_local_secret(item_id, field=field)
         if val:
             return val
+        cached = _prefetched_value(self.base_url, "resolved", item_id, field)
+        if cached is not None:
+            return cached
         # 2. Fallback: endpoint Bitwarden
         try:
             resp = self.client.get(
@@ -77,6 +143,9 @@ class SecretsAgentClient:
         val = self.get_local_secret(item_id, field=field_name)
         if val:
             return val
+        cached = _prefetched_value(self.base_url, "resolved", item_id, field_name)
+        if cached is not None:
+            return cached
         # 2. Fallback: BW endpoint (valor pode ser JSON com campos)
         try:
             resp = self.client.get(
@@ -9,12 +9,35 @@ import os
 
 logger = logging.getLogger(__name__)
 
+# Secrets lidos no import do telegram_bot (token e canal de trading)
+TELEGRAM_BOT_SECRET_REFS: list[tuple[str, str]] = [
+    ("shared/telegram_bot_token", "password"),
+    ("shared/telegram_bot_token", "token"),
+    ("shared/trading_telegram_chat_id", "chat_id"),
+    ("authentik/shared/trading_telegram_chat_id", "chat_id"),
+    ("shared/trading_telegram_chat_id", "password"),
+    ("authentik/shared/trading_telegram_chat_id", "password"),
+    ("shared/trading_telegram_thread_id", "thread_id"),
+    ("authentik/shared/trading_telegram_thread_id", "thread_id"),
+    ("shared/trading_telegram_thread_id", "password"),
+    ("authentik/shared/trading_telegram_thread_id", "password"),
+]
+
 def _get_client():
     """Retorna client autenticado do Secrets Agent."""
     from tools.secrets_agent_client import get_secrets_agent_client
     return get_secrets_agent_client()
 
 
+def prefetch(refs: list[tuple[str, str]]) -> int:
+    """Aquece numa única chamada os secrets ``(nome, field)`` usados no startup."""
+    client = _get_client()
+    try:
+        return client.prefetch(refs)
+    finally:
+        client.close()
+
+
 def get_field(name: str, field: str = "password") -> str:
     """Busca um secret pelo nome e campo no Secrets Agent."""
     client = _get_client()
@@ -16,6 +16,7 @@ import shlex
 import subprocess
 import sys
 import tempfile
+import threading
 import time
 import wave
 from pathlib import Path
@@ -781,6 +782,10 @@ def run_spd_say(
     return subprocess.run(cmd, check=False, capture_output=True, text=True)
 
 
+# Sínteses paralelas (blocos da agenda) não podem baixar a mesma voz ao mesmo tempo
+_PIPER_VOICE_LOCK = threading.Lock()
+
+
 def ensure_piper_voice(voice_name: str, data_dir: Path) -> tuple[Path, Path]:
     if not PIPER_VENV_PYTHON.exists():
         raise RuntimeError(
@@ -788,12 +793,22 @@ def ensure_piper_voice(voice_name: str, data_dir: Path) -> tuple[Path, Path]:
             "Crie o venv .venv-tts-piper e instale piper-tts."
         )
 
-    data_dir.mkdir(parents=True, exist_ok=True)
     model_path = data_dir / f"{voice_name}.onnx"
     config_path = data_dir / f"{voice_name}.onnx.json"
     if model_path.exists() and config_path.exists():
         return model_path, config_path
+    with _PIPER_VOICE_LOCK:
+        # Outra thread pode ter concluído o download enquanto esperávamos
+        if model_path.exists() and config_path.exists():
+            return model_path, config_path
+        _download_piper_voice(voice_name, data_dir)
+    if not model_path.exists() or not config_path.exists():
+        raise RuntimeError(f"Download da voz Piper falhou para {voice_name}")
+    return model_path, config_path
 
+
+def _download_piper_voice(voice_name: str, data_dir: Path) -> None:
+    data_dir.mkdir(parents=True, exist_ok=True)
     subprocess.run(
         [
             str(PIPER_VENV_PYTHON),
@@ -807,9 +822,6 @@ def ensure_piper_voice(voice_name: str, data_dir: Path) -> tuple[Path, Path]:
         capture_output=True,
         text=True,
     )
-    if not model_path.exists() or not config_path.exists():
-        raise RuntimeError(f"Download da voz Piper falhou para {voice_name}")
-    return model_path, config_path
 
 
 def write_wav_file(path: Path, pcm_data: bytes) -> None:
@@ -11,6 +11,17 @@ Uso:
   python3 tools/wiki_bulk_publish.py --phase1-only      # só gera a fila
   python3 tools/wiki_bulk_publish.py --phase2-only      # só processa fila existente
   python3 tools/wiki_bulk_publish.py --dry-run          # mostra o que seria publicado sem publicar
+  python3 tools/wiki_bulk_publish.py --force            # republica mesmo sem mudança de conteúdo
+
+Republicação incremental:
+  - a fase 1 reaproveita path/título/tags da fila anterior quando o .md não mudou
+    (sem chamar o Ollama);
+  - a fase 2 compara o hash do conteúdo com o manifesto de publicação e pula as
+    páginas idênticas sem nenhum round trip; os ids vêm de uma única listagem.
+    O manifesto e o hash são os mesmos do WikiAgent
+    (specialized_agents/wiki_manifest.py, WIKI_MANIFEST_PATH);
+  - as páginas restantes são publicadas em paralelo (--workers) dentro de um
+    orçamento de taxa (--max-rate publicações/s), ainda sujeito ao back-off de GPU.
 
 Thresholds de GPU (ajustados automaticamente durante execução):
   < 50% util  → delay 1s  (acelera)
@@ -20,12 +31,15 @@ Thresholds de GPU (ajustados automaticamente durante execução):
 """
 
 import argparse
+import hashlib
 import json
 import logging
 import os
 import re
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
 from urllib.error import HTTPError, URLError
@@ -34,6 +48,12 @@ from urllib.request import Request, urlopen
 # ─── Configuração ────────────────────────────────────────────────────────────
 
 WORKSPACE       = Path("/workspace/eddie-auto-dev")
+ROOT            = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from specialized_agents.wiki_manifest import WikiPageManifest, page_fingerprint  # noqa: E402
+
 WIKI_GQL        = "http://192.168.15.2:3009/graphql"
 OLLAMA_API      = "http://192.168.15.2:11437/api/generate"
 OLLAMA_MODEL    = "mistral:7b"
@@ -41,6 +61,11 @@ GPU_EXPORTER    = "http://192.168.15.2:9835/metrics"
 GPU_CHECK_EVERY = 5          # checar GPU a cada N publicações
 LOG_FILE        = WORKSPACE / "logs" / f"wiki_bulk_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
 QUEUE_FILE      = WORKSPACE / "logs" / "wiki_publish_queue.jsonl"
+MANIFEST_FILE   = Path(os.getenv("WIKI_MANIFEST_PATH", str(WORKSPACE / "data" / "wiki" / "page_manifest.json")))
+WIKI_LOCALE     = "pt"
+PUBLISH_WORKERS = 4          # publicações simultâneas
+MAX_PUBLISH_RATE = 2.0       # publicações iniciadas por segundo (orçamento global)
+QUEUE_FLUSH_EVERY = 20       # regrava a fila a cada N mudanças de status
 
 
 def _load_wiki_token() -> str:
@@ -216,10 +241,40 @@ def ollama_generate_metadata(filename, preview, used_paths):
         return {"path": f"docs/{slug}", "title": Path(filename).stem, "description": "", "tags": []}
 
 
+def sha256_text(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def content_hash(item):
+    """Hash do que vai para a wiki (corpo + metadados), no formato do WikiAgent."""
+    return page_fingerprint(item["title"], item["content"], item["tags"], item["description"])
+
+
+def load_queue(path=QUEUE_FILE):
+    if not path.exists():
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def write_queue(queue, path=QUEUE_FILE):
+    """Grava a fila inteira de forma atômica."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        for item in queue:
+            f.write(json.dumps(item, ensure_ascii=False) + "\n")
+    tmp.replace(path)
+
+
 def phase1_build_queue(md_files, dry_run=False):
     log.info("═══ FASE 1 — Gerando fila via Ollama (%d arquivos) ═══", len(md_files))
     queue = []
     used_paths = set()
+    # Metadados da fila anterior, reaproveitados quando o arquivo não mudou
+    previous = {item["source_file"]: item for item in load_queue() if item.get("source_sha256")}
+    claimed = set()  # paths atribuídos nesta execução
+    reused = 0
 
     # Carregar paths já na wiki para evitar duplicatas
     try:
@@ -237,18 +292,27 @@ def phase1_build_queue(md_files, dry_run=False):
         except Exception:
             content = ""
 
-        preview = content[:500]
-        meta = ollama_generate_metadata(rel, preview, used_paths)
-
-        # Garantir path único
-        base_path = meta["path"]
-        candidate = base_path
-        suffix = 2
-        while candidate in used_paths:
-            candidate = f"{base_path}-{suffix}"
-            suffix += 1
-        meta["path"] = candidate
-        used_paths.add(candidate)
+        source_sha = sha256_text(content)
+        prev = previous.get(rel)
+        own_path = {prev["path"]} if prev else set()
+        if prev and prev["source_sha256"] == source_sha and prev["path"] not in claimed:
+            # Arquivo inalterado: mesmo path/título/tags, sem chamar o Ollama
+            meta = {k: prev[k] for k in ("path", "title", "description", "tags")}
+            reused += 1
+        else:
+            preview = content[:500]
+            meta = ollama_generate_metadata(rel, preview, used_paths - own_path)
+
+            # Garantir path único (o path anterior do próprio arquivo pode ser reusado)
+            base_path = meta["path"]
+            candidate = base_path
+            suffix = 2
+            while candidate in claimed or (candidate in used_paths and candidate not in own_path):
+                candidate = f"{base_path}-{suffix}"
+                suffix += 1
+            meta["path"] = candidate
+        used_paths.add(meta["path"])
+        claimed.add(meta["path"])
 
         item = {
             "source_file": rel,
@@ -257,6 +321,7 @@ def phase1_build_queue(md_files, dry_run=False):
             "description": meta["description"],
             "tags":        meta["tags"],
             "content":     content,
+            "source_sha256": source_sha,
             "status":      "pending",
             "wiki_url":    None,
         }
@@ -265,11 +330,9 @@ def phase1_build_queue(md_files, dry_run=False):
         status = "DRY" if dry_run else "FILA"
         log.info("[%s %3d/%d] %s → /pt/%s", status, i, len(md_files), rel, meta["path"])
 
+    log.info("Metadados reaproveitados sem Ollama: %d/%d", reused, len(queue))
     if not dry_run:
-        QUEUE_FILE.parent.mkdir(parents=True, exist_ok=True)
-        with open(QUEUE_FILE, "w", encoding="utf-8") as f:
-            for item in queue:
-                f.write(json.dumps(item, ensure_ascii=False) + "\n")
+        write_queue(queue)
         log.info("Fila gravada: %s (%d itens)", QUEUE_FILE, len(queue))
 
     return queue
@@ -304,21 +367,35 @@ mutation($id: Int! $content: String! $description: String! $title: String! $tags
 """
 
 
+_PAGE_IDS = None
+_PAGE_IDS_LOCK = threading.Lock()
+
+
+def existing_page_ids():
+    """{path: id} das páginas do locale, via uma única listagem por execução."""
+    global _PAGE_IDS
+    with _PAGE_IDS_LOCK:
+        if _PAGE_IDS is None:
+            result = wiki_graphql("{ pages { list(orderBy: TITLE) { id path locale } } }")
+            _PAGE_IDS = {
+                p["path"]: p["id"]
+                for p in result["data"]["pages"]["list"]
+                if p.get("locale", WIKI_LOCALE) == WIKI_LOCALE
+            }
+            log.info("Wiki atual: %d páginas no locale %s", len(_PAGE_IDS), WIKI_LOCALE)
+        return _PAGE_IDS
+
+
 def existing_page_id(path):
     try:
-        result = wiki_graphql(
-            '{ pages { search(query: $q) { results { id path } } } }',
-            {"q": path.split("/")[-1]},
-        )
-        for r in result["data"]["pages"]["search"]["results"]:
-            if r["path"] == path:
-                return r["id"]
-    except Exception:
-        pass
-    return None
+        return existing_page_ids().get(path)
+    except Exception as e:
+        log.warning("Listagem de páginas falhou: %s", e)
+        return None
 
 
 def publish_page(item):
+    """Cria ou atualiza a página. Retorna (ok, ação, page_id)."""
     page_id = existing_page_id(item["path"])
     if page_id:
         result = wiki_graphql(UPDATE_MUTATION, {
@@ -340,84 +417,151 @@ def publish_page(item):
         })
         rc = result["data"]["pages"]["create"]
         ok = rc["responseResult"]["succeeded"]
+        page_id = (rc.get("page") or {}).get("id")
         action = "CRIADO"
+        if ok and page_id:
+            with _PAGE_IDS_LOCK:
+                if _PAGE_IDS is not None:
+                    _PAGE_IDS[item["path"]] = page_id
 
-    return ok, action
+    return ok, action, page_id
 
 
-def update_queue_status(idx, status, wiki_url=None):
-    """Reescreve o item na posição idx do JSONL com novo status."""
-    try:
-        lines = QUEUE_FILE.read_text(encoding="utf-8").splitlines()
-        item = json.loads(lines[idx])
-        item["status"] = status
-        if wiki_url:
-            item["wiki_url"] = wiki_url
-        lines[idx] = json.dumps(item, ensure_ascii=False)
-        QUEUE_FILE.write_text("\n".join(lines) + "\n", encoding="utf-8")
-    except Exception:
-        pass
-
-
-def phase2_process_queue(queue_items, dry_run=False):
-    log.info("═══ FASE 2 — Processando fila (%d itens) ═══", len(queue_items))
+class PublishBudget:
+    """Orçamento global de publicações: intervalo mínimo entre inícios.
 
-    published = 0
-    skipped   = 0
-    errors    = 0
-    current_delay = 3.0
+    O intervalo é o maior entre 1/max_rate e o delay do threshold de GPU
+    dividido pelo número de workers (mesma vazão média do modo sequencial
+    quando a GPU está carregada). Com GPU crítica, todos os workers pausam.
+    """
+
+    def __init__(self, max_rate, workers):
+        self.max_rate = max_rate
+        self.workers = max(1, workers)
+        self.gpu_delay = 3.0
+        self.paused_until = 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def interval(self):
+        return max(1.0 / self.max_rate if self.max_rate > 0 else 0.0, self.gpu_delay / self.workers)
+
+    def adjust(self, util):
+        new_delay = delay_for_gpu(util)
+        if new_delay != self.gpu_delay:
+            log.info("⚡ Threshold ajustado: %.1fs → %.1fs  %s", self.gpu_delay, new_delay, gpu_status_line(util))
+            self.gpu_delay = new_delay
+        else:
+            log.info("   %s  delay=%.1fs", gpu_status_line(util), self.gpu_delay)
+        if util >= 90:
+            log.warning("🔴 GPU crítica (%.1f%%) — pausa %ds", util, new_delay)
+            self.paused_until = time.monotonic() + new_delay
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_slot, self.paused_until)
+            self._next_slot = start + self.interval()
+        if start > now:
+            time.sleep(start - now)
+
+
+def phase2_process_queue(queue_items, dry_run=False, workers=PUBLISH_WORKERS,
+                         max_rate=MAX_PUBLISH_RATE, force=False):
+    log.info("═══ FASE 2 — Processando fila (%d itens) ═══", len(queue_items))
 
+    manifest = WikiPageManifest(MANIFEST_FILE)
+    counts = {"published": 0, "unchanged": 0, "skipped": 0, "errors": 0}
+    lock = threading.Lock()
+    dirty = [0]
+
+    def set_status(item, status, wiki_url=None):
+        # Fila e manifesto ficam em memória; gravados em lote (não a cada item)
+        with lock:
+            item["status"] = status
+            if wiki_url:
+                item["wiki_url"] = wiki_url
+            dirty[0] += 1
+            if not dry_run and dirty[0] >= QUEUE_FLUSH_EVERY:
+                write_queue(queue_items)
+                manifest.save()
+                dirty[0] = 0
+
+    todo = []
     for i, item in enumerate(queue_items):
-        if item.get("status") in ("done", "skipped"):
-            skipped += 1
+        digest = content_hash(item)
+        known = manifest.get(WIKI_LOCALE, item["path"]) or {}
+        if not force and known.get("fingerprint") == digest:
+            counts["unchanged"] += 1
+            if item.get("status") != "done":
+                set_status(item, "done", f"https://wiki.rpa4all.com/{WIKI_LOCALE}/{item['path']}")
             continue
+        if not force and item.get("status") == "skipped":
+            counts["skipped"] += 1
+            continue
+        if not force and not known.get("fingerprint") and item.get("status") == "done":
+            # Publicado por uma execução anterior ao manifesto: só registra o hash
+            manifest.record(
+                WIKI_LOCALE, item["path"], page_id=known.get("page_id"), title=item["title"],
+                description=item["description"], fingerprint=digest, persist=False,
+            )
+            counts["unchanged"] += 1
+            continue
+        todo.append((i, item, digest))
+    log.info("Sem mudança (pulados sem round trip): %d | a publicar: %d",
+             counts["unchanged"], len(todo))
 
-        # Monitorar GPU a cada N itens
-        if i % GPU_CHECK_EVERY == 0:
-            util = get_gpu_utilization()
-            new_delay = delay_for_gpu(util)
-            if new_delay != current_delay:
-                log.info("⚡ Threshold ajustado: %.1fs → %.1fs  %s", current_delay, new_delay, gpu_status_line(util))
-                current_delay = new_delay
-            else:
-                log.info("   %s  delay=%.1fs", gpu_status_line(util), current_delay)
-
-            # Back-off severo
-            if util >= 90:
-                log.warning("🔴 GPU crítica (%.1f%%) — pausa %ds", util, current_delay)
-                time.sleep(current_delay)
-                continue
-
-        wiki_url = f"https://wiki.rpa4all.com/pt/{item['path']}"
+    budget = PublishBudget(max_rate, workers)
 
+    def publish_one(n, i, item, digest):
+        wiki_url = f"https://wiki.rpa4all.com/{WIKI_LOCALE}/{item['path']}"
         if dry_run:
             log.info("[DRY %3d] %s → %s", i + 1, item["source_file"], wiki_url)
-            continue
-
+            return
+        # Monitorar GPU a cada N publicações
+        if n % GPU_CHECK_EVERY == 0:
+            budget.adjust(get_gpu_utilization())
+        budget.wait()
         try:
-            ok, action = publish_page(item)
-            if ok:
-                published += 1
-                update_queue_status(i, "done", wiki_url)
-                # Link clicável no terminal via ANSI OSC 8
-                link = f"\033]8;;{wiki_url}\033\\{wiki_url}\033]8;;\033\\"
-                log.info("✅ [%3d/%d] %s  %s  %s",
-                         i + 1, len(queue_items), action, item["title"][:50], link)
-            else:
-                errors += 1
-                update_queue_status(i, "error")
-                log.error("❌ [%3d/%d] FALHA  %s", i + 1, len(queue_items), item["path"])
+            ok, action, page_id = publish_page(item)
         except Exception as e:
-            errors += 1
-            update_queue_status(i, "error")
+            with lock:
+                counts["errors"] += 1
+            set_status(item, "error")
             log.error("❌ [%3d/%d] EXCEÇÃO  %s: %s", i + 1, len(queue_items), item["path"], e)
+            return
+        if not ok:
+            with lock:
+                counts["errors"] += 1
+            set_status(item, "error")
+            log.error("❌ [%3d/%d] FALHA  %s", i + 1, len(queue_items), item["path"])
+            return
+        with lock:
+            counts["published"] += 1
+        manifest.record(
+            WIKI_LOCALE, item["path"], page_id=page_id, title=item["title"],
+            description=item["description"], fingerprint=digest, persist=False,
+        )
+        set_status(item, "done", wiki_url)
+        # Link clicável no terminal via ANSI OSC 8
+        link = f"\033]8;;{wiki_url}\033\\{wiki_url}\033]8;;\033\\"
+        log.info("✅ [%3d/%d] %s  %s  %s",
+                 i + 1, len(queue_items), action, item["title"][:50], link)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [pool.submit(publish_one, n, i, item, digest)
+                   for n, (i, item, digest) in enumerate(todo)]
+        for future in as_completed(futures):
+            future.result()
 
-        time.sleep(current_delay)
+    if not dry_run:
+        write_queue(queue_items)
+        manifest.save()
 
-    log.info("═══ CONCLUÍDO: %d publicados | %d erros | %d ignorados ═══",
-             published, errors, skipped)
+    log.info("═══ CONCLUÍDO: %d publicados | %d sem mudança | %d erros | %d ignorados ═══",
+             counts["published"], counts["unchanged"], counts["errors"], counts["skipped"])
     log.info("Log completo: %s", LOG_FILE)
-    return published, errors
+    return counts["published"], counts["errors"]
 
 
 # ─── Entrypoint ──────────────────────────────────────────────────────────────
@@ -429,6 +573,10 @@ def main():
     parser.add_argument("--dry-run",     action="store_true", help="Simula sem publicar")
     parser.add_argument("--limit",       type=int, default=0,  help="Limitar a N arquivos (0 = todos)")
     parser.add_argument("--workspace",   default=str(WORKSPACE), help="Caminho do workspace")
+    parser.add_argument("--workers",     type=int, default=PUBLISH_WORKERS, help="Publicações simultâneas")
+    parser.add_argument("--max-rate",    type=float, default=MAX_PUBLISH_RATE,
+                        help="Máximo de publicações iniciadas por segundo")
+    parser.add_argument("--force",       action="store_true", help="Republica mesmo sem mudança de conteúdo")
     args = parser.parse_args()
 
     workspace = Path(args.workspace)
@@ -454,12 +602,12 @@ def main():
         if not QUEUE_FILE.exists():
             log.error("Fila não encontrada: %s — execute sem --phase2-only primeiro", QUEUE_FILE)
             sys.exit(1)
-        with open(QUEUE_FILE, encoding="utf-8") as f:
-            queue = [json.loads(line) for line in f if line.strip()]
+        queue = load_queue()
         log.info("Fila carregada: %d itens", len(queue))
 
     if not args.phase1_only:
-        phase2_process_queue(queue, dry_run=args.dry_run)
+        phase2_process_queue(queue, dry_run=args.dry_run, workers=args.workers,
+                             max_rate=args.max_rate, force=args.force)
 
 
 if __name__ == "__main__":